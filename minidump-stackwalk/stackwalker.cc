@@ -65,6 +65,7 @@
 
 #include "common.h"
 #include "http_symbol_supplier.h"
+#include "jit-categorize.h"
 #include "json/json.h"
 
 using google_breakpad::BasicSourceLineResolver;
@@ -1171,6 +1172,7 @@ void usage() {
   fprintf(stderr, "\t--pretty\tPretty-print JSON output.\n");
   fprintf(stderr, "\t--pipe-dump\tProduce pipe-delimited output in addition to JSON output\n");
   fprintf(stderr, "\t--raw-json\tAn input file with the raw annotations as JSON\n");
+  fprintf(stderr, "\t--jit-category\tCategorize crashes that may have happened in JIT code\n");
   http_commandline_usage();
   fprintf(stderr, "\t--help\tDisplay this help text.\n");
 }
@@ -1180,6 +1182,7 @@ int main(int argc, char** argv)
 {
   bool pretty = false;
   bool pipe = false;
+  bool jit_category = false;
   char* json_path = nullptr;
   // Yeah, this is ugly.
   vector<char*> symbols_urls;
@@ -1189,6 +1192,7 @@ int main(int argc, char** argv)
     {"pretty", no_argument, nullptr, 'p'},
     {"pipe-dump", no_argument, nullptr, 'i'},
     {"raw-json", required_argument, nullptr, 'r'},
+    {"jit-category", no_argument, nullptr, 'j'},
     HTTP_COMMANDLINE_OPTIONS
     {"help", no_argument, nullptr, 'h'},
     {nullptr, 0, nullptr, 0}
@@ -1211,6 +1215,9 @@ int main(int argc, char** argv)
     case 'r':
       json_path = optarg;
       break;
+    case 'j':
+      jit_category = true;
+      break;
     HANDLE_HTTP_COMMANDLINE_OPTIONS
     case 'h':
       usage();
@@ -1291,6 +1298,14 @@ int main(int argc, char** argv)
   }
   ConvertMemoryInfoToJSON(minidump, raw_root, root);
 
+  if (jit_category) {
+    // Same output as the jit-crash-categorize tool, which exits with 1 when
+    // the minidump can't be categorized.
+    const char* category = CategorizeJitCrash(minidump);
+    root["jit_category"] = category ? category : "ERROR";
+    root["jit_category_return_code"] = category ? 0 : 1;
+  }
+
   // Get the PID.
   MinidumpMiscInfo* misc_info = minidump.GetMiscInfo();
   if (misc_info && misc_info->misc_info() &&
@@ -212,9 +212,9 @@ class FetchTransformSaveApp(App):
         can detect and reject them here"""
         return False
 
-    def transform(self, crash_id, finished_func=(lambda: None)):
+    def transform(self, crash_id, finished_func=(lambda: None), **kwargs):
         try:
-            self._transform(crash_id)
+            self._transform(crash_id, **kwargs)
         finally:
             # no matter what causes this method to end, we need to make sure
             # that the finished_func gets called. If the new crash source is
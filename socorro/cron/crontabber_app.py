@@ -1091,6 +1091,7 @@ DEFAULT_JOBS = ','.join([
     # Crash data analysis
     'socorro.cron.jobs.bugzilla.BugzillaCronApp|1h',
     'socorro.cron.jobs.update_signatures.UpdateSignaturesCronApp|1h',
+    'socorro.cron.jobs.topcrashers_rollup.TopCrashersRollupCronApp|1h',
 
     # Dependency checking
     'socorro.cron.jobs.monitoring.DependencySecurityCheckCronApp|1d',
@@ -26,6 +26,15 @@ This traverses the entire tree every time. If there are missing builds, it will
 pick them up the next time it runs. There's no maintained state for this job
 and it always backfills.
 
+Directory listings and build information files are downloaded concurrently
+using a pool of ``number_of_threads`` threads with at most
+``max_requests_per_host`` requests in flight to any one host at a time.
+
+If ``conditional_cache_path`` is set, ETag and Last-Modified response headers
+are kept in that file between runs along with the page contents. Subsequent
+runs send conditional requests and reuse the cached contents when the server
+responds with a 304, so unchanged pages aren't downloaded again.
+
 This job only looks for build information for the en-US locale for the first
 platform in a build directory that has build information. Once it's found some
 build information, it moves on to the next version.
@@ -60,11 +69,14 @@ issues.
 
 """
 
+from concurrent.futures import ThreadPoolExecutor
 import json
+import os
+import threading
 
 from configman import Namespace, class_converter
 import psycopg2
-from six.moves.urllib.parse import urljoin
+from six.moves.urllib.parse import urljoin, urlparse
 
 from socorro.cron.base import BaseCronApp
 from socorro.lib.requestslib import session_with_retries
@@ -93,6 +105,93 @@ NON_PLATFORM_SUBSTRINGS = [
 ]
 
 
+class ConditionalRequestCache:
+    """Cache of validators and contents for conditional requests
+
+    This keeps the ETag and Last-Modified response headers along with the
+    content for urls so that later requests can be made conditional. It can
+    be persisted to a JSON file so the cache survives between runs.
+
+    Only urls that were looked at since the cache was loaded are saved which
+    keeps the file from growing without bound.
+
+    """
+    def __init__(self, path=''):
+        self.path = path
+        # Map of url -> {'etag': str, 'last_modified': str, 'content': bytes}
+        self._data = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Loads cache data from the file if there is one"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as fp:
+                data = json.load(fp)
+        except ValueError:
+            # If the file is corrupt, start over
+            return
+
+        with self._lock:
+            for url, entry in data.items():
+                # Contents are stored as latin-1 because that round-trips bytes
+                entry['content'] = entry['content'].encode('latin-1')
+                self._data[url] = entry
+
+    def save(self):
+        """Saves cache data for urls seen since loading to the file"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {}
+            for url in self._seen:
+                if url not in self._data:
+                    continue
+                entry = dict(self._data[url])
+                entry['content'] = entry['content'].decode('latin-1')
+                data[url] = entry
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(data, fp)
+        os.rename(tmp_path, self.path)
+
+    def get_request_headers(self, url):
+        """Returns conditional request headers for a url"""
+        with self._lock:
+            self._seen.add(url)
+            entry = self._data.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_content(self, url):
+        """Returns cached content for a url or None"""
+        with self._lock:
+            entry = self._data.get(url)
+        return entry['content'] if entry else None
+
+    def update(self, url, resp):
+        """Updates the cache for a url from a 200 response"""
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        with self._lock:
+            if etag or last_modified:
+                self._data[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'content': resp.content
+                }
+            else:
+                self._data.pop(url, None)
+
+
 def key_for_build_link(link):
     # The path is something like "build10/". We want to pull out the
     # integer from that.
@@ -116,6 +215,24 @@ class ArchiveScraperCronApp(BaseCronApp):
         default=False,
         doc='print verbose information about spidering'
     )
+    required_config.add_option(
+        'number_of_threads',
+        default=8,
+        doc='number of threads to use for downloading pages'
+    )
+    required_config.add_option(
+        'max_requests_per_host',
+        default=4,
+        doc='maximum number of requests in flight to a single host'
+    )
+    required_config.add_option(
+        'conditional_cache_path',
+        default='',
+        doc=(
+            'path to file for persisting ETag/Last-Modified data between runs; '
+            'empty string disables persisting'
+        )
+    )
     required_config.add_option(
         'database_class',
         default='socorro.external.postgresql.connection_context.ConnectionContext',
@@ -132,6 +249,24 @@ class ArchiveScraperCronApp(BaseCronApp):
         self.session = session_with_retries(default_timeout=5.0)
         self.successful_inserts = 0
 
+        self.executor = ThreadPoolExecutor(max_workers=self.config.number_of_threads)
+        self.conditional_cache = ConditionalRequestCache(self.config.conditional_cache_path)
+        self.conditional_cache.load()
+
+        # Map of host -> semaphore limiting concurrent requests to that host
+        self._host_semaphores = {}
+        self._host_semaphores_lock = threading.Lock()
+
+    def get_host_semaphore(self, url):
+        """Returns the semaphore limiting concurrent requests for the url's host"""
+        host = urlparse(url).netloc
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.config.max_requests_per_host
+                )
+            return self._host_semaphores[host]
+
     def get_max_major_version(self, product_name):
         """Retrieves the max major version for this product
 
@@ -225,15 +360,44 @@ class ArchiveScraperCronApp(BaseCronApp):
         url = urljoin(self.config.base_url, url_path)
         if self.config.verbose:
             self.logger.info('downloading: %s', url)
-        resp = self.session.get(url)
+        headers = self.conditional_cache.get_request_headers(url)
+        with self.get_host_semaphore(url):
+            resp = self.session.get(url, headers=headers)
+
+        if resp.status_code == 304:
+            content = self.conditional_cache.get_content(url)
+            if content is not None:
+                if self.config.verbose:
+                    self.logger.info('not modified: %s', url)
+                return content
+
+            # We sent a conditional request, but no longer have the content, so
+            # try again without the conditional headers
+            with self.get_host_semaphore(url):
+                resp = self.session.get(url)
+
         if resp.status_code != 200:
             if self.config.verbose:
                 # Most of these are 404s because we guessed a url wrong which is fine
                 self.logger.warning('Bad status: %s: %s', url, resp.status_code)
             return ''
 
+        self.conditional_cache.update(url, resp)
         return resp.content
 
+    def download_many(self, url_paths):
+        """Retrieves contents for pages concurrently
+
+        :arg list url_paths: the paths to retrieve
+
+        :returns: list of contents in the same order as ``url_paths``
+
+        """
+        url_paths = list(url_paths)
+        if len(url_paths) <= 1:
+            return [self.download(url_path) for url_path in url_paths]
+        return list(self.executor.map(self.download, url_paths))
+
     def get_json_links(self, path):
         """Traverses a directory of platforms and returns links to build info files
 
@@ -242,42 +406,71 @@ class ArchiveScraperCronApp(BaseCronApp):
         :returns: list of urls
 
         """
-        build_contents = self.download(path)
-        directory_links = [
-            link['path'] for link in self.get_links(build_contents)
-            if link['text'].endswith('/')
-        ]
+        return self.get_json_links_many([path])[0]
 
-        all_json_links = []
-        for directory_link in directory_links:
-            # Skip known unhelpful directories
-            if any([(bad_dir in directory_link) for bad_dir in NON_PLATFORM_SUBSTRINGS]):
-                continue
-
-            # We don't need to track all locales, so we only look at en-US and get
-            # the information from the first platform that we check that has it
-            locale_contents = self.download(directory_link + 'en-US/')
-            if not locale_contents:
-                continue
-
-            json_links = [
-                link['path'] for link in self.get_links(locale_contents)
-                if (link['path'].endswith('.json') and
-                    'mozinfo' not in link['path'] and
-                    'test_packages' not in link['path'])
-            ]
+    def get_json_links_many(self, paths):
+        """Traverses directories of platforms and returns links to build info files
 
-            # If there's a buildhub.json link, return that
-            buildhub_links = [
-                link for link in json_links if link.endswith('buildhub.json')
+        This downloads all the build directories and then all the platform
+        directories concurrently.
+
+        :arg list paths: the paths to start at
+
+        :returns: list of lists of urls--one for each item in ``paths``
+
+        """
+        build_contents_list = self.download_many(paths)
+
+        # List of lists of directory links we want to look at for each path
+        directory_links_list = []
+        for build_contents in build_contents_list:
+            directory_links = [
+                link['path'] for link in self.get_links(build_contents)
+                if link['text'].endswith('/')
             ]
-            if buildhub_links:
-                all_json_links.append(buildhub_links[0])
-            elif json_links:
-                # If there isn't a buildhub link, return the first json file we found
-                all_json_links.append(json_links[0])
+            # Skip known unhelpful directories
+            directory_links_list.append([
+                directory_link for directory_link in directory_links
+                if not any([(bad_dir in directory_link) for bad_dir in NON_PLATFORM_SUBSTRINGS])
+            ])
+
+        # We don't need to track all locales, so we only look at en-US and get
+        # the information from the first platform that we check that has it
+        locale_paths = [
+            directory_link + 'en-US/'
+            for directory_links in directory_links_list
+            for directory_link in directory_links
+        ]
+        locale_contents_map = dict(zip(locale_paths, self.download_many(locale_paths)))
+
+        all_json_links_list = []
+        for directory_links in directory_links_list:
+            all_json_links = []
+            for directory_link in directory_links:
+                locale_contents = locale_contents_map[directory_link + 'en-US/']
+                if not locale_contents:
+                    continue
+
+                json_links = [
+                    link['path'] for link in self.get_links(locale_contents)
+                    if (link['path'].endswith('.json') and
+                        'mozinfo' not in link['path'] and
+                        'test_packages' not in link['path'])
+                ]
+
+                # If there's a buildhub.json link, return that
+                buildhub_links = [
+                    link for link in json_links if link.endswith('buildhub.json')
+                ]
+                if buildhub_links:
+                    all_json_links.append(buildhub_links[0])
+                elif json_links:
+                    # If there isn't a buildhub link, return the first json file we found
+                    all_json_links.append(json_links[0])
 
-        return all_json_links
+            all_json_links_list.append(all_json_links)
+
+        return all_json_links_list
 
     def scrape_candidates(self, product_name, archive_directory):
         """Scrape the candidates/ directory for beta, release candidate, and final releases"""
@@ -288,7 +481,7 @@ class ArchiveScraperCronApp(BaseCronApp):
         # First, let's look at /pub/PRODUCT/releases/ so we know what final
         # builds have been released
         release_path = '/pub/%s/releases/' % archive_directory
-        release_path_content = self.download(release_path)
+        release_path_content, content = self.download_many([release_path, url_path])
 
         # Get the final release version numbers, so something like "64.0b8/" -> "64.0b8"
         final_releases = [
@@ -296,7 +489,6 @@ class ArchiveScraperCronApp(BaseCronApp):
             if link['text'][0].isdigit()
         ]
 
-        content = self.download(url_path)
         version_links = [
             link for link in self.get_links(content)
             if link['text'][0].isdigit()
@@ -317,9 +509,12 @@ class ArchiveScraperCronApp(BaseCronApp):
             ]
 
         # For each version in the candidates/ directory, we traverse the tree finding
-        # the first build info file we can find
-        for link in version_links:
-            content = self.download(link['path'])
+        # the first build info file we can find; we do this a level at a time so
+        # that all the pages at a level can be downloaded concurrently
+        version_contents = self.download_many([link['path'] for link in version_links])
+
+        version_build_links = []
+        for link, content in zip(version_links, version_contents):
             build_links = [
                 link for link in self.get_links(content)
                 if link['text'].startswith('build')
@@ -338,10 +533,27 @@ class ArchiveScraperCronApp(BaseCronApp):
             # the last one is possibly a final build
             build_links.sort(key=key_for_build_link)
 
+            version_build_links.append((version_root, is_final_release, build_links))
+
+        # Get all the json files with build information in them for all the
+        # platforms that have them for all the builds
+        build_paths = [
+            build_link['path']
+            for _, _, build_links in version_build_links
+            for build_link in build_links
+        ]
+        build_json_links = dict(zip(build_paths, self.get_json_links_many(build_paths)))
+
+        all_json_links = [
+            json_link
+            for json_links in build_json_links.values()
+            for json_link in json_links
+        ]
+        json_files = dict(zip(all_json_links, self.download_many(all_json_links)))
+
+        for version_root, is_final_release, build_links in version_build_links:
             for i, build_link in enumerate(build_links):
-                # Get all the json files with build information in them for all the
-                # platforms that ahve them
-                json_links = self.get_json_links(build_link['path'])
+                json_links = build_json_links[build_link['path']]
                 if not json_links:
                     self.logger.warning(
                         'could not find json files in: %s', build_link['path']
@@ -351,8 +563,7 @@ class ArchiveScraperCronApp(BaseCronApp):
                 # Go through all the links we acquired by traversing all the platform
                 # directories
                 for json_link in json_links:
-                    json_file = self.download(json_link)
-                    data = json.loads(json_file)
+                    data = json.loads(json_files[json_link])
 
                     if 'buildhub' in json_link:
                         # We have a buildhub.json file to use, so we use that
@@ -432,21 +643,27 @@ class ArchiveScraperCronApp(BaseCronApp):
                             self.insert_build(**data)
 
     def run(self):
-        # Capture Firefox beta and release builds
-        self.scrape_candidates(
-            product_name='Firefox',
-            archive_directory='firefox'
-        )
-        # Pick up DevEdition beta builds for which b1 and b2 are "Firefox builds"
-        self.scrape_candidates(
-            product_name='DevEdition',
-            archive_directory='devedition'
-        )
+        try:
+            # Capture Firefox beta and release builds
+            self.scrape_candidates(
+                product_name='Firefox',
+                archive_directory='firefox'
+            )
+            # Pick up DevEdition beta builds for which b1 and b2 are "Firefox builds"
+            self.scrape_candidates(
+                product_name='DevEdition',
+                archive_directory='devedition'
+            )
 
-        # Capture Fennec beta and release builds
-        self.scrape_candidates(
-            product_name='Fennec',
-            archive_directory='mobile'
-        )
+            # Capture Fennec beta and release builds
+            self.scrape_candidates(
+                product_name='Fennec',
+                archive_directory='mobile'
+            )
+        finally:
+            # Keep the validators of the pages fetched so far even if the
+            # scrape failed, and don't leave the threads behind.
+            self.executor.shutdown()
+            self.conditional_cache.save()
 
         self.logger.info('Inserted %s builds.', self.successful_inserts)
@@ -0,0 +1,275 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import datetime
+import json
+
+from configman import Namespace, class_converter
+from configman.converters import str_to_list
+from psycopg2.extras import execute_values
+
+from socorro.cron.base import BaseCronApp
+from socorro.cron.mixins import as_backfill_cron_app
+from socorro.external.es.supersearch import SuperSearch
+from socorro.external.es.super_search_fields import SuperSearchFieldsData
+from socorro.lib.search_common import SearchFilter
+from socorro.lib.transaction import transaction_context
+
+
+# Sub-aggregations needed to build a top crashers list, see
+# crashstats.crashstats.utils.SignatureStats.
+SIGNATURE_AGGS = [
+    'platform',
+    'is_garbage_collecting',
+    'hang_type',
+    'process_type',
+    'startup_crash',
+    '_histogram.uptime',
+    '_cardinality.install_time',
+]
+
+# Crash reports with an uptime under that many seconds happened during startup.
+STARTUP_WINDOW_SECONDS = 60
+
+
+class RollupSuperSearch(SuperSearch):
+    """SuperSearch that can aggregate signatures per product and version."""
+    meta_filters = SuperSearch.meta_filters + (
+        SearchFilter('_aggs.product.version.signature'),
+    )
+
+
+def summarize_signature(bucket):
+    """Turn a signature bucket from Super Search into a rollup row."""
+    facets = bucket.get('facets', {})
+    return {
+        'signature': bucket['term'],
+        'count': bucket['count'],
+        'platform_counts': {
+            row['term']: row['count'] for row in facets.get('platform', [])
+        },
+        'gc_count': sum(
+            row['count'] for row in facets.get('is_garbage_collecting', [])
+            if str(row['term']).lower() == 't'
+        ),
+        'hang_count': sum(
+            row['count'] for row in facets.get('hang_type', [])
+            if row['term'] in (1, -1)
+        ),
+        'plugin_count': sum(
+            row['count'] for row in facets.get('process_type', [])
+            if str(row['term']).lower() == 'plugin'
+        ),
+        'startup_count': sum(
+            row['count'] for row in facets.get('startup_crash', [])
+            if row['term'] in ('T', '1')
+        ),
+        'startup_window_count': sum(
+            row['count'] for row in facets.get('histogram_uptime', [])
+            if row['term'] < STARTUP_WINDOW_SECONDS
+        ),
+        'install_count': facets.get('cardinality_install_time', {}).get('value', 0),
+    }
+
+
+@as_backfill_cron_app
+class TopCrashersRollupCronApp(BaseCronApp):
+    """Stores hourly per-signature crash counts for the top crashers page
+
+    For every hour, this aggregates crash reports in Elasticsearch per
+    product, version, process type and signature, and stores the counts the
+    top crashers page needs in the ``topcrashers_signaturerollup`` table. The
+    total number of crash reports per product, version and process type goes
+    in the ``topcrashers_totalrollup`` table, with a count of 0 and no version
+    for process types without crash reports in that hour.
+
+    The top crashers page can then compute rankings over several days by
+    summing rollups instead of aggregating all the crash reports again.
+
+    Crash reports are indexed some time after they are processed, and
+    reprocessing can change their signature, so every run also rolls up the
+    ``rollup_hours`` hours before the last one again.
+
+    """
+    app_name = 'topcrashers-rollup'
+    app_description = 'Aggregates hourly top crashers data'
+    app_version = '0.1'
+
+    required_config = Namespace()
+    required_config.add_option(
+        'process_types',
+        default='any,browser,content,plugin,gpu',
+        from_string_converter=str_to_list,
+        doc=(
+            'Process types to aggregate crash reports for, "any" aggregates '
+            'all crash reports regardless of their process type'
+        )
+    )
+    required_config.add_option(
+        'facets_size',
+        default=10000,
+        doc='Maximum number of products, versions and signatures per hour'
+    )
+    required_config.add_option(
+        'rollup_hours',
+        default=6,
+        doc=(
+            'Number of full hours to roll up on every run, the last one and '
+            'the ones before it again to count late crash reports'
+        )
+    )
+    required_config.add_option(
+        'keep_days',
+        default=60,
+        doc='Number of days of rollups to keep'
+    )
+    required_config.add_option(
+        'database_class',
+        default='socorro.external.postgresql.connection_context.ConnectionContext',
+        from_string_converter=class_converter,
+        reference_value_from='resource.postgresql'
+    )
+    required_config.add_option(
+        'elasticsearch_class',
+        default='socorro.external.es.connection_context.ConnectionContext',
+        from_string_converter=class_converter,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.database = self.config.database_class(self.config)
+        self.es_context = self.config.elasticsearch_class(self.config)
+
+    def fetch_rollups(self, api, all_fields, start_datetime, end_datetime, process_type):
+        """Return (signature rows, total rows) for a process type and hour."""
+        params = {
+            'date': [
+                '>={}'.format(start_datetime.isoformat()),
+                '<{}'.format(end_datetime.isoformat()),
+            ],
+            '_aggs.product.version.signature': SIGNATURE_AGGS,
+            '_histogram_interval.uptime': STARTUP_WINDOW_SECONDS,
+            # Keep the regular facets small, only aggregations are needed.
+            '_facets': ['platform'],
+            '_facets_size': self.config.facets_size,
+            '_results_number': 0,
+            '_fields': all_fields,
+        }
+        if process_type != 'any':
+            params['process_type'] = process_type
+
+        results = api.get(**params)
+
+        signature_rows = []
+        total_rows = []
+        for product in results['facets'].get('product', []):
+            for version in product.get('facets', {}).get('version', []):
+                key = {
+                    'hour': start_datetime,
+                    'product': product['term'],
+                    'version': version['term'],
+                    'process_type': process_type,
+                }
+                total_rows.append(dict(key, count=version['count']))
+                for signature in version.get('facets', {}).get('signature', []):
+                    signature_rows.append(dict(key, **summarize_signature(signature)))
+        return signature_rows, total_rows
+
+    def save_rollups(self, start_datetime, signature_rows, total_rows):
+        with transaction_context(self.database) as connection:
+            cursor = connection.cursor()
+
+            # Replace everything for that hour so the job can be run again.
+            cursor.execute(
+                'DELETE FROM topcrashers_signaturerollup WHERE hour = %s',
+                (start_datetime,)
+            )
+            cursor.execute(
+                'DELETE FROM topcrashers_totalrollup WHERE hour = %s',
+                (start_datetime,)
+            )
+
+            execute_values(
+                cursor,
+                """
+                INSERT INTO topcrashers_signaturerollup (
+                    hour, product, version, process_type, signature, count,
+                    platform_counts, gc_count, hang_count, plugin_count,
+                    startup_count, startup_window_count, install_count
+                )
+                VALUES %s
+                """,
+                [
+                    (
+                        row['hour'], row['product'], row['version'], row['process_type'],
+                        row['signature'], row['count'], json.dumps(row['platform_counts']),
+                        row['gc_count'], row['hang_count'], row['plugin_count'],
+                        row['startup_count'], row['startup_window_count'], row['install_count'],
+                    )
+                    for row in signature_rows
+                ]
+            )
+            execute_values(
+                cursor,
+                """
+                INSERT INTO topcrashers_totalrollup (
+                    hour, product, version, process_type, count
+                )
+                VALUES %s
+                """,
+                [
+                    (row['hour'], row['product'], row['version'], row['process_type'], row['count'])
+                    for row in total_rows
+                ]
+            )
+
+            # Drop rollups nobody will look at anymore.
+            expired = start_datetime - datetime.timedelta(days=self.config.keep_days)
+            cursor.execute('DELETE FROM topcrashers_signaturerollup WHERE hour < %s', (expired,))
+            cursor.execute('DELETE FROM topcrashers_totalrollup WHERE hour < %s', (expired,))
+
+    def run(self, end_datetime):
+        # Aggregate the last full hours, oldest first
+        end_datetime = end_datetime.replace(minute=0, second=0, microsecond=0)
+
+        all_fields = SuperSearchFieldsData().get()
+        api = RollupSuperSearch(self.config)
+
+        for hours_ago in reversed(range(max(self.config.rollup_hours, 1))):
+            hour_end = end_datetime - datetime.timedelta(hours=hours_ago)
+            self.rollup_hour(api, all_fields, hour_end - datetime.timedelta(hours=1), hour_end)
+
+    def rollup_hour(self, api, all_fields, start_datetime, end_datetime):
+        self.logger.info('Rolling up %s to %s', start_datetime, end_datetime)
+
+        signature_rows = []
+        total_rows = []
+        for process_type in self.config.process_types:
+            rows, totals = self.fetch_rollups(
+                api, all_fields, start_datetime, end_datetime, process_type
+            )
+            signature_rows.extend(rows)
+            total_rows.extend(totals)
+
+        # The top crashers page checks that every hour was rolled up for a
+        # product and process type, so record the ones without crash reports
+        # with a count of 0 and no version.
+        rolled_up = {(row['product'], row['process_type']) for row in total_rows}
+        for product in sorted({row['product'] for row in total_rows}):
+            for process_type in self.config.process_types:
+                if (product, process_type) not in rolled_up:
+                    total_rows.append({
+                        'hour': start_datetime,
+                        'product': product,
+                        'version': '',
+                        'process_type': process_type,
+                        'count': 0,
+                    })
+
+        # Save even without rows so rollups from a previous run get replaced.
+        self.save_rollups(start_datetime, signature_rows, total_rows)
+        self.logger.info(
+            'Saved %d signature rollups and %d total rollups.',
+            len(signature_rows), len(total_rows)
+        )
@@ -19,10 +19,6 @@ from socorro.lib.dbutil import (
 from socorro.lib.transaction import transaction_context
 
 
-# Maximum number of results returned for a super search query
-MAX_PAGE = 1000
-
-
 @as_backfill_cron_app
 class UpdateSignaturesCronApp(BaseCronApp):
     """Updates the signatures table using crash data from Elasticsearch"""
@@ -110,53 +106,29 @@ class UpdateSignaturesCronApp(BaseCronApp):
                 '<{}'.format(end_datetime.isoformat()),
             ],
             '_columns': ['signature', 'build_id', 'date'],
-            '_facets_size': 0,
             '_fields': all_fields,
-
-            # Set up first page
-            '_results_offset': 0,
-            '_results_number': MAX_PAGE,
         }
 
         results = {}
-        crashids_count = 0
-
-        while True:
-            resp = api.get(**params)
-            hits = resp['hits']
-            for hit in hits:
-                crashids_count += 1
-
-                if not hit['build_id']:
-                    # Not all crashes have a build id, so skip the ones that don't.
-                    continue
-
-                if hit['signature'] in results:
-                    data = results[hit['signature']]
-                    data['build_id'] = min(data['build_id'], hit['build_id'])
-                    data['date'] = min(data['date'], hit['date'])
-                else:
-                    data = {
-                        'signature': hit['signature'],
-                        'build_id': hit['build_id'],
-                        'date': hit['date']
-                    }
-                results[hit['signature']] = data
-
-            # If there are no more crash ids to get, we return
-            total = resp['total']
-            if not hits or crashids_count >= total:
-                break
-
-            # Get the next page, but only as many results as we need
-            params['_results_offset'] += MAX_PAGE
-            params['_results_number'] = min(
-                # MAX_PAGE is the maximum we can request
-                MAX_PAGE,
-
-                # The number of results Super Search can return to us that is hasn't returned so far
-                total - crashids_count
-            )
+
+        # Walk through all the hits with the scroll API rather than paging
+        # with increasingly expensive offsets
+        for hit in api.iter_hits(**params):
+            if not hit['build_id']:
+                # Not all crashes have a build id, so skip the ones that don't.
+                continue
+
+            if hit['signature'] in results:
+                data = results[hit['signature']]
+                data['build_id'] = min(data['build_id'], hit['build_id'])
+                data['date'] = min(data['date'], hit['date'])
+            else:
+                data = {
+                    'signature': hit['signature'],
+                    'build_id': hit['build_id'],
+                    'date': hit['date']
+                }
+            results[hit['signature']] = data
 
         signature_data = results.values()
 
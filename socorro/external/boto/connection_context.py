@@ -203,6 +203,34 @@ class ConnectionContextBase(RequiredConfig):
 
     def fetch(self, id, name_of_thing):
         """Retrieve something from boto"""
+        key_object = self._get_key_object(id, name_of_thing)
+        # NOTE(willkg): this says "as string", but in Python 3 this
+        # will be bytes.
+        return key_object.get_contents_as_string()
+
+    def fetch_stream(self, id, name_of_thing, chunk_size=1024 * 1024):
+        """Retrieve something from boto as an iterator of bytes chunks
+
+        The object is looked up right away, so a missing object raises
+        KeyNotFound here, but its contents are only downloaded as the
+        iterator is consumed.
+
+        """
+        key_object = self._get_key_object(id, name_of_thing)
+        return self._iter_key_object(key_object, chunk_size)
+
+    @staticmethod
+    def _iter_key_object(key_object, chunk_size):
+        try:
+            while True:
+                chunk = key_object.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            key_object.close()
+
+    def _get_key_object(self, id, name_of_thing):
         conn = self._connect()
         bucket = self._get_bucket(conn, self.config.bucket_name)
 
@@ -210,9 +238,7 @@ class ConnectionContextBase(RequiredConfig):
         for key in all_keys:
             key_object = bucket.get_key(key)
             if key_object is not None:
-                # NOTE(willkg): this says "as string", but in Python 3 this
-                # will be bytes.
-                return key_object.get_contents_as_string()
+                return key_object
 
         # None of the keys worked, so raise an error
         raise KeyNotFound(
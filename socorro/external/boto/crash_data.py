@@ -32,8 +32,7 @@ class SimplifiedCrashData(BotoS3CrashStorage):
         self.config.json_object_hook = dict
         self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
 
-    def get(self, **kwargs):
-        """Return JSON data of a crash report, given its uuid. """
+    def _get_params(self, kwargs):
         filters = [
             ('uuid', None, str),
             ('datatype', None, str),
@@ -49,6 +48,11 @@ class SimplifiedCrashData(BotoS3CrashStorage):
 
         if not params.datatype:
             raise MissingArgumentError('datatype')
+        return params
+
+    def get(self, **kwargs):
+        """Return JSON data of a crash report, given its uuid. """
+        params = self._get_params(kwargs)
 
         datatype_method_mapping = {
             'raw': 'get_raw_dump',
@@ -72,6 +76,18 @@ class SimplifiedCrashData(BotoS3CrashStorage):
             # Re-wrap it here so the message is just the crash ID.
             raise CrashIDNotFound(params.uuid)
 
+    def get_stream(self, **kwargs):
+        """Return a raw dump of a crash report as an iterator of bytes chunks,
+        given its uuid. Only the 'raw' datatype can be streamed."""
+        params = self._get_params(kwargs)
+        if params.datatype != 'raw':
+            raise BadArgumentError(params.datatype)
+        try:
+            return self.get_raw_dump_stream(params.uuid, name=params.name)
+        except CrashIDNotFound as cidnf:
+            self.logger.error('%s not found: %s' % (params.datatype, cidnf))
+            raise CrashIDNotFound(params.uuid)
+
 
 class TelemetryCrashData(TelemetryBotoS3CrashStorage):
     """Fetches data from TelemetryBotoS3CrashStorage"""
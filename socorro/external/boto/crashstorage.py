@@ -136,6 +136,26 @@ class BotoCrashStorage(CrashStorageBase):
             name=name
         )
 
+    @staticmethod
+    def do_get_raw_dump_stream(boto_connection, crash_id, name=None):
+        try:
+            if name in (None, '', 'upload_file_minidump'):
+                name = 'dump'
+            return boto_connection.fetch_stream(crash_id, name)
+        except boto_connection.ResponseError as x:
+            raise CrashIDNotFound('%s not found: %s' % (crash_id, x))
+
+    def get_raw_dump_stream(self, crash_id, name=None):
+        """Returns an iterator of bytes chunks of a raw dump, which are only
+        downloaded as it is consumed"""
+        return retry(
+            self.connection_source,
+            self.quit_check,
+            self.do_get_raw_dump_stream,
+            crash_id=crash_id,
+            name=name
+        )
+
     @staticmethod
     def do_get_raw_dumps(boto_connection, crash_id):
         try:
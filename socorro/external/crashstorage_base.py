@@ -12,6 +12,7 @@ import copy
 import logging
 import os
 import sys
+import time
 
 from configman import Namespace, RequiredConfig
 from configman.converters import class_converter, str_to_list
@@ -554,11 +555,19 @@ class PolyCrashStorage(CrashStorageBase):
         if storage_exception.has_exceptions():
             raise storage_exception
 
-    def save_raw_and_processed(self, raw_crash, dump, processed_crash, crash_id):
+    def save_raw_and_processed(self, raw_crash, dump, processed_crash, crash_id,
+                               profile=None):
+        """Save the raw and processed crash in all subordinate crash stores
+
+        If ``profile`` is a ``socorro.processor.profiling.CrashProfile``, the
+        time spent in each crash store is recorded in it by namespace.
+
+        """
         storage_exception = PolyStorageError()
 
-        for a_store in self.stores.values():
+        for storage_namespace, a_store in self.stores.items():
             self.quit_check()
+            start_time = time.time()
             try:
                 actual_store = getattr(a_store, 'wrapped_object', a_store)
 
@@ -574,6 +583,8 @@ class PolyCrashStorage(CrashStorageBase):
                 store_class = getattr(a_store, 'wrapped_object', a_store.__class__)
                 self.logger.error('%r failed (crash id: %s)', store_class, crash_id, exc_info=True)
                 storage_exception.gather_current_exception()
+            if profile is not None:
+                profile.record('destinations', storage_namespace, time.time() - start_time)
         if storage_exception.has_exceptions():
             raise storage_exception
 
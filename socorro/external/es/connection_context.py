@@ -71,6 +71,16 @@ class ConnectionContext(RequiredConfig):
         doc='the default doctype to use in elasticsearch',
         reference_value_from='resource.elasticsearch',
     )
+    required_config.add_option(
+        'elasticsearch_index_catalog_interval',
+        default=300,
+        doc=(
+            'the time in seconds before the list of existing indices and '
+            'their dates is fetched again, 0 to search all the indices '
+            'covering the dates of a query'
+        ),
+        reference_value_from='resource.elasticsearch',
+    )
     required_config.add_option(
         'elasticsearch_shards_per_index',
         default=10,
@@ -109,6 +119,10 @@ class ConnectionContext(RequiredConfig):
         """Return doctype."""
         return self.config.elasticsearch_doctype
 
+    def get_index_catalog_interval(self):
+        """Return the refresh interval of the catalog of indices."""
+        return self.config.elasticsearch_index_catalog_interval
+
     def get_timeout_extended(self):
         """Return timeout_extended."""
         return self.config.elasticsearch_timeout_extended
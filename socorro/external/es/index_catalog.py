@@ -0,0 +1,171 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import datetime
+import logging
+import re
+import threading
+import time
+
+from elasticsearch.exceptions import ElasticsearchException, NotFoundError
+from elasticsearch_dsl import MultiSearch, Search
+
+from socorro.external.es.base import generate_list_of_indexes
+from socorro.lib.datetimeutil import UTC, utc_now
+
+
+logger = logging.getLogger(__name__)
+
+
+# Field holding the date used to split crash reports into indices.
+DATE_FIELD = 'processed_crash.date_processed'
+
+# Crash reports are indexed some time after being processed, so indices can
+# get crash reports older than the last refresh of the catalog.
+INDEXING_DELAY = datetime.timedelta(hours=1)
+
+# Directives of strftime formats, turned into wildcards to find all the
+# indices of a template.
+DIRECTIVE_REGEX = re.compile('(%.)+')
+
+
+class IndexCatalog(object):
+    """Cache of the crash report indices that exist in Elasticsearch, with
+    the dates of the first and last crash reports of each.
+
+    Searches compute the names of the indices covering their date range, but
+    some of those may not exist, or may not have any crash report in that
+    range. The catalog lets them skip those indices up front, rather than
+    recovering from errors or querying shards that can't match.
+
+    :arg context: an Elasticsearch ConnectionContext instance
+    :arg refresh_interval: number of seconds after which the catalog is
+        fetched again
+
+    """
+    def __init__(self, context, refresh_interval):
+        self.context = context
+        self.refresh_interval = refresh_interval
+        self._bounds = None
+        self._refreshed_at = None
+        self._expires = 0
+        self._refreshing = False
+        # Incremented by clear() so a refresh started before it doesn't
+        # postpone the next one.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_bounds(self):
+        """Return a dict of index name -> (first date, last date), and the
+        date the catalog was fetched at.
+
+        Dates are None for indices without crash reports. Return None if the
+        catalog could not be fetched.
+
+        When the catalog expires, the first caller fetches it again while the
+        others keep getting the previous one rather than waiting.
+        """
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._expires:
+                return self._bounds, self._refreshed_at
+            self._refreshing = True
+            generation = self._generation
+
+        # Fetch outside of the lock, it runs a search on every index.
+        self._refresh(generation)
+        with self._lock:
+            return self._bounds, self._refreshed_at
+
+    def clear(self):
+        with self._lock:
+            self._expires = 0
+            self._generation += 1
+
+    def _refresh(self, generation):
+        refreshed_at = utc_now()
+        bounds = None
+        try:
+            bounds = self._fetch_bounds()
+        except ElasticsearchException:
+            logger.warning('Unable to fetch the catalog of indices', exc_info=True)
+        finally:
+            with self._lock:
+                self._bounds = bounds
+                if bounds is not None:
+                    self._refreshed_at = refreshed_at
+                if generation == self._generation:
+                    # Try again after the interval even if it failed, rather
+                    # than on every search.
+                    self._expires = time.monotonic() + self.refresh_interval
+                self._refreshing = False
+
+    def _fetch_bounds(self):
+        pattern = DIRECTIVE_REGEX.sub('*', self.context.get_index_template())
+        try:
+            aliases = self.context.indices_client().get_aliases(index=pattern)
+        except NotFoundError:
+            return {}
+
+        # Some indices are aliased to the name searches use.
+        names = set()
+        for index, data in aliases.items():
+            names.update(data.get('aliases') or [index])
+        names = sorted(names)
+        if not names:
+            return {}
+
+        with self.context() as connection:
+            multi_search = MultiSearch(using=connection)
+        for name in names:
+            search = Search(index=name, doc_type=self.context.get_doctype()).extra(size=0)
+            search.aggs.metric('first_date', 'min', field=DATE_FIELD)
+            search.aggs.metric('last_date', 'max', field=DATE_FIELD)
+            multi_search = multi_search.add(search)
+
+        bounds = {}
+        for name, response in zip(names, multi_search.execute()):
+            if getattr(response, 'error', None):
+                # The index disappeared in between, searches will find out.
+                continue
+            aggregations = response.aggregations
+            bounds[name] = (
+                _to_datetime(aggregations.first_date.value),
+                _to_datetime(aggregations.last_date.value),
+            )
+        return bounds
+
+    def prune(self, indices, start_date, end_date):
+        """Return the indices that exist and may have crash reports between
+        `start_date` and `end_date`, and the list of those that don't exist.
+
+        Indices of dates after the catalog was fetched are kept as they may
+        have been created or filled since.
+        """
+        bounds, refreshed_at = self.get_bounds()
+        if bounds is None:
+            return list(indices), []
+
+        recent = set(generate_list_of_indexes(
+            refreshed_at - INDEXING_DELAY, end_date, self.context.get_index_template()
+        ))
+
+        kept = []
+        missing = []
+        for index in indices:
+            if index in recent:
+                kept.append(index)
+            elif index not in bounds:
+                missing.append(index)
+            else:
+                first_date, last_date = bounds[index]
+                if first_date is not None and first_date <= end_date and last_date >= start_date:
+                    kept.append(index)
+        return kept, missing
+
+
+def _to_datetime(timestamp):
+    """Return the datetime of a date aggregation value, in milliseconds."""
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp / 1000, UTC)
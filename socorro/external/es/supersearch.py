@@ -3,21 +3,24 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from collections import defaultdict
+import datetime
+import itertools
 import sys
 import re
 
 from configman import class_converter, Namespace, RequiredConfig
 from elasticsearch.exceptions import NotFoundError, RequestError
-from elasticsearch_dsl import A, F, Q, Search
+from elasticsearch_dsl import A, F, MultiSearch, Q, Search
 import six
 
 from socorro.external.es.base import generate_list_of_indexes
+from socorro.external.es.index_catalog import IndexCatalog
 from socorro.lib import (
     BadArgumentError,
     MissingArgumentError,
     datetimeutil,
 )
-from socorro.lib.search_common import SearchBase
+from socorro.lib.search_common import FieldsCompilationCache, SearchBase, SearchParam
 
 
 BAD_INDEX_REGEX = re.compile(r'\[\[(.*)\] missing\]')
@@ -25,6 +28,122 @@ ELASTICSEARCH_PARSE_EXCEPTION_REGEX = re.compile(
     r'ElasticsearchParseException\[Failed to parse \[([^\]]+)\]\]'
 )
 
+# How long Elasticsearch keeps the scroll context alive between batches when
+# iterating over hits.
+SCROLL_TIMEOUT = '5m'
+
+# Number of hits to retrieve per scroll batch (per shard for unsorted scans).
+SCROLL_BATCH_SIZE = 500
+
+# Maximum number of query templates kept by a SuperSearch instance.
+QUERY_TEMPLATES_CACHE_SIZE = 256
+
+# Placeholders of string values in query templates. Those with a space stand
+# for values with a space, which are turned into phrase queries.
+PLACEHOLDER_REGEX = re.compile('\x00[0-9]+ ?\x00')
+
+
+def get_value_kind(value):
+    """Return what kind of value a filter has, as far as the structure of
+    the query is concerned."""
+    if isinstance(value, list):
+        return tuple(get_value_kind(item) for item in value)
+    if isinstance(value, six.string_types):
+        return 'phrase' if ' ' in value else 'str'
+    return type(value).__name__
+
+
+def make_placeholder(kind, counter):
+    """Return a unique value of the given kind to stand for a value in a
+    query template."""
+    if isinstance(kind, tuple):
+        return [make_placeholder(item, counter) for item in kind]
+
+    number = next(counter)
+    # Dates are turned into strings when building the query, each year
+    # makes a distinct one.
+    if kind == 'datetime':
+        return datetime.datetime(1000 + number, 1, 1, tzinfo=datetimeutil.UTC)
+    if kind == 'date':
+        return datetime.date(1000 + number, 1, 1)
+    if kind == 'phrase':
+        return '\x00%d \x00' % number
+    return '\x00%d\x00' % number
+
+
+def replace_placeholders(value, replacements):
+    """Return a copy of a query body with its placeholders replaced."""
+    if isinstance(value, dict):
+        return {
+            key: replace_placeholders(item, replacements)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [replace_placeholders(item, replacements) for item in value]
+    if isinstance(value, six.string_types):
+        if value in replacements:
+            return replacements[value]
+        if '\x00' in value:
+            # A placeholder in a bigger string, like in a wildcard query.
+            return PLACEHOLDER_REGEX.sub(
+                lambda match: six.text_type(replacements[match.group(0)]), value
+            )
+    return value
+
+
+class QueryTemplate(object):
+    """The body of a query with placeholders instead of the values of its
+    filters.
+
+    :arg body: the body of the search
+    :arg count_body: the body used to count the matching documents
+    :arg request_columns: the columns returned for each hit
+    :arg placeholders: list of ``(field, index, placeholder)`` tuples, one
+        for each filter parameter, where ``placeholder`` is what the value of
+        the ``index``-th parameter of ``field`` became in the body
+
+    """
+    def __init__(self, body, count_body, request_columns, placeholders):
+        self.body = body
+        self.count_body = count_body
+        self.request_columns = request_columns
+        self.placeholders = placeholders
+
+    def render(self, params, get_filter_value):
+        """Return the body and the count body for the values of `params`."""
+        replacements = {}
+        for field, index, placeholder in self.placeholders:
+            value = get_filter_value(params[field][index])
+            if isinstance(placeholder, list):
+                replacements.update(zip(placeholder, value))
+            else:
+                replacements[placeholder] = value
+
+        return (
+            replace_placeholders(self.body, replacements),
+            replace_placeholders(self.count_body, replacements),
+        )
+
+
+class PreparedSearch(Search):
+    """A search whose body was built beforehand."""
+
+    def __init__(self, body=None, count_body=None, **kwargs):
+        super().__init__(**kwargs)
+        self._body = body
+        self._count_body = count_body
+
+    def _clone(self):
+        search = super()._clone()
+        search._body = self._body
+        search._count_body = self._count_body
+        return search
+
+    def to_dict(self, count=False, **kwargs):
+        body = dict(self._count_body if count else self._body)
+        body.update(kwargs)
+        return body
+
 
 class SuperSearch(RequiredConfig, SearchBase):
     required_config = Namespace()
@@ -43,13 +162,21 @@ class SuperSearch(RequiredConfig, SearchBase):
         """
         self.config = config
         self.context = self.config.elasticsearch_class(self.config)
+        self._query_templates = FieldsCompilationCache(
+            self._create_query_template, max_size=QUERY_TEMPLATES_CACHE_SIZE
+        )
+        self.index_catalog = None
+        if self.context.get_index_catalog_interval():
+            self.index_catalog = IndexCatalog(
+                self.context, self.context.get_index_catalog_interval()
+            )
 
     def get_connection(self):
         with self.context() as conn:
             return conn
 
-    def get_indices(self, dates):
-        """Return the list of indices to use for given dates. """
+    def get_date_range(self, dates):
+        """Return the start and end dates of the given date parameters."""
         start_date = None
         end_date = None
         for date in dates:
@@ -57,9 +184,25 @@ class SuperSearch(RequiredConfig, SearchBase):
                 start_date = date.value
             if '<' in date.operator:
                 end_date = date.value
+        return start_date, end_date
 
+    def get_indices(self, dates):
+        """Return the list of indices to use for given dates. """
+        start_date, end_date = self.get_date_range(dates)
         return generate_list_of_indexes(start_date, end_date, self.context.get_index_template())
 
+    def get_existing_indices(self, dates):
+        """Return the list of existing indices that may have crash reports
+        for given dates, and the list of errors for those that don't exist.
+        """
+        indices = self.get_indices(dates)
+        if self.index_catalog is None:
+            return indices, []
+
+        indices, missing = self.index_catalog.prune(indices, *self.get_date_range(dates))
+        errors = [{'type': 'missing_index', 'index': index} for index in missing]
+        return indices, errors
+
     def get_full_field_name(self, field_data):
         if not field_data['namespace']:
             return field_data['in_database_name']
@@ -69,25 +212,25 @@ class SuperSearch(RequiredConfig, SearchBase):
             field_data['in_database_name'],
         )
 
-    def format_field_names(self, hit):
+    def format_field_names(self, fields, hit, request_columns):
         """Return a hit with each field's database name replaced by its
         exposed name. """
         new_hit = {}
-        for field_name in self.request_columns:
-            field = self.all_fields[field_name]
+        for field_name in request_columns:
+            field = fields[field_name]
             database_field_name = self.get_full_field_name(field)
             new_hit[field_name] = hit.get(database_field_name)
 
         return new_hit
 
-    def format_fields(self, hit):
+    def format_fields(self, fields, hit, request_columns):
         """Return a well formatted document.
 
         Elasticsearch returns values as lists when using the `fields` option.
         This function removes the list when it contains zero or one element.
         It also calls `format_field_names` to correct all the field names.
         """
-        hit = self.format_field_names(hit)
+        hit = self.format_field_names(fields, hit, request_columns)
 
         for field in hit:
             if isinstance(hit[field], (list, tuple)):
@@ -98,9 +241,9 @@ class SuperSearch(RequiredConfig, SearchBase):
 
         return hit
 
-    def get_field_name(self, value, full=True):
+    def get_field_name(self, fields, value, full=True):
         try:
-            field_ = self.all_fields[value]
+            field_ = fields[value]
         except KeyError:
             raise BadArgumentError(value, msg='Unknown field "%s"' % value)
 
@@ -160,87 +303,438 @@ class SuperSearch(RequiredConfig, SearchBase):
 
         return aggs
 
+    def get_histogram_fields(self, fields):
+        """Return the names of the fields that can have histograms."""
+        return self.build_filters(fields).histogram_fields
+
+    def _build_search(self, **kwargs):
+        """Return the search object, the list of indices, the parsed
+        parameters, the errors about missing indices and the names of the
+        columns to return of a query.
+
+        This instance is shared by searches running concurrently, so
+        everything specific to a search is passed around rather than kept on
+        it.
+
+        Building the body of a query is expensive, and the same queries are
+        run over and over with only the values of their filters changing,
+        typically the dates. So bodies are built once for each shape of
+        parameters, with placeholders instead of the values of the filters,
+        and each search fills a copy of that template with its own values.
+        """
+        # Require that the list of fields be passed.
+        if not kwargs.get('_fields'):
+            raise MissingArgumentError('_fields')
+        fields = kwargs['_fields']
+
+        # Filter parameters and raise potential errors.
+        params = self.get_parameters(**kwargs)
+
+        # Find the indices to use to optimize the elasticsearch query.
+        indices, errors = self.get_existing_indices(params['date'])
+
+        template = self._query_templates.get(fields, self._get_query_shape(params))
+        body, count_body = template.render(params, self._get_filter_value)
+
+        search = PreparedSearch(
+            body,
+            count_body,
+            using=self.get_connection(),
+            index=indices,
+            doc_type=self.context.get_doctype(),
+        )
+        return search, indices, params, errors, list(template.request_columns)
+
+    def _get_query_shape(self, params):
+        """Return what the body of the query depends on in the parameters.
+
+        That is everything but the values of the filters, of which only the
+        kind matters.
+        """
+        shape = []
+        for field, sub_params in params.items():
+            sub_shape = []
+            for param in sub_params:
+                if param.name.startswith('_'):
+                    value = param.value
+                    if isinstance(value, list):
+                        value = tuple(value)
+                else:
+                    value = get_value_kind(param.value)
+                sub_shape.append(
+                    (param.name, param.operator, param.operator_not, param.data_type, value)
+                )
+            shape.append((field, tuple(sub_shape)))
+        return tuple(shape)
+
+    def _create_query_template(self, fields, shape):
+        """Return the `QueryTemplate` for a shape of parameters."""
+        counter = itertools.count()
+        params = {}
+        filter_params = []
+        for field, sub_shape in shape:
+            params[field] = []
+            for name, operator, operator_not, data_type, value in sub_shape:
+                if not name.startswith('_'):
+                    value = make_placeholder(value, counter)
+                    filter_params.append((field, len(params[field])))
+                elif isinstance(value, tuple):
+                    value = list(value)
+                params[field].append(
+                    SearchParam(name, value, operator, data_type, operator_not)
+                )
+
+        # Get the placeholders before building the filters changes them.
+        placeholders = [
+            (field, index, self._get_filter_value(params[field][index]))
+            for field, index in filter_params
+        ]
+
+        search, request_columns = self._create_search(fields, params)
+        return QueryTemplate(
+            body=search.to_dict(),
+            count_body=search.to_dict(count=True),
+            request_columns=request_columns,
+            placeholders=placeholders,
+        )
+
+    def _create_search(self, fields, params):
+        """Return the search object for the given parameters, and the names
+        of the columns to return."""
+        search = Search()
+
+        histogram_fields = self.get_histogram_fields(fields)
+        histogram_intervals = {}
+
+        for field, sub_params in params.items():
+            for param in sub_params:
+                if not param.name.startswith('_'):
+                    continue
+
+                # By default, all param values are turned into lists,
+                # even when they have and can have only one value.
+                # For those we know there can only be one value,
+                # so we just extract it from the made-up list.
+                if param.name == '_results_offset':
+                    results_from = param.value[0]
+                elif param.name == '_results_number':
+                    results_number = param.value[0]
+                    if results_number > 1000:
+                        raise BadArgumentError(
+                            '_results_number',
+                            msg=(
+                                '_results_number cannot be greater '
+                                'than 1,000'
+                            )
+                        )
+                    if results_number < 0:
+                        raise BadArgumentError(
+                            '_results_number',
+                            msg='_results_number cannot be negative'
+                        )
+                elif param.name == '_facets_size':
+                    facets_size = param.value[0]
+                    # Why cap it?
+                    # Because if the query is covering a lot of different
+                    # things you can get a really really large query
+                    # which can hog resources excessively.
+                    # Downloading, as an example, 100k facets (and 0 hits)
+                    # when there is plenty of data yields a 11MB JSON
+                    # file.
+                    if facets_size > 10000:
+                        raise BadArgumentError('_facets_size greater than 10,000')
+
+                if param.name.startswith('_histogram_interval.'):
+                    f = param.name[len('_histogram_interval.'):]
+                    if f in histogram_fields:
+                        histogram_intervals[f] = param.value[0]
+
+        # Create filters.
+        search = search.filter(F('bool', must=self._create_filters(fields, params)))
+
+        # Restricting returned fields.
+        field_names, request_columns = self._get_fields(fields, params)
+        search = search.fields(field_names)
+
+        # Sorting.
+        search = search.sort(*self._get_sort_fields(fields, params))
+
+        # Pagination.
+        results_to = results_from + results_number
+        search = search[results_from:results_to]
+
+        # Create facets.
+        if facets_size:
+            self._create_aggregations(
+                fields,
+                params,
+                search,
+                facets_size,
+                histogram_intervals
+            )
+
+        return search, request_columns
+
+    def _format_shards_errors(self, shards):
+        """Return the errors describing the shards that failed."""
+        if not shards or not shards.failed:
+            return []
+
+        # Some shards failed. We want to explain what happened in the
+        # results, so the client can decide what to do.
+        failed_indices = defaultdict(int)
+        for failure in shards.failures:
+            failed_indices[failure.index] += 1
+
+        return [
+            {
+                'type': 'shards',
+                'index': index,
+                'shards_count': shards_count,
+            }
+            for index, shards_count in failed_indices.items()
+        ]
+
     def get(self, **kwargs):
         """Return a list of results and aggregations based on parameters.
 
         The list of accepted parameters (with types and default values) is in
         the database and can be accessed with the super_search_fields service.
         """
+        search, indices, params, errors, request_columns = self._build_search(**kwargs)
+
+        # Query and compute results.
+        hits = []
+        total = 0
+        aggregations = {}
+        shards = None
+
+        if params['_return_query'][0].value[0]:
+            # Return only the JSON query that would be sent to elasticsearch.
+            return {
+                'query': search.to_dict(),
+                'indices': indices,
+            }
+
+        # We call elasticsearch with a computed list of indices, based on
+        # the date range and on the catalog of existing indices. However, if
+        # that list contains indices that do not exist in elasticsearch, an
+        # error will be raised. We thus want to remove all failing indices
+        # until we either have a valid list, or an empty list in which case
+        # we return no result.
+        while indices:
+            try:
+                results = search.execute()
+                for hit in results:
+                    hits.append(
+                        self.format_fields(kwargs['_fields'], hit.to_dict(), request_columns)
+                    )
+
+                total = search.count()
+
+                aggregations = getattr(results, 'aggregations', {})
+                if aggregations:
+                    aggregations = self.format_aggregations(aggregations)
+
+                shards = getattr(results, '_shards', {})
+
+                break  # Yay! Results!
+            except NotFoundError as e:
+                missing_index = re.findall(BAD_INDEX_REGEX, e.error)[0]
+                if missing_index in indices:
+                    del indices[indices.index(missing_index)]
+                else:
+                    # Wait what? An error caused by an index that was not
+                    # in the request? That should never happen, but in case
+                    # it does, better know it.
+                    raise
+
+                errors.append({
+                    'type': 'missing_index',
+                    'index': missing_index,
+                })
+
+                # Update the list of indices and try again. When there is
+                # no index left in the list, an empty result is returned.
+                # Note: we need to first empty the list of indices before
+                # updating it, otherwise the removed indices never get
+                # actually removed.
+                search = search.index().index(*indices)
+            except RequestError as exception:
+                exc_type, exc_value, exc_tb = sys.exc_info()
+                # Try to handle it gracefully if we can find out what
+                # input was bad and caused the exception.
+                try:
+                    bad_input = ELASTICSEARCH_PARSE_EXCEPTION_REGEX.findall(exception.error)[-1]
+                    # Loop over the original parameters to try to figure
+                    # out which *key* had the bad input.
+                    for key, value in kwargs.items():
+                        if value == bad_input:
+                            raise BadArgumentError(key)
+                except IndexError:
+                    # Not an ElasticsearchParseException exception
+                    pass
+
+                # Re-raise the original exception with the correct traceback
+                six.reraise(exc_type, exc_value, exc_tb)
+
+        errors.extend(self._format_shards_errors(shards))
+
+        return {
+            'hits': hits,
+            'total': total,
+            'facets': aggregations,
+            'errors': errors,
+        }
+
+    def get_multi(self, _searches, **kwargs):
+        """Return the results of several searches, run in a single request.
+
+        `kwargs` are the parameters shared by all searches, typically the
+        filters, and each item of `_searches` is a dict of the parameters
+        specific to one search, typically the facets. All the searches are
+        sent at once with the multi search API, which costs a single round
+        trip to Elasticsearch, instead of one per search.
+
+        Return a list of results, in the order of `_searches`, each in the
+        same form as the one returned by `get`.
+
+        A search that fails in the batch, for example because one of its
+        indices doesn't exist, is run again on its own with `get`, which
+        knows how to recover from missing indices and to report bad
+        arguments.
+        """
+        all_kwargs = [dict(kwargs, **search_kwargs) for search_kwargs in _searches]
+
+        results = [None] * len(all_kwargs)
+        multi_search = MultiSearch(using=self.get_connection())
+        batched = []
+        for i, search_kwargs in enumerate(all_kwargs):
+            search, indices, params, errors, request_columns = self._build_search(
+                **search_kwargs
+            )
+            if params['_return_query'][0].value[0]:
+                results[i] = {
+                    'query': search.to_dict(),
+                    'indices': indices,
+                }
+                continue
+
+            if not indices:
+                results[i] = {
+                    'hits': [],
+                    'total': 0,
+                    'facets': {},
+                    'errors': errors,
+                }
+                continue
+
+            multi_search = multi_search.add(search)
+            batched.append((i, request_columns, errors))
+
+        if not batched:
+            return results
+
+        responses = multi_search.execute()
+        for (i, request_columns, errors), response in zip(batched, responses):
+            if getattr(response, 'error', None):
+                results[i] = self.get(**all_kwargs[i])
+                continue
+
+            aggregations = getattr(response, 'aggregations', {})
+            if aggregations:
+                aggregations = self.format_aggregations(aggregations)
+
+            results[i] = {
+                'hits': [
+                    self.format_fields(all_kwargs[i]['_fields'], hit.to_dict(), request_columns)
+                    for hit in response
+                ],
+                'total': response.hits.total,
+                'facets': aggregations,
+                'errors': errors + self._format_shards_errors(getattr(response, '_shards', {})),
+            }
+
+        return results
+
+    def iter_hits(self, **kwargs):
+        """Return an iterator over all hits matching parameters.
+
+        Unlike `get`, this doesn't paginate with `_results_offset` and
+        `_results_number`. It uses the scroll API to walk through all the
+        matching documents, so it's suitable for exporting large result sets
+        without deep-offset queries. Hits are yielded lazily and formatted the
+        same way as in `get`.
+
+        If `_sort` is passed, hits are returned in that order. Otherwise they
+        are returned in no particular order, which is much cheaper for
+        Elasticsearch.
+
+        Facets and the `_results_*` meta parameters are ignored. Indices that
+        don't exist are skipped.
+        """
         # Require that the list of fields be passed.
         if not kwargs.get('_fields'):
             raise MissingArgumentError('_fields')
-        self.all_fields = kwargs['_fields']
+        fields = kwargs['_fields']
 
         # Filter parameters and raise potential errors.
         params = self.get_parameters(**kwargs)
 
-        # Find the indices to use to optimize the elasticsearch query.
-        indices = self.get_indices(params['date'])
+        indices, _ = self.get_existing_indices(params['date'])
+        if not indices:
+            # Searching no index would search them all.
+            return
 
-        # Create and configure the search object.
         search = Search(
             using=self.get_connection(),
             index=indices,
             doc_type=self.context.get_doctype(),
         )
+        search = search.filter(F('bool', must=self._create_filters(fields, params)))
+        field_names, request_columns = self._get_fields(fields, params)
+        search = search.fields(field_names)
 
-        # Create filters.
+        sort_fields = self._get_sort_fields(fields, params)
+        search = search.sort(*sort_fields)
+
+        search = search.params(
+            scroll=SCROLL_TIMEOUT,
+            size=SCROLL_BATCH_SIZE,
+            # Only pay for sorting if the caller asked for an order.
+            preserve_order=bool(sort_fields),
+            ignore_unavailable=True,
+        )
+
+        for hit in search.scan():
+            yield self.format_fields(fields, hit.to_dict(), request_columns)
+
+    @staticmethod
+    def _get_filter_value(param):
+        """Return the value of a filter parameter as it goes in the query."""
+        if param.data_type in ('date', 'datetime'):
+            return datetimeutil.date_to_string(param.value)
+        elif param.data_type == 'enum':
+            return [x.lower() for x in param.value]
+        elif param.data_type == 'str' and not param.operator:
+            return [x.lower() for x in param.value]
+        return param.value
+
+    def _create_filters(self, fields, params):
+        """Return the list of filters to apply for the given parameters."""
         filters = []
-        histogram_intervals = {}
 
         for field, sub_params in params.items():
             sub_filters = None
             for param in sub_params:
                 if param.name.startswith('_'):
-                    # By default, all param values are turned into lists,
-                    # even when they have and can have only one value.
-                    # For those we know there can only be one value,
-                    # so we just extract it from the made-up list.
-                    if param.name == '_results_offset':
-                        results_from = param.value[0]
-                    elif param.name == '_results_number':
-                        results_number = param.value[0]
-                        if results_number > 1000:
-                            raise BadArgumentError(
-                                '_results_number',
-                                msg=(
-                                    '_results_number cannot be greater '
-                                    'than 1,000'
-                                )
-                            )
-                        if results_number < 0:
-                            raise BadArgumentError(
-                                '_results_number',
-                                msg='_results_number cannot be negative'
-                            )
-                    elif param.name == '_facets_size':
-                        facets_size = param.value[0]
-                        # Why cap it?
-                        # Because if the query is covering a lot of different
-                        # things you can get a really really large query
-                        # which can hog resources excessively.
-                        # Downloading, as an example, 100k facets (and 0 hits)
-                        # when there is plenty of data yields a 11MB JSON
-                        # file.
-                        if facets_size > 10000:
-                            raise BadArgumentError('_facets_size greater than 10,000')
-
-                    for f in self.histogram_fields:
-                        if param.name == '_histogram_interval.%s' % f:
-                            histogram_intervals[f] = param.value[0]
-
                     # Don't use meta parameters in the query.
                     continue
 
-                field_data = self.all_fields[param.name]
+                field_data = fields[param.name]
                 name = self.get_full_field_name(field_data)
 
-                if param.data_type in ('date', 'datetime'):
-                    param.value = datetimeutil.date_to_string(param.value)
-                elif param.data_type == 'enum':
-                    param.value = [x.lower() for x in param.value]
-                elif param.data_type == 'str' and not param.operator:
-                    param.value = [x.lower() for x in param.value]
+                param.value = self._get_filter_value(param)
 
                 # Operators needing wildcards, and the associated value
                 # transformation with said wildcards.
@@ -339,26 +833,29 @@ class SuperSearch(RequiredConfig, SearchBase):
             if sub_filters is not None:
                 filters.append(sub_filters)
 
-        search = search.filter(F('bool', must=filters))
+        return filters
 
-        # Restricting returned fields.
-        fields = []
+    def _get_fields(self, fields, params):
+        """Return the list of database field names to return for hits, and
+        the list of the requested columns."""
+        field_names = []
 
         # We keep track of the requested columns in order to make sure we
         # return those column names and not aliases for example.
-        self.request_columns = []
+        request_columns = []
         for param in params['_columns']:
             for value in param.value:
                 if not value:
                     continue
 
-                self.request_columns.append(value)
-                field_name = self.get_field_name(value, full=False)
-                fields.append(field_name)
+                request_columns.append(value)
+                field_name = self.get_field_name(fields, value, full=False)
+                field_names.append(field_name)
 
-        search = search.fields(fields)
+        return field_names, request_columns
 
-        # Sorting.
+    def _get_sort_fields(self, fields, params):
+        """Return the list of database field names to sort hits by."""
         sort_fields = []
         for param in params['_sort']:
             for value in param.value:
@@ -375,7 +872,7 @@ class SuperSearch(RequiredConfig, SearchBase):
                     desc = True
                     value = value[1:]
 
-                field_name = self.get_field_name(value)
+                field_name = self.get_field_name(fields, value)
 
                 if desc:
                     # The underlying library understands that '-' means
@@ -384,127 +881,15 @@ class SuperSearch(RequiredConfig, SearchBase):
 
                 sort_fields.append(field_name)
 
-        search = search.sort(*sort_fields)
-
-        # Pagination.
-        results_to = results_from + results_number
-        search = search[results_from:results_to]
-
-        # Create facets.
-        if facets_size:
-            self._create_aggregations(
-                params,
-                search,
-                facets_size,
-                histogram_intervals
-            )
-
-        # Query and compute results.
-        hits = []
-
-        if params['_return_query'][0].value[0]:
-            # Return only the JSON query that would be sent to elasticsearch.
-            return {
-                'query': search.to_dict(),
-                'indices': indices,
-            }
-
-        errors = []
-
-        # We call elasticsearch with a computed list of indices, based on
-        # the date range. However, if that list contains indices that do not
-        # exist in elasticsearch, an error will be raised. We thus want to
-        # remove all failing indices until we either have a valid list, or
-        # an empty list in which case we return no result.
-        while True:
-            try:
-                results = search.execute()
-                for hit in results:
-                    hits.append(self.format_fields(hit.to_dict()))
-
-                total = search.count()
-
-                aggregations = getattr(results, 'aggregations', {})
-                if aggregations:
-                    aggregations = self.format_aggregations(aggregations)
-
-                shards = getattr(results, '_shards', {})
-
-                break  # Yay! Results!
-            except NotFoundError as e:
-                missing_index = re.findall(BAD_INDEX_REGEX, e.error)[0]
-                if missing_index in indices:
-                    del indices[indices.index(missing_index)]
-                else:
-                    # Wait what? An error caused by an index that was not
-                    # in the request? That should never happen, but in case
-                    # it does, better know it.
-                    raise
-
-                errors.append({
-                    'type': 'missing_index',
-                    'index': missing_index,
-                })
-
-                if indices:
-                    # Update the list of indices and try again.
-                    # Note: we need to first empty the list of indices before
-                    # updating it, otherwise the removed indices never get
-                    # actually removed.
-                    search = search.index().index(*indices)
-                else:
-                    # There is no index left in the list, return an empty
-                    # result.
-                    hits = []
-                    total = 0
-                    aggregations = {}
-                    shards = None
-                    break
-            except RequestError as exception:
-                exc_type, exc_value, exc_tb = sys.exc_info()
-                # Try to handle it gracefully if we can find out what
-                # input was bad and caused the exception.
-                try:
-                    bad_input = ELASTICSEARCH_PARSE_EXCEPTION_REGEX.findall(exception.error)[-1]
-                    # Loop over the original parameters to try to figure
-                    # out which *key* had the bad input.
-                    for key, value in kwargs.items():
-                        if value == bad_input:
-                            raise BadArgumentError(key)
-                except IndexError:
-                    # Not an ElasticsearchParseException exception
-                    pass
-
-                # Re-raise the original exception with the correct traceback
-                six.reraise(exc_type, exc_value, exc_tb)
-
-        if shards and shards.failed:
-            # Some shards failed. We want to explain what happened in the
-            # results, so the client can decide what to do.
-            failed_indices = defaultdict(int)
-            for failure in shards.failures:
-                failed_indices[failure.index] += 1
-
-            for index, shards_count in failed_indices.items():
-                errors.append({
-                    'type': 'shards',
-                    'index': index,
-                    'shards_count': shards_count,
-                })
-
-        return {
-            'hits': hits,
-            'total': total,
-            'facets': aggregations,
-            'errors': errors,
-        }
+        return sort_fields
 
     def _create_aggregations(
-        self, params, search, facets_size, histogram_intervals
+        self, fields, params, search, facets_size, histogram_intervals
     ):
         # Create facets.
         for param in params['_facets']:
             self._add_second_level_aggs(
+                fields,
                 param,
                 search.aggs,
                 facets_size,
@@ -516,40 +901,42 @@ class SuperSearch(RequiredConfig, SearchBase):
             if not key.startswith('_aggs.'):
                 continue
 
-            fields = key.split('.')[1:]
+            agg_fields = key.split('.')[1:]
 
-            if fields[0] not in self.all_fields:
+            if agg_fields[0] not in fields:
                 continue
 
-            base_bucket = self._get_fields_agg(fields[0], facets_size)
+            base_bucket = self._get_fields_agg(fields, agg_fields[0], facets_size)
             sub_bucket = base_bucket
 
-            for field in fields[1:]:
+            for field in agg_fields[1:]:
                 # For each field, make a bucket, then include that bucket in
                 # the latest one, and then make that new bucket the latest.
-                if field in self.all_fields:
-                    tmp_bucket = self._get_fields_agg(field, facets_size)
+                if field in fields:
+                    tmp_bucket = self._get_fields_agg(fields, field, facets_size)
                     sub_bucket.bucket(field, tmp_bucket)
                     sub_bucket = tmp_bucket
 
             for value in params[key]:
                 self._add_second_level_aggs(
+                    fields,
                     value,
                     sub_bucket,
                     facets_size,
                     histogram_intervals,
                 )
 
-            search.aggs.bucket(fields[0], base_bucket)
+            search.aggs.bucket(agg_fields[0], base_bucket)
 
         # Create histograms.
-        for f in self.histogram_fields:
+        for f in self.get_histogram_fields(fields):
             key = '_histogram.%s' % f
             if params.get(key):
-                histogram_bucket = self._get_histogram_agg(f, histogram_intervals)
+                histogram_bucket = self._get_histogram_agg(fields, f, histogram_intervals)
 
                 for param in params[key]:
                     self._add_second_level_aggs(
+                        fields,
                         param,
                         histogram_bucket,
                         facets_size,
@@ -558,51 +945,51 @@ class SuperSearch(RequiredConfig, SearchBase):
 
                 search.aggs.bucket('histogram_%s' % f, histogram_bucket)
 
-    def _get_histogram_agg(self, field, intervals):
+    def _get_histogram_agg(self, fields, field, intervals):
         histogram_type = (
-            self.all_fields[field]['query_type'] == 'date' and
+            fields[field]['query_type'] == 'date' and
             'date_histogram' or 'histogram'
         )
         return A(
             histogram_type,
-            field=self.get_field_name(field),
+            field=self.get_field_name(fields, field),
             interval=intervals[field],
         )
 
-    def _get_cardinality_agg(self, field):
+    def _get_cardinality_agg(self, fields, field):
         return A(
             'cardinality',
-            field=self.get_field_name(field),
+            field=self.get_field_name(fields, field),
         )
 
-    def _get_fields_agg(self, field, facets_size):
+    def _get_fields_agg(self, fields, field, facets_size):
         return A(
             'terms',
-            field=self.get_field_name(field),
+            field=self.get_field_name(fields, field),
             size=facets_size,
         )
 
-    def _add_second_level_aggs(self, param, recipient, facets_size, histogram_intervals):
+    def _add_second_level_aggs(self, fields, param, recipient, facets_size, histogram_intervals):
         for field in param.value:
             if not field:
                 continue
 
             if field.startswith('_histogram'):
                 field_name = field[len('_histogram.'):]
-                if field_name not in self.histogram_fields:
+                if field_name not in self.get_histogram_fields(fields):
                     continue
 
                 bucket_name = 'histogram_%s' % field_name
-                bucket = self._get_histogram_agg(field_name, histogram_intervals)
+                bucket = self._get_histogram_agg(fields, field_name, histogram_intervals)
 
             elif field.startswith('_cardinality'):
                 field_name = field[len('_cardinality.'):]
 
                 bucket_name = 'cardinality_%s' % field_name
-                bucket = self._get_cardinality_agg(field_name)
+                bucket = self._get_cardinality_agg(fields, field_name)
 
             else:
                 bucket_name = field
-                bucket = self._get_fields_agg(field, facets_size)
+                bucket = self._get_fields_agg(fields, field, facets_size)
 
             recipient.bucket(bucket_name, bucket)
@@ -3,6 +3,8 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
+import re
+
 from configman import Namespace
 from configman.converters import class_converter
 from configman.dotdict import DotDict
@@ -10,9 +12,32 @@ import pika
 from queue import Queue, Empty
 
 from socorro.external.crashstorage_base import CrashStorageBase
+from socorro.lib import BadArgumentError
 from socorro.lib.transaction import retry
 
 
+# Reprocessing jobs that only re-run some of the processor rules are queued
+# as "<crash_id>:<rule name>,<rule name>".
+JOB_RULES_SEPARATOR = ':'
+
+RULE_NAME_RE = re.compile(r'^\w+$')
+
+
+def build_job(crash_id, rule_names=None):
+    """Returns the queue message body for a crash id and optional rule names"""
+    if not rule_names:
+        return crash_id
+    return crash_id + JOB_RULES_SEPARATOR + ','.join(rule_names)
+
+
+def parse_job(job):
+    """Returns (crash_id, rule names or None) for a queue message body"""
+    crash_id, _, rule_names = job.partition(JOB_RULES_SEPARATOR)
+    if not rule_names:
+        return crash_id, None
+    return crash_id, [name for name in rule_names.split(',') if name]
+
+
 class RabbitMQCrashStorage(CrashStorageBase):
     """This class is an implementation of a Socorro Crash Storage system.
     It is used as a crash queing methanism for raw crashes.  It implements
@@ -244,15 +269,29 @@ class ReprocessingOneRabbitMQCrashStore(ReprocessingRabbitMQCrashStore):
         reference_value_from='resource.rabbitmq',
     )
 
-    def reprocess(self, crash_ids):
+    def reprocess(self, crash_ids, rules=None):
+        """Queues crashes for reprocessing
+
+        :arg crash_ids: crash id or list of crash ids
+        :arg rules: optional list of processor rule names; when given, the
+            processor only re-runs those rules on top of the stored processed
+            crash instead of processing the crash from scratch
+
+        """
         if not isinstance(crash_ids, (list, tuple)):
             crash_ids = [crash_ids]
+        if rules:
+            if not isinstance(rules, (list, tuple)):
+                rules = [rules]
+            for rule_name in rules:
+                if not RULE_NAME_RE.match(rule_name):
+                    raise BadArgumentError('rules', msg='Invalid rule name %r' % rule_name)
         success = bool(crash_ids)
         for crash_id in crash_ids:
             if not self.save_raw_crash(
                 DotDict({'legacy_processing': 0}),
                 [],
-                crash_id
+                build_job(crash_id, rules)
             ):
                 success = False
         return success
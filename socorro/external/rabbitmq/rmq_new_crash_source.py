@@ -7,6 +7,8 @@ from configman.converters import class_converter
 
 from functools import partial
 
+from socorro.external.rabbitmq.crashstorage import parse_job
+
 
 class RMQNewCrashSource(RequiredConfig):
     """An iterable of crashes from RabbitMQ"""
@@ -32,19 +34,23 @@ class RMQNewCrashSource(RequiredConfig):
         """Return an iterator over crashes from RabbitMQ.
 
         Each crash is a tuple of the ``(args, kwargs)`` variety. The lone arg
-        is a crash ID, and the kwargs contain only a callback function which
-        the FTS app will call to send an ack to Rabbit after processing is
-        complete.
+        is a crash ID, and the kwargs contain a callback function which the
+        FTS app will call to send an ack to Rabbit after processing is
+        complete. For reprocessing jobs that only re-run some rules, the
+        kwargs also contain the names of those rules as ``rerun_rules``.
 
         """
-        for a_crash_id in self.crash_store.new_crashes():
-            yield (
-                (a_crash_id,),
-                {'finished_func': partial(
+        for a_job in self.crash_store.new_crashes():
+            crash_id, rule_names = parse_job(a_job)
+            kwargs = {
+                'finished_func': partial(
                     self.crash_store.ack_crash,
-                    a_crash_id
-                )}
-            )
+                    a_job
+                )
+            }
+            if rule_names:
+                kwargs['rerun_rules'] = rule_names
+            yield ((crash_id,), kwargs)
 
     def new_crashes(self):
         return self.__iter__()
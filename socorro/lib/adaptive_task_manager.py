@@ -0,0 +1,351 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This module defines a threaded task manager that adjusts the number of
+worker threads while it runs.
+
+The best number of threads depends on what the jobs spend their time on.
+While the processor is stackwalker bound, more threads than cores just fight
+over the CPU. While it is waiting on S3 or Elasticsearch, more threads keep
+more requests in flight. Rather than picking one value per instance type, a
+controller thread looks at the last interval every ``adjustment_interval``
+seconds and adds or retires one worker thread:
+
+* how long jobs waited in the queue compared to how long they took to run
+* how busy the worker threads were
+* how much of the machine's CPU this process and its children used
+* how many jobs were completed, so a step that made throughput worse can be
+  undone
+
+Every decision is reported as a metric along with the values it was based
+on."""
+
+from collections import namedtuple
+import functools
+import os
+import queue
+import threading
+import time
+
+from configman import Namespace
+import markus
+
+from socorro.lib.task_manager import default_iterator, default_task_func
+from socorro.lib.threaded_task_manager import ThreadedTaskManager
+
+
+# What the controller saw during one adjustment interval
+#
+# threads - number of worker threads during the interval
+# jobs - number of jobs completed
+# queue_wait - mean seconds a job spent in the queue
+# service_time - mean seconds a job took to run
+# utilization - fraction of the worker threads' time spent running jobs
+# cpu_utilization - fraction of all the cores used by the process and its
+#                   children
+# throughput - jobs completed per second
+ConcurrencySample = namedtuple('ConcurrencySample', [
+    'threads', 'jobs', 'queue_wait', 'service_time', 'utilization', 'cpu_utilization',
+    'throughput',
+])
+
+
+def get_cpu_time():
+    """Returns the cpu seconds used by this process and its finished children"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class JobStats(object):
+    """Thread safe accumulator of job queue waits and run times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.jobs = 0
+        self.total_wait = 0.0
+        self.total_duration = 0.0
+
+    def record(self, wait, duration):
+        with self._lock:
+            self.jobs += 1
+            self.total_wait += wait
+            self.total_duration += duration
+
+    def collect(self):
+        """Returns (jobs, total wait, total duration) and starts over"""
+        with self._lock:
+            result = (self.jobs, self.total_wait, self.total_duration)
+            self._reset()
+        return result
+
+
+class ConcurrencyController(object):
+    """Decides how many worker threads to run next from a ConcurrencySample
+
+    The number of threads moves by at most one per decision:
+
+    * shrink if the last step up made throughput drop, and don't grow again
+      for ``backoff_intervals`` decisions
+    * shrink if the CPU is saturated
+    * grow if jobs wait in the queue and there is CPU to spare
+    * shrink if the worker threads are mostly idle
+    * otherwise stay put
+
+    """
+
+    def __init__(
+        self, minimum, maximum, target_cpu_utilization=0.75, maximum_cpu_utilization=0.95,
+        queue_wait_ratio=0.5, idle_utilization=0.5, throughput_tolerance=0.05,
+        backoff_intervals=6
+    ):
+        if minimum < 1 or maximum < minimum:
+            raise ValueError('invalid thread bounds: %r, %r' % (minimum, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_cpu_utilization = target_cpu_utilization
+        self.maximum_cpu_utilization = maximum_cpu_utilization
+        self.queue_wait_ratio = queue_wait_ratio
+        self.idle_utilization = idle_utilization
+        self.throughput_tolerance = throughput_tolerance
+        self.backoff_intervals = backoff_intervals
+
+        self._last_change = 0
+        self._throughput_before_growth = None
+        self._backoff = 0
+
+    def clamp(self, threads):
+        return max(self.minimum, min(self.maximum, threads))
+
+    def decide(self, sample):
+        """Returns (number of threads, reason)"""
+        if self._backoff:
+            self._backoff -= 1
+
+        if (
+            self._last_change > 0 and
+            self._throughput_before_growth and
+            sample.throughput < (
+                self._throughput_before_growth * (1 - self.throughput_tolerance)
+            )
+        ):
+            change, reason = -1, 'throughput'
+            self._backoff = self.backoff_intervals
+        elif sample.cpu_utilization >= self.maximum_cpu_utilization:
+            change, reason = -1, 'cpu'
+        elif (
+            sample.jobs and
+            sample.queue_wait >= self.queue_wait_ratio * sample.service_time and
+            sample.cpu_utilization < self.target_cpu_utilization
+        ):
+            change, reason = 1, 'queue_wait'
+            if self._backoff:
+                change, reason = 0, 'backoff'
+        elif sample.utilization < self.idle_utilization:
+            change, reason = -1, 'idle'
+        else:
+            change, reason = 0, 'steady'
+
+        threads = self.clamp(sample.threads + change)
+        if threads == sample.threads and change:
+            reason = 'bounds'
+        self._last_change = threads - sample.threads
+        self._throughput_before_growth = sample.throughput if self._last_change > 0 else None
+        return threads, reason
+
+
+class AdaptiveThreadedTaskManager(ThreadedTaskManager):
+    """A ThreadedTaskManager that grows and shrinks its pool of worker threads
+    between ``minimum_number_of_threads`` and ``maximum_number_of_threads``.
+    ``number_of_threads`` is the number of threads it starts with.  The
+    maximum queue size keeps the same ratio to the number of threads as
+    configured at start up."""
+    required_config = Namespace()
+    required_config.add_option(
+        'minimum_number_of_threads',
+        default=2,
+        doc='the smallest number of worker threads to run'
+    )
+    required_config.add_option(
+        'maximum_number_of_threads',
+        default=16,
+        doc='the largest number of worker threads to run'
+    )
+    required_config.add_option(
+        'adjustment_interval',
+        default=10.0,
+        doc='seconds between adjustments of the number of worker threads'
+    )
+    required_config.add_option(
+        'target_cpu_utilization',
+        default=0.75,
+        doc='only add worker threads while less than this fraction of the cpus are used'
+    )
+    required_config.add_option(
+        'maximum_cpu_utilization',
+        default=0.95,
+        doc='retire worker threads while more than this fraction of the cpus are used'
+    )
+    required_config.add_option(
+        'queue_wait_ratio',
+        default=0.5,
+        doc=(
+            'add worker threads when jobs wait in the queue for more than this '
+            'fraction of the time they take to run'
+        )
+    )
+    required_config.add_option(
+        'idle_utilization',
+        default=0.5,
+        doc='retire worker threads when they are busy less than this fraction of the time'
+    )
+    required_config.add_option(
+        'throughput_tolerance',
+        default=0.05,
+        doc='undo adding a worker thread when throughput drops by more than this fraction'
+    )
+    required_config.add_option(
+        'backoff_intervals',
+        default=6,
+        doc='number of adjustment intervals to not add threads after undoing one'
+    )
+    required_config.add_option(
+        'metrics_prefix',
+        default='processor.concurrency',
+        doc='prefix for the metrics reporting the adjustments'
+    )
+
+    def __init__(self, config,
+                 job_source_iterator=default_iterator,
+                 task_func=default_task_func):
+        super().__init__(config, job_source_iterator, task_func)
+        self.controller = ConcurrencyController(
+            minimum=config.minimum_number_of_threads,
+            maximum=config.maximum_number_of_threads,
+            target_cpu_utilization=config.target_cpu_utilization,
+            maximum_cpu_utilization=config.maximum_cpu_utilization,
+            queue_wait_ratio=config.queue_wait_ratio,
+            idle_utilization=config.idle_utilization,
+            throughput_tolerance=config.throughput_tolerance,
+            backoff_intervals=config.backoff_intervals,
+        )
+        self.number_of_threads = self.controller.clamp(config.number_of_threads)
+        self.queue_size_per_thread = config.maximum_queue_size / config.number_of_threads
+        self._set_queue_size()
+
+        self.job_stats = JobStats()
+        self.metrics = markus.get_metrics(config.metrics_prefix)
+        self.cpu_count = os.cpu_count() or 1
+        self.controller_thread = None
+        self._controller_stop = threading.Event()
+
+    def start(self):
+        super().start()
+        self._last_sample_time = time.time()
+        self._last_cpu_time = get_cpu_time()
+        self.controller_thread = threading.Thread(
+            name='ConcurrencyControllerThread',
+            target=self._controller_thread_func
+        )
+        self.controller_thread.daemon = True
+        self.controller_thread.start()
+
+    def _set_queue_size(self):
+        size = max(1, int(round(self.queue_size_per_thread * self.number_of_threads)))
+        with self.task_queue.mutex:
+            self.task_queue.maxsize = size
+            # wake up the queuing thread if it is waiting for room
+            self.task_queue.not_full.notify_all()
+
+    def _queue_job(self, job_params):
+        task = functools.partial(self._timed_task, time.time())
+        self.task_queue.put((task, job_params))
+
+    def _timed_task(self, queued_at, *args, **kwargs):
+        started_at = time.time()
+        try:
+            return self.task_func(*args, **kwargs)
+        finally:
+            self.job_stats.record(started_at - queued_at, time.time() - started_at)
+
+    def _take_sample(self):
+        now = time.time()
+        cpu_time = get_cpu_time()
+        elapsed = max(now - self._last_sample_time, 1e-6)
+        cpu_used = cpu_time - self._last_cpu_time
+        self._last_sample_time = now
+        self._last_cpu_time = cpu_time
+
+        jobs, total_wait, total_duration = self.job_stats.collect()
+        return ConcurrencySample(
+            threads=self.number_of_threads,
+            jobs=jobs,
+            queue_wait=total_wait / jobs if jobs else 0.0,
+            service_time=total_duration / jobs if jobs else 0.0,
+            utilization=min(1.0, total_duration / (elapsed * self.number_of_threads)),
+            cpu_utilization=cpu_used / (elapsed * self.cpu_count),
+            throughput=jobs / elapsed,
+        )
+
+    def _grow(self):
+        self._start_worker_thread()
+        self.number_of_threads += 1
+
+    def _shrink(self):
+        """queue a death token for one worker thread, returns False if the
+        queue is full"""
+        try:
+            self.task_queue.put_nowait((None, None))
+        except queue.Full:
+            return False
+        self.number_of_threads -= 1
+        self.thread_list = [t for t in self.thread_list if t.is_alive()]
+        return True
+
+    def adjust(self):
+        """take a sample of the last interval and act on the controller's
+        decision"""
+        sample = self._take_sample()
+        threads, reason = self.controller.decide(sample)
+
+        if threads > self.number_of_threads:
+            action = 'grow'
+            self._grow()
+        elif threads < self.number_of_threads:
+            action = 'shrink'
+            if not self._shrink():
+                action, reason = 'hold', 'queue_full'
+        else:
+            action = 'hold'
+        if action != 'hold':
+            self._set_queue_size()
+            self.logger.info(
+                '%s to %d worker threads (%s): %r', action, self.number_of_threads, reason, sample
+            )
+
+        self.metrics.incr('adjustment', tags=['action:%s' % action, 'reason:%s' % reason])
+        self.metrics.gauge('threads', self.number_of_threads)
+        self.metrics.gauge('queue_wait', sample.queue_wait)
+        self.metrics.gauge('service_time', sample.service_time)
+        self.metrics.gauge('utilization', sample.utilization)
+        self.metrics.gauge('cpu_utilization', sample.cpu_utilization)
+        self.metrics.gauge('throughput', sample.throughput)
+        return action, reason
+
+    def _controller_thread_func(self):
+        while not self._controller_stop.wait(self.config.adjustment_interval):
+            try:
+                self.adjust()
+            except Exception:
+                self.logger.error('adjusting the number of threads has failed', exc_info=True)
+
+    def _kill_worker_threads(self):
+        # the controller must not add or retire threads while they are
+        # being counted and killed
+        self._controller_stop.set()
+        if self.controller_thread is not None:
+            self.controller_thread.join()
+        super()._kill_worker_threads()
@@ -6,8 +6,10 @@
 Common functions for search-related external modules.
 """
 
+import collections
 import datetime
 import json
+import threading
 
 import six
 
@@ -93,32 +95,24 @@ class SearchFilter(object):
         self.mandatory = mandatory
 
 
-class SearchBase(object):
-    meta_filters = (
-        SearchFilter('_aggs.product.version'),
-        SearchFilter('_aggs.product.version.platform'),  # convenient for tests
-        SearchFilter(
-            '_aggs.android_cpu_abi.android_manufacturer.android_model'
-        ),
-        SearchFilter('_columns', default=[
-            'uuid', 'date', 'signature', 'product', 'version'
-        ]),
-        SearchFilter('_facets', default='signature'),
-        SearchFilter('_facets_size', data_type='int', default=50),
-        SearchFilter('_results_number', data_type='int', default=100),
-        SearchFilter('_results_offset', data_type='int', default=0),
-        SearchFilter('_return_query', data_type='bool', default=False),
-        SearchFilter('_sort', default=''),
-    )
+class CompiledFields(object):
+    """Filters precompiled from a mapping of super search fields.
 
-    def build_filters(self, fields):
-        self.filters = []
-        self.histogram_fields = []
+    Building the filters for all fields and all their meta parameters
+    (`_aggs.*`, `_histogram.*` and `_histogram_interval.*`) is expensive, and
+    the fields do not change during the life of a process, so instances are
+    built once and shared between all searches. Treat them as read-only.
 
-        all_meta_filters = list(self.meta_filters)
+    Use `compile_fields` to get an instance.
+
+    """
+    def __init__(self, fields, meta_filters=()):
+        filters = []
+        histogram_fields = []
+        all_meta_filters = list(meta_filters)
 
         for field in fields.values():
-            self.filters.append(SearchFilter(
+            filters.append(SearchFilter(
                 field['name'],
                 default=field['default_value'],
                 data_type=field['data_validation_type'],
@@ -133,7 +127,7 @@ class SearchBase(object):
             # Generate all histogram meta filters.
             if field['query_type'] in HISTOGRAM_QUERY_TYPES:
                 # Store that field in a list so we can easily use it later.
-                self.histogram_fields.append(field['name'])
+                histogram_fields.append(field['name'])
 
                 # Add a field to get a list of other fields to aggregate.
                 all_meta_filters.append(SearchFilter(
@@ -150,17 +144,104 @@ class SearchBase(object):
                 ))
 
         # Add meta parameters.
-        self.filters.extend(all_meta_filters)
+        filters.extend(all_meta_filters)
+
+        self.filters = tuple(filters)
+        self.histogram_fields = tuple(histogram_fields)
+        self._filters_by_name = {}
+        for search_filter in self.filters:
+            # Keep the first filter for a name, like a linear search would.
+            self._filters_by_name.setdefault(search_filter.name, search_filter)
+
+    def get_filter(self, field_name):
+        return self._filters_by_name.get(field_name)
+
+
+class FieldsCompilationCache(object):
+    """Thread-safe cache of objects compiled from a mapping of fields.
+
+    Fields mappings are big dicts passed along with every search, so entries
+    are keyed on the identity of the mapping rather than on its content. The
+    mapping is kept alive by the cache so its id cannot be reused by another
+    object while the entry exists. This means a mapping must not be modified
+    once it has been used for a search.
+
+    :arg compile_func: callable taking the fields mapping and any extra
+        hashable arguments passed to `get`, and returning the compiled object
+    :arg max_size: maximum number of compiled objects to keep
+
+    """
+    def __init__(self, compile_func, max_size=8):
+        self.compile_func = compile_func
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fields, *args):
+        key = (id(fields),) + args
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is fields:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # Compile outside of the lock, at worst two threads do the same work
+        # once and one of the results wins.
+        compiled = self.compile_func(fields, *args)
+
+        with self._lock:
+            self._entries[key] = (fields, compiled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_compiled_fields_cache = FieldsCompilationCache(CompiledFields)
+
+
+def compile_fields(fields, meta_filters=()):
+    """Return the shared `CompiledFields` for a fields mapping."""
+    return _compiled_fields_cache.get(fields, meta_filters)
+
+
+class SearchBase(object):
+    meta_filters = (
+        SearchFilter('_aggs.product.version'),
+        SearchFilter('_aggs.product.version.platform'),  # convenient for tests
+        SearchFilter(
+            '_aggs.android_cpu_abi.android_manufacturer.android_model'
+        ),
+        SearchFilter('_columns', default=[
+            'uuid', 'date', 'signature', 'product', 'version'
+        ]),
+        SearchFilter('_facets', default='signature'),
+        SearchFilter('_facets_size', data_type='int', default=50),
+        SearchFilter('_results_number', data_type='int', default=100),
+        SearchFilter('_results_offset', data_type='int', default=0),
+        SearchFilter('_return_query', data_type='bool', default=False),
+        SearchFilter('_sort', default=''),
+    )
+
+    def build_filters(self, fields):
+        """Return the `CompiledFields` of a fields mapping.
+
+        Instances can be shared by searches running concurrently, so the
+        result is not kept on them.
+        """
+        return compile_fields(fields, self.meta_filters)
 
     def get_parameters(self, **kwargs):
         parameters = {}
 
         fields = kwargs['_fields']
         assert fields
-        if fields:
-            self.build_filters(fields)
 
-        for param in self.filters:
+        for param in self.build_filters(fields).filters:
             values = kwargs.get(param.name, param.default)
 
             if values in ('', []):
@@ -424,10 +505,8 @@ class SearchBase(object):
             else:
                 parameters['version'].remove(version)
 
-    def get_filter(self, field_name):
-        for f in self.filters:
-            if f.name == field_name:
-                return f
+    def get_filter(self, fields, field_name):
+        return self.build_filters(fields).get_filter(field_name)
 
 
 def convert_to_type(value, data_type):
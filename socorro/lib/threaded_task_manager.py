@@ -87,18 +87,23 @@ class ThreadedTaskManager(TaskManager):
         self.logger.debug('start')
         # start each of the task threads.
         for x in range(self.number_of_threads):
-            # each thread is given the config object as well as a reference to
-            # this manager class.  The manager class is where the queue lives
-            # and the task threads will refer to it to get their next jobs.
-            new_thread = TaskThread(self.config, self.task_queue)
-            self.thread_list.append(new_thread)
-            new_thread.start()
+            self._start_worker_thread()
         self.queuing_thread = threading.Thread(
             name="QueuingThread",
             target=self._queuing_thread_func
         )
         self.queuing_thread.start()
 
+    def _start_worker_thread(self):
+        """start one more worker thread"""
+        # each thread is given the config object as well as a reference to
+        # this manager class.  The manager class is where the queue lives
+        # and the task threads will refer to it to get their next jobs.
+        new_thread = TaskThread(self.config, self.task_queue)
+        self.thread_list.append(new_thread)
+        new_thread.start()
+        return new_thread
+
     def wait_for_completion(self, waiting_func=None):
         """This is a blocking function call that will wait for the queuing
         thread to complete.
@@ -204,6 +209,10 @@ class ThreadedTaskManager(TaskManager):
         for t in self.thread_list:
             t.join()
 
+    def _queue_job(self, job_params):
+        """put a job on the queue, blocking while the queue is full"""
+        self.task_queue.put((self.task_func, job_params))
+
     def _queuing_thread_func(self):
         """This is the function responsible for reading the iterator and
         putting contents into the queue.  It loops as long as there are items
@@ -229,7 +238,7 @@ class ThreadedTaskManager(TaskManager):
                     continue
                 self.quit_check()
                 # self.logger.debug("queuing job %s", job_params)
-                self.task_queue.put((self.task_func, job_params))
+                self._queue_job(job_params)
         except Exception:
             self.logger.error('queuing jobs has failed', exc_info=True)
         except KeyboardInterrupt:
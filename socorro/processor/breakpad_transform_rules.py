@@ -10,14 +10,24 @@ import shlex
 import subprocess
 import threading
 import tempfile
+import time
 
-from configman import Namespace
+from configman import Namespace, class_converter
 from configman.converters import str_to_list
 from configman.dotdict import DotDict
 import markus
 
 from socorro.lib.util import dotdict_to_dict
 from socorro.processor.rules.base import Rule
+from socorro.processor.stackwalker_cache import (
+    DiskLRUCache,
+    S3Cache,
+    StackwalkerCache,
+    compute_cache_key,
+    file_sha256,
+    is_cacheable,
+)
+from socorro.processor.symbol_cache_manager import from_string_to_parse_size
 
 
 class CrashingThreadRule(Rule):
@@ -64,6 +74,8 @@ class MinidumpSha256Rule(Rule):
 
 
 class ExternalProcessRule(Rule):
+    uses_dumps = True
+
     # FIXME(willkg): command_line and command_pathname are referenced in the
     # uplifted versions in Processor2015. The rest of these config values have
     # no effect on anything and are just here.
@@ -116,6 +128,8 @@ class ExternalProcessRule(Rule):
         # Tokenize the command line into args
         command_line_args = shlex.split(command_line, comments=False, posix=True)
 
+        start_time = time.time()
+
         # Execute the command line sending stderr (debug logging) to devnull and
         # capturing stdout (JSON blob of output)
         subprocess_handle = subprocess.Popen(
@@ -130,6 +144,11 @@ class ExternalProcessRule(Rule):
             )
 
         return_code = subprocess_handle.wait()
+
+        profile = processor_meta.get('profile')
+        if profile is not None:
+            profile.record('subprocesses', self.__class__.__name__, time.time() - start_time)
+
         return external_command_output, return_code
 
     @staticmethod
@@ -194,6 +213,7 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
         doc='template for the command to invoke the external program; uses Python format syntax',
         default=(
             'timeout -s KILL {kill_timeout} {command_pathname} '
+            '{jit_category} '
             '--raw-json {raw_crash_pathname} '
             '{symbols_urls} '
             '--symbols-cache {symbol_cache_path} '
@@ -234,10 +254,91 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
         doc='a path where temporary files may be written',
         default=tempfile.gettempdir(),
     )
+    required_config.add_option(
+        'stackwalker_cache_path',
+        doc=(
+            'the directory where stackwalker output is cached; leave empty to '
+            'disable the disk cache'
+        ),
+        default='',
+    )
+    required_config.add_option(
+        'stackwalker_cache_size',
+        doc='the maximum size of the stackwalker output disk cache',
+        default='1G',
+        from_string_converter=from_string_to_parse_size
+    )
+    required_config.add_option(
+        'stackwalker_version',
+        doc=(
+            'the version of the stackwalker used in stackwalker output cache '
+            'keys; leave empty to use the SHA-256 hash of the stackwalker binary'
+        ),
+        default='',
+    )
+    required_config.namespace('stackwalker_cache_s3')
+    required_config.stackwalker_cache_s3.add_option(
+        'resource_class',
+        doc=(
+            'fully qualified dotted Python classname of the Boto connection to '
+            'share stackwalker output through S3; leave empty to disable'
+        ),
+        default='',
+        from_string_converter=class_converter
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.metrics = markus.get_metrics('processor.breakpadstackwalkerrule')
+        self.stackwalker_version = None
+        self.cache = self._build_cache()
+
+    def _build_cache(self):
+        """Returns the StackwalkerCache to use or None if caching is disabled"""
+        cache_path = self.config.get('stackwalker_cache_path')
+        s3_config = self.config.get('stackwalker_cache_s3')
+        resource_class = s3_config.get('resource_class') if s3_config else None
+        if not cache_path and not resource_class:
+            return None
+
+        self.stackwalker_version = self.config.get('stackwalker_version')
+        if not self.stackwalker_version:
+            try:
+                self.stackwalker_version = file_sha256(self.config.command_pathname)
+            except OSError:
+                self.logger.warning(
+                    'cannot determine the stackwalker version, not caching its output',
+                    exc_info=True
+                )
+                return None
+
+        disk_cache = None
+        if cache_path:
+            disk_cache = DiskLRUCache(cache_path, self.config.stackwalker_cache_size)
+        remote_cache = None
+        if resource_class:
+            remote_cache = S3Cache(resource_class(s3_config))
+        return StackwalkerCache(disk_cache, remote_cache)
+
+    def _get_cache_key(self, dump_name, dump_file_pathname, raw_crash, processed_crash):
+        """Returns the stackwalker output cache key for a dump or None"""
+        if self.cache is None:
+            return None
+
+        dump_hash = None
+        if dump_name == self.config.dump_field:
+            # Computed by the collector and copied over by MinidumpSha256Rule
+            dump_hash = processed_crash.get('minidump_sha256_hash')
+        if not dump_hash:
+            try:
+                dump_hash = file_sha256(dump_file_pathname)
+            except OSError:
+                self.logger.warning('cannot hash %s', dump_file_pathname, exc_info=True)
+                return None
+
+        return compute_cache_key(
+            dump_hash, self.stackwalker_version, self.config.symbols_urls, raw_crash
+        )
 
     @contextmanager
     def _temp_raw_crash_json_file(self, raw_crash, crash_id):
@@ -291,6 +392,15 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
 
         return stackwalker_data, return_code
 
+    def _stackwalker_data_from_cache(self, stackwalker_output, processor_meta):
+        stackwalker_data = DotDict()
+        stackwalker_data.json_dump = stackwalker_output
+        stackwalker_data.mdsw_return_code = 0
+        stackwalker_data.mdsw_status_string = stackwalker_output.get('status', 'unknown error')
+        stackwalker_data.success = stackwalker_data.mdsw_status_string == 'OK'
+        processor_meta.processor_notes.append('MDSW output reused from cache')
+        return stackwalker_data
+
     def expand_commandline(self, dump_file_pathname, raw_crash_pathname):
         """Expands the command line parameters and returns the final command line"""
         # NOTE(willkg): If we ever add new configuration variables, we'll need
@@ -309,6 +419,9 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
             'symbol_cache_path': self.config.symbol_cache_path,
             'symbol_tmp_path': self.config.symbol_tmp_path,
             'symbols_urls': symbols_urls,
+            'jit_category': (
+                '--jit-category' if self.config.get('jit_category_from_stackwalker') else ''
+            ),
 
             # These are calculated
             'dump_file_pathname': dump_file_pathname,
@@ -337,15 +450,33 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
 
                 dump_file_pathname = raw_dumps[dump_name]
 
-                command_line = self.expand_commandline(
-                    dump_file_pathname=dump_file_pathname,
-                    raw_crash_pathname=raw_crash_pathname
+                cache_key = self._get_cache_key(
+                    dump_name, dump_file_pathname, raw_crash, processed_crash
                 )
+                cached_output = self.cache.get(cache_key) if cache_key else None
 
-                stackwalker_data, return_code = self._execute_external_process(
-                    command_line,
-                    processor_meta
-                )
+                if cached_output is not None:
+                    stackwalker_data = self._stackwalker_data_from_cache(
+                        cached_output,
+                        processor_meta
+                    )
+                else:
+                    command_line = self.expand_commandline(
+                        dump_file_pathname=dump_file_pathname,
+                        raw_crash_pathname=raw_crash_pathname
+                    )
+
+                    stackwalker_data, return_code = self._execute_external_process(
+                        command_line,
+                        processor_meta
+                    )
+
+                    if (
+                        cache_key and
+                        return_code == 0 and
+                        is_cacheable(stackwalker_data.json_dump)
+                    ):
+                        self.cache.put(cache_key, stackwalker_data.json_dump)
 
                 if dump_name == self.config.dump_field:
                     processed_crash.update(stackwalker_data)
@@ -355,6 +486,17 @@ class BreakpadStackwalkerRule2015(ExternalProcessRule):
 
 
 class JitCrashCategorizeRule(ExternalProcessRule):
+    """Runs jit-crash-categorize on the minidump of JIT crashes
+
+    With ``jit_category_from_stackwalker``, the stackwalker is run with
+    ``--jit-category`` and categorizes the crash in the same run it walks the
+    stack, putting the category and the jit-crash-categorize return code in
+    the ``jit_category`` and ``jit_category_return_code`` fields of its
+    output. They are then read from there, and jit-crash-categorize is only
+    run when they are missing, for example for stackwalker output reused from
+    the cache.
+
+    """
     # FIXME(willkg): command_line and command_pathname are referenced in the
     # uplifted versions in Processor2015. The rest of these config values have
     # no effect on anything and are just here.
@@ -379,6 +521,18 @@ class JitCrashCategorizeRule(ExternalProcessRule):
         doc='where the external process return code should be stored in the processed crash',
         default='classifications.jit.category_return_code',
     )
+    required_config.add_option(
+        'jit_category_from_stackwalker',
+        doc=(
+            'whether to have the stackwalker categorize JIT crashes with '
+            '--jit-category instead of running a second program'
+        ),
+        default=False,
+    )
+
+    # Fields of the stackwalker output with the JIT category
+    STACKWALKER_KEY = 'jit_category'
+    STACKWALKER_RETURN_CODE_KEY = 'jit_category_return_code'
 
     def predicate(self, raw_crash, raw_dumps, processed_crash, proc_meta):
         if (
@@ -418,3 +572,24 @@ class JitCrashCategorizeRule(ExternalProcessRule):
         except AttributeError:
             # there's no strip method
             return result
+
+    def action(self, raw_crash, raw_dumps, processed_crash, processor_meta):
+        if self.config.get('jit_category_from_stackwalker'):
+            json_dump = processed_crash.get('json_dump', {})
+            category = json_dump.get(self.STACKWALKER_KEY)
+            if category is not None:
+                # NOTE: result_key and return_code_key are shadowed by the
+                # stackwalker ones in Processor2015, so use the defaults
+                self.dot_save(
+                    processed_crash,
+                    self.required_config.result_key.default,
+                    category
+                )
+                self.dot_save(
+                    processed_crash,
+                    self.required_config.return_code_key.default,
+                    json_dump.get(self.STACKWALKER_RETURN_CODE_KEY, 0)
+                )
+                return
+
+        super().action(raw_crash, raw_dumps, processed_crash, processor_meta)
@@ -2,9 +2,9 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import base64
 import datetime
 import gzip
-import json
 import re
 import time
 
@@ -23,6 +23,11 @@ from socorro.lib.datetimeutil import (
 from socorro.lib.ooid import date_from_ooid
 from socorro.lib.requestslib import session_with_retries
 from socorro.processor.rules.base import Rule
+from socorro.processor.rules.memory_report_extraction import (
+    MemoryMeasures,
+    MemoryReportTooLarge,
+    read_memory_report,
+)
 from socorro.signature.generator import SignatureGenerator
 from socorro.signature.utils import convert_to_crash_data
 
@@ -288,13 +293,32 @@ class MozCrashReasonRule(Rule):
 
 
 class OutOfMemoryBinaryRule(Rule):
+    """Extract the memory report of a crash
+
+    The gzipped JSON memory report is decompressed and parsed incrementally
+    and the memory measures ``MemoryReportExtraction`` stores are computed
+    along the way, see ``read_memory_report``.
+
+    With the ``compress_memory_report`` option, the ``reports`` list is not
+    kept as JSON objects. The memory report in the processed crash gets the
+    other top-level keys and the gzipped memory report encoded in base64 in
+    ``compressed_report`` instead. That keeps processors from holding the
+    whole report in memory.
+
+    """
     # Number of bytes, max, that we accept memory info payloads as JSON.
     MAX_SIZE_UNCOMPRESSED = 20 * 1024 * 1024  # ~20Mb
 
+    uses_dumps = True
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.compress_memory_report = config.get('compress_memory_report', False)
+
     def predicate(self, raw_crash, raw_dumps, processed_crash, proc_meta):
         return 'memory_report' in raw_dumps
 
-    def _extract_memory_info(self, dump_pathname, processor_notes):
+    def _extract_memory_info(self, dump_pathname, processor_notes, measures=None):
         """Extract and return the JSON data from the .json.gz memory report.
         file"""
         def error_out(error_message):
@@ -308,17 +332,17 @@ class OutOfMemoryBinaryRule(Rule):
             return error_out(error_message)
 
         try:
-            memory_info_as_string = fd.read()
-            if len(memory_info_as_string) > self.MAX_SIZE_UNCOMPRESSED:
-                error_message = (
-                    "Uncompressed memory info too large %d (max: %d)" % (
-                        len(memory_info_as_string),
-                        self.MAX_SIZE_UNCOMPRESSED
-                    )
-                )
-                return error_out(error_message)
-
-            memory_info = json.loads(memory_info_as_string)
+            memory_info = read_memory_report(
+                fd,
+                self.MAX_SIZE_UNCOMPRESSED,
+                measures=measures,
+                keep_reports=not self.compress_memory_report,
+            )
+        except MemoryReportTooLarge as x:
+            error_message = (
+                "Uncompressed memory info too large %d (max: %d)" % (x.size, x.max_size)
+            )
+            return error_out(error_message)
         except (EOFError, IOError) as x:
             error_message = "error in gzip for %s: %r" % (dump_pathname, x)
             return error_out(error_message)
@@ -328,20 +352,30 @@ class OutOfMemoryBinaryRule(Rule):
         finally:
             fd.close()
 
+        if self.compress_memory_report:
+            with open(dump_pathname, 'rb') as fp:
+                memory_info['compressed_report'] = base64.b64encode(fp.read()).decode('ascii')
+
         return memory_info
 
     def action(self, raw_crash, raw_dumps, processed_crash, processor_meta):
         pathname = raw_dumps['memory_report']
+        pid = processed_crash.get('json_dump', {}).get('pid')
+        measures = MemoryMeasures(pid) if pid is not None else None
         with temp_file_context(pathname):
             memory_report = self._extract_memory_info(
                 dump_pathname=pathname,
-                processor_notes=processor_meta.processor_notes
+                processor_notes=processor_meta.processor_notes,
+                measures=measures,
             )
 
             if isinstance(memory_report, dict) and memory_report.get('ERROR'):
                 processed_crash.memory_report_error = memory_report['ERROR']
             else:
                 processed_crash.memory_report = memory_report
+                # Saves MemoryReportExtraction from going through the reports
+                # again
+                processor_meta.memory_measures = measures
 
 
 class ProductRewrite(Rule):
@@ -10,10 +10,12 @@ some small part of the transformation process."""
 import logging
 import os
 import tempfile
+import time
 
 from configman import (
     Namespace,
     RequiredConfig,
+    class_converter,
 )
 from configman.converters import str_to_list
 from configman.dotdict import DotDict
@@ -37,6 +39,7 @@ from socorro.processor.general_transform_rules import (
 from socorro.processor.rules.memory_report_extraction import (
     MemoryReportExtraction,
 )
+from socorro.processor.symbol_cache_manager import from_string_to_parse_size
 
 from socorro.processor.mozilla_transform_rules import (
     AddonsRule,
@@ -146,6 +149,7 @@ class Processor2015(RequiredConfig):
         doc='template for the command to invoke the external program; uses Python format syntax',
         default=(
             'timeout -s KILL {kill_timeout} {command_pathname} '
+            '{jit_category} '
             '--raw-json {raw_crash_pathname} '
             '{symbols_urls} '
             '--symbols-cache {symbol_cache_path} '
@@ -180,6 +184,54 @@ class Processor2015(RequiredConfig):
         doc='a path where temporary files may be written',
         default=tempfile.gettempdir(),
     )
+    required_config.add_option(
+        'stackwalker_cache_path',
+        doc=(
+            'the directory where stackwalker output is cached; leave empty to '
+            'disable the disk cache'
+        ),
+        default='',
+    )
+    required_config.add_option(
+        'stackwalker_cache_size',
+        doc='the maximum size of the stackwalker output disk cache',
+        default='1G',
+        from_string_converter=from_string_to_parse_size
+    )
+    required_config.add_option(
+        'stackwalker_version',
+        doc=(
+            'the version of the stackwalker used in stackwalker output cache '
+            'keys; leave empty to use the SHA-256 hash of the stackwalker binary'
+        ),
+        default='',
+    )
+    required_config.namespace('stackwalker_cache_s3')
+    required_config.stackwalker_cache_s3.add_option(
+        'resource_class',
+        doc=(
+            'fully qualified dotted Python classname of the Boto connection to '
+            'share stackwalker output through S3; leave empty to disable'
+        ),
+        default='',
+        from_string_converter=class_converter
+    )
+    required_config.add_option(
+        'jit_category_from_stackwalker',
+        doc=(
+            'whether to have the stackwalker categorize JIT crashes with '
+            '--jit-category instead of running a second program'
+        ),
+        default=False,
+    )
+    required_config.add_option(
+        'compress_memory_report',
+        doc=(
+            'whether to store the reports of memory reports gzipped in the '
+            'processed crash instead of as JSON objects'
+        ),
+        default=False,
+    )
     required_config.add_option(
         'version_string_api',
         doc='url for the version string api endpoint in the webapp',
@@ -210,15 +262,51 @@ class Processor2015(RequiredConfig):
         self.rules = []
         for a_rule_class in rule_set:
             self.rules.append(a_rule_class(config))
+        self.rule_names = set(rule.__class__.__name__ for rule in self.rules)
 
         if self.config.sentry and self.config.sentry.dsn:
             self.sentry_dsn = self.config.sentry.dsn
         else:
             self.sentry_dsn = None
 
-    def process_crash(self, raw_crash, raw_dumps, processed_crash):
+    def get_partial_rules(self, rule_names, processed_crash):
+        """Return the rules to run to reprocess only some rules of a crash
+
+        Partially reprocessing a crash runs only the named rules on top of the
+        processed crash of a previous run, reusing everything else in it like
+        the stackwalker output. That is only possible if the crash was
+        completely processed before and all the rule names are known.
+
+        :arg rule_names: names of the rule classes to run
+        :arg processed_crash: the processed crash of a previous run
+
+        :returns: list of rules in pipeline order, or None if the crash needs
+            to be processed from scratch
+
+        """
+        if not rule_names or not processed_crash.get('completed_datetime'):
+            return None
+        if not self.rule_names.issuperset(rule_names):
+            return None
+        return [rule for rule in self.rules if rule.__class__.__name__ in rule_names]
+
+    def rules_use_dumps(self, rule_names, processed_crash):
+        """Return whether reprocessing the named rules of a crash needs its dumps"""
+        rules = self.get_partial_rules(rule_names, processed_crash)
+        if rules is None:
+            return True
+        return any(rule.uses_dumps for rule in rules)
+
+    def process_crash(self, raw_crash, raw_dumps, processed_crash, rerun_rules=None,
+                      profile=None):
         """Take a raw_crash and its associated raw_dumps and return a processed_crash
 
+        If ``rerun_rules`` is a list of rule names, only those rules are run on
+        the processed crash if possible. See ``get_partial_rules``.
+
+        If ``profile`` is a ``socorro.processor.profiling.CrashProfile``, the
+        time spent in every rule is recorded in it.
+
         If this throws an exception, the crash was not processed correctly.
 
         """
@@ -233,6 +321,7 @@ class Processor2015(RequiredConfig):
         processor_meta_data.quit_check = self.quit_check
         processor_meta_data.processor = self
         processor_meta_data.config = self.config
+        processor_meta_data.profile = profile
 
         if "processor_notes" in processed_crash:
             original_processor_notes = [
@@ -247,11 +336,27 @@ class Processor2015(RequiredConfig):
         else:
             original_processor_notes = []
 
+        rules = self.rules
+        if rerun_rules:
+            partial_rules = self.get_partial_rules(rerun_rules, processed_crash)
+            if partial_rules is None:
+                processor_meta_data.processor_notes.append(
+                    'partial reprocessing not possible, processing all rules'
+                )
+            else:
+                rules = partial_rules
+                processor_meta_data.processor_notes.append(
+                    'partial reprocessing: %s' % ', '.join(
+                        rule.__class__.__name__ for rule in rules
+                    )
+                )
+
         processed_crash.success = False
         processed_crash.started_datetime = utc_now()
         # for backwards compatibility:
         processed_crash.startedDateTime = processed_crash.started_datetime
-        processed_crash.signature = 'EMPTY: crash failed to process'
+        if rules is self.rules:
+            processed_crash.signature = 'EMPTY: crash failed to process'
 
         crash_id = raw_crash['uuid']
 
@@ -263,7 +368,8 @@ class Processor2015(RequiredConfig):
         processor_meta_data.started_timestamp = start_time
 
         # Apply rules; if a rule fails, capture the error and continue onward
-        for rule in self.rules:
+        for rule in rules:
+            rule_start_time = time.time()
             try:
                 rule.act(raw_crash, raw_dumps, processed_crash, processor_meta_data)
 
@@ -281,6 +387,9 @@ class Processor2015(RequiredConfig):
                     'rule %s failed: %s' % (rule.__class__.__name__, exc.__class__.__name__)
                 )
 
+            if profile is not None:
+                profile.record('rules', rule.__class__.__name__, time.time() - rule_start_time)
+
             self.quit_check()
 
         # The crash made it through the processor rules with no exceptions
@@ -6,18 +6,27 @@
 """the processor_app converts raw_crashes into processed_crashes"""
 
 import collections
+import json
 import os
+import random
 import sys
+import time
 
 from configman import Namespace
-from configman.converters import class_converter
+from configman.converters import class_converter, str_to_boolean
 from configman.dotdict import DotDict
 import six
 
 from socorro.app.fetch_transform_save_app import FetchTransformSaveWithSeparateNewCrashSourceApp
-from socorro.external.crashstorage_base import CrashIDNotFound
+from socorro.external.crashstorage_base import CrashIDNotFound, PolyCrashStorage
 from socorro.lib import raven_client
 from socorro.lib.util import dotdict_to_dict
+from socorro.processor.profiling import CrashProfile, ProfileStats, ProfileStatusServer
+from socorro.processor.symbol_prefetcher import SymbolPrefetcher
+
+
+# Key of the profile in processed crashes when profiles are saved with them
+PROFILE_KEY = 'processor_profile'
 
 
 # Defined separately for readability
@@ -57,6 +66,7 @@ CONFIG_DEFAULTS = {
             'es_redactor': {
                 'forbidden_keys': ', '.join([
                     'memory_report',
+                    PROFILE_KEY,
                     'upload_file_minidump_browser.json_dump',
                     'upload_file_minidump_flash1.json_dump',
                     'upload_file_minidump_flash2.json_dump',
@@ -162,6 +172,69 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
         from_string_converter=class_converter
     )
 
+    # profiling namespace
+    #     This namespace is for config parameters having to do with profiling
+    #     where the time goes when processing crashes.
+    required_config.namespace('profiling')
+    required_config.profiling.add_option(
+        'sample_rate',
+        doc='fraction of crashes to profile, between 0 (none) and 1 (all)',
+        default=0.0,
+        from_string_converter=float
+    )
+    required_config.profiling.add_option(
+        'save_in_processed_crash',
+        doc='whether to save profiles in processed crashes under "%s"' % PROFILE_KEY,
+        default=False,
+        from_string_converter=str_to_boolean
+    )
+    required_config.profiling.add_option(
+        'window_size',
+        doc='number of most recent profiles to summarize in the status endpoint',
+        default=1000,
+    )
+    required_config.profiling.add_option(
+        'status_host',
+        doc='host the profiling status endpoint listens on',
+        default='127.0.0.1',
+    )
+    required_config.profiling.add_option(
+        'status_port',
+        doc='port of the profiling status endpoint; 0 disables it',
+        default=0,
+    )
+
+    # symbol_prefetch namespace
+    #     This namespace is for config parameters having to do with fetching
+    #     symbols of queued crashes before the stackwalker needs them.
+    required_config.namespace('symbol_prefetch')
+    required_config.symbol_prefetch.add_option(
+        'enabled',
+        doc='whether to prefetch symbols of queued crashes into the symbol cache',
+        default=False,
+        from_string_converter=str_to_boolean
+    )
+    required_config.symbol_prefetch.add_option(
+        'number_of_threads',
+        doc='number of symbols files to download concurrently',
+        default=4,
+    )
+    required_config.symbol_prefetch.add_option(
+        'builds_to_remember',
+        doc='number of builds to remember the modules that needed symbols of',
+        default=20,
+    )
+    required_config.symbol_prefetch.add_option(
+        'modules_per_build',
+        doc='number of modules that needed symbols to remember per build',
+        default=100,
+    )
+    required_config.symbol_prefetch.add_option(
+        'annotation',
+        doc='crash annotation with stack traces to find the modules a crash needs in',
+        default='StackTraces',
+    )
+
     required_config.namespace('sentry')
     required_config.sentry.add_option(
         'dsn',
@@ -189,18 +262,37 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
             extra={'crash_id': crash_id}
         )
 
-    def _transform(self, crash_id):
+    def _transform(self, crash_id, rerun_rules=None):
         """Transform a raw crash into a process crash
 
         The ``crash_id`` passed in is used as a key to fetch the raw crash data
         from the ``source``, the ``processor_class`` processes the crash and
         the processed crash is saved to the ``destination``.
 
+        If ``rerun_rules`` is a list of rule names, only those rules are run
+        on top of the existing processed crash when the processor supports it.
+
         """
+        profile = self._start_profile(crash_id)
+        process_kwargs = {}
+        if rerun_rules:
+            process_kwargs['rerun_rules'] = rerun_rules
+        if profile is not None:
+            process_kwargs['profile'] = profile
+
         # Fetch the raw crash data
+        start_time = time.time()
         try:
             raw_crash = self.source.get_raw_crash(crash_id)
-            dumps = self.source.get_raw_dumps_as_files(crash_id)
+            if rerun_rules:
+                processed_crash = self._get_processed_crash(crash_id)
+                if self.processor.rules_use_dumps(rerun_rules, processed_crash):
+                    dumps = self.source.get_raw_dumps_as_files(crash_id)
+                else:
+                    # Skip downloading dumps nothing is going to look at
+                    dumps = {}
+            else:
+                dumps = self.source.get_raw_dumps_as_files(crash_id)
         except CrashIDNotFound:
             # If the crash isn't found, we just reject it--no need to capture
             # errors here
@@ -213,17 +305,28 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
             self.processor.reject_raw_crash(crash_id, 'error in loading: %s' % x)
             return
 
-        # Fetch processed crash data--there won't be any if this crash hasn't
-        # been processed, yet
-        try:
-            processed_crash = self.source.get_unredacted_processed(crash_id)
-        except CrashIDNotFound:
-            processed_crash = DotDict()
+        if not rerun_rules:
+            processed_crash = self._get_processed_crash(crash_id)
+
+        if profile is not None:
+            profile.record('stages', 'fetch', time.time() - start_time)
+            profile.bytes_fetched = self._get_dumps_size(dumps)
 
         # Process the crash and remove any temporary artifacts from disk
         try:
             # Process the crash to generate a processed crash
-            processed_crash = self.processor.process_crash(raw_crash, dumps, processed_crash)
+            start_time = time.time()
+            processed_crash = self.processor.process_crash(
+                raw_crash, dumps, processed_crash, **process_kwargs
+            )
+            if self.symbol_prefetcher is not None:
+                self.symbol_prefetcher.learn(raw_crash, processed_crash)
+            if profile is not None:
+                profile.record('stages', 'transform', time.time() - start_time)
+                if self.config.profiling.save_in_processed_crash:
+                    # Saving times are not known yet, they only make it to
+                    # the status endpoint
+                    processed_crash[PROFILE_KEY] = profile.to_dict()
 
             # Convert the raw and processed crashes from DotDict into Python standard data
             # structures
@@ -235,8 +338,22 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
             # individual crash storage implementations may choose to honor re-saving
             # the raw_crash or not.
 
-            self.destination.save_raw_and_processed(raw_crash, None, processed_crash, crash_id)
+            start_time = time.time()
+            if profile is not None and isinstance(self.destination, PolyCrashStorage):
+                self.destination.save_raw_and_processed(
+                    raw_crash, None, processed_crash, crash_id, profile=profile
+                )
+            else:
+                self.destination.save_raw_and_processed(raw_crash, None, processed_crash, crash_id)
             self.logger.info('saved - %s', crash_id)
+
+            if profile is not None:
+                profile.record('stages', 'save', time.time() - start_time)
+                profile.bytes_saved = (
+                    len(json.dumps(raw_crash, default=str)) +
+                    len(json.dumps(processed_crash, default=str))
+                )
+                self.profile_stats.add(profile)
         except Exception:
             # Capture the exception so we don't lose it as we do other things
             exc_type, exc_value, exc_tb = sys.exc_info()
@@ -264,6 +381,43 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
                     except OSError as x:
                         self.logger.info('deletion of dump failed: %s', x)
 
+    def _create_iter(self):
+        """Lets the symbol prefetcher peek at crashes as they are queued"""
+        for item in super()._create_iter():
+            if self.symbol_prefetcher is not None and item is not None:
+                if isinstance(item, tuple):
+                    (crash_id,), kwargs = item
+                else:
+                    crash_id, kwargs = item, {}
+                if not kwargs.get('rerun_rules'):
+                    self.symbol_prefetcher.peek(crash_id)
+            yield item
+
+    def _start_profile(self, crash_id):
+        """Returns a CrashProfile if this crash is sampled for profiling"""
+        sample_rate = self.config.profiling.sample_rate
+        if sample_rate and random.random() < sample_rate:
+            return CrashProfile(crash_id)
+        return None
+
+    @staticmethod
+    def _get_dumps_size(dumps):
+        size = 0
+        for a_dump_pathname in dumps.values():
+            try:
+                size += os.path.getsize(a_dump_pathname)
+            except OSError:
+                pass
+        return size
+
+    def _get_processed_crash(self, crash_id):
+        """Fetch processed crash data--there won't be any if this crash hasn't
+        been processed, yet"""
+        try:
+            return self.source.get_unredacted_processed(crash_id)
+        except CrashIDNotFound:
+            return DotDict()
+
     def _setup_source_and_destination(self):
         """Instantiates classes necessary for processing"""
         super()._setup_source_and_destination()
@@ -286,9 +440,44 @@ class ProcessorApp(FetchTransformSaveWithSeparateNewCrashSourceApp):
             quit_check_callback=self.quit_check
         )
 
+        if self.config.symbol_prefetch.enabled:
+            processor_config = self.config.processor
+            self.symbol_prefetcher = SymbolPrefetcher(
+                source=self.source,
+                symbol_cache_path=processor_config.symbol_cache_path,
+                symbol_tmp_path=processor_config.symbol_tmp_path,
+                symbols_urls=processor_config.symbols_urls,
+                number_of_threads=self.config.symbol_prefetch.number_of_threads,
+                builds_to_remember=self.config.symbol_prefetch.builds_to_remember,
+                modules_per_build=self.config.symbol_prefetch.modules_per_build,
+                annotation=self.config.symbol_prefetch.annotation,
+            )
+        else:
+            self.symbol_prefetcher = None
+
+        self.profile_stats = ProfileStats(window_size=self.config.profiling.window_size)
+        if self.config.profiling.status_port:
+            self.profile_status_server = ProfileStatusServer(
+                self.profile_stats,
+                self.config.profiling.status_host,
+                self.config.profiling.status_port
+            )
+        else:
+            self.profile_status_server = None
+
     def close(self):
         """Cleans up the processor on shutdown"""
         super().close()
+        try:
+            self.profile_status_server.close()
+        except AttributeError:
+            # There is no profiling status endpoint
+            pass
+        try:
+            self.symbol_prefetcher.close()
+        except AttributeError:
+            # There is no symbol prefetcher
+            pass
         try:
             self.companion_process.close()
         except AttributeError:
@@ -0,0 +1,171 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Per-crash processing profiles.
+
+The statsd timers tell how long rules take on average, but not which crashes
+are slow and why. A ``CrashProfile`` records where the time went while
+processing one crash: fetching, transforming and saving it, every rule,
+every external process and every crash storage destination, along with the
+number of bytes fetched and saved.
+
+Profiles of a sample of crashes are kept in a ``ProfileStats`` rolling window
+which summarizes them as percentiles and lists the slowest crashes. A
+``ProfileStatusServer`` serves that summary as JSON over HTTP so it can be
+looked at on a running processor.
+
+"""
+
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# Sections of a profile holding timings by name
+SECTIONS = ('stages', 'rules', 'subprocesses', 'destinations')
+
+
+class CrashProfile(object):
+    """Timings and sizes recorded while processing one crash
+
+    All timings are in seconds. Recording the same name twice adds up the
+    timings, for example when a rule runs an external process once per dump.
+
+    """
+
+    def __init__(self, crash_id):
+        self.crash_id = crash_id
+        self.sections = OrderedDict((section, OrderedDict()) for section in SECTIONS)
+        self.bytes_fetched = 0
+        self.bytes_saved = 0
+
+    def record(self, section, name, seconds):
+        timings = self.sections[section]
+        timings[name] = timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, section, name):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.record(section, name, time.time() - start_time)
+
+    @property
+    def total(self):
+        return sum(self.sections['stages'].values())
+
+    def to_dict(self):
+        data = {
+            'crash_id': self.crash_id,
+            'total': self.total,
+            'bytes_fetched': self.bytes_fetched,
+            'bytes_saved': self.bytes_saved,
+        }
+        for section, timings in self.sections.items():
+            data[section] = dict(timings)
+        return data
+
+
+def percentile(sorted_values, fraction):
+    """Returns the nearest-rank percentile of a sorted list of values"""
+    if not sorted_values:
+        return None
+    index = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class ProfileStats(object):
+    """Rolling window of the most recent crash profiles"""
+
+    PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99))
+
+    def __init__(self, window_size=1000, outliers_size=10):
+        self.outliers_size = outliers_size
+        self._profiles = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        data = profile.to_dict() if isinstance(profile, CrashProfile) else profile
+        with self._lock:
+            self._profiles.append(data)
+
+    def _metrics(self, profiles):
+        metrics = OrderedDict()
+        metrics['total'] = [profile['total'] for profile in profiles]
+        metrics['bytes_fetched'] = [profile['bytes_fetched'] for profile in profiles]
+        metrics['bytes_saved'] = [profile['bytes_saved'] for profile in profiles]
+        for section in SECTIONS:
+            for profile in profiles:
+                for name, seconds in profile[section].items():
+                    metrics.setdefault('%s.%s' % (section, name), []).append(seconds)
+        return metrics
+
+    def summary(self):
+        """Returns percentiles of every metric and the slowest crashes"""
+        with self._lock:
+            profiles = list(self._profiles)
+
+        histograms = OrderedDict()
+        for name, values in self._metrics(profiles).items():
+            if not values:
+                continue
+            values.sort()
+            histogram = OrderedDict([('count', len(values))])
+            for label, fraction in self.PERCENTILES:
+                histogram[label] = percentile(values, fraction)
+            histogram['max'] = values[-1]
+            histograms[name] = histogram
+
+        slowest = sorted(profiles, key=lambda profile: profile['total'], reverse=True)
+        return {
+            'count': len(profiles),
+            'histograms': histograms,
+            'slowest': slowest[:self.outliers_size],
+        }
+
+
+class ProfileStatusServer(object):
+    """Serves a ProfileStats summary as JSON from a background thread"""
+
+    def __init__(self, stats, host, port):
+        self.stats = stats
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.rstrip('/') not in ('', '/profile'):
+                    handler.send_error(404)
+                    return
+                body = json.dumps(stats.summary()).encode('utf-8')
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'application/json')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                logger.debug(format, *args)
+
+        self.server = HTTPServer((host, port), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            name='ProfileStatusServer',
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
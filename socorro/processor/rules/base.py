@@ -19,6 +19,10 @@ class Rule(RequiredConfig):
 
     """
 
+    # Whether the rule reads the raw dumps; when reprocessing only some rules,
+    # dumps are only fetched if one of them does
+    uses_dumps = False
+
     def __init__(self, config=None, quit_check_callback=None):
         self.config = config
         self.quit_check_callback = quit_check_callback
@@ -2,6 +2,13 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import base64
+import codecs
+import gzip
+import io
+import json
+import re
+
 from socorro.processor.rules.base import Rule
 
 
@@ -13,10 +20,301 @@ UNITS_BYTES = 0
 # For more information on those values, see:
 # https://dxr.mozilla.org/mozilla-central/source/xpcom/base/nsIMemoryReporter.idl#27-125
 
+# Metrics that are in the memory report.
+# Note: theses keys use dashes instead of underscores because that's
+# how they appear in the paths of the memory report. For the sake of
+# consistent naming in our documents, we will rewrite them before
+# adding them to the processed_crash.
+METRICS_MEASURED = (
+    'gfx-textures',
+    'ghost-windows',
+    'heap-allocated',
+    'host-object-urls',
+    'private',
+    'resident',
+    'resident-unique',
+    'system-heap-allocated',
+    'vsize-max-contiguous',
+    'vsize',
+)
+
+# Metrics that are derived from the memory report.
+METRICS_DERIVED = (
+    'explicit',
+    'heap-overhead',
+    'heap-unclassified',
+    'images',
+    'js-main-runtime',
+    'top-none-detached',
+)
+
+
+class MemoryMeasures(object):
+    """Computes the memory measures of a process one report at a time
+
+    Reports are the items in the ``reports`` list of a memory report. ``add``
+    raises a ValueError or a KeyError for reports that don't make sense.
+    Callers that don't want to stop there can store the exception in
+    ``error`` to have ``result`` raise it.
+
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.pid_str = '(pid {})'.format(pid)
+        self.pid_found = False
+        self.explicit_heap = 0
+        self.explicit_nonheap = 0
+        self.metrics = dict.fromkeys(METRICS_MEASURED + METRICS_DERIVED, 0)
+        self.error = None
+
+    def add(self, report):
+        if self.pid_str not in report['process']:
+            return
+
+        self.pid_found = True
+
+        path = report['path']
+        kind = report['kind']
+        units = report['units']
+        amount = report['amount']
+
+        if path.startswith('explicit/'):
+            if units != UNITS_BYTES:
+                raise ValueError(
+                    'bad units for an explicit/ report: {}, {}'.format(
+                        path, str(units)
+                    )
+                )
+
+            if kind == KIND_NONHEAP:
+                self.explicit_nonheap += amount
+            elif kind == KIND_HEAP:
+                self.explicit_heap += amount
+            else:
+                raise ValueError(
+                    'bad kind for an explicit/ report: {}, {}'.format(
+                        path, str(kind)
+                    )
+                )
+
+            if path.startswith('explicit/images/'):
+                self.metrics['images'] += amount
+            elif 'top(none)/detached' in path:
+                self.metrics['top-none-detached'] += amount
+            elif path.startswith('explicit/heap-overhead/'):
+                self.metrics['heap-overhead'] += amount
+
+        elif path.startswith('js-main-runtime/'):
+            self.metrics['js-main-runtime'] += amount
+
+        elif path in METRICS_MEASURED:
+            self.metrics[path] += amount
+
+    def result(self):
+        """Returns the memory measures of all the reports added so far"""
+        if self.error is not None:
+            raise self.error
+
+        if not self.pid_found:
+            raise ValueError('no measurements found for pid {}'.format(self.pid))
+
+        all_metrics = dict(self.metrics)
+
+        # Nb: sometimes heap-unclassified is negative due to bogus measurements
+        # of some kind. We just show the negative value anyway.
+        all_metrics['heap-unclassified'] = (
+            all_metrics['heap-allocated'] - self.explicit_heap
+        )
+        all_metrics['explicit'] = (
+            all_metrics['heap-allocated'] + self.explicit_nonheap
+        )
+
+        # Replace all dashes in keys with underscores to fit our crash
+        # documents' naming conventions.
+        memory_measures = dict(
+            (key.replace('-', '_'), val)
+            for key, val in all_metrics.items()
+        )
+
+        return memory_measures
+
+
+class MemoryReportTooLarge(Exception):
+    """The uncompressed memory report is larger than the maximum size"""
+
+    def __init__(self, size, max_size):
+        super().__init__(size, max_size)
+        self.size = size
+        self.max_size = max_size
+
+
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+
+class _JSONStream(object):
+    """Reads JSON values one at a time from a binary file object"""
+
+    def __init__(self, fp, max_size, chunk_size):
+        self.fp = fp
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Reads the next chunk and returns whether there is more text to parse"""
+        if self.eof:
+            return False
+        # Read at least as much as what is left to parse, so retrying a value
+        # that spans many chunks doesn't take quadratic time
+        chunk = self.fp.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise MemoryReportTooLarge(self.size, self.max_size)
+        if not chunk:
+            self.eof = True
+        text = self.text_decoder.decode(chunk, final=self.eof)
+        # Drop what was parsed already, so the buffer stays small
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return bool(text) or not self.eof
+
+    def peek(self):
+        """Returns the next character that is not whitespace"""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError('unexpected end of data')
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('expected {!r} at position {}'.format(char, self.size))
+        self.pos += 1
+
+    def value(self):
+        """Returns the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # The value may go on in the next chunk
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buffer) and self._fill():
+                # So may a number at the end of the buffer
+                continue
+            self.pos = end
+            return value
+
+    def end(self):
+        try:
+            self.peek()
+        except ValueError:
+            return
+        raise ValueError('extra data at position {}'.format(self.size))
+
+
+def read_memory_report(fp, max_size, measures=None, keep_reports=True, chunk_size=64 * 1024):
+    """Parses a JSON memory report from a binary file object one report at a time
+
+    The memory report is decompressed and parsed incrementally, so only a chunk
+    of it is held in memory at a time. Each item of the ``reports`` list is
+    passed to ``measures`` as it gets parsed.
+
+    :arg fp: binary file object, usually a gzip.GzipFile
+    :arg max_size: maximum size of the uncompressed memory report
+    :arg measures: optional MemoryMeasures instance; errors computing measures
+        are stored in its ``error`` attribute
+    :arg keep_reports: whether to return the ``reports`` list; memory reports
+        can have hundreds of thousands of them
+    :arg chunk_size: number of bytes to read at a time
+
+    :returns: the memory report as a dict
+
+    :raises MemoryReportTooLarge: if the memory report is larger than max_size
+    :raises ValueError: if the memory report is not a valid JSON object
+
+    """
+    stream = _JSONStream(fp, max_size, chunk_size)
+    memory_report = {}
+
+    stream.expect('{')
+    if stream.peek() == '}':
+        stream.pos += 1
+        stream.end()
+        return memory_report
+
+    while True:
+        key = stream.value()
+        if not isinstance(key, str):
+            raise ValueError('expected a key at position {}'.format(stream.size))
+        stream.expect(':')
+
+        if key == 'reports' and stream.peek() == '[':
+            stream.pos += 1
+            reports = []
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    report = stream.value()
+                    if measures is not None and measures.error is None:
+                        try:
+                            measures.add(report)
+                        except (KeyError, ValueError, TypeError) as exc:
+                            measures.error = exc
+                    if keep_reports:
+                        reports.append(report)
+                    if stream.peek() == ',':
+                        stream.pos += 1
+                        continue
+                    stream.expect(']')
+                    break
+            memory_report['reports'] = reports
+        else:
+            memory_report[key] = stream.value()
+
+        if stream.peek() == ',':
+            stream.pos += 1
+            continue
+        stream.expect('}')
+        break
+
+    stream.end()
+    if not keep_reports:
+        memory_report.pop('reports', None)
+    return memory_report
+
+
+def decompress_memory_report(compressed_report):
+    """Returns a binary file object for a memory report stored compressed
+
+    See ``OutOfMemoryBinaryRule`` for how memory reports are stored compressed.
+
+    """
+    data = base64.b64decode(compressed_report)
+    return gzip.GzipFile(fileobj=io.BytesIO(data), mode='rb')
+
 
 class MemoryReportExtraction(Rule):
     """Extract key measurements from the memory_report object into a more
-    comprehensible and usable dictionary. """
+    comprehensible and usable dictionary.
+
+    ``OutOfMemoryBinaryRule`` computes the measurements while it reads the
+    memory report and leaves them in ``processor_meta.memory_measures``. When
+    it didn't, for example when only this rule is reprocessed, they are
+    computed from the memory report in the processed crash.
+
+    """
 
     def predicate(self, raw_crash, raw_dumps, processed_crash, proc_meta):
         try:
@@ -28,8 +326,13 @@ class MemoryReportExtraction(Rule):
                 bool(processed_crash['memory_report']) and
                 # ... and that memory report is recognisable.
                 'version' in processed_crash['memory_report'] and
-                'reports' in processed_crash['memory_report'] and
-                'hasMozMallocUsableSize' in processed_crash['memory_report']
+                'hasMozMallocUsableSize' in processed_crash['memory_report'] and
+                # ... with reports we can get to.
+                (
+                    'reports' in processed_crash['memory_report'] or
+                    'compressed_report' in processed_crash['memory_report'] or
+                    'memory_measures' in proc_meta
+                )
             )
         except KeyError:
             return False
@@ -39,7 +342,10 @@ class MemoryReportExtraction(Rule):
         memory_report = processed_crash['memory_report']
 
         try:
-            measures = self._get_memory_measures(memory_report, pid)
+            if processor_meta.get('memory_measures') is not None:
+                measures = processor_meta['memory_measures'].result()
+            else:
+                measures = self._get_memory_measures(memory_report, pid)
         except ValueError as e:
             self.logger.info('Unable to extract measurements from memory report: {}'.format(e))
             return
@@ -53,106 +359,11 @@ class MemoryReportExtraction(Rule):
         processed_crash['memory_measures'] = measures
 
     def _get_memory_measures(self, memory_report, pid):
-        explicit_heap = 0
-        explicit_nonheap = 0
-        pid_found = False
-        pid_str = '(pid {})'.format(pid)
-
-        # These ones are in the memory report.
-        # Note: theses keys use dashes instead of underscores because that's
-        # how they appear in the paths of the memory report. For the sake of
-        # consistent naming in our documents, we will rewrite them before
-        # adding them to the processed_crash.
-        metrics_measured = {
-            'gfx-textures': 0,
-            'ghost-windows': 0,
-            'heap-allocated': 0,
-            'host-object-urls': 0,
-            'private': 0,
-            'resident': 0,
-            'resident-unique': 0,
-            'system-heap-allocated': 0,
-            'vsize-max-contiguous': 0,
-            'vsize': 0,
-        }
-
-        # These ones are derived from the memory report.
-        metrics_derived = {
-            'explicit': 0,
-            'heap-overhead': 0,
-            'heap-unclassified': 0,
-            'images': 0,
-            'js-main-runtime': 0,
-            'top-none-detached': 0,
-        }
-
-        all_metrics = {}
-        all_metrics.update(metrics_measured)
-        all_metrics.update(metrics_derived)
-
-        # Process reports
-        for report in memory_report['reports']:
-            process = report['process']
-
-            if pid_str not in process:
-                continue
-
-            pid_found = True
-
-            path = report['path']
-            kind = report['kind']
-            units = report['units']
-            amount = report['amount']
-
-            if path.startswith('explicit/'):
-                if units != UNITS_BYTES:
-                    raise ValueError(
-                        'bad units for an explicit/ report: {}, {}'.format(
-                            path, str(units)
-                        )
-                    )
-
-                if kind == KIND_NONHEAP:
-                    explicit_nonheap += amount
-                elif kind == KIND_HEAP:
-                    explicit_heap += amount
-                else:
-                    raise ValueError(
-                        'bad kind for an explicit/ report: {}, {}'.format(
-                            path, str(kind)
-                        )
-                    )
-
-                if path.startswith('explicit/images/'):
-                    all_metrics['images'] += amount
-                elif 'top(none)/detached' in path:
-                    all_metrics['top-none-detached'] += amount
-                elif path.startswith('explicit/heap-overhead/'):
-                    all_metrics['heap-overhead'] += amount
-
-            elif path.startswith('js-main-runtime/'):
-                all_metrics['js-main-runtime'] += amount
-
-            elif path in metrics_measured:
-                all_metrics[path] += amount
-
-        if not pid_found:
-            raise ValueError('no measurements found for pid {}'.format(pid))
-
-        # Nb: sometimes heap-unclassified is negative due to bogus measurements
-        # of some kind. We just show the negative value anyway.
-        all_metrics['heap-unclassified'] = (
-            all_metrics['heap-allocated'] - explicit_heap
-        )
-        all_metrics['explicit'] = (
-            all_metrics['heap-allocated'] + explicit_nonheap
-        )
-
-        # Replace all dashes in keys with underscores to fit our crash
-        # documents' naming conventions.
-        memory_measures = dict(
-            (key.replace('-', '_'), val)
-            for key, val in all_metrics.items()
-        )
-
-        return memory_measures
+        measures = MemoryMeasures(pid)
+        if 'reports' in memory_report:
+            for report in memory_report['reports']:
+                measures.add(report)
+        else:
+            with decompress_memory_report(memory_report['compressed_report']) as fp:
+                read_memory_report(fp, float('inf'), measures=measures, keep_reports=False)
+        return measures.result()
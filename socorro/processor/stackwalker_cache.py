@@ -0,0 +1,267 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Content-addressed cache of minidump stackwalker output.
+
+Running the stackwalker is by far the most expensive step of processing a
+crash. Its output only depends on the minidump, the few crash annotations it
+reads, the stackwalker binary and the symbols it can find, so it is cached under
+a key built from the SHA-256 hash of the minidump, those annotations, the
+stackwalker version and the list of symbols urls. That lets
+reprocessing crashes, and processing duplicate submissions of a minidump, skip
+the stackwalker entirely.
+
+There are two tiers: a size-bounded LRU cache on the local disk and an optional
+shared tier in S3.
+
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import markus
+
+
+# Fields of the raw crash the stackwalker reads from the file passed with
+# --raw-json.
+STACKWALKER_RAW_CRASH_FIELDS = (
+    'BreakpadReserveAddress',
+    'BreakpadReserveSize',
+    'ModuleSignatureInfo',
+    'ThreadIdNameMapping',
+)
+
+
+def compute_cache_key(dump_hash, stackwalker_version, symbols_urls, raw_crash):
+    """Returns the cache key for the stackwalker output of a minidump
+
+    :arg dump_hash: SHA-256 hex digest of the minidump
+    :arg stackwalker_version: version of the stackwalker binary
+    :arg symbols_urls: ordered list of symbols urls the stackwalker uses
+    :arg raw_crash: the raw crash passed to the stackwalker, of which only
+        the fields in ``STACKWALKER_RAW_CRASH_FIELDS`` are part of the key
+
+    :returns: hex digest
+
+    """
+    annotations = {field: raw_crash.get(field) for field in STACKWALKER_RAW_CRASH_FIELDS}
+    key_data = json.dumps(
+        [dump_hash, stackwalker_version, [url.strip() for url in symbols_urls], annotations],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of the contents of a file"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_cacheable(stackwalker_output):
+    """Returns whether stackwalker output can be reused for later runs
+
+    Only successful runs with all their symbols are cached. Failures can be
+    transient and symbols can get uploaded after a crash was first processed,
+    so running the stackwalker again could produce better output.
+
+    """
+    if not stackwalker_output or stackwalker_output.get('status') != 'OK':
+        return False
+    for module in stackwalker_output.get('modules') or []:
+        if module.get('missing_symbols'):
+            return False
+    return True
+
+
+class DiskLRUCache(object):
+    """Size-bounded LRU cache of JSON documents stored as files in a directory
+
+    Files are written atomically, so several processors can share the same
+    directory. Each process keeps its own view of what is in the directory and
+    evicts the least recently used files it knows of when the total size goes
+    over ``max_size``.
+
+    """
+
+    def __init__(self, path, max_size):
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+        self.total_size = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load_existing_files()
+
+    def _load_existing_files(self):
+        existing = []
+        for base, dirs, files in os.walk(self.path):
+            for filename in files:
+                if not filename.endswith('.json'):
+                    continue
+                file_path = os.path.join(base, filename)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                existing.append((stat.st_mtime, file_path, stat.st_size))
+
+        # Oldest first, so recently used files are evicted last
+        for _, file_path, size in sorted(existing):
+            self._lru[file_path] = size
+            self.total_size += size
+        self._evict()
+
+    def _path_for(self, key):
+        # Spread files across subdirectories to keep directories small
+        return os.path.join(self.path, key[:2], key + '.json')
+
+    def _evict(self):
+        while self.total_size > self.max_size and self._lru:
+            file_path, size = self._lru.popitem(last=False)
+            self.total_size -= size
+            try:
+                os.unlink(file_path)
+            except OSError:
+                # Another process removed it already
+                pass
+
+    def get(self, key):
+        """Returns the document stored for key or None"""
+        file_path = self._path_for(key)
+        try:
+            with open(file_path, 'r') as fp:
+                value = json.load(fp)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._lru.pop(file_path, None)
+                if size is not None:
+                    self.total_size -= size
+            return None
+        except (OSError, ValueError):
+            self.logger.warning('unable to read cached file %s', file_path, exc_info=True)
+            return None
+
+        with self._lock:
+            if file_path in self._lru:
+                self._lru.move_to_end(file_path)
+            else:
+                # Written by another process
+                try:
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    return value
+                self._lru[file_path] = size
+                self.total_size += size
+                self._evict()
+        try:
+            # Keep the modification time in line with the last use for
+            # processes that load the directory later
+            os.utime(file_path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Stores a document for key"""
+        file_path = self._path_for(key)
+        data = json.dumps(value).encode('utf-8')
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp_path, file_path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            previous_size = self._lru.pop(file_path, 0)
+            self.total_size += len(data) - previous_size
+            self._lru[file_path] = len(data)
+            self._evict()
+
+
+class S3Cache(object):
+    """Stores JSON documents in S3 using a boto connection context"""
+
+    name_of_thing = 'stackwalker_output'
+
+    def __init__(self, connection_source):
+        self.connection_source = connection_source
+
+    def get(self, key):
+        try:
+            data = self.connection_source.fetch(key, self.name_of_thing)
+        except self.connection_source.ResponseError:
+            return None
+        return json.loads(data.decode('utf-8'))
+
+    def put(self, key, value):
+        self.connection_source.submit(key, self.name_of_thing, json.dumps(value).encode('utf-8'))
+
+
+class StackwalkerCache(object):
+    """Two-tier cache of stackwalker output
+
+    Lookups go to the disk cache first, then to the S3 cache. Hits in S3 are
+    copied to the disk cache. Errors talking to either tier are logged and
+    treated as misses, the cache never fails processing.
+
+    """
+
+    def __init__(self, disk_cache=None, remote_cache=None):
+        self.disk_cache = disk_cache
+        self.remote_cache = remote_cache
+        self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+        self.metrics = markus.get_metrics('processor.stackwalkercache')
+
+    def _call(self, tier_name, func, *args):
+        try:
+            return func(*args)
+        except Exception:
+            self.logger.warning('stackwalker cache %s error', tier_name, exc_info=True)
+            return None
+
+    def get(self, key):
+        """Returns the cached stackwalker output for key or None"""
+        if self.disk_cache is not None:
+            value = self._call('disk', self.disk_cache.get, key)
+            if value is not None:
+                self.metrics.incr('lookup', tags=['result:hit', 'tier:disk'])
+                return value
+
+        if self.remote_cache is not None:
+            value = self._call('s3', self.remote_cache.get, key)
+            if value is not None:
+                self.metrics.incr('lookup', tags=['result:hit', 'tier:s3'])
+                if self.disk_cache is not None:
+                    self._call('disk', self.disk_cache.put, key, value)
+                return value
+
+        self.metrics.incr('lookup', tags=['result:miss'])
+        return None
+
+    def put(self, key, value):
+        """Stores stackwalker output for key in all tiers"""
+        if self.disk_cache is not None:
+            self._call('disk', self.disk_cache.put, key, value)
+        if self.remote_cache is not None:
+            self._call('s3', self.remote_cache.put, key, value)
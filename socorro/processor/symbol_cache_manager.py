@@ -3,14 +3,19 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from collections import OrderedDict
+import json
 import logging
+import multiprocessing
 import os
 import sys
 import tempfile
+import threading
+import time
 
 import six
 
 from configman import Namespace, RequiredConfig
+from configman.dotdict import DotDict
 
 
 if os.uname()[0] != 'Linux':
@@ -124,7 +129,18 @@ def from_string_to_parse_size(size_as_string):
 
 
 class SymbolLRUCacheManager(RequiredConfig):
-    """for cleaning up the symbols cache"""
+    """for cleaning up the symbols cache
+
+    The manager keeps track of the size and last use of every file in the
+    cache by watching the cache directory with inotify. When the cache grows
+    over ``symbol_cache_size``, the least recently used files are removed
+    until it is down to ``symbol_cache_low_water`` of that size.
+
+    The list of files is saved to ``symbol_cache_index_path`` periodically
+    and on close. On start up, that index is loaded instead of walking the
+    cache directory, and the directory is reconciled with it in a background
+    thread.
+    """
     required_config = Namespace()
     required_config.add_option(
         'symbol_cache_path',
@@ -137,6 +153,39 @@ class SymbolLRUCacheManager(RequiredConfig):
         default='1G',
         from_string_converter=from_string_to_parse_size
     )
+    required_config.add_option(
+        'symbol_cache_low_water',
+        doc=(
+            'fraction of symbol_cache_size to evict down to once the cache '
+            'is full, so files are evicted in batches'
+        ),
+        default=0.9,
+        from_string_converter=float
+    )
+    required_config.add_option(
+        'symbol_cache_index_path',
+        doc=(
+            'file to save the list of cached files in so restarts do not walk '
+            'the cache; defaults to the cache directory with ".index" appended'
+        ),
+        default=''
+    )
+    required_config.add_option(
+        'index_save_interval',
+        doc='seconds between saves of the index; 0 only saves it on close',
+        default=300,
+        from_string_converter=int
+    )
+    required_config.add_option(
+        'eviction_grace_period',
+        doc=(
+            'files modified less than this many seconds ago are not evicted, '
+            'so symbols files the symbol prefetcher fetched stay until they '
+            'are used; 0 evicts strictly in LRU order'
+        ),
+        default=0,
+        from_string_converter=int
+    )
     required_config.add_option(
         'verbosity',
         doc="how chatty should this be? 1 - writes to stdout,"
@@ -145,6 +194,9 @@ class SymbolLRUCacheManager(RequiredConfig):
         from_string_converter=int
     )
 
+    # Version of the index file format
+    INDEX_VERSION = 1
+
     def __init__(self, config, quit_check_callback=None):
         """constructor for a registration object that runs an LRU cache
        cleaner"""
@@ -153,10 +205,19 @@ class SymbolLRUCacheManager(RequiredConfig):
 
         self.directory = os.path.abspath(config.symbol_cache_path)
         self.max_size = config.symbol_cache_size
+        self.low_water_size = int(self.max_size * config.get('symbol_cache_low_water', 1.0))
         self.verbosity = config.verbosity
-        # Cache state
+        self.eviction_grace_period = config.get('eviction_grace_period', 0)
+        self.index_path = os.path.abspath(
+            config.get('symbol_cache_index_path') or self.directory.rstrip(os.sep) + '.index'
+        )
+        # Cache state: path -> (size, last used time), least recently used
+        # first
         self.total_size = 0
         self._lru = OrderedDict()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._threads = []
         # pyinotify bits
         self._wm = pyinotify.WatchManager()
         self._handler = EventHandler(self, verbosity=config.verbosity)
@@ -170,10 +231,25 @@ class SymbolLRUCacheManager(RequiredConfig):
             rec=True,
             auto_add=True
         )
-        # Load existing files into the cache.
-        self._get_existing_files(self.directory)
+        # Load existing files into the cache, from the index if there is one
+        if self._load_index():
+            self._start_thread('SymbolCacheReconcile', self._reconcile)
+        else:
+            self._get_existing_files(self.directory)
+            self._evict()
         self._notifier.start()
 
+        index_save_interval = config.get('index_save_interval', 0)
+        if index_save_interval:
+            self._start_thread('SymbolCacheIndexSaver', self._save_index_periodically,
+                               index_save_interval)
+
+    def _start_thread(self, name, target, *args):
+        thread = threading.Thread(name=name, target=target, args=args)
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+
     @property
     def num_files(self):
         return len(self._lru)
@@ -190,46 +266,227 @@ class SymbolLRUCacheManager(RequiredConfig):
             path = os.path.dirname(path)
 
     def _update_cache(self, path, update_size=False):
-        if path in self._lru:
-            size = self._lru.pop(path)
-            if update_size:
-                self.total_size -= size
-        else:
-            update_size = True
+        with self._lock:
+            if path in self._lru:
+                size, _ = self._lru.pop(path)
+                if update_size:
+                    self.total_size -= size
+            else:
+                update_size = True
 
-        if update_size:
-            try:
-                size = os.stat(path).st_size
-            except OSError:
-                self.logger.warning('file was not found while cleaning cache: %s', path)
+            if update_size:
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    self.logger.warning('file was not found while cleaning cache: %s', path)
+                    return
+
+                self.total_size += size
+                # If we're out of space, remove items from the cache until
+                # we're down to the low water mark.
+                if self.total_size > self.max_size:
+                    self._evict()
+            self._lru[path] = (size, time.time())
+
+    def _evict(self):
+        """remove least recently used files until the cache is down to the
+        low water mark"""
+        spared = 0
+        with self._lock:
+            if self.total_size <= self.max_size:
                 return
-
-            self.total_size += size
-            # If we're out of space, remove items from the cache until
-            # we fit again.
-            while self.total_size > self.max_size and self._lru:
-                rm_path, rm_size = self._lru.popitem(last=False)
-                self.total_size -= rm_size
-                os.unlink(rm_path)
-                self._rm_empty_dirs(rm_path)
+            while self.total_size > self.low_water_size and len(self._lru) > spared:
+                rm_path, entry = self._lru.popitem(last=False)
+                if self._in_grace_period(rm_path):
+                    # Move it to the most recently used end and try the next one
+                    self._lru[rm_path] = entry
+                    spared += 1
+                    continue
+                self.total_size -= entry[0]
+                try:
+                    os.unlink(rm_path)
+                    self._rm_empty_dirs(rm_path)
+                except OSError:
+                    # It was removed already
+                    pass
                 if self.verbosity >= 2:
                     self.logger.debug('RM %s', rm_path)
-        self._lru[path] = size
+
+    def _in_grace_period(self, path):
+        if not self.eviction_grace_period:
+            return False
+        try:
+            return time.time() - os.stat(path).st_mtime < self.eviction_grace_period
+        except OSError:
+            return False
 
     def _remove_cached(self, path):
         # We might have already removed this file in _update_cache.
-        if path in self._lru:
-            size = self._lru.pop(path)
-            self.total_size -= size
+        with self._lock:
+            if path in self._lru:
+                size, _ = self._lru.pop(path)
+                self.total_size -= size
 
     def _get_existing_files(self, path):
+        existing = []
         for base, dirs, files in os.walk(path):
             for f in files:
                 f = os.path.join(base, f)
-                self._update_cache(f)
+                try:
+                    stat = os.stat(f)
+                except OSError:
+                    continue
+                existing.append((stat.st_atime, f, stat.st_size))
+        # Least recently used first
+        with self._lock:
+            for atime, f, size in sorted(existing):
+                if f not in self._lru:
+                    self._lru[f] = (size, atime)
+                    self.total_size += size
+
+    def _load_index(self):
+        """load the cache state from the index; returns whether it was
+        loaded"""
+        try:
+            with open(self.index_path, 'r') as fp:
+                index = json.load(fp)
+            if index.get('version') != self.INDEX_VERSION:
+                return False
+            entries = [
+                (os.path.join(self.directory, relative_path), size, atime)
+                for relative_path, size, atime in index['files']
+            ]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError):
+            self.logger.warning('unable to load symbol cache index %s', self.index_path,
+                                exc_info=True)
+            return False
+
+        with self._lock:
+            for path, size, atime in entries:
+                self._lru[path] = (size, atime)
+                self.total_size += size
+        return True
+
+    def save_index(self):
+        """write the cache state to the index"""
+        with self._lock:
+            files = [
+                [os.path.relpath(path, self.directory), size, atime]
+                for path, (size, atime) in self._lru.items()
+            ]
+        data = json.dumps({'version': self.INDEX_VERSION, 'files': files})
+
+        index_dir = os.path.dirname(self.index_path)
+        fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix='.symbol-cache-index')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                fp.write(data)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _save_index_periodically(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.save_index()
+            except Exception:
+                self.logger.warning('unable to save symbol cache index', exc_info=True)
+
+    def _reconcile(self):
+        """bring the state loaded from the index in line with the files in
+        the cache directory
+
+        Files the index does not know of were added while nothing was
+        watching, they are considered the least recently used. Files in the
+        index that are gone are forgotten.
+        """
+        seen = set()
+        for base, dirs, files in os.walk(self.directory):
+            if self._stop.is_set():
+                return
+            for f in files:
+                path = os.path.join(base, f)
+                seen.add(path)
+                with self._lock:
+                    if path in self._lru:
+                        continue
+                    try:
+                        size = os.stat(path).st_size
+                    except OSError:
+                        continue
+                    self._lru[path] = (size, 0)
+                    self._lru.move_to_end(path, last=False)
+                    self.total_size += size
+
+        with self._lock:
+            # Only forget files that are still gone, inotify may have added
+            # some while walking
+            for path in [path for path in self._lru if path not in seen]:
+                if not os.path.exists(path):
+                    self._remove_cached(path)
+            self._evict()
+        self.logger.info('symbol cache reconciled: %d files, %d bytes',
+                         self.num_files, self.total_size)
+
+    def close(self):
+        self._stop.set()
+        if self._notifier.is_alive():
+            self._notifier.stop()
+        for thread in self._threads:
+            thread.join()
+        try:
+            self.save_index()
+        except Exception:
+            self.logger.warning('unable to save symbol cache index', exc_info=True)
+
+
+def _run_cache_manager(config_values, stop_event, parent_pid):
+    """run a SymbolLRUCacheManager until told to stop or the parent process
+    is gone"""
+    manager = SymbolLRUCacheManager(DotDict(config_values))
+    try:
+        while not stop_event.wait(5):
+            if os.getppid() != parent_pid:
+                break
+    finally:
+        manager.close()
+
+
+class SubprocessSymbolLRUCacheManager(SymbolLRUCacheManager):
+    """runs the SymbolLRUCacheManager in a separate process
+
+    Every file the stackwalker opens in the cache makes for an inotify event
+    to handle. Handling them in a separate process keeps that work from
+    competing with the processor's worker threads for the GIL.
+    """
+
+    def __init__(self, config, quit_check_callback=None):
+        self.config = config
+        self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+        config_values = dict(
+            (name, config[name]) for name in self.get_required_config() if name in config
+        )
+        # Start from a fresh interpreter rather than a fork of a process with
+        # threads
+        context = multiprocessing.get_context('spawn')
+        self._stop_event = context.Event()
+        self.process = context.Process(
+            name='SymbolLRUCacheManager',
+            target=_run_cache_manager,
+            args=(config_values, self._stop_event, os.getpid())
+        )
+        self.process.daemon = True
+        self.process.start()
 
     def close(self):
-        self._notifier.stop()
+        self._stop_event.set()
+        self.process.join()
 
 
 class NoOpCacheManager(RequiredConfig):
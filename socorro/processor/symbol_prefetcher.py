@@ -0,0 +1,277 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Fetches symbols files into the stackwalker's symbol cache ahead of time.
+
+The stackwalker downloads symbols files one at a time while it walks a stack,
+so a worker processing a crash with a cold symbol cache spends most of its
+time waiting for big downloads. The ``SymbolPrefetcher`` looks at crashes as
+they are queued, before a worker gets to them, and downloads the symbols files
+they are likely to need concurrently:
+
+* the modules referenced by the frames of the ``StackTraces`` annotation some
+  clients send with the crash
+* the modules that needed symbols in previously processed crashes of the same
+  build
+
+Files are downloaded to the symbol tmp directory and moved into the symbol
+cache with the same layout the stackwalker uses, so the stackwalker finds them
+there and the ``SymbolLRUCacheManager`` sees them as recently used. Symbols
+files that are already in the cache are opened, which marks them as recently
+used too.
+
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import tempfile
+import threading
+from urllib.parse import quote
+
+from glom import glom
+import markus
+
+from socorro.lib.requestslib import session_with_retries
+
+
+def symbol_file_name(debug_file):
+    """Returns the name of the symbols file for a module's debug file
+
+    >>> symbol_file_name('xul.pdb')
+    'xul.sym'
+    >>> symbol_file_name('libxul.so')
+    'libxul.so.sym'
+
+    """
+    if debug_file.lower().endswith('.pdb'):
+        return debug_file[:-4] + '.sym'
+    return debug_file + '.sym'
+
+
+def symbol_path(debug_file, debug_id):
+    """Returns the path of a symbols file relative to the symbol cache or a
+    symbols url"""
+    return os.path.join(debug_file, debug_id, symbol_file_name(debug_file))
+
+
+def get_build_key(raw_crash):
+    """Returns the key identifying the build a crash comes from or None"""
+    key = tuple(raw_crash.get(name) for name in ('ProductName', 'Version', 'BuildID'))
+    if not all(key):
+        return None
+    return key
+
+
+def get_annotation_modules(raw_crash, annotation='StackTraces'):
+    """Returns the (debug_file, debug_id) of modules the stack traces in a
+    crash annotation refer to
+
+    Only modules in frames of the crashing thread are returned, or of all the
+    threads if the crashing thread is unknown.
+
+    """
+    stack_traces = raw_crash.get(annotation)
+    if not stack_traces:
+        return []
+    if isinstance(stack_traces, str):
+        try:
+            stack_traces = json.loads(stack_traces)
+        except ValueError:
+            return []
+
+    modules = stack_traces.get('modules') or []
+    threads = stack_traces.get('threads') or []
+    crashing_thread = glom(stack_traces, 'crash_info.crashing_thread', default=None)
+    if isinstance(crashing_thread, int) and 0 <= crashing_thread < len(threads):
+        threads = [threads[crashing_thread]]
+
+    result = []
+    for thread in threads:
+        for frame in thread.get('frames') or []:
+            index = frame.get('module_index')
+            if not isinstance(index, int) or not 0 <= index < len(modules):
+                continue
+            module = modules[index]
+            if module.get('debug_file') and module.get('debug_id'):
+                item = (module['debug_file'], module['debug_id'])
+                if item not in result:
+                    result.append(item)
+    return result
+
+
+def get_loaded_modules(processed_crash):
+    """Returns the (debug_file, debug_id) of modules the stackwalker loaded
+    symbols for while processing a crash"""
+    result = []
+    for module in glom(processed_crash, 'json_dump.modules', default=None) or []:
+        if module.get('loaded_symbols') and module.get('debug_file') and module.get('debug_id'):
+            result.append((module['debug_file'], module['debug_id']))
+    return result
+
+
+class SymbolPrefetcher(object):
+    """Downloads symbols files of upcoming crashes into the symbol cache
+
+    :arg source: crash storage to fetch raw crashes from
+    :arg symbol_cache_path: the stackwalker's symbol cache directory
+    :arg symbol_tmp_path: directory to download to, on the same file system as
+        the symbol cache
+    :arg symbols_urls: ordered list of symbols urls to try
+    :arg number_of_threads: number of concurrent downloads
+    :arg builds_to_remember: number of builds to remember modules of
+    :arg modules_per_build: number of modules to remember per build
+    :arg annotation: name of the annotation holding stack traces
+    :arg session: requests session to download with
+
+    """
+
+    # Number of symbols files known to be missing to remember
+    MAX_MISSING = 10000
+
+    def __init__(
+        self, source, symbol_cache_path, symbol_tmp_path, symbols_urls, number_of_threads=4,
+        builds_to_remember=20, modules_per_build=100, annotation='StackTraces', session=None
+    ):
+        self.source = source
+        self.symbol_cache_path = symbol_cache_path
+        self.symbol_tmp_path = symbol_tmp_path
+        self.symbols_urls = [url.strip().rstrip('/') for url in symbols_urls if url.strip()]
+        self.builds_to_remember = builds_to_remember
+        self.modules_per_build = modules_per_build
+        self.annotation = annotation
+        self.session = session or session_with_retries(default_timeout=30.0)
+
+        self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+        self.metrics = markus.get_metrics('processor.symbolprefetcher')
+        self.executor = ThreadPoolExecutor(max_workers=number_of_threads)
+
+        self._lock = threading.Lock()
+        self._builds = OrderedDict()
+        self._pending = set()
+        self._missing = OrderedDict()
+
+    def peek(self, crash_id):
+        """Starts prefetching symbols for a crash that is about to be processed
+
+        :returns: a future that is done once all downloads have been started
+
+        """
+        return self.executor.submit(self._prefetch_crash, crash_id)
+
+    def _prefetch_crash(self, crash_id):
+        try:
+            raw_crash = self.source.get_raw_crash(crash_id)
+        except Exception:
+            self.logger.debug('unable to fetch raw crash %s', crash_id, exc_info=True)
+            return
+        for debug_file, debug_id in self.modules_for(raw_crash):
+            self.prefetch(debug_file, debug_id)
+
+    def modules_for(self, raw_crash):
+        """Returns the (debug_file, debug_id) of modules a crash likely needs"""
+        modules = get_annotation_modules(raw_crash, self.annotation)
+        build_key = get_build_key(raw_crash)
+        with self._lock:
+            known = list(self._builds.get(build_key, ()))
+        for item in known:
+            if item not in modules:
+                modules.append(item)
+        return modules
+
+    def learn(self, raw_crash, processed_crash):
+        """Remembers the modules a processed crash needed symbols for"""
+        build_key = get_build_key(raw_crash)
+        if build_key is None:
+            return
+        loaded = get_loaded_modules(processed_crash)
+        if not loaded:
+            return
+        with self._lock:
+            modules = self._builds.pop(build_key, OrderedDict())
+            for item in loaded:
+                modules.pop(item, None)
+                modules[item] = True
+            while len(modules) > self.modules_per_build:
+                modules.popitem(last=False)
+            self._builds[build_key] = modules
+            while len(self._builds) > self.builds_to_remember:
+                self._builds.popitem(last=False)
+
+    def prefetch(self, debug_file, debug_id):
+        """Makes sure a symbols file is in the cache, downloading it in the
+        background if it isn't"""
+        # Don't let a crash write outside the cache
+        if '/' in debug_file or '/' in debug_id or debug_file.startswith('.'):
+            return
+        item = (debug_file, debug_id)
+        path = os.path.join(self.symbol_cache_path, symbol_path(debug_file, debug_id))
+        with self._lock:
+            if item in self._pending or item in self._missing:
+                return
+            if not os.path.exists(path):
+                try:
+                    self.executor.submit(self._download, item, path)
+                except RuntimeError:
+                    # The prefetcher has been closed
+                    return
+                self._pending.add(item)
+                return
+
+        try:
+            # Opening the file makes the SymbolLRUCacheManager see it as
+            # recently used and the modification time protects it from
+            # eviction for a while
+            with open(path, 'rb'):
+                os.utime(path)
+        except OSError:
+            pass
+        self.metrics.incr('prefetch', tags=['result:cached'])
+
+    def _download(self, item, path):
+        try:
+            result = self._download_file(item, path)
+        except Exception:
+            self.logger.warning('unable to prefetch symbols for %s/%s', *item, exc_info=True)
+            result = 'error'
+        with self._lock:
+            self._pending.discard(item)
+            if result == 'missing':
+                self._missing[item] = True
+                while len(self._missing) > self.MAX_MISSING:
+                    self._missing.popitem(last=False)
+        self.metrics.incr('prefetch', tags=['result:%s' % result])
+
+    def _download_file(self, item, path):
+        relative_url = quote(symbol_path(*item).replace(os.sep, '/'))
+        for symbols_url in self.symbols_urls:
+            resp = self.session.get('%s/%s' % (symbols_url, relative_url), stream=True)
+            if resp.status_code == 404:
+                resp.close()
+                continue
+            resp.raise_for_status()
+
+            os.makedirs(self.symbol_tmp_path, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.symbol_tmp_path)
+            try:
+                with os.fdopen(fd, 'wb') as fp:
+                    for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                        fp.write(chunk)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            finally:
+                resp.close()
+            return 'downloaded'
+        return 'missing'
+
+    def close(self):
+        self.executor.shutdown(wait=False)
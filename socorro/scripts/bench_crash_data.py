@@ -0,0 +1,143 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import argparse
+import copy
+import timeit
+
+from glom import glom
+
+from socorro.scripts import WrappedTextHelpFormatter
+from socorro.signature.generator import SignatureGenerator
+from socorro.signature.utils import convert_to_crash_data, int_or_none
+
+
+DESCRIPTION = """
+Benchmarks building signature generation crash data from a processed crash
+
+This compares convert_to_crash_data, which uses precompiled accessors and only copies the frames
+signature generation looks at, with the way it was done before: a glom lookup for every field and
+a pass over every frame of every thread.
+
+"""
+
+
+def convert_to_crash_data_glom(raw_crash, processed_crash):
+    """convert_to_crash_data as it was implemented with glom"""
+    for thread in glom(processed_crash, 'json_dump.threads', default=[]):
+        for frame in thread.get('frames', []):
+            if 'normalized' in frame:
+                del frame['normalized']
+
+    return {
+        'java_stack_trace': glom(processed_crash, 'java_stack_trace', default=None),
+        'crashing_thread': glom(
+            processed_crash, 'json_dump.crash_info.crashing_thread', default=None
+        ),
+        'threads': glom(processed_crash, 'json_dump.threads', default=None),
+        'hang_type': glom(processed_crash, 'hang_type', default=None),
+        'os': glom(processed_crash, 'json_dump.system_info.os', default=None),
+        'oom_allocation_size': int_or_none(glom(raw_crash, 'OOMAllocationSize', default=None)),
+        'abort_message': glom(raw_crash, 'AbortMessage', default=None),
+        'mdsw_status_string': glom(processed_crash, 'mdsw_status_string', default=None),
+        'async_shutdown_timeout': glom(raw_crash, 'AsyncShutdownTimeout', default=None),
+        'jit_category': glom(processed_crash, 'classifications.jit.category', default=None),
+        'ipc_channel_error': glom(raw_crash, 'ipc_channel_error', default=None),
+        'ipc_message_name': glom(raw_crash, 'IPCMessageName', default=None),
+        'moz_crash_reason': glom(processed_crash, 'moz_crash_reason', default=None),
+        'additional_minidumps': glom(raw_crash, 'additional_minidumps', default=''),
+        'original_signature': glom(processed_crash, 'signature', default='')
+    }
+
+
+def build_crash(threads, frames, crashing_thread=0):
+    """Returns a (raw crash, processed crash) with that many threads and frames"""
+    raw_crash = {
+        'ProductName': 'Firefox',
+        'OOMAllocationSize': '1048576',
+        'additional_minidumps': 'browser',
+    }
+    processed_crash = {
+        'signature': 'mozilla::dom::Element::GetAttr',
+        'hang_type': 0,
+        'mdsw_status_string': 'OK',
+        'json_dump': {
+            'crash_info': {'crashing_thread': crashing_thread},
+            'system_info': {'os': 'Windows NT'},
+            'threads': [
+                {
+                    'frames': [
+                        {
+                            'frame': frame,
+                            'module': 'xul.dll',
+                            'function': 'mozilla::dom::Function%d(int, char const*)' % frame,
+                            'file': 'hg:hg.mozilla.org/mozilla-central:dom/F%d.cpp:abc' % frame,
+                            'line': frame,
+                            'module_offset': hex(frame),
+                            'offset': hex(frame),
+                        }
+                        for frame in range(frames)
+                    ]
+                }
+                for thread in range(threads)
+            ],
+        },
+    }
+    return raw_crash, processed_crash
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=WrappedTextHelpFormatter,
+        description=DESCRIPTION.strip(),
+    )
+    parser.add_argument(
+        '--threads', type=int, default=50,
+        help='number of threads in the crash'
+    )
+    parser.add_argument(
+        '--frames', type=int, default=100,
+        help='number of frames in every thread'
+    )
+    parser.add_argument(
+        '--number', type=int, default=1000,
+        help='number of conversions per round'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='number of rounds, the best one is reported'
+    )
+
+    if argv is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(argv)
+
+    raw_crash, processed_crash = build_crash(args.threads, args.frames)
+
+    # Make sure both produce the same signature before timing anything, also
+    # for a shutdown hang, which uses thread 0 rather than the crashing thread.
+    shutdownhang_crash = build_crash(args.threads, args.frames, crashing_thread=1)
+    shutdownhang_crash[1]['json_dump']['threads'][1]['frames'][0]['function'] = 'RunWatchdog'
+    generator = SignatureGenerator()
+    for raw, processed in ((raw_crash, processed_crash), shutdownhang_crash):
+        glom_result = generator.generate(
+            convert_to_crash_data_glom(raw, copy.deepcopy(processed))
+        )
+        accessor_result = generator.generate(convert_to_crash_data(raw, processed))
+        assert glom_result.signature == accessor_result.signature
+
+    results = []
+    for name, func in (('glom', convert_to_crash_data_glom), ('accessors', convert_to_crash_data)):
+        best = min(timeit.repeat(
+            lambda: func(raw_crash, processed_crash),
+            number=args.number,
+            repeat=args.repeat
+        ))
+        per_crash = best / args.number * 1000000
+        results.append(per_crash)
+        print('%-10s %10.1f us per crash' % (name, per_crash))
+
+    print('speedup    %10.1fx' % (results[0] / results[1]))
+    return 0
@@ -0,0 +1,398 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+from configman import ConfigurationManager
+from configman.dotdict import DotDict
+
+from socorro.external.crashstorage_base import CrashIDNotFound
+from socorro.processor.processor_2015 import DEFAULT_RULES, Processor2015
+from socorro.processor.profiling import CrashProfile, ProfileStats
+from socorro.scripts import WrappedTextHelpFormatter
+
+
+DESCRIPTION = """
+Benchmarks the processor by replaying a directory of crashes
+
+This processes the crashes in CRASHDIR with the same rules the processor uses and reports the
+throughput, the latency of every rule and the peak memory usage. CRASHDIR is in the layout
+fetch_crash_data writes, so a corpus can be created with:
+
+    socorro-cmd fetch_crash_data CRASHDIR CRASHID...
+
+Processed crashes are not saved anywhere.
+
+By default, the stackwalker is replaced by a stub that outputs the same canned stack for every
+crash, which leaves the stackwalker out of the numbers. Use --stackwalker to run a real one.
+
+BetaVersionRule looks up versions of beta and aurora crashes in the webapp. Use
+--skip-rule BetaVersionRule to leave it out when running offline.
+
+"""
+
+# Output of the stub stackwalker, just enough for the rules that use it to
+# have something to work with.
+STUB_FRAMES = [
+    {
+        'frame': 0,
+        'module': 'xul.dll',
+        'function': 'mozilla::dom::Element::GetAttr()',
+        'file': 'hg:hg.mozilla.org/mozilla-central:dom/base/Element.cpp:abcdef',
+        'line': 100,
+        'offset': '0x7ff000001000',
+        'module_offset': '0x1000',
+        'function_offset': '0x10',
+        'trust': 'context',
+    },
+    {
+        'frame': 1,
+        'module': 'xul.dll',
+        'function': 'nsThread::ProcessNextEvent(bool, bool*)',
+        'file': 'hg:hg.mozilla.org/mozilla-central:xpcom/threads/nsThread.cpp:abcdef',
+        'line': 200,
+        'offset': '0x7ff000002000',
+        'module_offset': '0x2000',
+        'function_offset': '0x20',
+        'trust': 'cfi',
+    },
+]
+
+STUB_STACKWALKER_OUTPUT = {
+    'status': 'OK',
+    'system_info': {
+        'os': 'Windows NT',
+        'os_ver': '10.0.17134',
+        'cpu_arch': 'amd64',
+        'cpu_info': 'family 6 model 142 stepping 10',
+        'cpu_count': 4,
+    },
+    'crash_info': {
+        'type': 'EXCEPTION_ACCESS_VIOLATION_READ',
+        'address': '0x0',
+        'crashing_thread': 0,
+    },
+    'main_module': 0,
+    'modules': [
+        {
+            'base_addr': '0x7ff000000000',
+            'end_addr': '0x7ff004000000',
+            'filename': 'xul.dll',
+            'debug_file': 'xul.pdb',
+            'debug_id': '0123456789ABCDEF0123456789ABCDEF1',
+            'code_id': '5B2F3A6F4000000',
+            'version': '62.0.0.6777',
+            'loaded_symbols': True,
+        },
+    ],
+    'crashing_thread': {
+        'threads_index': 0,
+        'total_frames': 2,
+        'frames': STUB_FRAMES,
+    },
+    'threads': [
+        {'frame_count': 2, 'frames': STUB_FRAMES},
+    ],
+}
+
+
+class CrashDirectory(object):
+    """Read-only crash storage for a directory written by fetch_crash_data
+
+    Raw crashes are in ``v2/raw_crash/<entropy>/<date>/<crash_id>``, the list
+    of dump names of a crash is in ``v1/dump_names/<crash_id>`` and dumps are
+    in ``v1/<dump_name>/<crash_id>``, where the main dump is named ``dump``.
+
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    def crash_ids(self):
+        """Returns the sorted list of crash ids in the directory"""
+        pattern = os.path.join(self.path, 'v2', 'raw_crash', '*', '*', '*')
+        return sorted(os.path.basename(path) for path in glob.glob(pattern))
+
+    def get_raw_crash(self, crash_id):
+        pattern = os.path.join(self.path, 'v2', 'raw_crash', '*', '*', crash_id)
+        paths = glob.glob(pattern)
+        if not paths:
+            raise CrashIDNotFound(crash_id)
+        with open(paths[0], 'r') as fp:
+            return json.load(fp, object_hook=DotDict)
+
+    def get_raw_dumps_as_files(self, crash_id):
+        """Returns a dict of dump name -> dump path
+
+        The dumps are not copied, so the processor reads them in place.
+
+        """
+        try:
+            with open(os.path.join(self.path, 'v1', 'dump_names', crash_id), 'r') as fp:
+                dump_names = json.load(fp)
+        except FileNotFoundError:
+            return {}
+
+        dumps = {}
+        for dump_name in dump_names:
+            file_name = 'dump' if dump_name == 'upload_file_minidump' else dump_name
+            dumps[dump_name] = os.path.join(self.path, 'v1', file_name, crash_id)
+        return dumps
+
+    def get_unredacted_processed(self, crash_id):
+        # Crashes are always processed from scratch
+        raise CrashIDNotFound(crash_id)
+
+
+def get_processor_config(settings):
+    """Returns the configuration for a Processor2015 given benchmark settings"""
+    values = {
+        'temporary_file_system_storage_path': settings['tmp_path'],
+        'symbol_tmp_path': os.path.join(settings['tmp_path'], 'symbols-tmp'),
+    }
+    if settings['stackwalker']:
+        values['command_pathname'] = settings['stackwalker']
+        if settings['symbols_urls']:
+            values['symbols_urls'] = ','.join(settings['symbols_urls'])
+        if settings['symbol_cache_path']:
+            values['symbol_cache_path'] = settings['symbol_cache_path']
+    else:
+        values['command_line'] = 'cat %s' % shlex.quote(settings['stub_output_path'])
+
+    cm = ConfigurationManager(
+        definition_source=Processor2015.get_required_config(),
+        values_source_list=[values],
+        argv_source=[],
+    )
+    config = cm.get_config()
+    config.processor_name = 'bench_processor'
+    config.sentry = DotDict({'dsn': None})
+    return config
+
+
+def process_crashes(settings, crash_ids, threads):
+    """Processes crashes with one processor and returns timing results
+
+    :arg settings: dict of benchmark settings
+    :arg crash_ids: the crash ids to process
+    :arg threads: number of threads sharing the processor
+
+    :returns: dict with the start and end times of processing, the profile of
+        every crash and the number of rule failures by rule name
+
+    """
+    rules = [rule for rule in DEFAULT_RULES if rule.__name__ not in settings['skip_rules']]
+    processor = Processor2015(get_processor_config(settings), rules=rules)
+    storage = CrashDirectory(settings['crashdir'])
+
+    def process_crash(crash_id):
+        profile = CrashProfile(crash_id)
+        raw_crash = storage.get_raw_crash(crash_id)
+        dumps = storage.get_raw_dumps_as_files(crash_id)
+        with profile.timer('stages', 'transform'):
+            processed_crash = processor.process_crash(
+                raw_crash, dumps, DotDict(), profile=profile
+            )
+        failures = [
+            note.split()[1] for note in processed_crash.processor_notes.split('; ')
+            if note.startswith('rule ') and ' failed: ' in note
+        ]
+        return profile.to_dict(), failures
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(process_crash, crash_ids))
+    end_time = time.time()
+    processor.close()
+
+    rule_failures = {}
+    for _, failures in results:
+        for rule_name in failures:
+            rule_failures[rule_name] = rule_failures.get(rule_name, 0) + 1
+
+    return {
+        'start_time': start_time,
+        'end_time': end_time,
+        'profiles': [profile for profile, _ in results],
+        'rule_failures': rule_failures,
+    }
+
+
+def get_peak_rss():
+    """Returns the peak resident set size of this process and its children in bytes"""
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+
+def run_benchmark(settings, crash_ids, processes, threads):
+    """Processes crashes in processes each running threads
+
+    :returns: dict with the number of crashes, the elapsed time, the peak RSS,
+        the summary of crash profiles and the number of rule failures
+
+    """
+    if processes > 1:
+        # Split crashes evenly across processes, each with its own processor
+        chunks = [crash_ids[i::processes] for i in range(processes)]
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(
+                process_crashes,
+                [(settings, chunk, threads) for chunk in chunks if chunk]
+            )
+    else:
+        results = [process_crashes(settings, crash_ids, threads)]
+
+    # Processors take a while to set up, so only the time spent processing
+    # crashes is counted
+    elapsed = (
+        max(result['end_time'] for result in results) -
+        min(result['start_time'] for result in results)
+    )
+
+    stats = ProfileStats(window_size=None)
+    rule_failures = {}
+    for result in results:
+        for profile in result['profiles']:
+            stats.add(profile)
+        for rule_name, count in result['rule_failures'].items():
+            rule_failures[rule_name] = rule_failures.get(rule_name, 0) + count
+
+    return {
+        'crashes': len(crash_ids),
+        'elapsed': elapsed,
+        'peak_rss': get_peak_rss(),
+        'summary': stats.summary(),
+        'rule_failures': rule_failures,
+    }
+
+
+def print_report(report, processes, threads):
+    print('crashes:    %d (%d processes, %d threads each)' % (
+        report['crashes'], processes, threads
+    ))
+    print('elapsed:    %.3f s' % report['elapsed'])
+    if report['elapsed']:
+        print('throughput: %.2f crashes/s' % (report['crashes'] / report['elapsed']))
+    print('peak rss:   %.1f MB' % (report['peak_rss'] / 1024 / 1024))
+    print()
+
+    print('%-40s %10s %10s %10s %10s' % ('latency (ms)', 'p50', 'p95', 'p99', 'max'))
+    for name, histogram in report['summary']['histograms'].items():
+        if name != 'total' and not name.startswith(('rules.', 'subprocesses.')):
+            continue
+        print('%-40s %10.2f %10.2f %10.2f %10.2f' % (
+            name,
+            histogram['p50'] * 1000,
+            histogram['p95'] * 1000,
+            histogram['p99'] * 1000,
+            histogram['max'] * 1000,
+        ))
+
+    if report['rule_failures']:
+        print()
+        for rule_name, count in sorted(report['rule_failures'].items()):
+            print('%s failed on %d crashes' % (rule_name, count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=WrappedTextHelpFormatter,
+        description=DESCRIPTION.strip(),
+    )
+    parser.add_argument(
+        '--processes', type=int, default=1,
+        help='number of processes, each with its own processor'
+    )
+    parser.add_argument(
+        '--threads', type=int, default=1,
+        help='number of threads sharing the processor in each process'
+    )
+    parser.add_argument(
+        '--passes', type=int, default=1,
+        help='number of times to process every crash'
+    )
+    parser.add_argument(
+        '--stackwalker',
+        help='path to the stackwalker binary; uses a stub stackwalker if not specified'
+    )
+    parser.add_argument(
+        '--symbols-url', dest='symbols_urls', action='append', default=[],
+        help='symbols url for the stackwalker; can be specified multiple times'
+    )
+    parser.add_argument(
+        '--symbol-cache-path',
+        help='directory for the stackwalker symbols cache'
+    )
+    parser.add_argument(
+        '--skip-rule', dest='skip_rules', action='append', default=[],
+        help='name of a rule to leave out; can be specified multiple times'
+    )
+    parser.add_argument(
+        '--verbose', action='store_true',
+        help='log rule errors as they happen instead of only counting them'
+    )
+    parser.add_argument('crashdir', help='directory of crashes written by fetch_crash_data')
+
+    if argv is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(argv)
+
+    rule_names = set(rule.__name__ for rule in DEFAULT_RULES)
+    unknown_rules = set(args.skip_rules) - rule_names
+    if unknown_rules:
+        parser.error('unknown rules: %s' % ', '.join(sorted(unknown_rules)))
+
+    if args.processes < 1 or args.threads < 1 or args.passes < 1:
+        parser.error('--processes, --threads and --passes must be at least 1')
+
+    crash_ids = CrashDirectory(args.crashdir).crash_ids()
+    if not crash_ids:
+        print('No crashes found in %s.' % args.crashdir)
+        return 1
+
+    if not args.verbose:
+        # Rule errors are counted and reported at the end
+        logging.disable(logging.CRITICAL)
+
+    tmp_path = tempfile.mkdtemp(prefix='bench_processor')
+    try:
+        stub_output_path = os.path.join(tmp_path, 'stackwalker_output.json')
+        with open(stub_output_path, 'w') as fp:
+            json.dump(STUB_STACKWALKER_OUTPUT, fp)
+
+        settings = {
+            'crashdir': args.crashdir,
+            'tmp_path': tmp_path,
+            'stub_output_path': stub_output_path,
+            'stackwalker': args.stackwalker,
+            'symbols_urls': args.symbols_urls,
+            'symbol_cache_path': args.symbol_cache_path,
+            'skip_rules': args.skip_rules,
+        }
+        report = run_benchmark(settings, crash_ids * args.passes, args.processes, args.threads)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+    print_report(report, args.processes, args.threads)
+    return 0
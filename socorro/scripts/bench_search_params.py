@@ -0,0 +1,79 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import argparse
+import copy
+import timeit
+
+from socorro.external.es.super_search_fields import FIELDS
+from socorro.lib.search_common import SearchBase, _compiled_fields_cache
+from socorro.scripts import WrappedTextHelpFormatter
+
+
+DESCRIPTION = """
+Benchmarks the per-request overhead of parsing Super Search parameters
+
+This compares the cost of handling a search the way it was done before the fields were compiled
+once per process (deep-copying the fields and rebuilding all the filters for every request) with
+the cost of handling it using the shared compiled fields.
+
+"""
+
+# Representative parameters sent by the Super Search page.
+SEARCH_PARAMS = {
+    'product': ['Firefox'],
+    'version': ['60.0', '61.0b2'],
+    'date': ['>=2018-06-01', '<2018-06-08'],
+    'signature': ['~OOM'],
+    '_facets': ['signature', 'platform'],
+    '_columns': ['uuid', 'date', 'signature', 'product', 'version'],
+    '_histogram.date': ['version'],
+    '_results_number': '100',
+}
+
+
+def parse_uncompiled():
+    # Deep-copy the fields and rebuild all the filters like every request
+    # used to do.
+    _compiled_fields_cache.clear()
+    fields = copy.deepcopy(FIELDS)
+    return SearchBase().get_parameters(_fields=fields, **SEARCH_PARAMS)
+
+
+def parse_compiled():
+    return SearchBase().get_parameters(_fields=FIELDS, **SEARCH_PARAMS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=WrappedTextHelpFormatter,
+        description=DESCRIPTION.strip(),
+    )
+    parser.add_argument(
+        '--number', type=int, default=200,
+        help='number of searches to parse per round'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='number of rounds, the best one is reported'
+    )
+
+    if argv is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(argv)
+
+    # Make sure both produce the same parameters before timing anything.
+    assert sorted(parse_uncompiled()) == sorted(parse_compiled())
+
+    results = []
+    for name, func in (('uncompiled', parse_uncompiled), ('compiled', parse_compiled)):
+        _compiled_fields_cache.clear()
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        per_request = best / args.number * 1000
+        results.append(per_request)
+        print('%-12s %8.3f ms per request' % (name, per_request))
+
+    print('speedup      %8.1fx' % (results[0] / results[1]))
+    return 0
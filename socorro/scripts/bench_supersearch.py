@@ -0,0 +1,164 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import argparse
+import contextlib
+import json
+import timeit
+
+from configman.dotdict import DotDict
+
+from socorro.external.es.super_search_fields import FIELDS
+from socorro.external.es.supersearch import SuperSearch
+from socorro.scripts import WrappedTextHelpFormatter
+
+
+DESCRIPTION = """
+Benchmarks the end-to-end overhead of a Super Search get()
+
+This runs a typical Top Crashers query against a fake Elasticsearch that answers right away, and
+compares building the query body for every request with filling the cached query template for
+that shape of parameters.
+
+"""
+
+# Parameters of the Top Crashers page.
+TOPCRASHERS_PARAMS = {
+    'product': ['Firefox'],
+    'version': ['62.0', '62.0b3'],
+    'date': ['>=2018-06-01T00:00:00+00:00', '<2018-06-08T00:00:00+00:00'],
+    '_aggs.signature': [
+        'platform',
+        'is_garbage_collecting',
+        'hang_type',
+        'process_type',
+        'startup_crash',
+        '_histogram.uptime',
+        '_cardinality.install_time',
+    ],
+    '_histogram_interval.uptime': 60,
+    '_results_number': 0,
+    '_facets': ['signature'],
+    '_facets_size': 50,
+}
+
+# Variations of values and shapes of the parameters to make sure the query
+# templates give the same bodies as building them.
+VARIATIONS = [
+    {},
+    {'date': ['>=2018-05-01T00:00:00+00:00', '<2018-05-02T12:00:00+00:00']},
+    {'version': ['61.0']},
+    {'signature': ['OOM | small']},
+    {'signature': ['js::GC | large'], 'version': ['60.0']},
+    {'signature': ['~OOM'], 'platform': ['!Windows']},
+    {'build_id': ['>20180601000000'], 'uptime': ['<60']},
+]
+
+
+class FakeElasticsearch(object):
+    """Elasticsearch client answering every query with no results."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def search(self, body, **kwargs):
+        # Serialize the body like the real client does.
+        self.bodies.append(json.dumps(body, sort_keys=True))
+        return {
+            'hits': {'total': 0, 'hits': []},
+            '_shards': {'failed': 0},
+            'aggregations': {},
+        }
+
+    def count(self, body, **kwargs):
+        self.bodies.append(json.dumps(body, sort_keys=True))
+        return {'count': 0}
+
+
+class FakeConnectionContext(object):
+    def __init__(self, config):
+        self.connection = FakeElasticsearch()
+
+    def get_index_template(self):
+        return 'socorro%Y%W'
+
+    def get_doctype(self):
+        return 'crash_reports'
+
+    def get_index_catalog_interval(self):
+        # Search all the indices of the dates, without fetching a catalog.
+        return 0
+
+    @contextlib.contextmanager
+    def __call__(self):
+        yield self.connection
+
+
+class UncachedSuperSearch(SuperSearch):
+    """SuperSearch building the query body for every request."""
+
+    def _build_search(self, **kwargs):
+        params = self.get_parameters(**kwargs)
+        indices, errors = self.get_existing_indices(params['date'])
+        search, request_columns = self._create_search(kwargs['_fields'], params)
+        search = (
+            search
+            .using(self.get_connection())
+            .index(*indices)
+            .doc_type(self.context.get_doctype())
+        )
+        return search, indices, params, errors, request_columns
+
+
+def get_body(api, params):
+    """Return the serialized bodies sent to Elasticsearch for a search."""
+    connection = api.get_connection()
+    connection.bodies = []
+    api.get(_fields=FIELDS, **params)
+    return connection.bodies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=WrappedTextHelpFormatter,
+        description=DESCRIPTION.strip(),
+    )
+    parser.add_argument(
+        '--number', type=int, default=200,
+        help='number of searches to run per round'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='number of rounds, the best one is reported'
+    )
+
+    if argv is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(argv)
+
+    config = DotDict({'elasticsearch_class': FakeConnectionContext})
+    apis = [('uncached', UncachedSuperSearch(config)), ('cached', SuperSearch(config))]
+
+    # Make sure both send the same queries before timing anything. The
+    # templates are filled with other values than the ones they were made
+    # with.
+    get_body(apis[1][1], TOPCRASHERS_PARAMS)
+    for variation in VARIATIONS:
+        params = dict(TOPCRASHERS_PARAMS, **variation)
+        assert get_body(apis[0][1], params) == get_body(apis[1][1], params)
+
+    results = []
+    for name, api in apis:
+        best = min(timeit.repeat(
+            lambda: get_body(api, TOPCRASHERS_PARAMS),
+            number=args.number,
+            repeat=args.repeat,
+        ))
+        per_request = best / args.number * 1000
+        results.append(per_request)
+        print('%-12s %8.3f ms per request' % (name, per_request))
+
+    print('speedup      %8.1fx' % (results[0] / results[1]))
+    return 0
@@ -27,6 +27,10 @@ will sleep for 10 seconds between submitting groups of crashes.
 Also, if you're processing a lot of crashes, you should let ops know and maybe
 they should increase the number of processor nodes.
 
+If only some processor rules changed, for example after a signature generation
+change, use "--rule SignatureGeneratorRule" to only re-run those rules on top of
+the existing processed crashes. That skips the minidump stackwalker.
+
 """
 
 DEFAULT_HOST = 'https://crash-stats.mozilla.com'
@@ -46,6 +50,10 @@ def main(argv=None):
         default=SLEEP_DEFAULT
     )
     parser.add_argument('--host', help='host for system to reprocess in', default=DEFAULT_HOST)
+    parser.add_argument(
+        '--rule', dest='rules', action='append',
+        help='only re-run this processor rule; can be specified multiple times'
+    )
     parser.add_argument('crashid', nargs='*', help='one or more crash ids to fetch data for')
 
     if argv is None:
@@ -83,13 +91,18 @@ def main(argv=None):
     print('Reprocessing %s crashes sleeping %s seconds between groups...' % (
         len(crash_ids), args.sleep
     ))
+    if args.rules:
+        print('Only re-running rules: %s' % ', '.join(args.rules))
 
     groups = list(chunked(crash_ids, CHUNK_SIZE))
     for i, group in enumerate(groups):
         print('Processing group ending with %s ... (%s/%s)' % (group[-1], i + 1, len(groups)))
+        data = {'crash_ids': group}
+        if args.rules:
+            data['rules'] = args.rules
         resp = session.post(
             url,
-            data={'crash_ids': group},
+            data=data,
             headers={
                 'Auth-Token': api_token
             }
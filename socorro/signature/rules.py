@@ -10,6 +10,7 @@ from glom import glom
 
 from . import siglists_utils
 from .utils import (
+    MAXIMUM_FRAMES_TO_CONSIDER,
     collapse,
     drop_bad_characters,
     drop_prefix_and_return_type,
@@ -18,7 +19,6 @@ from .utils import (
 
 
 SIGNATURE_MAX_LENGTH = 255
-MAXIMUM_FRAMES_TO_CONSIDER = 40
 
 
 def join_ignore_empty(delimiter, list_of_strings):
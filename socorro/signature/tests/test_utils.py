@@ -2,16 +2,135 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import copy
+
 import pytest
 
+from ..generator import SignatureGenerator
 from ..utils import (
+    Accessor,
     collapse,
+    convert_to_crash_data,
+    copy_signature_threads,
     drop_bad_characters,
     drop_prefix_and_return_type,
     parse_source_file,
 )
 
 
+@pytest.mark.parametrize('data, expected', [
+    ({'a': {'b': {'c': 1}}}, 1),
+    ({'a': {'b': {'c': None}}}, None),
+    ({'a': {'b': {}}}, 'default'),
+    ({'a': {'b': None}}, 'default'),
+    ({'a': 'text'}, 'default'),
+    ({'a': []}, 'default'),
+    ({}, 'default'),
+])
+def test_accessor(data, expected):
+    assert Accessor('a.b.c', default='default')(data) == expected
+
+
+def make_frames(count):
+    return [
+        {'function': 'f%d' % i, 'module': 'XUL.DLL', 'normalized': 'cached'}
+        for i in range(count)
+    ]
+
+
+def test_copy_signature_threads():
+    threads = [{'frames': make_frames(2)}, {'frames': make_frames(50)}, {'frames': make_frames(1)}]
+    original_threads = copy.deepcopy(threads)
+    thread_0 = {'frames': [{'function': 'f%d' % i, 'module': 'XUL.DLL'} for i in range(2)]}
+
+    signature_threads = copy_signature_threads(threads, 1)
+    # Thread 0 is always copied
+    assert signature_threads[0] == thread_0
+    # Only the frames signature generation looks at are copied and the
+    # cached normalized values are dropped
+    assert signature_threads[1] == {
+        'frames': [{'function': 'f%d' % i, 'module': 'XUL.DLL'} for i in range(40)]
+    }
+    assert signature_threads[2] == {}
+    assert threads == original_threads
+
+    assert copy_signature_threads(threads, 3) == [thread_0, {}, {}]
+    assert copy_signature_threads(threads, None) == [thread_0, {}, {}]
+    assert copy_signature_threads([], None) == []
+    assert copy_signature_threads(None, 0) is None
+
+
+def test_convert_to_crash_data():
+    raw_crash = {
+        'OOMAllocationSize': '1024',
+        'AbortMessage': 'abort',
+    }
+    processed_crash = {
+        'hang_type': 1,
+        'signature': 'old signature',
+        'classifications': {'jit': {'category': 'JIT Crash'}},
+        'json_dump': {
+            'crash_info': {'crashing_thread': 1},
+            'system_info': {'os': 'Windows NT'},
+            'threads': [{'frames': make_frames(1)}, {'frames': make_frames(1)}],
+        },
+    }
+    original_processed_crash = copy.deepcopy(processed_crash)
+
+    crash_data = convert_to_crash_data(raw_crash, processed_crash)
+    assert crash_data == {
+        'java_stack_trace': None,
+        'crashing_thread': 1,
+        'hang_type': 1,
+        'os': 'Windows NT',
+        'oom_allocation_size': 1024,
+        'abort_message': 'abort',
+        'mdsw_status_string': None,
+        'async_shutdown_timeout': None,
+        'jit_category': 'JIT Crash',
+        'ipc_channel_error': None,
+        'ipc_message_name': None,
+        'moz_crash_reason': None,
+        'additional_minidumps': '',
+        'original_signature': 'old signature',
+        'threads': [
+            {'frames': [{'function': 'f0', 'module': 'XUL.DLL'}]},
+            {'frames': [{'function': 'f0', 'module': 'XUL.DLL'}]},
+        ],
+    }
+    assert processed_crash == original_processed_crash
+
+
+def test_convert_to_crash_data_shutdownhang():
+    # Shutdown hangs crash in the watchdog thread, but the signature comes
+    # from thread 0 which is the one that hung
+    processed_crash = {
+        'signature': 'RunWatchdog',
+        'json_dump': {
+            'crash_info': {'crashing_thread': 1},
+            'threads': [
+                {'frames': [{'function': 'NtWaitForSingleObject', 'module': 'ntdll.dll'}]},
+                {'frames': [{'function': 'RunWatchdog', 'module': 'xul.dll'}]},
+                {'frames': [{'function': 'Unrelated', 'module': 'xul.dll'}]},
+            ],
+        },
+    }
+
+    crash_data = convert_to_crash_data({}, processed_crash)
+    assert crash_data['threads'][2] == {}
+
+    result = SignatureGenerator().generate(crash_data)
+    assert result.signature == 'shutdownhang | NtWaitForSingleObject'
+
+
+def test_convert_to_crash_data_empty():
+    crash_data = convert_to_crash_data({}, {})
+    assert crash_data['threads'] is None
+    assert crash_data['crashing_thread'] is None
+    assert crash_data['oom_allocation_size'] is None
+    assert crash_data['original_signature'] == ''
+
+
 @pytest.mark.parametrize('text, expected', [
     ('', ''),
     (u'', ''),
@@ -3,10 +3,13 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
-from glom import glom
 import six
 
 
+#: Maximum number of frames of the crashing thread signature generation looks at
+MAXIMUM_FRAMES_TO_CONSIDER = 40
+
+
 def int_or_none(data):
     try:
         return int(data)
@@ -14,74 +17,144 @@ def int_or_none(data):
         return None
 
 
-def convert_to_crash_data(raw_crash, processed_crash):
+class Accessor(object):
+    """Looks up a dotted path in nested dicts
+
+    This does what ``glom(data, path, default=default)`` does for paths of dict
+    keys, but the path is split once when the accessor is created rather than
+    parsed on every call.
+
     """
-    Takes a raw crash and a processed crash (these are Socorro-centric
-    data structures) and converts them to a crash data structure used
-    by signature generation.
+    __slots__ = ('path', 'keys', 'default')
 
-    :arg raw_crash: raw crash data from Socorro
-    :arg processed_crash: processed crash data from Socorro
+    def __init__(self, path, default=None):
+        self.path = path
+        self.keys = tuple(path.split('.'))
+        self.default = default
 
-    :returns: crash data structure that conforms to the schema
+    def __call__(self, data):
+        for key in self.keys:
+            try:
+                data = data[key]
+            except (KeyError, IndexError, TypeError):
+                return self.default
+        return data
 
-    """
-    # We want to generate fresh signatures, so we remove the "normalized" field
-    # from stack frames from the processed crash because this is essentially
-    # cached data from previous processing
-    for thread in glom(processed_crash, 'json_dump.threads', default=[]):
-        for frame in thread.get('frames', []):
-            if 'normalized' in frame:
-                del frame['normalized']
+    def __repr__(self):
+        return '<Accessor %s>' % self.path
 
-    crash_data = {
-        # JavaStackTrace or None
-        'java_stack_trace': glom(processed_crash, 'java_stack_trace', default=None),
 
-        # int or None
-        'crashing_thread': glom(
-            processed_crash, 'json_dump.crash_info.crashing_thread', default=None
-        ),
+RAW_CRASH = 'raw_crash'
+PROCESSED_CRASH = 'processed_crash'
+
+#: Crash data fields as (key, source, accessor)
+CRASH_DATA_FIELDS = (
+    # JavaStackTrace or None
+    ('java_stack_trace', PROCESSED_CRASH, Accessor('java_stack_trace')),
+
+    # int or None
+    ('crashing_thread', PROCESSED_CRASH, Accessor('json_dump.crash_info.crashing_thread')),
+
+    # int or None
+    ('hang_type', PROCESSED_CRASH, Accessor('hang_type')),
+
+    # text or None
+    ('os', PROCESSED_CRASH, Accessor('json_dump.system_info.os')),
+
+    # text or None
+    ('abort_message', RAW_CRASH, Accessor('AbortMessage')),
+
+    # text or None
+    ('mdsw_status_string', PROCESSED_CRASH, Accessor('mdsw_status_string')),
+
+    # text json with "phase", "conditions" (complicated--see code) or None
+    ('async_shutdown_timeout', RAW_CRASH, Accessor('AsyncShutdownTimeout')),
+
+    # text or None
+    ('jit_category', PROCESSED_CRASH, Accessor('classifications.jit.category')),
 
-        # list of CStackTrace or None
-        'threads': glom(processed_crash, 'json_dump.threads', default=None),
+    # text or None
+    ('ipc_channel_error', RAW_CRASH, Accessor('ipc_channel_error')),
 
-        # int or None
-        'hang_type': glom(processed_crash, 'hang_type', default=None),
+    # text or None
+    ('ipc_message_name', RAW_CRASH, Accessor('IPCMessageName')),
 
-        # text or None
-        'os': glom(processed_crash, 'json_dump.system_info.os', default=None),
+    # text
+    ('moz_crash_reason', PROCESSED_CRASH, Accessor('moz_crash_reason')),
 
-        # int or None
-        'oom_allocation_size': int_or_none(glom(raw_crash, 'OOMAllocationSize', default=None)),
+    # text; comma-delimited e.g. "browser,flash1,flash2"
+    ('additional_minidumps', RAW_CRASH, Accessor('additional_minidumps', default='')),
 
-        # text or None
-        'abort_message': glom(raw_crash, 'AbortMessage', default=None),
+    # pull out the original signature if there was one
+    ('original_signature', PROCESSED_CRASH, Accessor('signature', default='')),
+)
 
-        # text or None
-        'mdsw_status_string': glom(processed_crash, 'mdsw_status_string', default=None),
+_get_threads = Accessor('json_dump.threads')
+_get_oom_allocation_size = Accessor('OOMAllocationSize')
 
-        # text json with "phase", "conditions" (complicated--see code) or None
-        'async_shutdown_timeout': glom(raw_crash, 'AsyncShutdownTimeout', default=None),
 
-        # text or None
-        'jit_category': glom(processed_crash, 'classifications.jit.category', default=None),
+def copy_signature_threads(threads, thread_index):
+    """Copies the frames of the threads signature generation looks at
 
-        # text or None
-        'ipc_channel_error': glom(raw_crash, 'ipc_channel_error', default=None),
+    Those are the crashing thread and thread 0, which chrome hangs and
+    shutdown hangs use whatever the crashing thread is. Every other thread is
+    replaced with an empty dict, so indexes into the list stay the same. We
+    want to generate fresh signatures, so the "normalized" field is left out
+    of frames because it's essentially cached data from previous processing.
 
-        # text or None
-        'ipc_message_name': glom(raw_crash, 'IPCMessageName', default=None),
+    :arg threads: list of threads from the stackwalker output or None
+    :arg thread_index: index of the crashing thread
 
-        # text
-        'moz_crash_reason': glom(processed_crash, 'moz_crash_reason', default=None),
+    :returns: list of threads or None
+
+    """
+    if not isinstance(threads, list):
+        return threads
+
+    signature_threads = [{} for thread in threads]
+    for index in (0, thread_index):
+        if isinstance(index, int) and 0 <= index < len(threads):
+            frames = []
+            for frame in (threads[index].get('frames') or [])[:MAXIMUM_FRAMES_TO_CONSIDER]:
+                frame = dict(frame)
+                frame.pop('normalized', None)
+                frames.append(frame)
+            signature_threads[index] = {'frames': frames}
+    return signature_threads
 
-        # text; comma-delimited e.g. "browser,flash1,flash2"
-        'additional_minidumps': glom(raw_crash, 'additional_minidumps', default=''),
 
-        # pull out the original signature if there was one
-        'original_signature': glom(processed_crash, 'signature', default='')
+def convert_to_crash_data(raw_crash, processed_crash):
+    """
+    Takes a raw crash and a processed crash (these are Socorro-centric
+    data structures) and converts them to a crash data structure used
+    by signature generation.
+
+    Only the threads signature generation looks at are copied into "threads",
+    neither the raw crash nor the processed crash are changed.
+
+    :arg raw_crash: raw crash data from Socorro
+    :arg processed_crash: processed crash data from Socorro
+
+    :returns: crash data structure that conforms to the schema
+
+    """
+    sources = {
+        RAW_CRASH: raw_crash,
+        PROCESSED_CRASH: processed_crash,
     }
+    crash_data = {
+        key: accessor(sources[source])
+        for key, source, accessor in CRASH_DATA_FIELDS
+    }
+
+    # int or None
+    crash_data['oom_allocation_size'] = int_or_none(_get_oom_allocation_size(raw_crash))
+
+    # list of CStackTrace or None
+    crash_data['threads'] = copy_signature_threads(
+        _get_threads(processed_crash), crash_data['crashing_thread']
+    )
+
     return crash_data
 
 
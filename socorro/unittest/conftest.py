@@ -49,6 +49,8 @@ def db_conn():
         'crashstats_signature',
         'cron_job',
         'cron_log',
+        'topcrashers_signaturerollup',
+        'topcrashers_totalrollup',
     ]
 
     # Clean specific tables after usage
@@ -308,3 +308,63 @@ class TestArchiveScraperCronApp(object):
         archive_scraper.scrape_candidates('Firefox', 'firefox')
         data = self.fetch_data(db_conn)
         assert data == expected_data
+
+    def test_download_many(self, config, req_mock):
+        req_mock.get(HOST + '/pub/a/', text='a')
+        req_mock.get(HOST + '/pub/b/', text='b')
+        req_mock.get(HOST + '/pub/c/', status_code=404)
+
+        archive_scraper = ArchiveScraperCronApp(config, {})
+        contents = archive_scraper.download_many(['/pub/a/', '/pub/b/', '/pub/c/'])
+        assert contents == [b'a', b'b', '']
+
+    def test_conditional_requests(self, config, req_mock, tmpdir):
+        cache_path = str(tmpdir.join('cache.json'))
+        config.conditional_cache_path = cache_path
+
+        url = HOST + '/pub/firefox/'
+        req_mock.get(
+            url,
+            text='index page',
+            headers={'ETag': '"abc"', 'Last-Modified': 'Fri, 26 Oct 2018 03:14:00 GMT'}
+        )
+
+        # The first run has nothing cached, so it doesn't send conditional headers
+        archive_scraper = ArchiveScraperCronApp(config, {})
+        assert archive_scraper.download('/pub/firefox/') == b'index page'
+        assert 'If-None-Match' not in req_mock.last_request.headers
+        archive_scraper.conditional_cache.save()
+
+        # The second run loads the cache from disk, sends conditional headers
+        # and uses the cached content for a 304
+        req_mock.get(url, status_code=304)
+        archive_scraper = ArchiveScraperCronApp(config, {})
+        assert archive_scraper.download('/pub/firefox/') == b'index page'
+        assert req_mock.last_request.headers['If-None-Match'] == '"abc"'
+        assert (
+            req_mock.last_request.headers['If-Modified-Since'] ==
+            'Fri, 26 Oct 2018 03:14:00 GMT'
+        )
+
+    def test_run_failure_saves_cache(self, config, req_mock, tmpdir):
+        cache_path = str(tmpdir.join('cache.json'))
+        config.conditional_cache_path = cache_path
+
+        req_mock.get(HOST + '/pub/firefox/', text='index page', headers={'ETag': '"abc"'})
+
+        archive_scraper = ArchiveScraperCronApp(config, {})
+
+        def scrape_candidates(product_name, archive_directory):
+            archive_scraper.download('/pub/%s/' % archive_directory)
+            raise ValueError('boom')
+
+        archive_scraper.scrape_candidates = scrape_candidates
+        with pytest.raises(ValueError):
+            archive_scraper.run()
+
+        # The threads are shut down and the validators fetched so far are kept
+        assert archive_scraper.executor._shutdown
+        archive_scraper = ArchiveScraperCronApp(config, {})
+        assert archive_scraper.conditional_cache.get_request_headers(HOST + '/pub/firefox/') == {
+            'If-None-Match': '"abc"'
+        }
@@ -0,0 +1,216 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import datetime
+import json
+
+import mock
+
+from socorro.cron.crontabber_app import CronTabberApp
+from socorro.cron.jobs.topcrashers_rollup import TopCrashersRollupCronApp, summarize_signature
+from socorro.lib.datetimeutil import UTC
+from socorro.unittest.cron.crontabber_tests_base import get_config_manager, load_structure
+
+
+SIGNATURE_BUCKET = {
+    'term': 'OOM | small',
+    'count': 10,
+    'facets': {
+        'platform': [
+            {'term': 'Windows NT', 'count': 7},
+            {'term': 'Linux', 'count': 3},
+        ],
+        'is_garbage_collecting': [
+            {'term': 'T', 'count': 2},
+            {'term': 'F', 'count': 1},
+        ],
+        'hang_type': [
+            {'term': 1, 'count': 4},
+            {'term': -1, 'count': 1},
+            {'term': 0, 'count': 5},
+        ],
+        'process_type': [
+            {'term': 'plugin', 'count': 6},
+            {'term': 'content', 'count': 4},
+        ],
+        'startup_crash': [
+            {'term': 'T', 'count': 3},
+            {'term': 'F', 'count': 7},
+        ],
+        'histogram_uptime': [
+            {'term': 0, 'count': 8},
+            {'term': 60, 'count': 2},
+        ],
+        'cardinality_install_time': {'value': 9},
+    },
+}
+
+
+def test_summarize_signature():
+    assert summarize_signature(SIGNATURE_BUCKET) == {
+        'signature': 'OOM | small',
+        'count': 10,
+        'platform_counts': {'Windows NT': 7, 'Linux': 3},
+        'gc_count': 2,
+        'hang_count': 5,
+        'plugin_count': 6,
+        'startup_count': 3,
+        'startup_window_count': 8,
+        'install_count': 9,
+    }
+
+
+def test_summarize_signature_without_facets():
+    summary = summarize_signature({'term': 'OOM | small', 'count': 10})
+    assert summary['count'] == 10
+    assert summary['platform_counts'] == {}
+    assert summary['install_count'] == 0
+
+
+class TestTopCrashersRollupCronApp(object):
+    def _setup_config_manager(self, rollup_hours=1):
+        return get_config_manager(
+            jobs='socorro.cron.jobs.topcrashers_rollup.TopCrashersRollupCronApp|1h',
+            overrides={
+                'crontabber.class-TopCrashersRollupCronApp.process_types': 'any,browser',
+                'crontabber.class-TopCrashersRollupCronApp.rollup_hours': rollup_hours,
+            }
+        )
+
+    def run_job_and_assert_success(self, db_conn):
+        config_manager = self._setup_config_manager()
+        with config_manager.context() as config:
+            crontabberapp = CronTabberApp(config)
+            crontabberapp.run_one('topcrashers-rollup')
+
+        crontabber_info = load_structure(db_conn)
+        assert crontabber_info['topcrashers-rollup']['last_error'] == {}
+        assert crontabber_info['topcrashers-rollup']['last_success']
+
+    def fetch_rollups(self, db_conn):
+        cursor = db_conn.cursor()
+        cursor.execute("""
+            SELECT product, version, process_type, signature, count, platform_counts,
+                startup_count
+            FROM topcrashers_signaturerollup
+            ORDER BY process_type, signature
+        """)
+        signatures = cursor.fetchall()
+        cursor.execute("""
+            SELECT product, version, process_type, count
+            FROM topcrashers_totalrollup
+            ORDER BY process_type
+        """)
+        totals = cursor.fetchall()
+        return signatures, totals
+
+    @mock.patch('socorro.cron.jobs.topcrashers_rollup.RollupSuperSearch')
+    def test_rollups(self, mock_supersearch, db_conn):
+        calls = []
+
+        def mocked_get(**params):
+            calls.append(params)
+            count = 10 if 'process_type' in params else 20
+            return {
+                'hits': [],
+                'total': count,
+                'facets': {
+                    'product': [{
+                        'term': 'Firefox',
+                        'count': count,
+                        'facets': {
+                            'version': [{
+                                'term': '60.0',
+                                'count': count,
+                                'facets': {
+                                    'signature': [SIGNATURE_BUCKET],
+                                },
+                            }],
+                        },
+                    }],
+                },
+            }
+
+        mock_supersearch.return_value.get.side_effect = mocked_get
+
+        self.run_job_and_assert_success(db_conn)
+
+        assert len(calls) == 2
+        assert 'process_type' not in calls[0]
+        assert calls[1]['process_type'] == 'browser'
+        assert '_cardinality.install_time' in calls[0]['_aggs.product.version.signature']
+
+        signatures, totals = self.fetch_rollups(db_conn)
+        assert [row[:5] for row in signatures] == [
+            ('Firefox', '60.0', 'any', 'OOM | small', 10),
+            ('Firefox', '60.0', 'browser', 'OOM | small', 10),
+        ]
+        assert json.loads(signatures[0][5]) == {'Windows NT': 7, 'Linux': 3}
+        assert signatures[0][6] == 3
+        assert totals == [
+            ('Firefox', '60.0', 'any', 20),
+            ('Firefox', '60.0', 'browser', 10),
+        ]
+
+    @mock.patch('socorro.cron.jobs.topcrashers_rollup.RollupSuperSearch')
+    def test_no_crashes(self, mock_supersearch, db_conn):
+        mock_supersearch.return_value.get.return_value = {
+            'hits': [],
+            'total': 0,
+            'facets': {},
+        }
+
+        self.run_job_and_assert_success(db_conn)
+
+        assert self.fetch_rollups(db_conn) == ([], [])
+
+    @mock.patch('socorro.cron.jobs.topcrashers_rollup.RollupSuperSearch')
+    def test_late_crashes_are_counted(self, mock_supersearch, db_conn):
+        # Number of crash reports indexed so far for each hour
+        indexed = {}
+
+        def mocked_get(**params):
+            count = indexed.get(params['date'][0], 0)
+            if not count or 'process_type' in params:
+                return {'hits': [], 'total': 0, 'facets': {}}
+            return {
+                'hits': [],
+                'total': count,
+                'facets': {
+                    'product': [{
+                        'term': 'Firefox',
+                        'count': count,
+                        'facets': {
+                            'version': [{'term': '60.0', 'count': count, 'facets': {}}],
+                        },
+                    }],
+                },
+            }
+
+        mock_supersearch.return_value.get.side_effect = mocked_get
+
+        hour = datetime.datetime(2018, 6, 13, 10, 0, tzinfo=UTC)
+        hour_param = '>={}'.format(hour.isoformat())
+        config_manager = self._setup_config_manager(rollup_hours=2)
+        with config_manager.context() as config:
+            crontabberapp = CronTabberApp(config)
+            class_config = crontabberapp.config.crontabber['class-TopCrashersRollupCronApp']
+            app = TopCrashersRollupCronApp(class_config, {})
+
+            indexed[hour_param] = 1
+            app.run(hour + datetime.timedelta(hours=1))
+            assert self.fetch_rollups(db_conn)[1] == [
+                ('Firefox', '60.0', 'any', 1),
+                # Process types without crash reports are marked as rolled up
+                ('Firefox', '', 'browser', 0),
+            ]
+
+            # A crash report of that hour gets indexed after it was rolled
+            # up, the next run rolls the hour up again and counts it.
+            indexed[hour_param] = 2
+            app.run(hour + datetime.timedelta(hours=2))
+            assert self.fetch_rollups(db_conn)[1] == [
+                ('Firefox', '60.0', 'any', 2),
+                ('Firefox', '', 'browser', 0),
+            ]
@@ -24,6 +24,13 @@ class FakeModel(object):
         step = self._get_steps.pop(0)
         return step['response']
 
+    def iter_hits(self, *args, **kwargs):
+        if not self._get_steps:
+            raise Exception('Unexpected call to .iter_hits()')
+
+        step = self._get_steps.pop(0)
+        return iter(step['response']['hits'])
+
 
 class TestUpdateSignaturesCronApp(object):
     def _setup_config_manager(self):
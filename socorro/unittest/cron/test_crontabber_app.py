@@ -11,6 +11,7 @@ class TestJobsConverter(object):
         'BugzillaCronApp',
         'DependencySecurityCheckCronApp',
         'ElasticsearchCleanupCronApp',
+        'TopCrashersRollupCronApp',
         'UpdateSignaturesCronApp',
     ]
 
@@ -190,6 +190,22 @@ class TestConnectionContext:
 
         assert result == thing_as_binary
 
+    def test_fetch_stream(self):
+        conn = setup_mocked_s3_storage()
+        key_object = (
+            conn._connect_to_endpoint.return_value
+            .get_bucket.return_value.get_key.return_value
+        )
+        key_object.read.side_effect = [b'abc', b'def', b'']
+
+        chunks = conn.fetch_stream('fff13cf0-5671-4496-ab89-47a922141114', 'name_of_thing', 3)
+        # nothing is downloaded until the chunks are consumed
+        assert not key_object.read.called
+
+        assert list(chunks) == [b'abc', b'def']
+        key_object.read.assert_called_with(3)
+        assert key_object.close.called
+
     def assert_regional_s3_connection_parameters(self, region, conn):
         kwargs = {
             'aws_access_key_id': conn.config.access_key,
@@ -78,6 +78,44 @@ class TestSimplifiedCrashData(object):
                     datatype='raw'
                 )
 
+    @mock_s3_deprecated
+    def test_get_stream(self, boto_helper):
+        boto_helper.set_contents_from_string(
+            bucket_name='crashstats',
+            key='/v1/upload_file_minidump_flash1/0bba929f-8721-460c-dead-a43c20071027',
+            value=b'\xa0' * 10
+        )
+
+        boto_s3_store = self.get_s3_store()
+
+        result = boto_s3_store.get_stream(
+            uuid='0bba929f-8721-460c-dead-a43c20071027',
+            datatype='raw',
+            name='upload_file_minidump_flash1',
+        )
+        assert b''.join(result) == b'\xa0' * 10
+
+    @mock_s3_deprecated
+    def test_get_stream_not_found(self, boto_helper):
+        with mock.patch('socorro.lib.transaction.BACKOFF_TIMES', [0]):
+            boto_helper.get_or_create_bucket('crashstats')
+
+            boto_s3_store = self.get_s3_store()
+
+            with pytest.raises(CrashIDNotFound):
+                boto_s3_store.get_stream(
+                    uuid='0bba929f-8721-460c-dead-a43c20071027',
+                    datatype='raw'
+                )
+
+    def test_get_stream_not_raw(self):
+        boto_s3_store = self.get_s3_store()
+        with pytest.raises(BadArgumentError):
+            boto_s3_store.get_stream(
+                uuid='0bba929f-8721-460c-dead-a43c20071027',
+                datatype='processed'
+            )
+
     @mock_s3_deprecated
     def test_get_raw_crash_not_found(self, boto_helper):
         with mock.patch('socorro.lib.transaction.BACKOFF_TIMES', [0]):
@@ -335,6 +335,25 @@ class TestBotoS3CrashStorage(object):
         result = boto_s3_store.get_raw_dump('936ce666-ff3b-4c7a-9674-367fe2120408')
         assert result == b'this is a raw dump'
 
+    @mock_s3_deprecated
+    def test_get_raw_dump_stream(self, boto_helper):
+        boto_helper.set_contents_from_string(
+            bucket_name='crash_storage',
+            key='dev/v1/dump/936ce666-ff3b-4c7a-9674-367fe2120408',
+            value=b'this is a raw dump'
+        )
+
+        boto_s3_store = setup_mocked_s3_storage()
+        chunks = boto_s3_store.get_raw_dump_stream('936ce666-ff3b-4c7a-9674-367fe2120408')
+        assert b''.join(chunks) == b'this is a raw dump'
+
+    @mock_s3_deprecated
+    def test_get_raw_dump_stream_not_found(self):
+        boto_s3_store = setup_mocked_s3_storage()
+
+        with pytest.raises(CrashIDNotFound):
+            boto_s3_store.get_raw_dump_stream('0bba929f-dead-dead-dead-a43c20071027')
+
     @mock_s3_deprecated
     def test_get_raw_dump_not_found(self):
         boto_s3_store = setup_mocked_s3_storage()
@@ -64,6 +64,14 @@ class SuperSearchWithFields(SuperSearch):
         kwargs['_fields'] = copy.deepcopy(FIELDS)
         return super().get(**kwargs)
 
+    def get_multi(self, _searches, **kwargs):
+        kwargs['_fields'] = copy.deepcopy(FIELDS)
+        return super().get_multi(_searches, **kwargs)
+
+    def iter_hits(self, **kwargs):
+        kwargs['_fields'] = copy.deepcopy(FIELDS)
+        return super().iter_hits(**kwargs)
+
 
 class TestCaseWithConfig(object):
     """A simple TestCase class that can create configuration objects"""
@@ -0,0 +1,155 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import contextlib
+import datetime
+import threading
+
+from elasticsearch.exceptions import ConnectionError, NotFoundError
+from mock import Mock, patch
+
+from socorro.external.es.index_catalog import IndexCatalog
+from socorro.lib.datetimeutil import UTC
+
+
+# A Wednesday, far from the beginning of a week.
+NOW = datetime.datetime(2018, 6, 13, 12, 0, tzinfo=UTC)
+
+
+def to_timestamp(date):
+    return (date - datetime.datetime(1970, 1, 1, tzinfo=UTC)).total_seconds() * 1000
+
+
+def get_response(first_date, last_date):
+    return {
+        'hits': {'total': 0, 'hits': []},
+        'aggregations': {
+            'first_date': {'value': first_date and to_timestamp(first_date)},
+            'last_date': {'value': last_date and to_timestamp(last_date)},
+        },
+    }
+
+
+class TestIndexCatalog(object):
+    def get_context(self, aliases, responses):
+        context = Mock()
+        context.get_index_template.return_value = 'socorro%Y%W'
+        context.get_doctype.return_value = 'crash_reports'
+        context.indices_client.return_value.get_aliases.return_value = aliases
+
+        connection = Mock()
+        connection.msearch.return_value = {'responses': responses}
+
+        @contextlib.contextmanager
+        def get_connection():
+            yield connection
+
+        context.side_effect = get_connection
+        return context
+
+    @patch('socorro.external.es.index_catalog.utc_now', return_value=NOW)
+    def test_prune(self, mocked_utc_now):
+        now = NOW
+        last_week = now - datetime.timedelta(weeks=1)
+        two_weeks_ago = now - datetime.timedelta(weeks=2)
+
+        aliases = {
+            'socorro_old': {'aliases': {two_weeks_ago.strftime('socorro%Y%W'): {}}},
+            last_week.strftime('socorro%Y%W'): {'aliases': {}},
+            'socorro209901': {},
+        }
+        context = self.get_context(aliases, [
+            # Indices are sorted by name.
+            get_response(two_weeks_ago, two_weeks_ago + datetime.timedelta(days=1)),
+            get_response(last_week, last_week + datetime.timedelta(days=1)),
+            get_response(None, None),
+        ])
+        catalog = IndexCatalog(context, 300)
+
+        names = [
+            (now - datetime.timedelta(weeks=weeks)).strftime('socorro%Y%W')
+            for weeks in (3, 2, 1, 0)
+        ]
+        assert catalog.prune(names, now - datetime.timedelta(weeks=3), now) == (
+            names[1:], names[:1]
+        )
+        context.indices_client.return_value.get_aliases.assert_called_with(index='socorro*')
+
+        # Indices with no crash report in the dates are skipped, but indices
+        # of dates after the catalog was fetched are always kept.
+        start_date = last_week + datetime.timedelta(days=2)
+        assert catalog.prune(names, start_date, now) == (names[3:], names[:1])
+
+        # Empty indices are skipped.
+        assert catalog.prune(['socorro209901'], now, now) == ([], [])
+
+        # The catalog is only fetched once.
+        assert context.indices_client.return_value.get_aliases.call_count == 1
+
+    def test_refresh(self):
+        context = self.get_context({'socorro200101': {}}, [get_response(None, None)])
+        catalog = IndexCatalog(context, 0)
+        catalog.get_bounds()
+        catalog.get_bounds()
+        assert context.indices_client.return_value.get_aliases.call_count == 2
+
+        catalog = IndexCatalog(context, 300)
+        catalog.get_bounds()
+        catalog.clear()
+        catalog.get_bounds()
+        assert context.indices_client.return_value.get_aliases.call_count == 4
+
+    def test_slow_refresh_does_not_block(self):
+        catalog = IndexCatalog(Mock(), 300)
+        old_bounds = {'socorro200101': (None, None)}
+        new_bounds = {'socorro200102': (None, None)}
+        fetched = [old_bounds, new_bounds]
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch_bounds():
+            bounds = fetched.pop(0)
+            if bounds is new_bounds:
+                started.set()
+                release.wait(5)
+            return bounds
+
+        catalog._fetch_bounds = fetch_bounds
+        assert catalog.get_bounds()[0] == old_bounds
+
+        catalog.clear()
+        thread = threading.Thread(target=catalog.get_bounds)
+        thread.start()
+        try:
+            assert started.wait(5)
+            # Other callers get the previous catalog instead of waiting for
+            # the refresh.
+            assert catalog.get_bounds()[0] == old_bounds
+        finally:
+            release.set()
+            thread.join(5)
+
+        assert catalog.get_bounds()[0] == new_bounds
+        assert fetched == []
+
+    def test_no_index(self):
+        context = self.get_context({}, [])
+        context.indices_client.return_value.get_aliases.side_effect = NotFoundError
+        catalog = IndexCatalog(context, 300)
+
+        old_date = NOW - datetime.timedelta(weeks=4)
+        names = [old_date.strftime('socorro%Y%W')]
+        assert catalog.prune(names, old_date, old_date) == ([], names)
+
+    def test_error(self):
+        context = self.get_context({}, [])
+        get_aliases = context.indices_client.return_value.get_aliases
+        get_aliases.side_effect = ConnectionError('N/A', 'refused', None)
+        catalog = IndexCatalog(context, 300)
+
+        # Without a catalog, all the indices are searched.
+        assert catalog.prune(['socorro200101'], None, None) == (['socorro200101'], [])
+        assert catalog.get_bounds()[0] is None
+        # The catalog is not fetched again before the interval.
+        assert get_aliases.call_count == 1
@@ -609,6 +609,63 @@ class TestIntegrationSuperSearch(ElasticsearchTestCase):
         with pytest.raises(BadArgumentError):
             self.api.get(_sort='something')
 
+    def test_iter_hits(self):
+        number_of_crashes = 21
+        processed_crash = {
+            'signature': 'something',
+            'date_processed': self.now,
+        }
+        self.index_many_crashes(number_of_crashes, processed_crash)
+
+        # _results_number is ignored, all hits are returned
+        hits = list(self.api.iter_hits(_columns=['signature'], _results_number='10'))
+        assert len(hits) == number_of_crashes
+        assert hits[0] == {'signature': 'something'}
+
+        hits = list(self.api.iter_hits(signature='=nothing'))
+        assert hits == []
+
+    def test_searches_do_not_share_state(self):
+        processed_crash = {
+            'signature': 'something',
+            'product': 'WaterWolf',
+            'date_processed': self.now,
+        }
+        self.index_many_crashes(2, processed_crash)
+
+        # The same instance serves searches that run concurrently, a search
+        # started before another one keeps its own columns.
+        hits = self.api.iter_hits(_columns=['signature'])
+        assert next(hits) == {'signature': 'something'}
+        res = self.api.get(_columns=['product'])
+        assert res['hits'] == [{'product': 'WaterWolf'}] * 2
+        assert list(hits) == [{'signature': 'something'}]
+
+    def test_iter_hits_with_sorting(self):
+        self.index_crash({
+            'product': 'WaterWolf',
+            'date_processed': self.now,
+        })
+        self.index_crash({
+            'product': 'NightTrain',
+            'date_processed': self.now,
+        })
+        self.index_crash({
+            'product': 'EarthRaccoon',
+            'date_processed': self.now,
+        })
+        self.refresh_index()
+
+        hits = list(self.api.iter_hits(_sort='product', _columns=['product']))
+        assert [hit['product'] for hit in hits] == ['EarthRaccoon', 'NightTrain', 'WaterWolf']
+
+        hits = list(self.api.iter_hits(_sort='-product', _columns=['product']))
+        assert [hit['product'] for hit in hits] == ['WaterWolf', 'NightTrain', 'EarthRaccoon']
+
+        # Invalid field--"something" is invalid
+        with pytest.raises(BadArgumentError):
+            list(self.api.iter_hits(_sort='something'))
+
     def test_get_with_facets(self):
         self.index_crash({
             'signature': 'js::break_your_browser',
@@ -731,6 +788,115 @@ class TestIntegrationSuperSearch(ElasticsearchTestCase):
         with pytest.raises(BadArgumentError):
             self.api.get(_facets=['unknownfield'])
 
+    def test_get_with_cached_query_template(self):
+        yesterday = self.now - datetime.timedelta(days=1)
+        self.index_crash({
+            'signature': 'js::break_your_browser',
+            'product': 'WaterWolf',
+            'date_processed': yesterday,
+        })
+        self.index_crash({
+            'signature': 'OhILoveMyBrowser',
+            'product': 'NightTrain',
+            'date_processed': self.now,
+        })
+        self.refresh_index()
+
+        res = self.api.get(
+            product='WaterWolf',
+            signature='~js',
+            date='>=%s' % yesterday.isoformat(),
+        )
+        assert res['total'] == 1
+        assert res['hits'][0]['signature'] == 'js::break_your_browser'
+
+        # Same shape of parameters, the query template is reused with the
+        # new values.
+        res = self.api.get(
+            product='NightTrain',
+            signature='~Love',
+            date='>=%s' % self.now.isoformat(),
+        )
+        assert len(self.api._query_templates._entries) == 1
+        assert res['total'] == 1
+        assert res['hits'][0]['signature'] == 'OhILoveMyBrowser'
+
+        res = self.api.get(
+            product='NightTrain',
+            signature='~js',
+            date='>=%s' % self.now.isoformat(),
+        )
+        assert res['total'] == 0
+
+        # The query is the same as when building it from scratch.
+        query = self.api.get(product='NightTrain', _return_query=True)
+        self.api._query_templates.clear()
+        assert self.api.get(product='NightTrain', _return_query=True) == query
+
+    def test_get_multi(self):
+        self.index_crash({
+            'signature': 'js::break_your_browser',
+            'product': 'WaterWolf',
+            'os_name': 'Windows NT',
+            'date_processed': self.now,
+        })
+        self.index_crash({
+            'signature': 'js::break_your_browser',
+            'product': 'NightTrain',
+            'os_name': 'Linux',
+            'date_processed': self.now,
+        })
+        self.index_crash({
+            'signature': 'foo(bar)',
+            'product': 'WaterWolf',
+            'os_name': 'Linux',
+            'date_processed': self.now,
+        })
+        self.refresh_index()
+
+        searches = [
+            {'_facets': ['product']},
+            {'_facets': ['platform'], '_results_number': 0},
+            {'_facets': [], '_columns': ['product'], '_sort': ['product']},
+        ]
+        res = self.api.get_multi(searches, signature='=js::break_your_browser')
+        assert len(res) == 3
+
+        assert res[0]['total'] == 2
+        assert res[0]['facets']['product'] == [
+            {'term': 'NightTrain', 'count': 1},
+            {'term': 'WaterWolf', 'count': 1},
+        ]
+        assert res[1]['hits'] == []
+        assert res[1]['facets']['platform'] == [
+            {'term': 'Linux', 'count': 1},
+            {'term': 'Windows NT', 'count': 1},
+        ]
+        assert res[2]['hits'] == [{'product': 'NightTrain'}, {'product': 'WaterWolf'}]
+        assert res[2]['facets'] == {}
+
+        # Each search gives the same results as when run on its own
+        for search, results in zip(searches, res):
+            assert results == self.api.get(signature='=js::break_your_browser', **search)
+
+        assert self.api.get_multi([]) == []
+
+        with pytest.raises(BadArgumentError):
+            self.api.get_multi([{'_facets': ['product']}, {'_facets': ['unknownfield']}])
+
+    def test_get_multi_against_nonexistent_index(self):
+        config = self.get_base_config(cls=SuperSearchWithFields, es_index='socorro_test_reports_%W')
+        api = SuperSearchWithFields(config=config)
+
+        res = api.get_multi(
+            [{'_facets': ['product']}, {'_facets': ['platform']}],
+            date=['>2000-01-01T00:00:00', '<2000-01-10T00:00:00'],
+        )
+        # Searches failing in the batch are run again on their own
+        for results in res:
+            assert results['total'] == 0
+            assert len(results['errors']) == 3  # 3 weeks are missing
+
     def test_get_with_too_many_facets(self):
         # Some crazy big number
         with pytest.raises(BadArgumentError):
@@ -1752,6 +1918,15 @@ class TestIntegrationSuperSearch(ElasticsearchTestCase):
         assert len(res['hits']) == 0
         assert len(res['errors']) == 3  # 3 weeks are missing
 
+    def test_iter_hits_against_nonexistent_index(self):
+        config = self.get_base_config(cls=SuperSearchWithFields, es_index='socorro_test_reports_%W')
+        api = SuperSearchWithFields(config=config)
+        params = {
+            'date': ['>2000-01-01T00:00:00', '<2000-01-10T00:00:00']
+        }
+
+        assert list(api.iter_hits(**params)) == []
+
     def test_get_too_large_date_range(self):
         # this is a whole year apart
         params = {
@@ -4,9 +4,27 @@
 
 from configman.dotdict import DotDict
 from mock import Mock, MagicMock, patch
+import pytest
 
-from socorro.external.rabbitmq.crashstorage import RabbitMQCrashStorage
+from socorro.external.rabbitmq.crashstorage import (
+    RabbitMQCrashStorage,
+    ReprocessingOneRabbitMQCrashStore,
+    build_job,
+    parse_job,
+)
 from socorro.external.crashstorage_base import Redactor
+from socorro.lib import BadArgumentError
+
+
+def test_build_and_parse_job():
+    assert build_job('crash_id') == 'crash_id'
+    assert parse_job('crash_id') == ('crash_id', None)
+
+    job = build_job('crash_id', ['SignatureGeneratorRule', 'JitCrashCategorizeRule'])
+    assert job == 'crash_id:SignatureGeneratorRule,JitCrashCategorizeRule'
+    assert parse_job(job) == (
+        'crash_id', ['SignatureGeneratorRule', 'JitCrashCategorizeRule']
+    )
 
 
 class TestCrashStorage(object):
@@ -206,3 +224,36 @@ class TestCrashStorage(object):
         expected = ['normal_crash_id']
         for result in crash_store.new_crashes():
             assert expected.pop() == result
+
+
+class TestReprocessingOneRabbitMQCrashStore(object):
+    def _setup_config(self):
+        config = DotDict()
+        config.rabbitmq_class = MagicMock()
+        config.routing_key = 'socorro.reprocessing'
+        config.filter_on_legacy_processing = False
+        config.redactor_class = Redactor
+        config.forbidden_keys = Redactor.required_config.forbidden_keys.default
+        return config
+
+    def test_reprocess(self):
+        crash_store = ReprocessingOneRabbitMQCrashStore(self._setup_config())
+        with patch('socorro.external.rabbitmq.crashstorage.retry') as retry_mock:
+            assert crash_store.reprocess(['crash1', 'crash2'])
+            assert [call[1]['crash_id'] for call in retry_mock.call_args_list] == [
+                'crash1', 'crash2'
+            ]
+
+    def test_reprocess_rules(self):
+        crash_store = ReprocessingOneRabbitMQCrashStore(self._setup_config())
+        with patch('socorro.external.rabbitmq.crashstorage.retry') as retry_mock:
+            assert crash_store.reprocess('crash1', rules=['SignatureGeneratorRule'])
+            retry_mock.assert_called_with(
+                crash_store.rabbitmq,
+                crash_store.quit_check,
+                crash_store._save_raw_crash,
+                crash_id='crash1:SignatureGeneratorRule'
+            )
+
+        with pytest.raises(BadArgumentError):
+            crash_store.reprocess('crash1', rules=['Bad:Rule'])
@@ -40,3 +40,16 @@ class TestRMQNewCrashSource(object):
             assert str(i) == crash_id
             assert crash_id == kwargs['finished_func']()
         assert i == 9
+
+    def test__iter__rerun_rules(self):
+        config = self._setup_config()
+        ncs = RMQNewCrashSource(config)
+        ncs.crash_store.new_crashes = lambda: iter(['crash1', 'crash2:RuleA,RuleB'])
+
+        (args1, kwargs1), (args2, kwargs2) = list(ncs())
+        assert args1 == ('crash1',)
+        assert 'rerun_rules' not in kwargs1
+        assert args2 == ('crash2',)
+        assert kwargs2['rerun_rules'] == ['RuleA', 'RuleB']
+        # The job is acknowledged with the original message
+        assert kwargs2['finished_func']() == 'crash2:RuleA,RuleB'
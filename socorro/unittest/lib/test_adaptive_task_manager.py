@@ -0,0 +1,176 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+from configman.dotdict import DotDict
+from markus.testing import MetricsMock
+import pytest
+
+from socorro.lib.adaptive_task_manager import (
+    AdaptiveThreadedTaskManager,
+    ConcurrencyController,
+    ConcurrencySample,
+    JobStats,
+)
+
+
+def sample(**kwargs):
+    values = {
+        'threads': 4,
+        'jobs': 100,
+        'queue_wait': 0.0,
+        'service_time': 1.0,
+        'utilization': 0.9,
+        'cpu_utilization': 0.5,
+        'throughput': 10.0,
+    }
+    values.update(kwargs)
+    return ConcurrencySample(**values)
+
+
+def get_config(**kwargs):
+    config = DotDict()
+    config.idle_delay = 1
+    config.quit_on_empty_queue = False
+    config.number_of_threads = 2
+    config.maximum_queue_size = 4
+    config.minimum_number_of_threads = 1
+    config.maximum_number_of_threads = 4
+    config.adjustment_interval = 60
+    config.target_cpu_utilization = 0.75
+    config.maximum_cpu_utilization = 0.95
+    config.queue_wait_ratio = 0.5
+    config.idle_utilization = 0.5
+    config.throughput_tolerance = 0.05
+    config.backoff_intervals = 6
+    config.metrics_prefix = 'processor.concurrency'
+    config.update(kwargs)
+    return config
+
+
+class TestJobStats(object):
+    def test_collect(self):
+        stats = JobStats()
+        stats.record(1.0, 2.0)
+        stats.record(3.0, 4.0)
+        assert stats.collect() == (2, 4.0, 6.0)
+        assert stats.collect() == (0, 0.0, 0.0)
+
+
+class TestConcurrencyController(object):
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            ConcurrencyController(minimum=0, maximum=4)
+        with pytest.raises(ValueError):
+            ConcurrencyController(minimum=4, maximum=2)
+
+    def test_steady(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample()) == (4, 'steady')
+
+    def test_grow_on_queue_wait(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample(queue_wait=0.6)) == (5, 'queue_wait')
+
+    def test_no_growth_when_cpu_is_busy(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample(queue_wait=0.6, cpu_utilization=0.8)) == (4, 'steady')
+
+    def test_shrink_when_cpu_is_saturated(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample(queue_wait=2.0, cpu_utilization=0.99)) == (3, 'cpu')
+
+    def test_shrink_when_idle(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample(utilization=0.2)) == (3, 'idle')
+        assert controller.decide(sample(jobs=0, utilization=0.0)) == (3, 'idle')
+
+    def test_bounds(self):
+        controller = ConcurrencyController(minimum=4, maximum=4)
+        assert controller.decide(sample(queue_wait=0.6)) == (4, 'bounds')
+        assert controller.decide(sample(utilization=0.2)) == (4, 'bounds')
+
+    def test_undo_growth_that_hurt_throughput(self):
+        controller = ConcurrencyController(minimum=1, maximum=8, backoff_intervals=2)
+        assert controller.decide(sample(queue_wait=0.6, throughput=10.0)) == (5, 'queue_wait')
+        assert controller.decide(
+            sample(threads=5, queue_wait=0.6, throughput=9.0)
+        ) == (4, 'throughput')
+        # Jobs still wait, but growing didn't help a moment ago
+        assert controller.decide(sample(queue_wait=0.6)) == (4, 'backoff')
+        assert controller.decide(sample(queue_wait=0.6)) == (5, 'queue_wait')
+
+    def test_keep_growth_that_helped_throughput(self):
+        controller = ConcurrencyController(minimum=1, maximum=8)
+        assert controller.decide(sample(queue_wait=0.6, throughput=10.0)) == (5, 'queue_wait')
+        assert controller.decide(
+            sample(threads=5, queue_wait=0.6, throughput=12.0)
+        ) == (6, 'queue_wait')
+
+
+class TestAdaptiveThreadedTaskManager(object):
+    def test_initial_threads_within_bounds(self):
+        config = get_config(number_of_threads=8)
+        ttm = AdaptiveThreadedTaskManager(config)
+        assert ttm.number_of_threads == 4
+        assert ttm.task_queue.maxsize == 2
+
+    def test_doing_work(self):
+        my_list = []
+
+        def insert_into_list(an_item):
+            my_list.append(an_item)
+
+        ttm = AdaptiveThreadedTaskManager(get_config(), task_func=insert_into_list)
+        try:
+            ttm.start()
+            time.sleep(0.2)
+            assert len(my_list) == 10
+            assert sorted(my_list) == list(range(10))
+            assert ttm.job_stats.jobs == 10
+            ttm.stop()
+        finally:
+            ttm.wait_for_completion()
+        assert not ttm.controller_thread.is_alive()
+        assert not any(t.is_alive() for t in ttm.thread_list)
+
+    def test_adjust(self):
+        ttm = AdaptiveThreadedTaskManager(get_config())
+        ttm.thread_list = []
+        ttm._last_sample_time = time.time() - 10
+        ttm._last_cpu_time = 0
+        # A job that waited as long as it ran while the cpus had nothing to do
+        ttm.job_stats.record(1.0, 1.0)
+
+        with MetricsMock() as mm:
+            ttm.controller.decide = lambda sample: (3, 'queue_wait')
+            assert ttm.adjust() == ('grow', 'queue_wait')
+            assert ttm.number_of_threads == 3
+            assert len(ttm.thread_list) == 1
+            assert ttm.task_queue.maxsize == 6
+            assert mm.has_record(
+                'incr', stat='processor.concurrency.adjustment',
+                tags=['action:grow', 'reason:queue_wait']
+            )
+            assert mm.has_record('gauge', stat='processor.concurrency.threads', value=3)
+
+            ttm.controller.decide = lambda sample: (2, 'idle')
+            assert ttm.adjust() == ('shrink', 'idle')
+            assert ttm.number_of_threads == 2
+            assert ttm.task_queue.maxsize == 4
+
+        # The death token retires the thread that was started
+        ttm.thread_list[0].join(1.0)
+        assert not ttm.thread_list[0].is_alive()
+
+    def test_shrink_with_full_queue(self):
+        ttm = AdaptiveThreadedTaskManager(get_config(maximum_queue_size=2))
+        ttm._last_sample_time = time.time() - 10
+        ttm._last_cpu_time = 0
+        ttm.task_queue.put((None, None))
+        ttm.task_queue.put((None, None))
+        ttm.controller.decide = lambda sample: (1, 'idle')
+        assert ttm.adjust() == ('hold', 'queue_full')
+        assert ttm.number_of_threads == 2
@@ -2,13 +2,20 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import copy
 import datetime
 
 import pytest
 
 from socorro.lib import BadArgumentError, datetimeutil
 from socorro.lib.search_common import (
-    SearchBase, SearchParam, convert_to_type, get_parameters, restrict_fields
+    FieldsCompilationCache,
+    SearchBase,
+    SearchParam,
+    compile_fields,
+    convert_to_type,
+    get_parameters,
+    restrict_fields,
 )
 
 
@@ -320,6 +327,68 @@ class TestSearchBase(object):
                 assert param.value == ['1.9b2']
 
 
+class TestCompiledFields(object):
+    def test_compile_fields(self):
+        compiled = compile_fields(SUPERSEARCH_FIELDS_MOCKED_RESULTS)
+
+        names = [x.name for x in compiled.filters]
+        for field in SUPERSEARCH_FIELDS_MOCKED_RESULTS.values():
+            assert field['name'] in names
+            assert '_aggs.%s' % field['name'] in names
+        assert '_histogram.date' in names
+        assert compiled.histogram_fields == ('date', 'build_id')
+
+        assert compiled.get_filter('_histogram_interval.date').default == 'day'
+        assert compiled.get_filter('signature').data_type == 'str'
+        assert compiled.get_filter('unknown') is None
+
+    def test_compile_fields_is_shared(self):
+        fields = copy.deepcopy(SUPERSEARCH_FIELDS_MOCKED_RESULTS)
+        compiled = compile_fields(fields)
+        assert compile_fields(fields) is compiled
+
+        # A different mapping gets its own compiled fields.
+        assert compile_fields(copy.deepcopy(fields)) is not compiled
+
+        # All searches share the filters, which are not kept on them.
+        search = SearchBase()
+        search.get_parameters(_fields=fields)
+        other_search = SearchBase()
+        assert search.build_filters(fields) is other_search.build_filters(fields)
+        assert not hasattr(search, 'filters')
+        assert search.get_filter(fields, '_columns').default == [
+            'uuid', 'date', 'signature', 'product', 'version'
+        ]
+
+    def test_fields_compilation_cache(self):
+        calls = []
+
+        def compile_func(fields, suffix):
+            calls.append(fields)
+            return [x + suffix for x in fields]
+
+        cache = FieldsCompilationCache(compile_func, max_size=2)
+        fields_a = {'a': 1}
+        fields_b = {'b': 1}
+        fields_c = {'c': 1}
+
+        assert cache.get(fields_a, '!') == ['a!']
+        assert cache.get(fields_a, '!') == ['a!']
+        assert cache.get(fields_a, '?') == ['a?']
+        assert len(calls) == 2
+
+        # Adding more entries than max_size evicts the least recently used.
+        cache.get(fields_b, '!')
+        cache.get(fields_c, '!')
+        assert len(calls) == 4
+        cache.get(fields_a, '!')
+        assert len(calls) == 5
+
+        cache.clear()
+        cache.get(fields_a, '!')
+        assert len(calls) == 6
+
+
 class TestSearchCommon(object):
     """Test functions of the search_common module. """
 
@@ -2,10 +2,20 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import base64
+import gzip
+import io
 import os
 import json
 
-from socorro.processor.rules.memory_report_extraction import MemoryReportExtraction
+import pytest
+
+from socorro.processor.rules.memory_report_extraction import (
+    MemoryMeasures,
+    MemoryReportExtraction,
+    MemoryReportTooLarge,
+    read_memory_report,
+)
 from socorro.unittest.processor import create_basic_fake_processor
 
 
@@ -18,6 +28,65 @@ def get_example_file_data(filename):
         return json.loads(f.read())
 
 
+def get_example_file_bytes(filename):
+    file_path = os.path.join(HERE, 'memory_reports', filename)
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+class TestReadMemoryReport(object):
+    @pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+    def test_same_as_json(self, chunk_size):
+        data = get_example_file_bytes('good.json')
+        memory_report = read_memory_report(io.BytesIO(data), len(data), chunk_size=chunk_size)
+        assert memory_report == json.loads(data.decode('utf-8'))
+
+    def test_measures(self):
+        data = get_example_file_bytes('good.json')
+        measures = MemoryMeasures(11717)
+        memory_report = read_memory_report(
+            io.BytesIO(data), len(data), measures=measures, keep_reports=False
+        )
+        assert memory_report == {'version': 1, 'hasMozMallocUsableSize': True}
+        assert measures.result()['js_main_runtime'] == 600000
+
+    def test_measures_error(self):
+        data = get_example_file_bytes('bad_kind.json')
+        measures = MemoryMeasures(11620)
+        memory_report = read_memory_report(io.BytesIO(data), len(data), measures=measures)
+        # The memory report is still read completely
+        assert memory_report == json.loads(data.decode('utf-8'))
+        with pytest.raises(ValueError):
+            measures.result()
+
+    def test_non_ascii(self):
+        data = json.dumps({'reports': [{'path': '\u00e9t\u00e9 \u2603'}]}, ensure_ascii=False)
+        memory_report = read_memory_report(io.BytesIO(data.encode('utf-8')), 100, chunk_size=1)
+        assert memory_report == {'reports': [{'path': '\u00e9t\u00e9 \u2603'}]}
+
+    def test_numbers_across_chunks(self):
+        data = b'{"version": 12345, "reports": [{"amount": 67890}]}'
+        memory_report = read_memory_report(io.BytesIO(data), len(data), chunk_size=3)
+        assert memory_report == {'version': 12345, 'reports': [{'amount': 67890}]}
+
+    def test_too_large(self):
+        data = get_example_file_bytes('good.json')
+        with pytest.raises(MemoryReportTooLarge):
+            read_memory_report(io.BytesIO(data), 1000, chunk_size=100)
+
+    @pytest.mark.parametrize('data', [
+        b'',
+        b'[]',
+        b'{"reports": [{}',
+        b'{"reports": [{}] "version": 1}',
+        b'{"version": 1} junk',
+        b'{1: 2}',
+    ])
+    def test_bad_json(self, data):
+        with pytest.raises(ValueError):
+            read_memory_report(io.BytesIO(data), 1000)
+
+
 class TestMemoryReportExtraction(object):
     def get_config(self):
         fake_processor = create_basic_fake_processor()
@@ -129,6 +198,44 @@ class TestMemoryReportExtraction(object):
         }
         assert processed_crash['memory_measures'] == expected_res
 
+    def test_action_precomputed_measures(self):
+        config = self.get_config()
+        rule = MemoryReportExtraction(config)
+
+        measures = MemoryMeasures(11620)
+        measures.add({
+            'process': 'Main Process (pid 11620)',
+            'path': 'ghost-windows',
+            'kind': 2,
+            'units': 1,
+            'amount': 3,
+        })
+        processed_crash = {}
+        processed_crash['memory_report'] = {'version': 1, 'hasMozMallocUsableSize': True}
+        processed_crash['json_dump'] = {'pid': 11620}
+        processor_meta = {'memory_measures': measures}
+
+        assert rule.predicate({}, {}, processed_crash, processor_meta)
+        rule.action({}, {}, processed_crash, processor_meta)
+        assert processed_crash['memory_measures']['ghost_windows'] == 3
+
+    def test_action_compressed_report(self):
+        config = self.get_config()
+        rule = MemoryReportExtraction(config)
+
+        compressed = gzip.compress(get_example_file_bytes('good.json'))
+        processed_crash = {}
+        processed_crash['memory_report'] = {
+            'version': 1,
+            'hasMozMallocUsableSize': True,
+            'compressed_report': base64.b64encode(compressed).decode('ascii'),
+        }
+        processed_crash['json_dump'] = {'pid': 11620}
+
+        assert rule.predicate({}, {}, processed_crash, {})
+        rule.action({}, {}, processed_crash, {})
+        assert processed_crash['memory_measures']['ghost_windows'] == 7
+
     def test_action_failure_bad_kind(self, caplogpp):
         caplogpp.set_level('DEBUG')
 
@@ -17,6 +17,7 @@ from socorro.processor.breakpad_transform_rules import (
     JitCrashCategorizeRule,
     MinidumpSha256Rule,
 )
+from socorro.processor.profiling import CrashProfile
 from socorro.unittest.processor import get_basic_config, get_basic_processor_meta
 
 
@@ -420,6 +421,17 @@ class TestBreakpadTransformRule2015(object):
                 tags=['outcome:success', 'exitcode:0']
             )
 
+    def test_expand_commandline_jit_category(self):
+        config = self.get_basic_config()
+        rule = BreakpadStackwalkerRule2015(config)
+        assert '--jit-category' not in rule.expand_commandline('a.dump', 'a.json')
+
+        config.jit_category_from_stackwalker = True
+        rule = BreakpadStackwalkerRule2015(config)
+        assert rule.expand_commandline('a.dump', 'a.json').startswith(
+            'timeout -s KILL 5 /bin/stackwalker --jit-category --raw-json a.json '
+        )
+
     @patch('socorro.processor.breakpad_transform_rules.subprocess')
     def test_stackwalker_fails(self, mocked_subprocess_module):
         config = self.get_basic_config()
@@ -482,6 +494,90 @@ class TestBreakpadTransformRule2015(object):
             'MDSW failed with -1: unknown error'
         )
 
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_profile(self, mocked_subprocess_module):
+        config = self.get_basic_config()
+
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+        processed_crash = DotDict()
+        processor_meta = get_basic_processor_meta()
+        processor_meta.profile = CrashProfile(example_uuid)
+
+        mocked_subprocess_handle = mocked_subprocess_module.Popen.return_value
+        mocked_subprocess_handle.stdout.read.return_value = canonical_stackwalker_output_str
+        mocked_subprocess_handle.wait.return_value = 0
+
+        rule = BreakpadStackwalkerRule2015(config)
+        rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+
+        timings = processor_meta.profile.to_dict()['subprocesses']
+        assert list(timings) == ['BreakpadStackwalkerRule2015']
+
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_output_cache(self, mocked_subprocess_module, tmpdir):
+        config = self.get_basic_config()
+        config.stackwalker_cache_path = str(tmpdir)
+        config.stackwalker_cache_size = 1024 * 1024
+        config.stackwalker_version = '1.0'
+
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+
+        mocked_subprocess_handle = mocked_subprocess_module.Popen.return_value
+        mocked_subprocess_handle.stdout.read.return_value = canonical_stackwalker_output_str
+        mocked_subprocess_handle.wait.return_value = 0
+
+        rule = BreakpadStackwalkerRule2015(config)
+        for i in range(2):
+            processed_crash = DotDict()
+            processed_crash.minidump_sha256_hash = 'abcdef'
+            processor_meta = get_basic_processor_meta()
+            rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+
+            assert processed_crash.json_dump == canonical_stackwalker_output
+            assert processed_crash.mdsw_return_code == 0
+            assert processed_crash.success is True
+
+        # The stackwalker ran once, the second crash used its cached output
+        assert mocked_subprocess_module.Popen.call_count == 1
+        assert processor_meta.processor_notes == ['MDSW output reused from cache']
+
+        # A different stackwalker version does not use that output
+        config.stackwalker_version = '2.0'
+        rule = BreakpadStackwalkerRule2015(config)
+        rule.act(raw_crash, raw_dumps, processed_crash, get_basic_processor_meta())
+        assert mocked_subprocess_module.Popen.call_count == 2
+
+        # Neither do different annotations read by the stackwalker
+        raw_crash = copy.deepcopy(canonical_standard_raw_crash)
+        raw_crash['ModuleSignatureInfo'] = '{"Mozilla Corporation": ["xul.dll"]}'
+        rule.act(raw_crash, raw_dumps, processed_crash, get_basic_processor_meta())
+        assert mocked_subprocess_module.Popen.call_count == 3
+
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_output_cache_skips_failures(self, mocked_subprocess_module, tmpdir):
+        config = self.get_basic_config()
+        config.stackwalker_cache_path = str(tmpdir)
+        config.stackwalker_cache_size = 1024 * 1024
+        config.stackwalker_version = '1.0'
+
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+
+        mocked_subprocess_handle = mocked_subprocess_module.Popen.return_value
+        mocked_subprocess_handle.stdout.read.return_value = '{}\n'
+        mocked_subprocess_handle.wait.return_value = 124
+
+        rule = BreakpadStackwalkerRule2015(config)
+        for i in range(2):
+            processed_crash = DotDict()
+            processed_crash.minidump_sha256_hash = 'abcdef'
+            rule.act(raw_crash, raw_dumps, processed_crash, get_basic_processor_meta())
+            assert processed_crash.success is False
+
+        assert mocked_subprocess_module.Popen.call_count == 2
+
     @patch('socorro.processor.breakpad_transform_rules.os.unlink')
     def test_temp_file_context(self, mocked_unlink):
         config = self.get_basic_config()
@@ -539,6 +635,75 @@ class TestJitCrashCategorizeRule(object):
         assert processed_crash.classifications.jit.category == 'EXTRA-SPECIAL'
         assert processed_crash.classifications.jit.category_return_code == 0
 
+    def get_jit_processed_crash(self):
+        processed_crash = DotDict()
+        processed_crash.product = 'Firefox'
+        processed_crash.os_name = 'Windows 386'
+        processed_crash.cpu_name = 'x86'
+        processed_crash.signature = 'EnterBaseline'
+        processed_crash.mdsw_return_code = 0
+        processed_crash['json_dump.crashing_thread.frames'] = [
+            DotDict({'not_module': 'not-a-module'}),
+            DotDict({'module': 'a-module'})
+        ]
+        return processed_crash
+
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_category_from_stackwalker(self, mocked_subprocess_module):
+        config = self.get_basic_config()
+        config.jit_category_from_stackwalker = True
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+        processed_crash = self.get_jit_processed_crash()
+        processed_crash['json_dump.jit_category'] = 'JIT Crash'
+        processor_meta = get_basic_processor_meta()
+
+        rule = JitCrashCategorizeRule(config)
+        rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+
+        assert not mocked_subprocess_module.Popen.called
+        assert processor_meta.processor_notes == []
+        assert processed_crash.classifications.jit.category == 'JIT Crash'
+        assert processed_crash.classifications.jit.category_return_code == 0
+
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_category_error_from_stackwalker(self, mocked_subprocess_module):
+        config = self.get_basic_config()
+        config.jit_category_from_stackwalker = True
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+        processed_crash = self.get_jit_processed_crash()
+        processed_crash['json_dump.jit_category'] = 'ERROR'
+        processed_crash['json_dump.jit_category_return_code'] = 1
+        processor_meta = get_basic_processor_meta()
+
+        rule = JitCrashCategorizeRule(config)
+        rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+
+        assert not mocked_subprocess_module.Popen.called
+        assert processed_crash.classifications.jit.category == 'ERROR'
+        assert processed_crash.classifications.jit.category_return_code == 1
+
+    @patch('socorro.processor.breakpad_transform_rules.subprocess')
+    def test_category_missing_from_stackwalker(self, mocked_subprocess_module):
+        config = self.get_basic_config()
+        config.jit_category_from_stackwalker = True
+        raw_crash = copy.copy(canonical_standard_raw_crash)
+        raw_dumps = {config.dump_field: 'a_fake_dump.dump'}
+        processed_crash = self.get_jit_processed_crash()
+        processor_meta = get_basic_processor_meta()
+
+        mocked_subprocess_handle = mocked_subprocess_module.Popen.return_value
+        mocked_subprocess_handle.stdout.read.return_value = 'EXTRA-SPECIAL'
+        mocked_subprocess_handle.wait.return_value = 0
+
+        rule = JitCrashCategorizeRule(config)
+        rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+
+        # The stackwalker didn't categorize the crash, so the program runs
+        assert mocked_subprocess_module.Popen.called
+        assert processed_crash.classifications.jit.category == 'EXTRA-SPECIAL'
+
     @patch('socorro.processor.breakpad_transform_rules.subprocess')
     def test_success_all_types_of_signatures(self, mocked_subprocess_module):
         config = self.get_basic_config()
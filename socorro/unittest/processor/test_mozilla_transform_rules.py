@@ -2,8 +2,11 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import base64
 import copy
+import gzip
 import json
+import os
 
 from configman.dotdict import DotDict
 from mock import call, Mock, patch
@@ -40,6 +43,9 @@ from socorro.unittest import WHATEVER
 from socorro.unittest.processor import get_basic_config, get_basic_processor_meta
 
 
+MEMORY_REPORTS_DIR = os.path.join(os.path.dirname(__file__), 'rules', 'memory_reports')
+
+
 canonical_standard_raw_crash = DotDict({
     "uuid": '00000000-0000-0000-0000-000002140504',
     "InstallTime": "1335439892",
@@ -812,23 +818,18 @@ class TestOutOfMemoryBinaryRule(object):
         processor_meta = get_basic_processor_meta()
 
         with patch('socorro.processor.mozilla_transform_rules.gzip.open') as mocked_gzip_open:
-            with patch(
-                'socorro.processor.mozilla_transform_rules.json.loads'
-            ) as mocked_json_loads:
-                mocked_json_loads.side_effect = ValueError
-
-                rule = OutOfMemoryBinaryRule(config)
-                memory = rule._extract_memory_info('a_pathname', processor_meta.processor_notes)
-                mocked_gzip_open.assert_called_with('a_pathname', 'rb')
-                assert memory == {"ERROR": "error in json for a_pathname: ValueError()"}
-                expected = ["error in json for a_pathname: ValueError()"]
-                assert processor_meta.processor_notes == expected
-                mocked_gzip_open.return_value.close.assert_called_with()
-
-                rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
-                assert 'memory_report' not in processed_crash
-                expected = 'error in json for a_pathname: ValueError()'
-                assert processed_crash.memory_report_error == expected
+            mocked_gzip_open.return_value = six.BytesIO(b'{"version": 1, "reports": [}')
+
+            rule = OutOfMemoryBinaryRule(config)
+            memory = rule._extract_memory_info('a_pathname', processor_meta.processor_notes)
+            mocked_gzip_open.assert_called_with('a_pathname', 'rb')
+            assert memory['ERROR'].startswith('error in json for a_pathname: JSONDecodeError(')
+            assert processor_meta.processor_notes == [memory['ERROR']]
+
+            mocked_gzip_open.return_value = six.BytesIO(b'{"version": 1, "reports": [}')
+            rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
+            assert 'memory_report' not in processed_crash
+            assert processed_crash.memory_report_error == memory['ERROR']
 
     def test_everything_we_hoped_for(self):
         config = get_basic_config()
@@ -841,7 +842,7 @@ class TestOutOfMemoryBinaryRule(object):
 
         class MyOutOfMemoryBinaryRule(OutOfMemoryBinaryRule):
             @staticmethod
-            def _extract_memory_info(dump_pathname, processor_notes):
+            def _extract_memory_info(dump_pathname, processor_notes, measures=None):
                 assert dump_pathname == raw_dumps['memory_report']
                 assert processor_notes == []
                 return 'mysterious-awesome-memory'
@@ -851,6 +852,51 @@ class TestOutOfMemoryBinaryRule(object):
             rule.act(raw_crash, raw_dumps, processed_crash, processor_meta)
             assert processed_crash.memory_report == 'mysterious-awesome-memory'
 
+    def write_memory_report(self, tmpdir):
+        with open(os.path.join(MEMORY_REPORTS_DIR, 'good.json'), 'rb') as fp:
+            data = fp.read()
+        pathname = str(tmpdir.join('memory_report.json.gz'))
+        with gzip.open(pathname, 'wb') as fp:
+            fp.write(data)
+        return pathname, json.loads(data.decode('utf-8'))
+
+    def test_memory_measures(self, tmpdir):
+        config = get_basic_config()
+        pathname, expected = self.write_memory_report(tmpdir)
+
+        raw_dumps = {'memory_report': pathname}
+        processed_crash = DotDict({'json_dump': {'pid': 11620}})
+        processor_meta = get_basic_processor_meta()
+
+        rule = OutOfMemoryBinaryRule(config)
+        with patch('socorro.processor.mozilla_transform_rules.temp_file_context'):
+            rule.act({}, raw_dumps, processed_crash, processor_meta)
+        assert processed_crash.memory_report == expected
+        # The measures were computed while reading the memory report
+        measures = processor_meta.memory_measures.result()
+        assert measures['ghost_windows'] == 7
+
+    def test_compress_memory_report(self, tmpdir):
+        config = get_basic_config()
+        config.compress_memory_report = True
+        pathname, expected = self.write_memory_report(tmpdir)
+        with open(pathname, 'rb') as fp:
+            compressed = fp.read()
+
+        raw_dumps = {'memory_report': pathname}
+        processed_crash = DotDict({'json_dump': {'pid': 11620}})
+        processor_meta = get_basic_processor_meta()
+
+        rule = OutOfMemoryBinaryRule(config)
+        with patch('socorro.processor.mozilla_transform_rules.temp_file_context'):
+            rule.act({}, raw_dumps, processed_crash, processor_meta)
+        assert processed_crash.memory_report == {
+            'version': 1,
+            'hasMozMallocUsableSize': True,
+            'compressed_report': base64.b64encode(compressed).decode('ascii'),
+        }
+        assert processor_meta.memory_measures.result()['ghost_windows'] == 7
+
     def test_this_is_not_the_crash_you_are_looking_for(self):
         config = get_basic_config()
 
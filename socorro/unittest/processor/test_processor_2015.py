@@ -7,6 +7,7 @@ from configman.dotdict import DotDict
 from mock import MagicMock, Mock, patch
 
 from socorro.processor.processor_2015 import Processor2015
+from socorro.processor.profiling import CrashProfile
 from socorro.processor.general_transform_rules import (
     CPUInfoRule,
     OSInfoRule
@@ -109,3 +110,77 @@ class TestProcessor2015(object):
             " we've been here before; yep"
         )
         assert processed_crash.processor_notes == expected
+
+    def test_partial_reprocessing(self):
+        raw_crash = DotDict({
+            'uuid': '1',
+        })
+        processed_crash = DotDict({
+            'processor_notes': 'earlier notes',
+            'started_datetime': '2014-01-01T00:00:00',
+            'completed_datetime': '2014-01-01T00:00:01',
+            'signature': 'existing signature',
+            'json_dump': {'status': 'OK', 'system_info': {'os': 'Linux'}},
+        })
+
+        p = Processor2015(self.get_config(), rules=[
+            CPUInfoRule,
+            OSInfoRule,
+        ])
+        assert not p.rules_use_dumps(['OSInfoRule'], processed_crash)
+
+        with patch.object(CPUInfoRule, 'action') as mocked_cpu_action:
+            processed_crash = p.process_crash(
+                raw_crash, {}, processed_crash, rerun_rules=['OSInfoRule']
+            )
+            assert not mocked_cpu_action.called
+
+        assert processed_crash.success
+        # The rule used the stored stackwalker output
+        assert processed_crash.os_name == 'Linux'
+        # Nothing else is touched
+        assert processed_crash.signature == 'existing signature'
+        assert 'cpu_name' not in processed_crash
+        assert processed_crash.processor_notes == (
+            'dwight; Processor2015; earlier processing: 2014-01-01T00:00:00; '
+            'partial reprocessing: OSInfoRule; earlier notes'
+        )
+
+    def test_partial_reprocessing_not_possible(self):
+        raw_crash = DotDict({
+            'uuid': '1',
+        })
+
+        p = Processor2015(self.get_config(), rules=[
+            CPUInfoRule,
+            OSInfoRule,
+        ])
+        # Never processed before
+        assert p.get_partial_rules(['OSInfoRule'], DotDict()) is None
+        # Unknown rule
+        assert p.get_partial_rules(
+            ['OSInfoRule', 'BogusRule'],
+            DotDict({'completed_datetime': '2014-01-01T00:00:01'})
+        ) is None
+        assert p.rules_use_dumps(['OSInfoRule'], DotDict())
+
+        with patch.object(CPUInfoRule, 'action') as mocked_cpu_action:
+            processed_crash = p.process_crash(
+                raw_crash, {}, DotDict(), rerun_rules=['OSInfoRule']
+            )
+            assert mocked_cpu_action.called
+
+        assert processed_crash.processor_notes == (
+            'dwight; Processor2015; partial reprocessing not possible, processing all rules'
+        )
+
+    def test_profile(self):
+        profile = CrashProfile('1')
+        p = Processor2015(self.get_config(), rules=[
+            CPUInfoRule,
+            BadRule,
+        ])
+        p.process_crash(DotDict({'uuid': '1'}), {}, DotDict(), profile=profile)
+
+        # Failing rules are timed too
+        assert list(profile.to_dict()['rules']) == ['CPUInfoRule', 'BadRule']
@@ -66,6 +66,16 @@ class TestProcessorApp(object):
         config.sentry = mock.MagicMock()
         config.sentry.dsn = sentry_dsn
 
+        config.profiling = DotDict()
+        config.profiling.sample_rate = 0.0
+        config.profiling.save_in_processed_crash = False
+        config.profiling.window_size = 10
+        config.profiling.status_host = '127.0.0.1'
+        config.profiling.status_port = 0
+
+        config.symbol_prefetch = DotDict()
+        config.symbol_prefetch.enabled = False
+
         return config
 
     def test_source_iterator(self):
@@ -78,6 +88,39 @@ class TestProcessorApp(object):
         assert next(g) is None
         assert next(g) == ((3,), {})
 
+    def test_source_iterator_symbol_prefetch(self):
+        config = self.get_standard_config()
+        config.processor.symbol_cache_path = '/tmp/symbols'
+        config.processor.symbol_tmp_path = '/tmp/symbols-tmp'
+        config.processor.symbols_urls = ['https://localhost']
+        config.symbol_prefetch.enabled = True
+        config.symbol_prefetch.number_of_threads = 2
+        config.symbol_prefetch.builds_to_remember = 5
+        config.symbol_prefetch.modules_per_build = 10
+        config.symbol_prefetch.annotation = 'StackTraces'
+        with mock.patch('socorro.processor.processor_app.SymbolPrefetcher') as mock_prefetcher:
+            pa = ProcessorApp(config)
+            pa._setup_source_and_destination()
+        g = pa.source_iterator()
+        assert next(g) == ((1,), {})
+        assert next(g) == ((2,), {})
+        assert next(g) is None
+        assert next(g) == ((3,), {})
+        assert mock_prefetcher.return_value.peek.call_args_list == [
+            mock.call(1), mock.call(2), mock.call(3)
+        ]
+
+        pa.source.get_raw_crash.return_value = DotDict()
+        pa.source.get_raw_dumps_as_files.return_value = {}
+        pa.processor.process_crash.return_value = DotDict({'json_dump': {}})
+        pa.transform(17)
+        mock_prefetcher.return_value.learn.assert_called_with(
+            DotDict(), DotDict({'json_dump': {}})
+        )
+
+        pa.close()
+        assert mock_prefetcher.return_value.close.call_count == 1
+
     def test_transform_success(self):
         config = self.get_standard_config()
         pa = ProcessorApp(config)
@@ -116,6 +159,68 @@ class TestProcessorApp(object):
         )
         assert finished_func.call_count == 1
 
+    def test_transform_rerun_rules(self):
+        config = self.get_standard_config()
+        pa = ProcessorApp(config)
+        pa._setup_source_and_destination()
+
+        fake_raw_crash = DotDict()
+        pa.source.get_raw_crash = mock.Mock(return_value=fake_raw_crash)
+        fake_processed_crash = DotDict()
+        pa.source.get_unredacted_processed = mock.Mock(return_value=fake_processed_crash)
+        pa.processor.rules_use_dumps.return_value = False
+        pa.processor.process_crash.return_value = 7
+
+        finished_func = mock.Mock()
+        pa.transform(17, finished_func, rerun_rules=['SignatureGeneratorRule'])
+
+        # No rule needs the dumps, so they are not fetched
+        assert not pa.source.get_raw_dumps_as_files.called
+        pa.processor.rules_use_dumps.assert_called_with(
+            ['SignatureGeneratorRule'], fake_processed_crash
+        )
+        pa.processor.process_crash.assert_called_with(
+            fake_raw_crash,
+            {},
+            fake_processed_crash,
+            rerun_rules=['SignatureGeneratorRule']
+        )
+        pa.destination.save_raw_and_processed.assert_called_with(
+            fake_raw_crash, None, 7, 17
+        )
+        assert finished_func.call_count == 1
+
+    def test_transform_profiling(self):
+        config = self.get_standard_config()
+        config.profiling.sample_rate = 1.0
+        config.profiling.save_in_processed_crash = True
+        pa = ProcessorApp(config)
+        pa._setup_source_and_destination()
+
+        pa.source.get_raw_crash.return_value = DotDict({'uuid': '17'})
+        pa.source.get_raw_dumps_as_files.return_value = {}
+        pa.source.get_unredacted_processed.return_value = DotDict()
+
+        def mocked_process_crash(raw_crash, dumps, processed_crash, profile):
+            profile.record('rules', 'SomeRule', 0.5)
+            return DotDict({'signature': 'foo'})
+
+        pa.processor.process_crash.side_effect = mocked_process_crash
+
+        pa.transform('17')
+
+        processed_crash = pa.destination.save_raw_and_processed.call_args[0][2]
+        profile = processed_crash['processor_profile']
+        assert profile['crash_id'] == '17'
+        assert profile['rules'] == {'SomeRule': 0.5}
+        assert set(profile['stages']) == {'fetch', 'transform'}
+
+        summary = pa.profile_stats.summary()
+        assert summary['count'] == 1
+        assert summary['histograms']['rules.SomeRule']['max'] == 0.5
+        assert set(summary['slowest'][0]['stages']) == {'fetch', 'transform', 'save'}
+        assert summary['slowest'][0]['bytes_saved'] > 0
+
     def test_transform_crash_id_missing(self):
         config = self.get_standard_config()
         pa = ProcessorApp(config)
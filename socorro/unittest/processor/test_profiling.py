@@ -0,0 +1,93 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from socorro.processor.profiling import (
+    CrashProfile,
+    ProfileStats,
+    ProfileStatusServer,
+    percentile,
+)
+
+
+def make_profile(crash_id, fetch, transform):
+    profile = CrashProfile(crash_id)
+    profile.record('stages', 'fetch', fetch)
+    profile.record('stages', 'transform', transform)
+    profile.record('rules', 'SomeRule', transform)
+    return profile
+
+
+class TestCrashProfile(object):
+    def test_record(self):
+        profile = CrashProfile('1')
+        profile.record('subprocesses', 'BreakpadStackwalkerRule2015', 1.0)
+        profile.record('subprocesses', 'BreakpadStackwalkerRule2015', 0.5)
+        profile.record('stages', 'transform', 2.0)
+        profile.bytes_fetched = 10
+
+        assert profile.to_dict() == {
+            'crash_id': '1',
+            'total': 2.0,
+            'bytes_fetched': 10,
+            'bytes_saved': 0,
+            'stages': {'transform': 2.0},
+            'rules': {},
+            'subprocesses': {'BreakpadStackwalkerRule2015': 1.5},
+            'destinations': {},
+        }
+
+    def test_timer(self):
+        profile = CrashProfile('1')
+        with pytest.raises(ValueError):
+            with profile.timer('rules', 'SomeRule'):
+                raise ValueError('boom')
+        assert profile.sections['rules']['SomeRule'] >= 0
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([1, 2, 3, 4, 5], 0.5) == 3
+    assert percentile([1, 2, 3, 4, 5], 0.99) == 5
+
+
+class TestProfileStats(object):
+    def test_summary(self):
+        stats = ProfileStats(window_size=3, outliers_size=2)
+        for i in range(5):
+            stats.add(make_profile(str(i), 0.1, float(i)))
+
+        summary = stats.summary()
+        # Only the last 3 profiles are kept
+        assert summary['count'] == 3
+        assert summary['histograms']['rules.SomeRule'] == {
+            'count': 3, 'p50': 3.0, 'p90': 4.0, 'p95': 4.0, 'p99': 4.0, 'max': 4.0,
+        }
+        assert [profile['crash_id'] for profile in summary['slowest']] == ['4', '3']
+
+    def test_empty(self):
+        assert ProfileStats().summary() == {'count': 0, 'histograms': {}, 'slowest': []}
+
+
+def test_status_server():
+    stats = ProfileStats()
+    stats.add(make_profile('1', 0.1, 0.2))
+
+    server = ProfileStatusServer(stats, '127.0.0.1', 0)
+    try:
+        url = 'http://127.0.0.1:%s' % server.port
+        with urlopen(url + '/profile') as response:
+            data = json.loads(response.read().decode('utf-8'))
+        assert data['count'] == 1
+        assert data['slowest'][0]['crash_id'] == '1'
+
+        with pytest.raises(HTTPError):
+            urlopen(url + '/nope')
+    finally:
+        server.close()
@@ -0,0 +1,140 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import hashlib
+import os
+
+import mock
+
+from socorro.external.boto.connection_context import KeyNotFound
+from socorro.processor.stackwalker_cache import (
+    DiskLRUCache,
+    S3Cache,
+    StackwalkerCache,
+    compute_cache_key,
+    file_sha256,
+    is_cacheable,
+)
+
+
+def test_compute_cache_key():
+    urls = ['https://a', 'https://b']
+    key = compute_cache_key('abc', '1.0', urls, {})
+    assert len(key) == 64
+    assert key == compute_cache_key('abc', '1.0', [' https://a', 'https://b '], {})
+    assert key != compute_cache_key('abd', '1.0', urls, {})
+    assert key != compute_cache_key('abc', '1.1', urls, {})
+    assert key != compute_cache_key('abc', '1.0', ['https://b', 'https://a'], {})
+
+    # Only the annotations the stackwalker reads are part of the key
+    assert key == compute_cache_key('abc', '1.0', urls, {'ProductName': 'Firefox'})
+    raw_crash = {'ThreadIdNameMapping': '10:"Main"'}
+    assert key != compute_cache_key('abc', '1.0', urls, raw_crash)
+    assert compute_cache_key('abc', '1.0', urls, raw_crash) != compute_cache_key(
+        'abc', '1.0', urls, {'ThreadIdNameMapping': '10:"Other"'}
+    )
+
+
+def test_file_sha256(tmpdir):
+    path = tmpdir.join('dump')
+    path.write_binary(b'MDMP' * 1000)
+    assert file_sha256(str(path), chunk_size=7) == hashlib.sha256(b'MDMP' * 1000).hexdigest()
+
+
+def test_is_cacheable():
+    assert is_cacheable({'status': 'OK', 'modules': [{'missing_symbols': False}]})
+    assert not is_cacheable({})
+    assert not is_cacheable({'status': 'ERROR_MINIDUMP_NOT_FOUND'})
+    assert not is_cacheable({'status': 'OK', 'modules': [{'missing_symbols': True}]})
+
+
+class TestDiskLRUCache(object):
+    def test_get_and_put(self, tmpdir):
+        cache = DiskLRUCache(str(tmpdir), 1024)
+        assert cache.get('aabbcc') is None
+
+        cache.put('aabbcc', {'status': 'OK'})
+        assert cache.get('aabbcc') == {'status': 'OK'}
+        assert os.path.exists(str(tmpdir.join('aa', 'aabbcc.json')))
+
+    def test_eviction(self, tmpdir):
+        cache = DiskLRUCache(str(tmpdir), 50)
+        cache.put('key1', {'data': 'x' * 10})
+        cache.put('key2', {'data': 'x' * 10})
+        # Use key1 so key2 gets evicted first
+        assert cache.get('key1')
+        cache.put('key3', {'data': 'x' * 10})
+
+        assert cache.get('key2') is None
+        assert cache.get('key1')
+        assert cache.get('key3')
+        assert cache.total_size <= 50
+
+    def test_loads_existing_files(self, tmpdir):
+        cache = DiskLRUCache(str(tmpdir), 1024)
+        cache.put('key1', {'data': 1})
+
+        other_cache = DiskLRUCache(str(tmpdir), 1024)
+        assert other_cache.total_size == cache.total_size
+        assert other_cache.get('key1') == {'data': 1}
+
+    def test_files_removed_by_other_processes(self, tmpdir):
+        cache = DiskLRUCache(str(tmpdir), 1024)
+        cache.put('key1', {'data': 1})
+        os.unlink(str(tmpdir.join('ke', 'key1.json')))
+
+        assert cache.get('key1') is None
+        assert cache.total_size == 0
+
+
+class TestS3Cache(object):
+    def test_get_and_put(self):
+        connection_source = mock.Mock()
+        connection_source.ResponseError = (KeyNotFound,)
+        connection_source.fetch.return_value = b'{"status": "OK"}'
+
+        cache = S3Cache(connection_source)
+        assert cache.get('key1') == {'status': 'OK'}
+        connection_source.fetch.assert_called_with('key1', 'stackwalker_output')
+
+        connection_source.fetch.side_effect = KeyNotFound('nope')
+        assert cache.get('key1') is None
+
+        cache.put('key1', {'status': 'OK'})
+        connection_source.submit.assert_called_with(
+            'key1', 'stackwalker_output', b'{"status": "OK"}'
+        )
+
+
+class TestStackwalkerCache(object):
+    def test_remote_hits_fill_disk_cache(self, tmpdir):
+        disk_cache = DiskLRUCache(str(tmpdir), 1024)
+        remote_cache = mock.Mock()
+        remote_cache.get.return_value = {'status': 'OK'}
+
+        cache = StackwalkerCache(disk_cache, remote_cache)
+        assert cache.get('key1') == {'status': 'OK'}
+        assert disk_cache.get('key1') == {'status': 'OK'}
+
+        remote_cache.get.reset_mock()
+        assert cache.get('key1') == {'status': 'OK'}
+        assert not remote_cache.get.called
+
+    def test_put_stores_in_all_tiers(self, tmpdir):
+        disk_cache = DiskLRUCache(str(tmpdir), 1024)
+        remote_cache = mock.Mock()
+
+        cache = StackwalkerCache(disk_cache, remote_cache)
+        cache.put('key1', {'status': 'OK'})
+        assert disk_cache.get('key1') == {'status': 'OK'}
+        remote_cache.put.assert_called_with('key1', {'status': 'OK'})
+
+    def test_errors_are_misses(self):
+        remote_cache = mock.Mock()
+        remote_cache.get.side_effect = Exception('S3 is down')
+        remote_cache.put.side_effect = Exception('S3 is down')
+
+        cache = StackwalkerCache(remote_cache=remote_cache)
+        assert cache.get('key1') is None
+        cache.put('key1', {'status': 'OK'})
@@ -3,13 +3,18 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import os
+import time
 
+from configman.dotdict import DotDict
+import mock
 from mock import Mock
 import pytest
 
 from socorro.processor.symbol_cache_manager import (
     EventHandler,
     from_string_to_parse_size,
+    SubprocessSymbolLRUCacheManager,
+    SymbolLRUCacheManager,
 )
 
 
@@ -192,3 +197,128 @@ class Test_from_string_to_parse_size:
         assert from_string_to_parse_size("1k") == 1024
         assert from_string_to_parse_size("1M") == 1048576
         assert from_string_to_parse_size("1G") == 1073741824
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return tmpdir.mkdir('symbols')
+
+
+def write_file(directory, name, age, data='abcd'):
+    path = directory.join(name)
+    path.write(data, ensure=True)
+    mtime = time.time() - age
+    os.utime(str(path), (mtime, mtime))
+    return str(path)
+
+
+def get_config(cache_dir, **kwargs):
+    config = DotDict({
+        'symbol_cache_path': str(cache_dir),
+        'symbol_cache_size': 10,
+        'verbosity': 0,
+    })
+    config.update(kwargs)
+    return config
+
+
+@pytest.mark.skipif(os.uname()[0] != 'Linux', reason='only run if on Linux')
+class TestSymbolLRUCacheManager(object):
+    def get_manager(self, cache_dir, **kwargs):
+        manager = SymbolLRUCacheManager(get_config(cache_dir, **kwargs))
+        # Drive the cache by hand rather than through inotify events
+        manager._notifier.stop()
+        return manager
+
+    def test_evicts_least_recently_used(self, cache_dir):
+        manager = self.get_manager(cache_dir)
+        old = write_file(cache_dir, 'old.sym', 100)
+        new = write_file(cache_dir, 'new.sym', 1)
+        manager._update_cache(old)
+        manager._update_cache(new)
+        manager._update_cache(write_file(cache_dir, 'newest.sym', 0))
+        assert not os.path.exists(old)
+        assert os.path.exists(new)
+
+    def test_evicts_down_to_low_water(self, cache_dir):
+        manager = self.get_manager(cache_dir, symbol_cache_size=16, symbol_cache_low_water=0.5)
+        paths = [write_file(cache_dir, 'file%d.sym' % i, 10 - i) for i in range(4)]
+        for path in paths:
+            manager._update_cache(path)
+        assert manager.total_size == 16
+
+        # Going over the maximum size evicts down to half of it in one go
+        newest = write_file(cache_dir, 'newest.sym', 0)
+        manager._update_cache(newest)
+        assert [os.path.exists(path) for path in paths] == [False, False, False, True]
+        assert manager.total_size == 8
+        assert list(manager._lru) == [paths[3], newest]
+
+    def test_eviction_grace_period(self, cache_dir):
+        manager = self.get_manager(cache_dir, eviction_grace_period=60)
+        recent = write_file(cache_dir, 'recent.sym', 1)
+        old = write_file(cache_dir, 'old.sym', 100)
+        manager._update_cache(recent)
+        manager._update_cache(old)
+        # The least recently used file was modified recently, so the next
+        # one goes
+        manager._update_cache(write_file(cache_dir, 'newest.sym', 0))
+        assert os.path.exists(recent)
+        assert not os.path.exists(old)
+
+    def test_existing_files(self, cache_dir):
+        old = write_file(cache_dir, 'a/1/old.sym', 100)
+        new = write_file(cache_dir, 'b/2/new.sym', 1)
+        manager = self.get_manager(cache_dir, symbol_cache_size=100)
+        assert list(manager._lru) == [old, new]
+        assert manager.total_size == 8
+        manager.close()
+
+    def test_index(self, cache_dir, tmpdir):
+        old = write_file(cache_dir, 'a/1/old.sym', 100)
+        new = write_file(cache_dir, 'b/2/new.sym', 1)
+        manager = self.get_manager(cache_dir, symbol_cache_size=100)
+        # Use the old file last
+        manager._update_cache(old)
+        manager.close()
+        assert os.path.exists(str(tmpdir.join('symbols.index')))
+
+        # Changes while no manager was running
+        os.unlink(new)
+        added = write_file(cache_dir, 'c/3/added.sym', 50, data='abcdefgh')
+
+        with mock.patch.object(SymbolLRUCacheManager, '_get_existing_files') as mock_walk:
+            manager = self.get_manager(cache_dir, symbol_cache_size=100)
+            for thread in manager._threads:
+                thread.join()
+        # The cache was loaded from the index and reconciled with the
+        # directory in the background
+        assert not mock_walk.called
+        assert list(manager._lru) == [added, old]
+        assert manager.total_size == 12
+        manager.close()
+
+    def test_bad_index(self, cache_dir, tmpdir):
+        tmpdir.join('symbols.index').write('{"version": 1, "files": [')
+        old = write_file(cache_dir, 'old.sym', 1)
+        manager = self.get_manager(cache_dir)
+        assert list(manager._lru) == [old]
+        manager.close()
+
+    def test_index_path(self, cache_dir, tmpdir):
+        index_path = str(tmpdir.join('index.json'))
+        manager = self.get_manager(cache_dir, symbol_cache_index_path=index_path)
+        manager.close()
+        assert os.path.exists(index_path)
+
+
+@pytest.mark.skipif(os.uname()[0] != 'Linux', reason='only run if on Linux')
+class TestSubprocessSymbolLRUCacheManager(object):
+    def test_start_and_close(self, cache_dir, tmpdir):
+        manager = SubprocessSymbolLRUCacheManager(get_config(cache_dir))
+        assert manager.process.is_alive()
+        manager.close()
+        assert not manager.process.is_alive()
+        assert manager.process.exitcode == 0
+        # The manager in the other process saved its index on close
+        assert os.path.exists(str(tmpdir.join('symbols.index')))
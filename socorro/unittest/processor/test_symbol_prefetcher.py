@@ -0,0 +1,244 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import os
+
+from configman.dotdict import DotDict
+from markus.testing import MetricsMock
+from mock import Mock
+import pytest
+import requests
+import requests_mock
+
+from socorro.external.crashstorage_base import CrashIDNotFound
+from socorro.processor.symbol_prefetcher import (
+    get_annotation_modules,
+    get_build_key,
+    get_loaded_modules,
+    symbol_file_name,
+    symbol_path,
+    SymbolPrefetcher,
+)
+
+
+XUL = ('xul.pdb', '44E4EC8C2F41492B9369D6B9A059577C2')
+NTDLL = ('ntdll.pdb', '9C9A9A6D8B2C4B1C8E2C2E3C1C0F2D561')
+LIBXUL = ('libxul.so', '9E915C89F3B8A0B5E5F1BD9A0DB4F4A80')
+
+RAW_CRASH = {
+    'ProductName': 'Firefox',
+    'Version': '62.0',
+    'BuildID': '20180620000000',
+}
+
+STACK_TRACES = {
+    'crash_info': {'crashing_thread': 1},
+    'modules': [
+        {'debug_file': XUL[0], 'debug_id': XUL[1], 'filename': 'xul.dll'},
+        {'debug_file': NTDLL[0], 'debug_id': NTDLL[1], 'filename': 'ntdll.dll'},
+        {'filename': 'nodebuginfo.dll'},
+    ],
+    'threads': [
+        {'frames': [{'module_index': 1}]},
+        {'frames': [{'module_index': 0}, {'module_index': 2}, {'ip': '0x0'}, {'module_index': 0}]},
+    ],
+}
+
+
+def test_symbol_file_name():
+    assert symbol_file_name('xul.pdb') == 'xul.sym'
+    assert symbol_file_name('XUL.PDB') == 'XUL.sym'
+    assert symbol_file_name('libxul.so') == 'libxul.so.sym'
+    assert symbol_file_name('XUL') == 'XUL.sym'
+
+
+def test_symbol_path():
+    assert symbol_path(*XUL) == os.path.join('xul.pdb', XUL[1], 'xul.sym')
+
+
+def test_get_build_key():
+    assert get_build_key(RAW_CRASH) == ('Firefox', '62.0', '20180620000000')
+    assert get_build_key({'ProductName': 'Firefox'}) is None
+
+
+class TestGetAnnotationModules(object):
+    def test_crashing_thread(self):
+        raw_crash = {'StackTraces': json.dumps(STACK_TRACES)}
+        assert get_annotation_modules(raw_crash) == [XUL]
+
+    def test_all_threads(self):
+        stack_traces = dict(STACK_TRACES, crash_info={})
+        assert get_annotation_modules({'StackTraces': stack_traces}) == [NTDLL, XUL]
+
+    @pytest.mark.parametrize('raw_crash', [
+        {},
+        {'StackTraces': ''},
+        {'StackTraces': '{"modules": ['},
+        {'StackTraces': '{}'},
+    ])
+    def test_nothing(self, raw_crash):
+        assert get_annotation_modules(raw_crash) == []
+
+
+def test_get_loaded_modules():
+    processed_crash = {
+        'json_dump': {
+            'modules': [
+                {'debug_file': XUL[0], 'debug_id': XUL[1], 'loaded_symbols': True},
+                {'debug_file': NTDLL[0], 'debug_id': NTDLL[1]},
+                {'filename': 'nodebuginfo.dll', 'loaded_symbols': True},
+            ]
+        }
+    }
+    assert get_loaded_modules(processed_crash) == [XUL]
+    assert get_loaded_modules({}) == []
+
+
+class TestSymbolPrefetcher(object):
+    def get_prefetcher(self, tmpdir, **kwargs):
+        params = {
+            'source': Mock(),
+            'symbol_cache_path': str(tmpdir.join('symbols')),
+            'symbol_tmp_path': str(tmpdir.join('symbols-tmp')),
+            'symbols_urls': ['https://one.example.com/', 'https://two.example.com'],
+            'number_of_threads': 2,
+            'session': requests.Session(),
+        }
+        params.update(kwargs)
+        return SymbolPrefetcher(**params)
+
+    def cache_file(self, prefetcher, module):
+        return os.path.join(prefetcher.symbol_cache_path, symbol_path(*module))
+
+    def test_learn(self, tmpdir):
+        prefetcher = self.get_prefetcher(tmpdir, builds_to_remember=1, modules_per_build=2)
+        prefetcher.learn(RAW_CRASH, {
+            'json_dump': {
+                'modules': [
+                    {'debug_file': NTDLL[0], 'debug_id': NTDLL[1], 'loaded_symbols': True},
+                    {'debug_file': LIBXUL[0], 'debug_id': LIBXUL[1], 'loaded_symbols': True},
+                ]
+            }
+        })
+        prefetcher.learn(RAW_CRASH, {
+            'json_dump': {
+                'modules': [
+                    {'debug_file': XUL[0], 'debug_id': XUL[1], 'loaded_symbols': True},
+                    {'debug_file': LIBXUL[0], 'debug_id': LIBXUL[1], 'loaded_symbols': True},
+                ]
+            }
+        })
+        # The module from the annotation comes first, then the ones last seen
+        # with the same build
+        raw_crash = dict(RAW_CRASH, StackTraces=json.dumps(STACK_TRACES))
+        assert prefetcher.modules_for(raw_crash) == [XUL, LIBXUL]
+
+        other_build = dict(RAW_CRASH, BuildID='20180621000000')
+        assert prefetcher.modules_for(other_build) == []
+        prefetcher.learn(other_build, {
+            'json_dump': {
+                'modules': [{'debug_file': XUL[0], 'debug_id': XUL[1], 'loaded_symbols': True}]
+            }
+        })
+        assert prefetcher.modules_for(other_build) == [XUL]
+        # Only one build is remembered
+        assert prefetcher.modules_for(RAW_CRASH) == []
+
+    def test_download(self, tmpdir):
+        prefetcher = self.get_prefetcher(tmpdir)
+        with requests_mock.Mocker() as req_mock, MetricsMock() as mm:
+            req_mock.get('https://one.example.com/xul.pdb/%s/xul.sym' % XUL[1], status_code=404)
+            req_mock.get('https://two.example.com/xul.pdb/%s/xul.sym' % XUL[1], content=b'MODULE')
+            prefetcher.prefetch(*XUL)
+            prefetcher.executor.shutdown(wait=True)
+            assert mm.has_record(
+                'incr', stat='processor.symbolprefetcher.prefetch', tags=['result:downloaded']
+            )
+
+        with open(self.cache_file(prefetcher, XUL), 'rb') as fp:
+            assert fp.read() == b'MODULE'
+        assert os.listdir(prefetcher.symbol_tmp_path) == []
+        assert not prefetcher._pending
+
+    def test_missing(self, tmpdir):
+        prefetcher = self.get_prefetcher(tmpdir)
+        with requests_mock.Mocker() as req_mock:
+            req_mock.get(requests_mock.ANY, status_code=404)
+            prefetcher.prefetch(*XUL)
+            prefetcher.executor.shutdown(wait=True)
+            assert req_mock.call_count == 2
+
+        assert not os.path.exists(self.cache_file(prefetcher, XUL))
+        assert XUL in prefetcher._missing
+        # Known missing symbols are not requested again
+        prefetcher.executor = Mock()
+        prefetcher.prefetch(*XUL)
+        assert not prefetcher.executor.submit.called
+
+    def test_error(self, tmpdir):
+        prefetcher = self.get_prefetcher(tmpdir)
+        with requests_mock.Mocker() as req_mock, MetricsMock() as mm:
+            req_mock.get(requests_mock.ANY, status_code=403)
+            prefetcher.prefetch(*XUL)
+            prefetcher.executor.shutdown(wait=True)
+            assert mm.has_record(
+                'incr', stat='processor.symbolprefetcher.prefetch', tags=['result:error']
+            )
+
+        assert not os.path.exists(self.cache_file(prefetcher, XUL))
+        # Errors may be transient, so the file can be requested again
+        assert XUL not in prefetcher._missing
+        assert not prefetcher._pending
+
+    def test_cached(self, tmpdir):
+        prefetcher = self.get_prefetcher(tmpdir)
+        path = self.cache_file(prefetcher, XUL)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fp:
+            fp.write(b'MODULE')
+        os.utime(path, (0, 0))
+
+        prefetcher.executor = Mock()
+        with MetricsMock() as mm:
+            prefetcher.prefetch(*XUL)
+            assert mm.has_record(
+                'incr', stat='processor.symbolprefetcher.prefetch', tags=['result:cached']
+            )
+        assert not prefetcher.executor.submit.called
+        # The modification time is bumped so the file is not evicted right away
+        assert os.stat(path).st_mtime > 0
+
+    @pytest.mark.parametrize('module', [
+        ('../xul.pdb', XUL[1]),
+        ('xul.pdb', '../../etc'),
+        ('..', XUL[1]),
+    ])
+    def test_bad_module(self, tmpdir, module):
+        prefetcher = self.get_prefetcher(tmpdir)
+        prefetcher.executor = Mock()
+        prefetcher.prefetch(*module)
+        assert not prefetcher.executor.submit.called
+
+    def test_peek(self, tmpdir):
+        source = Mock()
+        source.get_raw_crash.return_value = DotDict(
+            dict(RAW_CRASH, StackTraces=json.dumps(STACK_TRACES))
+        )
+        prefetcher = self.get_prefetcher(tmpdir, source=source)
+        with requests_mock.Mocker() as req_mock:
+            req_mock.get(requests_mock.ANY, content=b'MODULE')
+            prefetcher.peek('de1bb258-cbbf-4589-a673-34f800180620').result()
+            prefetcher.executor.shutdown(wait=True)
+
+        source.get_raw_crash.assert_called_with('de1bb258-cbbf-4589-a673-34f800180620')
+        assert os.path.exists(self.cache_file(prefetcher, XUL))
+
+    def test_peek_crash_not_found(self, tmpdir):
+        source = Mock()
+        source.get_raw_crash.side_effect = CrashIDNotFound
+        prefetcher = self.get_prefetcher(tmpdir, source=source)
+        prefetcher.peek('de1bb258-cbbf-4589-a673-34f800180620')
+        prefetcher.executor.shutdown(wait=True)
+        assert not os.path.exists(prefetcher.symbol_cache_path)
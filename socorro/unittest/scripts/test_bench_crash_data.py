@@ -0,0 +1,45 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import copy
+
+from socorro.scripts import bench_crash_data
+from socorro.signature.generator import SignatureGenerator
+from socorro.signature.utils import convert_to_crash_data
+
+
+def test_same_crash_data_as_glom():
+    raw_crash, processed_crash = bench_crash_data.build_crash(threads=3, frames=5)
+    glom_crash_data = bench_crash_data.convert_to_crash_data_glom(
+        raw_crash, copy.deepcopy(processed_crash)
+    )
+    crash_data = convert_to_crash_data(raw_crash, processed_crash)
+
+    # Only the crashing thread and thread 0 are copied
+    threads = crash_data.pop('threads')
+    glom_threads = glom_crash_data.pop('threads')
+    assert threads[0] == glom_threads[0]
+    assert threads[1:] == [{}, {}]
+    assert crash_data == glom_crash_data
+
+
+def test_shutdownhang_same_signature_as_glom():
+    raw_crash, processed_crash = bench_crash_data.build_crash(
+        threads=3, frames=5, crashing_thread=1
+    )
+    processed_crash['json_dump']['threads'][1]['frames'][0]['function'] = 'RunWatchdog'
+    generator = SignatureGenerator()
+    glom_result = generator.generate(
+        bench_crash_data.convert_to_crash_data_glom(raw_crash, copy.deepcopy(processed_crash))
+    )
+    result = generator.generate(convert_to_crash_data(raw_crash, processed_crash))
+    assert result.signature == glom_result.signature
+    assert result.signature.startswith('shutdownhang | ')
+
+
+def test_main(capsys):
+    assert bench_crash_data.main(['--number', '1', '--repeat', '1']) == 0
+    out = capsys.readouterr().out
+    assert 'glom' in out
+    assert 'speedup' in out
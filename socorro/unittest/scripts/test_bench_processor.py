@@ -0,0 +1,104 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import os
+
+import pytest
+
+from socorro.external.crashstorage_base import CrashIDNotFound
+from socorro.scripts import bench_processor
+
+
+CRASH_ID_1 = 'de1bb258-cbbf-4589-a673-34f800180620'
+CRASH_ID_2 = 'de1bb258-cbbf-4589-a673-34f800180621'
+
+
+def write_crash(crashdir, crash_id, dumps):
+    raw_crash_path = os.path.join(
+        crashdir, 'v2', 'raw_crash', crash_id[0:3], '20' + crash_id[-6:], crash_id
+    )
+    os.makedirs(os.path.dirname(raw_crash_path))
+    with open(raw_crash_path, 'w') as fp:
+        json.dump({
+            'uuid': crash_id,
+            'ProductName': 'Firefox',
+            'Version': '62.0',
+            'BuildID': '20180620000000',
+            'ReleaseChannel': 'release',
+            'submitted_timestamp': '2018-06-20T12:00:00+00:00',
+        }, fp)
+
+    if dumps:
+        os.makedirs(os.path.join(crashdir, 'v1', 'dump_names'), exist_ok=True)
+        with open(os.path.join(crashdir, 'v1', 'dump_names', crash_id), 'w') as fp:
+            json.dump(list(dumps.keys()), fp)
+        for dump_name, data in dumps.items():
+            if dump_name == 'upload_file_minidump':
+                dump_name = 'dump'
+            os.makedirs(os.path.join(crashdir, 'v1', dump_name), exist_ok=True)
+            with open(os.path.join(crashdir, 'v1', dump_name, crash_id), 'wb') as fp:
+                fp.write(data)
+
+
+@pytest.fixture
+def crashdir(tmpdir):
+    crashdir = str(tmpdir.join('crashes'))
+    write_crash(crashdir, CRASH_ID_1, {'upload_file_minidump': b'abcd', 'memory_report': b'ef'})
+    write_crash(crashdir, CRASH_ID_2, {})
+    return crashdir
+
+
+class TestCrashDirectory(object):
+    def test_crash_ids(self, crashdir):
+        storage = bench_processor.CrashDirectory(crashdir)
+        assert storage.crash_ids() == [CRASH_ID_1, CRASH_ID_2]
+
+    def test_get_raw_crash(self, crashdir):
+        storage = bench_processor.CrashDirectory(crashdir)
+        raw_crash = storage.get_raw_crash(CRASH_ID_1)
+        assert raw_crash.uuid == CRASH_ID_1
+
+        with pytest.raises(CrashIDNotFound):
+            storage.get_raw_crash('0bba929f-8721-460c-dead-a43c20071025')
+
+    def test_get_raw_dumps_as_files(self, crashdir):
+        storage = bench_processor.CrashDirectory(crashdir)
+        assert storage.get_raw_dumps_as_files(CRASH_ID_1) == {
+            'upload_file_minidump': os.path.join(crashdir, 'v1', 'dump', CRASH_ID_1),
+            'memory_report': os.path.join(crashdir, 'v1', 'memory_report', CRASH_ID_1),
+        }
+        assert storage.get_raw_dumps_as_files(CRASH_ID_2) == {}
+
+
+def test_main(crashdir, capsys):
+    assert bench_processor.main([
+        '--threads', '2', '--passes', '2', '--skip-rule', 'BetaVersionRule', crashdir
+    ]) == 0
+    out = capsys.readouterr().out
+    assert 'crashes:    4 (1 processes, 2 threads each)' in out
+    assert 'crashes/s' in out
+    assert 'rules.BreakpadStackwalkerRule2015' in out
+    assert 'rules.BetaVersionRule' not in out
+    # The stub stackwalker output is good enough for all the rules
+    assert 'failed on' not in out
+
+
+def test_main_processes(crashdir, capsys):
+    assert bench_processor.main([
+        '--processes', '2', '--skip-rule', 'BetaVersionRule', crashdir
+    ]) == 0
+    out = capsys.readouterr().out
+    assert 'crashes:    2 (2 processes, 1 threads each)' in out
+    assert 'rules.SignatureGeneratorRule' in out
+
+
+def test_main_unknown_rule(crashdir):
+    with pytest.raises(SystemExit):
+        bench_processor.main(['--skip-rule', 'NoSuchRule', crashdir])
+
+
+def test_main_no_crashes(tmpdir, capsys):
+    assert bench_processor.main([str(tmpdir)]) == 1
+    assert 'No crashes found' in capsys.readouterr().out
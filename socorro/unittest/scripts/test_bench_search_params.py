@@ -0,0 +1,19 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from socorro.scripts import bench_search_params
+
+
+def test_parse_compiled_matches_uncompiled():
+    uncompiled = bench_search_params.parse_uncompiled()
+    compiled = bench_search_params.parse_compiled()
+    assert sorted(uncompiled) == sorted(compiled)
+    assert compiled['signature'][0].operator == '~'
+
+
+def test_main(capsys):
+    assert bench_search_params.main(['--number', '1', '--repeat', '1']) == 0
+    out = capsys.readouterr().out
+    assert 'uncompiled' in out
+    assert 'speedup' in out
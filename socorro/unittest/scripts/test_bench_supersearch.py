@@ -0,0 +1,32 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from configman.dotdict import DotDict
+
+from socorro.external.es.supersearch import SuperSearch
+from socorro.scripts import bench_supersearch
+
+
+def get_apis():
+    config = DotDict({'elasticsearch_class': bench_supersearch.FakeConnectionContext})
+    return bench_supersearch.UncachedSuperSearch(config), SuperSearch(config)
+
+
+def test_cached_matches_uncached():
+    uncached, cached = get_apis()
+    bench_supersearch.get_body(cached, bench_supersearch.TOPCRASHERS_PARAMS)
+    for variation in bench_supersearch.VARIATIONS:
+        params = dict(bench_supersearch.TOPCRASHERS_PARAMS, **variation)
+        body = bench_supersearch.get_body(cached, params)
+        assert body == bench_supersearch.get_body(uncached, params)
+
+    # Values only differing from the first search reuse its template.
+    assert len(cached._query_templates._entries) < len(bench_supersearch.VARIATIONS)
+
+
+def test_main(capsys):
+    assert bench_supersearch.main(['--number', '1', '--repeat', '1']) == 0
+    out = capsys.readouterr().out
+    assert 'uncached' in out
+    assert 'speedup' in out
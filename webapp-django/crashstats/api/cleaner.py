@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import functools
 import re
 import warnings
 
@@ -69,8 +70,9 @@ class Cleaner(object):
                     elif isinstance(data, list):
                         self._scrub_list(data, whitelist)
 
-    def _scrub_item(self, data, whitelist):
-        matcher = SmartWhitelistMatcher(whitelist)
+    def _scrub_item(self, data, whitelist, matcher=None):
+        if matcher is None:
+            matcher = get_matcher(whitelist)
         for key in list(data.keys()):
             if key not in matcher:
                 # warnings.warn() never redirects the same message to
@@ -83,18 +85,52 @@ class Cleaner(object):
                 del data[key]
 
     def _scrub_list(self, sequence, whitelist):
+        matcher = get_matcher(whitelist)
         for i, data in enumerate(sequence):
-            self._scrub_item(data, whitelist)
+            self._scrub_item(data, whitelist, matcher)
             sequence[i] = data
 
 
 class SmartWhitelistMatcher(object):
+    """
+    Tells whether a key is in a whitelist of names, where `*` in a name
+    matches any run of word characters and dashes.
+
+    Keys that are in the whitelist as is are found with a set lookup. Other
+    keys go through a regex of the whole whitelist once and the answer is
+    remembered, since the same keys come up in every hit of a result.
+    """
+
+    # Number of answers to remember
+    MAX_REMEMBERED_KEYS = 10000
+
     def __init__(self, whitelist):
         def format(item):
             return '^' + item.replace('*', r'[\w-]*') + '$'
 
         items = [format(x) for x in whitelist]
         self.regex = re.compile('|'.join(items))
+        self.exact = frozenset(x for x in whitelist if '*' not in x)
+        self._remembered = {}
 
     def __contains__(self, key):
-        return bool(self.regex.match(key))
+        if key in self.exact:
+            return True
+        try:
+            return self._remembered[key]
+        except KeyError:
+            pass
+        found = bool(self.regex.match(key))
+        if len(self._remembered) < self.MAX_REMEMBERED_KEYS:
+            self._remembered[key] = found
+        return found
+
+
+@functools.lru_cache(maxsize=100)
+def _get_matcher(whitelist):
+    return SmartWhitelistMatcher(whitelist)
+
+
+def get_matcher(whitelist):
+    """Return the SmartWhitelistMatcher shared by all users of a whitelist"""
+    return _get_matcher(tuple(whitelist))
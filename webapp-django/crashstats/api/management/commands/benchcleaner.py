@@ -0,0 +1,105 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks scrubbing a Super Search response with the API whitelist the way
+the public API does for users without the view_pii permission.
+"""
+
+import copy
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from crashstats.api.cleaner import Cleaner
+from socorro.external.es.super_search_fields import FIELDS
+
+
+class UncompiledCleaner(Cleaner):
+    """Cleaner that builds the whitelist regex for every item it scrubs"""
+
+    def _scrub_item(self, data, whitelist, matcher=None):
+        regex = re.compile('|'.join(
+            '^' + item.replace('*', r'[\w-]*') + '$' for item in whitelist
+        ))
+        for key in list(data.keys()):
+            if not regex.match(key):
+                del data[key]
+
+
+def get_whitelist():
+    return {
+        'hits': tuple(
+            meta['name'] for meta in FIELDS.values()
+            if meta['is_returned'] and not meta['permissions_needed']
+        )
+    }
+
+
+def get_response(hits):
+    """Return a Super Search response with `hits` hits holding all the
+    returned fields, whitelisted or not"""
+    hit = {
+        meta['name']: 'value'
+        for meta in FIELDS.values()
+        if meta['is_returned']
+    }
+    return {
+        'hits': [dict(hit, uuid='%032d' % i) for i in range(hits)],
+        'total': hits,
+        'facets': {},
+        'errors': [],
+    }
+
+
+def time_cleaner(cleaner_class, whitelist, response, number, repeat):
+    """Return the best time in seconds to scrub the response"""
+    best = None
+    for i in range(repeat):
+        copies = [copy.deepcopy(response) for j in range(number)]
+        start = time.perf_counter()
+        for data in copies:
+            cleaner_class(whitelist).start(data)
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks scrubbing a Super Search response with the API whitelist.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hits', type=int, default=1000,
+            help='number of hits in the response'
+        )
+        parser.add_argument(
+            '--number', type=int, default=10,
+            help='number of responses to scrub per round'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='number of rounds, the best one is reported'
+        )
+
+    def handle(self, **options):
+        whitelist = get_whitelist()
+        response = get_response(options['hits'])
+
+        # Make sure both scrub the same way before timing anything.
+        uncompiled = copy.deepcopy(response)
+        UncompiledCleaner(whitelist).start(uncompiled)
+        compiled = copy.deepcopy(response)
+        Cleaner(whitelist).start(compiled)
+        assert uncompiled == compiled
+
+        results = []
+        for name, cleaner_class in (('uncompiled', UncompiledCleaner), ('compiled', Cleaner)):
+            best = time_cleaner(
+                cleaner_class, whitelist, response, options['number'], options['repeat']
+            )
+            results.append(best)
+            self.stdout.write('%-12s %8.3f ms per response' % (name, best * 1000))
+        self.stdout.write('speedup      %8.1fx' % (results[0] / results[1]))
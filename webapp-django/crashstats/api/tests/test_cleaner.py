@@ -2,9 +2,11 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+from django.core.management import call_command
 import mock
+import six
 
-from crashstats.api.cleaner import Cleaner, SmartWhitelistMatcher
+from crashstats.api.cleaner import Cleaner, get_matcher, SmartWhitelistMatcher
 
 
 class TestCleaner(object):
@@ -219,3 +221,29 @@ class TestSmartWhitelistMatcher(object):
         assert 'thing' in matcher
         assert 'things' in matcher
         assert 'nothing' not in matcher
+
+    def test_exact_and_remembered_keys(self):
+        matcher = SmartWhitelistMatcher(['some', 'thing*'])
+        assert matcher.exact == {'some'}
+        assert 'things' in matcher
+        assert 'nothing' not in matcher
+        assert matcher._remembered == {'things': True, 'nothing': False}
+
+    def test_dots_are_matched_like_before(self):
+        # Names aren't escaped in the regex, so keys that only differ by the
+        # character in place of a dot are still in the whitelist
+        matcher = SmartWhitelistMatcher(['raw_crash.foo'])
+        assert 'raw_crash.foo' in matcher
+        assert 'raw_crashXfoo' in matcher
+
+
+def test_get_matcher():
+    matcher = get_matcher(['some', 'thing*'])
+    assert get_matcher(('some', 'thing*')) is matcher
+    assert get_matcher(['some']) is not matcher
+
+
+def test_benchcleaner():
+    buffer = six.StringIO()
+    call_command('benchcleaner', hits=10, number=1, repeat=1, stdout=buffer)
+    assert 'speedup' in buffer.getvalue()
@@ -367,7 +367,13 @@ class TestViews(BaseTestViews):
                 return '\xe0'
             raise NotImplementedError
 
+        def mocked_get_stream(**params):
+            if 'uuid' in params and params['uuid'] == 'abc':
+                return iter([b'\xe0', b'\xe1'])
+            raise NotImplementedError
+
         RawCrash.implementation().get.side_effect = mocked_get
+        RawCrash.implementation().get_stream.side_effect = mocked_get_stream
 
         url = reverse('api:model_wrapper', args=('RawCrash',))
         response = self.client.get(url, {
@@ -403,6 +409,7 @@ class TestViews(BaseTestViews):
         assert response.status_code == 200
         assert response['Content-Disposition'] == 'attachment; filename="abc.dmp"'
         assert response['Content-Type'] == 'application/octet-stream'
+        assert b''.join(response.streaming_content) == b'\xe0\xe1'
 
     def test_RawCrash_invalid_crash_id(self):
         # NOTE(alexisdeschamps): this undoes the mocking of the implementation so we can test
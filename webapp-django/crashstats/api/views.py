@@ -234,26 +234,6 @@ def model_wrapper(request, model_name):
     request_data = request.method == 'GET' and request.GET or request.POST
     form = FormWrapper(model, request_data)
     if form.is_valid():
-        try:
-            result = function(**form.cleaned_data)
-        except ValueError as e:
-            if 'No JSON object could be decoded' in e:
-                return http.HttpResponseBadRequest(
-                    json.dumps({'error': 'Not a valid JSON response'}),
-                    content_type='application/json; charset=UTF-8'
-                )
-            raise
-        except NOT_FOUND_EXCEPTIONS as exception:
-            return http.HttpResponseNotFound(
-                json.dumps({'error': ('%s: %s' % (type(exception).__name__, exception))}),
-                content_type='application/json; charset=UTF-8'
-            )
-        except BAD_REQUEST_EXCEPTIONS as exception:
-            return http.HttpResponseBadRequest(
-                json.dumps({'error': ('%s: %s' % (type(exception).__name__, exception))}),
-                content_type='application/json; charset=UTF-8'
-            )
-
         # Some models allows to return a binary reponse. It does so based on
         # the models `BINARY_RESPONSE` dict in which all keys and values
         # need to be in the valid query. For example, if the query is
@@ -286,7 +266,31 @@ def model_wrapper(request, model_name):
                     (', '.join(permission_names))
                 )
 
-        elif not request.user.has_perm('crashstats.view_pii'):
+        try:
+            if binary_response and hasattr(instance, 'get_stream'):
+                # Binary responses can be big, pass them through in chunks
+                result = instance.get_stream(**form.cleaned_data)
+            else:
+                result = function(**form.cleaned_data)
+        except ValueError as e:
+            if 'No JSON object could be decoded' in e:
+                return http.HttpResponseBadRequest(
+                    json.dumps({'error': 'Not a valid JSON response'}),
+                    content_type='application/json; charset=UTF-8'
+                )
+            raise
+        except NOT_FOUND_EXCEPTIONS as exception:
+            return http.HttpResponseNotFound(
+                json.dumps({'error': ('%s: %s' % (type(exception).__name__, exception))}),
+                content_type='application/json; charset=UTF-8'
+            )
+        except BAD_REQUEST_EXCEPTIONS as exception:
+            return http.HttpResponseBadRequest(
+                json.dumps({'error': ('%s: %s' % (type(exception).__name__, exception))}),
+                content_type='application/json; charset=UTF-8'
+            )
+
+        if not binary_response and not request.user.has_perm('crashstats.view_pii'):
             if callable(model.API_WHITELIST):
                 whitelist = model.API_WHITELIST()
             else:
@@ -307,7 +311,12 @@ def model_wrapper(request, model_name):
 
     if binary_response:
         assert model.API_BINARY_FILENAME, 'No API_BINARY_FILENAME set on model'
-        response = http.HttpResponse(result, content_type='application/octet-stream')
+        if hasattr(instance, 'get_stream'):
+            response = http.StreamingHttpResponse(
+                result, content_type='application/octet-stream'
+            )
+        else:
+            response = http.HttpResponse(result, content_type='application/octet-stream')
         filename = model.API_BINARY_FILENAME % form.cleaned_data
         response['Content-Disposition'] = 'attachment; filename="%s"' % filename
         return response
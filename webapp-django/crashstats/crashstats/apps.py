@@ -2,12 +2,17 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import logging
+
 from django.apps import AppConfig
 from django.conf import settings
 
 import markus
 
 
+logger = logging.getLogger('crashstats.apps')
+
+
 class CrashstatsConfig(AppConfig):
     name = 'crashstats.crashstats'
 
@@ -48,3 +53,16 @@ class CrashstatsConfig(AppConfig):
             ]
 
         markus.configure(backends=backends)
+
+        if settings.WARM_UP_IMPLEMENTATIONS:
+            from crashstats.crashstats.models import (
+                get_models_with_implementation,
+                implementation_registry,
+            )
+
+            try:
+                implementation_registry.warm_up(get_models_with_implementation())
+            except Exception:
+                # Requests that need the implementation will fail and report
+                # the problem, the rest of the site still works
+                logger.exception('unable to build implementations')
@@ -0,0 +1,88 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Run independent backend calls of a view in parallel.
+
+Views like the report index need data from several backends that don't
+depend on each other: the raw crash and the processed crash are two separate
+S3 GETs. Calling them one after the other makes the page as slow as the sum
+of the calls. ``fan_out`` runs them on a thread pool shared by the whole
+process, so the page is only as slow as the slowest call::
+
+    results = fan_out(
+        raw=functools.partial(models.RawCrash().get, crash_id=crash_id),
+        report=functools.partial(models.UnredactedCrash().get, crash_id=crash_id),
+    )
+    raw = results['raw'].result()
+
+Each call gets a ``Future``, whose ``result()`` returns the value or raises the
+exception of that call, so views handle errors of each call like they did when
+calling it directly.
+
+Calls shouldn't use the database: connections are per thread and the
+request's transaction isn't visible from the pool's threads.
+
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_executor():
+    """Return the process-wide thread pool, or None if it is disabled"""
+    global _executor
+    if not settings.VIEW_FANOUT_THREADS:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.VIEW_FANOUT_THREADS)
+    return _executor
+
+
+def _run_in_pool(func):
+    _local.in_pool = True
+    try:
+        return func()
+    finally:
+        _local.in_pool = False
+        # Don't leave connections opened by accident behind in the pool's
+        # threads
+        connections.close_all()
+
+
+def _run_here(func):
+    future = Future()
+    try:
+        future.set_result(func())
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def fan_out(**calls):
+    """Run callables concurrently and return a dict of their futures
+
+    The first callable runs in the calling thread while the others run in
+    the shared pool. Everything runs in the calling thread if the pool is
+    disabled, or when called from a thread of the pool, which could
+    otherwise wait on itself.
+
+    """
+    executor = get_executor()
+    if executor is None or getattr(_local, 'in_pool', False):
+        return {name: _run_here(func) for name, func in calls.items()}
+
+    names = list(calls)
+    futures = {name: executor.submit(_run_in_pool, calls[name]) for name in names[1:]}
+    if names:
+        futures[names[0]] = _run_here(calls[names[0]])
+    return futures
@@ -0,0 +1,37 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Refreshes the cached versions of all active products.
+
+Finding the versions of a product takes a faceted search over months of
+crash reports and almost every page needs them. Running this more often than
+``crashstats.crashstats.utils.VERSIONS_FRESH_SECONDS`` (every 30 minutes, for
+example) keeps the cache warm so that web requests never run that search.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crashstats.crashstats import utils
+from crashstats.crashstats.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Refreshes the cached versions of all active products.'
+
+    def handle(self, **options):
+        failed = []
+        products = Product.objects.active_products().values_list('product_name', flat=True)
+        for product in products:
+            try:
+                versions = utils.get_versions_for_product(product, refresh=True)
+                utils.get_version_context_for_product(product, refresh=True)
+            except Exception as exc:
+                failed.append(product)
+                self.stderr.write('%s: unable to refresh versions: %r' % (product, exc))
+                continue
+            self.stdout.write('%s: %d versions' % (product, len(versions)))
+
+        if failed:
+            raise CommandError('Unable to refresh versions of %s' % ', '.join(failed))
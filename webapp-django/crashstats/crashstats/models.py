@@ -10,9 +10,11 @@ import datetime
 import functools
 import hashlib
 import logging
+import threading
 import time
 
 from configman import configuration, Namespace
+import markus
 import six
 
 from django.conf import settings
@@ -33,6 +35,7 @@ from socorro.lib.requestslib import session_with_retries
 
 
 logger = logging.getLogger('crashstats.models')
+metrics = markus.get_metrics('webapp.models')
 
 
 # Django models first
@@ -249,6 +252,95 @@ def config_from_configman():
     return config
 
 
+class ImplementationRegistry(object):
+    """Process-wide registry of implementation objects
+
+    Building the configman config and instantiating an implementation (and
+    with it a boto or Elasticsearch connection context) is expensive, so
+    both are done once per process and the objects are shared by all
+    requests. Implementations that are shared have to be safe to use from
+    several threads, like the crash storage objects the processor shares
+    between its worker threads.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._config = None
+        self._implementations = {}
+
+    def get_config(self):
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    start_time = time.time()
+                    self._config = config_from_configman()
+                    self._report('config', '', time.time() - start_time)
+        return self._config
+
+    def get(self, implementation, namespace=''):
+        """Returns the shared instance of an implementation class"""
+        key = (implementation, namespace)
+        try:
+            return self._implementations[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if key not in self._implementations:
+                config = self.get_config()
+                if namespace:
+                    config = config[namespace]
+                start_time = time.time()
+                instance = implementation(config=config)
+                self._report(
+                    getattr(implementation, '__name__', repr(implementation)),
+                    namespace,
+                    time.time() - start_time
+                )
+                self._implementations[key] = instance
+            return self._implementations[key]
+
+    def _report(self, name, namespace, seconds):
+        logger.info(
+            'built %s%s in %.1f ms',
+            name,
+            ' (%s)' % namespace if namespace else '',
+            seconds * 1000
+        )
+        metrics.timing(
+            'implementation_construction',
+            value=seconds * 1000,
+            tags=['implementation:%s' % name]
+        )
+
+    def warm_up(self, model_classes):
+        """Builds the config and the shared implementations of model classes"""
+        for model_class in model_classes:
+            if model_class.implementation and model_class.share_implementation:
+                self.get(model_class.implementation, model_class.implementation_config_namespace)
+
+    def clear(self):
+        with self._lock:
+            self._config = None
+            self._implementations = {}
+
+
+implementation_registry = ImplementationRegistry()
+
+
+def get_models_with_implementation():
+    """Returns all the model classes that have an implementation"""
+    result = []
+    stack = [SocorroCommon]
+    while stack:
+        klass = stack.pop()
+        if klass.implementation and klass not in result:
+            result.append(klass)
+        stack.extend(klass.__subclasses__())
+    return result
+
+
 def get_api_whitelist(*args, **kwargs):
 
     def get_from_es(namespace, baseline=None):
@@ -367,6 +459,13 @@ class SocorroCommon(object):
     # instantiating implementation classes so this is None by default.
     implementation = None
 
+    # Whether the implementation object can be shared by all requests of
+    # the process, see ImplementationRegistry
+    share_implementation = True
+
+    # Config namespace to use for the implementation
+    implementation_config_namespace = ''
+
     # By default, the model is not called with an API user.
     # This is applicable when the models are used from views that
     # originate from pure class instanciation instead of from
@@ -390,9 +489,7 @@ class SocorroCommon(object):
         cache_key = None
 
         if settings.CACHE_IMPLEMENTATION_FETCHES and not dont_cache and self.cache_seconds:
-            name = implementation.__class__.__name__
-            key_string = name + repr(params)
-            cache_key = hashlib.md5(key_string.encode('utf-8')).hexdigest()
+            cache_key = self.get_fetch_cache_key(implementation, params)
 
             if not refresh_cache:
                 result = cache.get(cache_key)
@@ -408,6 +505,12 @@ class SocorroCommon(object):
 
         return result, False
 
+    @staticmethod
+    def get_fetch_cache_key(implementation, params):
+        name = implementation.__class__.__name__
+        key_string = name + repr(params)
+        return hashlib.md5(key_string.encode('utf-8')).hexdigest()
+
     def _complete_url(self, url):
         if url.startswith('/'):
             if not getattr(self, 'base_url', None):
@@ -417,7 +520,11 @@ class SocorroCommon(object):
 
     def get_implementation(self):
         if self.implementation:
-            config = config_from_configman()
+            if self.share_implementation:
+                return implementation_registry.get(
+                    self.implementation, self.implementation_config_namespace
+                )
+            config = implementation_registry.get_config()
             if self.implementation_config_namespace:
                 config = config[self.implementation_config_namespace]
             return self.implementation(config=config)
@@ -869,6 +976,43 @@ class RawCrash(SocorroMiddleware):
             raise BadArgumentError('format')
         return result
 
+    def get_stream(self, **kwargs):
+        """Return a raw dump as an iterable of bytes chunks.
+
+        The dump is downloaded as the chunks are consumed, so it never has to
+        be in memory as a whole. It's cached like the dumps `get` returns
+        unless it's bigger than settings.RAW_DUMP_CACHE_MAX_SIZE.
+        """
+        kwargs['format'] = 'raw'
+        implementation = self.get_implementation()
+        params = self.parse_parameters(kwargs)
+
+        cache_key = None
+        if settings.CACHE_IMPLEMENTATION_FETCHES and self.cache_seconds:
+            cache_key = self.get_fetch_cache_key(implementation, params)
+            result = cache.get(cache_key)
+            if result is not None:
+                return [result]
+
+        chunks = implementation.get_stream(**params)
+        if not cache_key:
+            return chunks
+        return self._cache_chunks(chunks, cache_key)
+
+    def _cache_chunks(self, chunks, cache_key):
+        kept = []
+        size = 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= settings.RAW_DUMP_CACHE_MAX_SIZE:
+                    kept.append(chunk)
+                else:
+                    kept = None
+            yield chunk
+        if kept is not None:
+            cache.set(cache_key, b''.join(kept), self.cache_seconds)
+
 
 class Bugs(SocorroMiddleware):
     # NOTE(willkg): This is implemented with a Django model.
@@ -1137,6 +1281,10 @@ class Reprocessing(SocorroMiddleware):
     HELP_TEXT = """
     API for queuing up crash reports for reprocessing. Requires the reprocess
     permission.
+
+    Use `rules` to only re-run some processor rules, like
+    `SignatureGeneratorRule`, on top of the existing processed crash instead
+    of processing the crash from scratch.
     """
 
     API_REQUIRED_PERMISSIONS = (
@@ -1149,14 +1297,23 @@ class Reprocessing(SocorroMiddleware):
 
     implementation_config_namespace = 'queuing'
 
+    # RabbitMQ connections can't be shared between threads
+    share_implementation = False
+
     required_params = (
         ('crash_ids', list),
     )
 
+    possible_params = (
+        ('rules', list),
+    )
+
     get = None
 
-    def post(self, **data):
-        return self.get_implementation().reprocess(**data)
+    def post(self, crash_ids, rules=None):
+        if rules:
+            return self.get_implementation().reprocess(crash_ids=crash_ids, rules=rules)
+        return self.get_implementation().reprocess(crash_ids=crash_ids)
 
 
 class Priorityjob(SocorroMiddleware):
@@ -1168,6 +1325,9 @@ class Priorityjob(SocorroMiddleware):
 
     implementation_config_namespace = 'priority'
 
+    # RabbitMQ connections can't be shared between threads
+    share_implementation = False
+
     required_params = (
         ('crash_ids', list),
     )
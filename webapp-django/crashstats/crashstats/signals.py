@@ -3,6 +3,7 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from django.contrib.auth.models import Permission
+from django.core.signals import setting_changed
 from django.db.models.signals import post_migrate
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
@@ -79,3 +80,12 @@ def setup_custom_permissions_and_groups(sender, **kwargs):
             group.save()
             if created:
                 print('  Group: "%s" created.' % group_name)
+
+
+@receiver(setting_changed)
+def clear_implementation_registry(sender, setting, **kwargs):
+    """Forget shared implementations built from outdated settings"""
+    if setting == 'SOCORRO_IMPLEMENTATIONS_CONFIG':
+        from crashstats.crashstats.models import implementation_registry
+
+        implementation_registry.clear()
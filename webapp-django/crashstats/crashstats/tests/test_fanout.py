@@ -0,0 +1,59 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+
+from django.test.utils import override_settings
+import pytest
+
+from crashstats.crashstats import fanout
+from crashstats.crashstats.fanout import fan_out
+
+
+class TestFanOut:
+    def test_results(self):
+        results = fan_out(one=lambda: 1, two=lambda: 2, three=lambda: 3)
+        assert {name: future.result() for name, future in results.items()} == {
+            'one': 1, 'two': 2, 'three': 3,
+        }
+
+    def test_runs_concurrently(self):
+        # Each call waits for the other one, so they only finish when they
+        # run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        results = fan_out(one=barrier.wait, two=barrier.wait)
+        assert sorted(future.result() for future in results.values()) == [0, 1]
+
+    def test_first_call_runs_in_calling_thread(self):
+        results = fan_out(here=threading.get_ident, there=threading.get_ident)
+        assert results['here'].result() == threading.get_ident()
+        assert results['there'].result() != threading.get_ident()
+
+    def test_exceptions(self):
+        def fail():
+            raise ValueError('boom')
+
+        results = fan_out(ok=lambda: 'ok', fail=fail, fail_here=fail)
+        assert results['ok'].result() == 'ok'
+        with pytest.raises(ValueError):
+            results['fail'].result()
+        with pytest.raises(ValueError):
+            results['fail_here'].result()
+
+    def test_nested(self):
+        # A call made in the pool fans out in its own thread rather than
+        # waiting on the pool
+        def inner():
+            results = fan_out(a=threading.get_ident, b=threading.get_ident)
+            return {future.result() for future in results.values()}
+
+        results = fan_out(here=lambda: None, inner=inner)
+        assert len(results['inner'].result()) == 1
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(fanout, '_executor', None)
+        with override_settings(VIEW_FANOUT_THREADS=0):
+            results = fan_out(one=threading.get_ident, two=threading.get_ident)
+            assert fanout.get_executor() is None
+        assert {future.result() for future in results.values()} == {threading.get_ident()}
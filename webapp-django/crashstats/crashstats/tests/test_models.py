@@ -593,6 +593,17 @@ class TestMiddlewareModels(DjangoTestCase):
         # the ReprocessingOneRabbitMQCrashStore choses NOT to queue it.
         assert not api.post(crash_ids='bad-crash-id')
 
+    def test_Reprocessing_rules(self):
+        api = models.Reprocessing()
+
+        mocked_reprocess = mock.Mock(return_value=True)
+        models.Reprocessing.implementation().reprocess = mocked_reprocess
+        assert api.post(crash_ids=['some-crash-id'], rules=['SignatureGeneratorRule'])
+        mocked_reprocess.assert_called_with(
+            crash_ids=['some-crash-id'],
+            rules=['SignatureGeneratorRule']
+        )
+
     def test_Priorityjob(self):
         api = models.Priorityjob()
 
@@ -608,3 +619,75 @@ class TestMiddlewareModels(DjangoTestCase):
         # Note that it doesn't raise an error if
         # the PriorityjobRabbitMQCrashStore choses NOT to queue it.
         assert not api.post(crash_ids='bad-crash-id')
+
+
+class TestImplementationRegistry(object):
+    def test_get(self):
+        registry = models.ImplementationRegistry()
+        implementation = mock.Mock()
+        with mock.patch('crashstats.crashstats.models.config_from_configman') as mock_config:
+            mock_config.return_value = {'crashdata': {'name': 'crashdata'}}
+            first = registry.get(implementation, 'crashdata')
+            assert registry.get(implementation, 'crashdata') is first
+            registry.get(implementation)
+
+        # The config is parsed once and each implementation is built once
+        assert mock_config.call_count == 1
+        assert implementation.call_args_list == [
+            mock.call(config={'name': 'crashdata'}),
+            mock.call(config={'crashdata': {'name': 'crashdata'}}),
+        ]
+
+    def test_clear(self):
+        registry = models.ImplementationRegistry()
+        implementation = mock.Mock(side_effect=lambda config: object())
+        with mock.patch('crashstats.crashstats.models.config_from_configman') as mock_config:
+            first = registry.get(implementation)
+            registry.clear()
+            assert registry.get(implementation) is not first
+        assert mock_config.call_count == 2
+
+    def test_warm_up(self):
+        Shared = mock.Mock(
+            implementation=mock.Mock(),
+            implementation_config_namespace='crashdata',
+            share_implementation=True,
+        )
+        NotShared = mock.Mock(
+            implementation=mock.Mock(),
+            implementation_config_namespace='',
+            share_implementation=False,
+        )
+
+        registry = models.ImplementationRegistry()
+        with mock.patch('crashstats.crashstats.models.config_from_configman') as mock_config:
+            mock_config.return_value = {'crashdata': {}}
+            registry.warm_up([Shared, NotShared])
+        assert Shared.implementation.call_count == 1
+        assert NotShared.implementation.call_count == 0
+
+    def test_get_models_with_implementation(self):
+        classes = models.get_models_with_implementation()
+        assert models.RawCrash in classes
+        assert models.ProcessedCrash in classes
+        assert models.NoOpMiddleware not in classes
+
+
+class TestSharedImplementations(DjangoTestCase):
+    def test_shared_across_model_instances(self):
+        implementation = mock.Mock(side_effect=lambda config: mock.Mock())
+        with mock.patch.object(models.RawCrash, 'implementation', implementation):
+            assert (
+                models.RawCrash().get_implementation() is
+                models.RawCrash().get_implementation()
+            )
+        assert implementation.call_count == 1
+
+    def test_not_shared(self):
+        implementation = mock.Mock(side_effect=lambda config: mock.Mock())
+        with mock.patch.object(models.Reprocessing, 'implementation', implementation):
+            assert (
+                models.Reprocessing().get_implementation() is not
+                models.Reprocessing().get_implementation()
+            )
+        assert implementation.call_count == 2
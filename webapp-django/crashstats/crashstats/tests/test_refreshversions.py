@@ -0,0 +1,68 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+import mock
+import pytest
+import six
+
+from crashstats.crashstats import utils
+from crashstats.crashstats.models import Product
+
+
+class TestRefreshVersionsCommand(object):
+    def setup_method(self):
+        cache.clear()
+
+    def test_refresh(self, db):
+        Product.objects.create(product_name='WaterWolf', sort=1, is_active=True)
+        Product.objects.create(product_name='NightTrain', sort=2, is_active=False)
+
+        buffer = six.StringIO()
+        with mock.patch('crashstats.crashstats.utils._get_versions_for_product') as mock_get:
+            mock_get.return_value = ['64.0', '63.0b2', '62.0']
+            call_command('refreshversions', stdout=buffer)
+            mock_get.assert_called_once_with('WaterWolf')
+        assert 'WaterWolf: 3 versions' in buffer.getvalue()
+
+        # Requests use the cached versions
+        with mock.patch('crashstats.crashstats.utils._get_versions_for_product') as mock_get:
+            assert utils.get_versions_for_product('WaterWolf') == ['64.0', '63.0b2', '62.0']
+            context = utils.get_version_context_for_product('WaterWolf')
+            assert not mock_get.called
+        assert [v['version'] for v in context if v['is_featured']] == ['64.0', '63.0b2', '62.0']
+        assert '63.0b' in [v['version'] for v in context]
+
+        # Running again refreshes the cache
+        with mock.patch('crashstats.crashstats.utils._get_versions_for_product') as mock_get:
+            mock_get.return_value = ['65.0']
+            call_command('refreshversions', stdout=six.StringIO())
+        assert utils.get_versions_for_product('WaterWolf') == ['65.0']
+        assert [v['version'] for v in utils.get_version_context_for_product('WaterWolf')] == [
+            '65.0'
+        ]
+
+    def test_unavailable(self, db):
+        Product.objects.create(product_name='WaterWolf', sort=1, is_active=True)
+
+        buffer = six.StringIO()
+        with mock.patch('crashstats.crashstats.utils._get_versions_for_product') as mock_get:
+            mock_get.side_effect = utils.VersionsUnavailable('WaterWolf')
+            call_command('refreshversions', stdout=buffer)
+            assert 'WaterWolf: 0 versions' in buffer.getvalue()
+
+            # Nothing was cached, so the next call tries again
+            call_count = mock_get.call_count
+            utils.get_version_context_for_product('WaterWolf')
+            assert mock_get.call_count == call_count + 1
+
+    def test_error(self, db):
+        Product.objects.create(product_name='WaterWolf', sort=1, is_active=True)
+
+        with mock.patch('crashstats.crashstats.utils._get_versions_for_product') as mock_get:
+            mock_get.side_effect = ValueError('boom')
+            with pytest.raises(CommandError):
+                call_command('refreshversions', stdout=six.StringIO(), stderr=six.StringIO())
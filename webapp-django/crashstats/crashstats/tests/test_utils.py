@@ -3,9 +3,14 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import copy
+import datetime
 import json
 
-from django.http import HttpResponse
+import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test.utils import override_settings
 from django.utils.encoding import smart_text
 
 from crashstats.crashstats import utils
@@ -269,6 +274,101 @@ def test_enhance_json_dump():
     assert actual == expected
 
 
+class TestGetEnhancedJsonDump:
+    vcs_mappings = {
+        'hg': {'hg.m.org': 'http://hg.m.org/%(repo)s/annotate/%(revision)s/%(file)s#l%(line)s'}
+    }
+    crash_id = '11cb72f5-eb28-41e1-a8e4-849982120611'
+
+    def setup_method(self):
+        cache.clear()
+
+    def get_processed_crash(self, **kwargs):
+        processed_crash = {
+            'completeddatetime': '2012-06-11T06:08:57',
+            'json_dump': {
+                'sensitive': {'exploitability': 'high'},
+                'threads': [{
+                    'frames': [{
+                        'frame': 0,
+                        'module': 'bad.dll',
+                        'function': 'Func(A * a,B b)',
+                        'file': 'hg:hg.m.org/repo/name:dname/fname:rev',
+                        'line': 576,
+                    }]
+                }]
+            }
+        }
+        processed_crash.update(kwargs)
+        return processed_crash
+
+    def test_enhances_and_pretty_prints(self):
+        processed_crash = self.get_processed_crash()
+        pretty_expected = json.dumps(
+            processed_crash['json_dump'], sort_keys=True, indent=4, separators=(',', ': ')
+        )
+        dump, pretty = utils.get_enhanced_json_dump(
+            self.crash_id, processed_crash, self.vcs_mappings
+        )
+        assert pretty == pretty_expected
+        frame = dump['threads'][0]['frames'][0]
+        assert frame['signature'] == 'Func(A* a, B b)'
+        assert frame['file'] == 'dname/fname'
+
+    def test_cached(self):
+        utils.get_enhanced_json_dump(self.crash_id, self.get_processed_crash(), self.vcs_mappings)
+        with mock.patch(
+            'crashstats.crashstats.utils.enhance_json_dump', wraps=utils.enhance_json_dump
+        ) as mock_enhance:
+            dump, pretty = utils.get_enhanced_json_dump(
+                self.crash_id, self.get_processed_crash(), self.vcs_mappings
+            )
+            assert not mock_enhance.called
+            assert dump['threads'][0]['frames'][0]['file'] == 'dname/fname'
+
+            # Reprocessing the crash changes the completion time
+            utils.get_enhanced_json_dump(
+                self.crash_id,
+                self.get_processed_crash(completeddatetime='2012-06-12T06:08:57'),
+                self.vcs_mappings
+            )
+            assert mock_enhance.call_count == 1
+
+            utils.get_enhanced_json_dump(
+                self.crash_id, self.get_processed_crash(), self.vcs_mappings, refresh_cache=True
+            )
+            assert mock_enhance.call_count == 2
+
+    def test_sensitive_data_not_shared(self):
+        utils.get_enhanced_json_dump(self.crash_id, self.get_processed_crash(), self.vcs_mappings)
+        processed_crash = self.get_processed_crash()
+        del processed_crash['json_dump']['sensitive']
+        dump, pretty = utils.get_enhanced_json_dump(
+            self.crash_id, processed_crash, self.vcs_mappings
+        )
+        assert 'sensitive' not in dump
+        assert 'exploitability' not in pretty
+
+    def test_not_cached_without_completion_time(self):
+        processed_crash = self.get_processed_crash()
+        del processed_crash['completeddatetime']
+        utils.get_enhanced_json_dump(self.crash_id, processed_crash, self.vcs_mappings)
+        with mock.patch('crashstats.crashstats.utils.cache') as mock_cache:
+            utils.get_enhanced_json_dump(self.crash_id, processed_crash, self.vcs_mappings)
+            assert not mock_cache.get.called
+            assert not mock_cache.set.called
+
+    @override_settings(ENHANCED_JSON_DUMP_CACHE_MAX_SIZE=10)
+    def test_too_big_to_cache(self):
+        with mock.patch('crashstats.crashstats.utils.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            utils.get_enhanced_json_dump(
+                self.crash_id, self.get_processed_crash(), self.vcs_mappings
+            )
+            assert mock_cache.get.called
+            assert not mock_cache.set.called
+
+
 def test_find_crash_id():
     # A good string, no prefix
     input_str = '1234abcd-ef56-7890-ab12-abcdef130802'
@@ -355,6 +455,35 @@ def test_json_view_custom_status(rf):
     assert response.status_code == 403
 
 
+@override_settings(JSON_RESPONSE_CHUNK_SIZE=20)
+def test_json_view_streaming(rf):
+    request = rf.get('/')
+    data = {'hits': ['hit %d </script>' % i for i in range(10)], 'total': 10}
+
+    def func(request):
+        return data, {'X-Foo': 'bar'}
+
+    func = utils.json_view(func)
+    response = func(request)
+    assert isinstance(response, StreamingHttpResponse)
+    assert response['Content-Type'] == 'application/json; charset=UTF-8'
+    assert response['X-Foo'] == 'bar'
+    chunks = list(response.streaming_content)
+    assert len(chunks) > 1
+    content = b''.join(chunks)
+    assert b'</' not in content
+    assert json.loads(content) == data
+
+
+def test_iter_json_chunks():
+    data = {'a': ['x' * 10, 'y' * 10], 'b': datetime.date(2018, 6, 20)}
+    chunks = list(utils.iter_json_chunks(data, 0, 15))
+    assert all(len(chunk) >= 15 for chunk in chunks[:-1])
+    assert ''.join(chunks) == json.dumps(data, cls=utils.DateTimeEncoder, indent=0)
+
+    assert list(utils.iter_json_chunks({}, 0, 15)) == ['{}']
+
+
 class TestRenderException(object):
     def test_basic(self):
         html = utils.render_exception('hi!')
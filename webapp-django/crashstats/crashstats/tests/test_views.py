@@ -1595,16 +1595,18 @@ class TestViews(BaseTestViews):
 
     def test_raw_data(self):
         def mocked_get(**params):
-            if 'datatype' in params and params['datatype'] == 'raw':
-                return "bla bla bla"
-            else:
-                # default is datatype/meta
-                return {
-                    'foo': 'bar',
-                    'stuff': 123,
-                }
+            assert params['datatype'] == 'meta'
+            return {
+                'foo': 'bar',
+                'stuff': 123,
+            }
+
+        def mocked_get_stream(**params):
+            assert params['datatype'] == 'raw'
+            return iter([b'bla bla', b' bla'])
 
         models.RawCrash.implementation().get.side_effect = mocked_get
+        models.RawCrash.implementation().get_stream.side_effect = mocked_get_stream
 
         crash_id = '176bcd6c-c2ec-4b0c-9d5f-dadea2120531'
         json_url = reverse('crashstats:raw_data', args=(crash_id, 'json'))
@@ -1627,28 +1629,49 @@ class TestViews(BaseTestViews):
         response = self.client.get(dump_url)
         assert response.status_code == 200
         assert response['Content-Type'] == 'application/octet-stream'
-        assert 'bla bla bla' in smart_text(response.content)
+        assert b''.join(response.streaming_content) == b'bla bla bla'
 
         # dump files are cached. check the mock function and expect no change.
-        def different_mocked_get(**params):
+        def different_mocked_get_stream(**params):
             raise AssertionError("shouldn't be used due to caching")
 
-        models.RawCrash.implementation().get.side_effect = different_mocked_get
+        models.RawCrash.implementation().get_stream.side_effect = different_mocked_get_stream
 
         response = self.client.get(dump_url)
         assert response.status_code == 200
-        assert 'bla bla bla' in smart_text(response.content)  # still. good.
+        assert b''.join(response.streaming_content) == b'bla bla bla'  # still. good.
+
+    @override_settings(RAW_DUMP_CACHE_MAX_SIZE=5)
+    def test_raw_data_too_big_to_cache(self):
+        calls = []
+
+        def mocked_get_stream(**params):
+            calls.append(params)
+            return iter([b'bla bla', b' bla'])
+
+        models.RawCrash.implementation().get_stream.side_effect = mocked_get_stream
+
+        user = self._login()
+        group = self._create_group_with_permission('view_rawdump')
+        user.groups.add(group)
+
+        crash_id = '176bcd6c-c2ec-4b0c-9d5f-dadea2120531'
+        dump_url = reverse('crashstats:raw_data', args=(crash_id, 'dmp'))
+        for i in range(2):
+            response = self.client.get(dump_url)
+            assert b''.join(response.streaming_content) == b'bla bla bla'
+        assert len(calls) == 2
 
     def test_raw_data_memory_report(self):
         crash_id = '176bcd6c-c2ec-4b0c-9d5f-dadea2120531'
 
-        def mocked_get(**params):
+        def mocked_get_stream(**params):
             assert params['name'] == 'memory_report'
             assert params['uuid'] == crash_id
             assert params['datatype'] == 'raw'
-            return "binary stuff"
+            return iter([b'binary stuff'])
 
-        models.RawCrash.implementation().get.side_effect = mocked_get
+        models.RawCrash.implementation().get_stream.side_effect = mocked_get_stream
 
         dump_url = reverse('crashstats:raw_data_named', args=(crash_id, 'memory_report', 'json.gz'))
         response = self.client.get(dump_url)
@@ -1663,7 +1686,7 @@ class TestViews(BaseTestViews):
         response = self.client.get(dump_url)
         assert response.status_code == 200
         assert response['Content-Type'] == 'application/octet-stream'
-        assert 'binary stuff' in smart_text(response.content)
+        assert b''.join(response.streaming_content) == b'binary stuff'
 
 
 class TestLogin(BaseTestViews):
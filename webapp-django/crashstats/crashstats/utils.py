@@ -5,9 +5,10 @@
 from collections import OrderedDict
 import datetime
 import functools
+import hashlib
 import isodate
+import itertools
 import json
-import random
 import re
 
 import six
@@ -22,6 +23,7 @@ from django.utils.functional import cached_property
 
 from crashstats.crashstats import models
 import crashstats.supersearch.models as supersearch_models
+from crashstats.supersearch import cache as search_cache
 from socorro.lib.versionutil import (
     generate_version_key,
     VersionParseError
@@ -207,7 +209,7 @@ def json_view(f):
         request._json_view = True
         response = f(request, *args, **kw)
 
-        if isinstance(response, http.HttpResponse):
+        if isinstance(response, (http.HttpResponse, http.StreamingHttpResponse)):
             return response
 
         else:
@@ -225,21 +227,47 @@ def json_view(f):
                 response, headers = response
             else:
                 headers = {}
-            http_response = http.HttpResponse(
-                _json_clean(json.dumps(
-                    response,
-                    cls=DateTimeEncoder,
-                    indent=indent
-                )),
-                status=status,
-                content_type='application/json; charset=UTF-8'
-            )
+            chunks = iter_json_chunks(response, indent, settings.JSON_RESPONSE_CHUNK_SIZE)
+            first_chunk = next(chunks, '')
+            second_chunk = next(chunks, None)
+            if second_chunk is None:
+                http_response = http.HttpResponse(
+                    first_chunk,
+                    status=status,
+                    content_type='application/json; charset=UTF-8'
+                )
+            else:
+                # Big results are sent while they are being encoded rather
+                # than after having been encoded in memory as a whole
+                http_response = http.StreamingHttpResponse(
+                    itertools.chain([first_chunk, second_chunk], chunks),
+                    status=status,
+                    content_type='application/json; charset=UTF-8'
+                )
             for key, value in headers.items():
                 http_response[key] = value
             return http_response
     return wrapper
 
 
+def iter_json_chunks(data, indent, chunk_size):
+    """Yield the JSON encoding of `data` in chunks of at least `chunk_size`
+    characters, except for the last one."""
+    buffer = []
+    size = 0
+    # `iterencode` yields every string literal as a whole, so `</` never
+    # straddles two pieces and chunks can be cleaned one at a time
+    for piece in DateTimeEncoder(indent=indent).iterencode(data):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield _json_clean(''.join(buffer))
+            buffer = []
+            size = 0
+    if buffer:
+        yield _json_clean(''.join(buffer))
+
+
 def _json_clean(value):
     """JSON-encodes the given Python object."""
     # JSON permits but does not require forward slashes to be escaped.
@@ -252,6 +280,14 @@ def _json_clean(value):
     return value.replace("</", "<\\/")
 
 
+# Spaces before stars, ampersands, and commas
+_space_before_punctuation_regex = re.compile(r' (?=[\*&,])')
+# Commas not followed by a space
+_comma_without_space_regex = re.compile(r',(?! )')
+# Function arguments
+_arguments_regex = re.compile(r'\(.*\)')
+
+
 def enhance_frame(frame, vcs_mappings):
     """
     Add some additional info to a stack frame--signature
@@ -259,9 +295,9 @@ def enhance_frame(frame, vcs_mappings):
     """
     if 'function' in frame:
         # Remove spaces before all stars, ampersands, and commas
-        function = re.sub(r' (?=[\*&,])', '', frame['function'])
+        function = _space_before_punctuation_regex.sub('', frame['function'])
         # Ensure a space after commas
-        function = re.sub(r',(?! )', ', ', function)
+        function = _comma_without_space_regex.sub(', ', function)
         frame['function'] = function
         signature = function
     elif 'file' in frame and 'line' in frame:
@@ -271,7 +307,7 @@ def enhance_frame(frame, vcs_mappings):
     else:
         signature = '@%s' % frame['offset']
     frame['signature'] = signature
-    frame['short_signature'] = re.sub(r'\(.*\)', '', signature)
+    frame['short_signature'] = _arguments_regex.sub('', signature)
 
     if 'file' in frame:
         vcsinfo = frame['file'].split(':')
@@ -322,6 +358,53 @@ def enhance_json_dump(dump, vcs_mappings):
     return dump
 
 
+# Bump when enhance_json_dump changes what it produces so the enhanced dumps
+# cached by get_enhanced_json_dump are not used anymore
+ENHANCED_JSON_DUMP_VERSION = 1
+
+
+def get_enhanced_json_dump(crash_id, processed_crash, vcs_mappings, refresh_cache=False):
+    """
+    Return (enhanced json_dump, pretty-printed json_dump) for the
+    json_dump of a processed crash.
+
+    Enhancing and pretty-printing the dump of a big crash takes a while and
+    popular crash reports are viewed a lot, so the result is cached. The
+    cache key contains the time the crash was processed, so reprocessing the
+    crash makes it compute them again. Whether the dump contains the
+    sensitive data is part of the key too, so users who can't see it never
+    get it from the cache.
+    """
+    json_dump = processed_crash['json_dump']
+    completed = processed_crash.get('completeddatetime')
+
+    cache_key = None
+    if completed and settings.ENHANCED_JSON_DUMP_CACHE_SECONDS:
+        mappings_hash = hashlib.md5(
+            json.dumps(vcs_mappings, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        cache_key = 'enhanced_json_dump:{}:{}'.format(
+            crash_id,
+            hashlib.md5('{}:{}:{}:{}'.format(
+                ENHANCED_JSON_DUMP_VERSION,
+                completed,
+                'sensitive' in json_dump,
+                mappings_hash,
+            ).encode('utf-8')).hexdigest()
+        )
+        if not refresh_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+    pretty = json.dumps(json_dump, sort_keys=True, indent=4, separators=(',', ': '))
+    result = (enhance_json_dump(json_dump, vcs_mappings), pretty)
+    # The cache backend may refuse huge values, don't bother sending them
+    if cache_key and len(pretty) <= settings.ENHANCED_JSON_DUMP_CACHE_MAX_SIZE:
+        cache.set(cache_key, result, settings.ENHANCED_JSON_DUMP_CACHE_SECONDS)
+    return result
+
+
 def enhance_raw(raw_crash):
     """Enhances raw crash with additional data"""
     if raw_crash.get('AdapterVendorID') and raw_crash.get('AdapterDeviceID'):
@@ -340,8 +423,20 @@ def enhance_raw(raw_crash):
 #: two months, then seems like that version isn't active.
 VERSIONS_WINDOW_DAYS = 60
 
+#: Number of seconds versions of a product are cached before they are
+#: refreshed. The ``refreshversions`` command refreshes them before that.
+VERSIONS_FRESH_SECONDS = 60 * 60
+
+#: Number of seconds expired versions of a product are still used while
+#: they are refreshed in the background.
+VERSIONS_STALE_SECONDS = 60 * 60 * 24
+
 
-def get_versions_for_product(product='Firefox', use_cache=True):
+class VersionsUnavailable(Exception):
+    """SuperSearch didn't return the versions of a product"""
+
+
+def get_versions_for_product(product='Firefox', use_cache=True, refresh=False):
     """Returns list of recent version strings for specified product
 
     This looks at the crash reports submitted for this product over
@@ -354,17 +449,33 @@ def get_versions_for_product(product='Firefox', use_cache=True):
 
     :arg str product: the product to query for
     :arg bool use_cache: whether or not to pull results from cache
+    :arg bool refresh: whether to update the cache rather than pull results
+        from it
 
     :returns: list of versions sorted in reverse order or ``[]``
 
     """
+    try:
+        if not use_cache:
+            return _get_versions_for_product(product)
+        return _get_cached_versions_for_product(product, refresh=refresh)
+    except VersionsUnavailable:
+        return []
+
 
-    if use_cache:
-        key = 'get_versions_for_product:%s' % product.lower().replace(' ', '')
-        ret = cache.get(key)
-        if ret is not None:
-            return ret
+def _get_cached_versions_for_product(product, refresh=False):
+    key = 'get_versions_for_product:%s' % product.lower().replace(' ', '')
+    versions, from_cache = search_cache.get_or_compute(
+        key,
+        functools.partial(_get_versions_for_product, product),
+        VERSIONS_FRESH_SECONDS,
+        VERSIONS_STALE_SECONDS,
+        refresh=refresh,
+    )
+    return versions
 
+
+def _get_versions_for_product(product):
     api = supersearch_models.SuperSearchUnredacted()
     now = timezone.now()
 
@@ -386,7 +497,8 @@ def get_versions_for_product(product='Firefox', use_cache=True):
     # we don't need to cache the fetch
     ret = api.get(**params, dont_cache=True)
     if 'facets' not in ret or 'version' not in ret['facets']:
-        return []
+        # Don't cache anything, so the query is tried again
+        raise VersionsUnavailable(product)
 
     # Get versions from facet, drop junk, and sort the final list
     versions = []
@@ -402,14 +514,10 @@ def get_versions_for_product(product='Firefox', use_cache=True):
     versions.sort(key=lambda v: v[0], reverse=True)
     versions = [v[1] for v in versions]
 
-    if use_cache:
-        # Cache value for an hour plus a fudge factor in seconds
-        cache.set(key, versions, timeout=(60 * 60) + random.randint(60, 120))
-
     return versions
 
 
-def get_version_context_for_product(product):
+def get_version_context_for_product(product, refresh=False):
     """Returns version context for a specified product
 
     This gets the versions for a product and generates a context consisting
@@ -421,16 +529,32 @@ def get_version_context_for_product(product):
     junk versions. We might want to add a "minimum to matter" number.
 
     :arg product: the product to query for
+    :arg bool refresh: whether to rebuild the cached context rather than pull
+        it from the cache; this uses the cached versions, so refresh those
+        first
 
     :returns: list of version dicts sorted in reverse order or ``[]``
 
     """
     key = 'get_version_context_for_product:%s' % product.lower().replace(' ', '')
-    ret = cache.get(key)
-    if ret is not None:
-        return ret
+    try:
+        ret, from_cache = search_cache.get_or_compute(
+            key,
+            functools.partial(_get_version_context_for_product, product),
+            VERSIONS_FRESH_SECONDS,
+            VERSIONS_STALE_SECONDS,
+            refresh=refresh,
+        )
+    except VersionsUnavailable:
+        return []
+    return ret
 
-    versions = get_versions_for_product(product, use_cache=False)
+
+def _get_version_context_for_product(product):
+    versions = list(get_versions_for_product(product))
+    if not versions:
+        # Don't cache anything, so the versions are tried again
+        raise VersionsUnavailable(product)
 
     # Set of X.Yb to add
     betas = set()
@@ -466,7 +590,7 @@ def get_version_context_for_product(product):
     versions.sort(key=lambda v: generate_version_key(v), reverse=True)
 
     # Generate the version data the context needs
-    ret = [
+    return [
         {
             'product': product,
             'version': ver,
@@ -476,11 +600,6 @@ def get_version_context_for_product(product):
         for ver in versions
     ]
 
-    # Cache value for an hour plus a fudge factor in seconds
-    cache.set(key, ret, (60 * 60) + random.randint(60, 120))
-
-    return ret
-
 
 def build_default_context(product=None, versions=None):
     """
@@ -3,6 +3,7 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import datetime
+import functools
 import json
 
 from django import http
@@ -17,6 +18,7 @@ from csp.decorators import csp_update
 
 from crashstats.crashstats import forms, models, utils
 from crashstats.crashstats.decorators import pass_default_context
+from crashstats.crashstats.fanout import fan_out
 from crashstats.supersearch.models import SuperSearchFields
 from socorro.external.crashstorage_base import CrashIDNotFound
 
@@ -88,9 +90,20 @@ def report_index(request, crash_id, default_context=None):
 
     refresh_cache = request.GET.get('refresh') == 'cache'
 
-    raw_api = models.RawCrash()
+    # The raw crash, the processed crash and the fields don't depend on each
+    # other, so fetch them all at once
+    results = fan_out(
+        raw=functools.partial(
+            models.RawCrash().get, crash_id=crash_id, refresh_cache=refresh_cache
+        ),
+        report=functools.partial(
+            models.UnredactedCrash().get, crash_id=crash_id, refresh_cache=refresh_cache
+        ),
+        fields=SuperSearchFields().get,
+    )
+
     try:
-        context['raw'] = raw_api.get(crash_id=crash_id, refresh_cache=refresh_cache)
+        context['raw'] = results['raw'].result()
     except CrashIDNotFound:
         # If the raw crash can't be found, we can't do much.
         return render(request, 'crashstats/report_index_not_found.html', context, status=404)
@@ -101,9 +114,8 @@ def report_index(request, crash_id, default_context=None):
         context['raw'].get('Email') == request.user.email
     )
 
-    api = models.UnredactedCrash()
     try:
-        context['report'] = api.get(crash_id=crash_id, refresh_cache=refresh_cache)
+        context['report'] = results['report'].result()
     except CrashIDNotFound:
         # ...if we haven't already done so.
         cache_key = 'priority_job:{}'.format(crash_id)
@@ -117,14 +129,10 @@ def report_index(request, crash_id, default_context=None):
         json_dump = context['report']['json_dump']
         if 'sensitive' in json_dump and not request.user.has_perm('crashstats.view_pii'):
             del json_dump['sensitive']
-        context['raw_stackwalker_output'] = json.dumps(
-            json_dump,
-            sort_keys=True,
-            indent=4,
-            separators=(',', ': ')
+        parsed_dump, context['raw_stackwalker_output'] = utils.get_enhanced_json_dump(
+            crash_id, context['report'], settings.VCS_MAPPINGS, refresh_cache=refresh_cache
         )
-        utils.enhance_json_dump(json_dump, settings.VCS_MAPPINGS)
-        parsed_dump = json_dump
+        context['report']['json_dump'] = parsed_dump
     else:
         context['raw_stackwalker_output'] = 'No dump available'
         parsed_dump = {}
@@ -193,7 +201,7 @@ def report_index(request, crash_id, default_context=None):
             )
 
     # Add descriptions to all fields.
-    all_fields = SuperSearchFields().get()
+    all_fields = results['fields'].result()
     descriptions = {}
     for field in all_fields.values():
         key = '{}.{}'.format(field['namespace'], field['in_database_name'])
@@ -300,12 +308,14 @@ def raw_data(request, crash_id, extension, name=None):
     else:
         raise NotImplementedError(extension)
 
+    if format == 'raw':
+        return http.StreamingHttpResponse(
+            api.get_stream(crash_id=crash_id, name=name), content_type=content_type
+        )
+
     data = api.get(crash_id=crash_id, format=format, name=name)
     response = http.HttpResponse(content_type=content_type)
-    if extension == 'json':
-        response.write(json.dumps(data))
-    else:
-        response.write(data)
+    response.write(json.dumps(data))
     return response
 
 
@@ -406,6 +406,9 @@ EXPLOITABILITY_BATCH_SIZE = config(
 # Default number of days a token lasts until it expires
 TOKENS_DEFAULT_EXPIRATION_DAYS = 90
 
+# Number of seconds the users and permissions of API tokens are cached for
+API_TOKEN_CACHE_SECONDS = config('API_TOKEN_CACHE_SECONDS', 60, cast=int)
+
 # Store all dates timezone aware
 USE_TZ = True
 
@@ -423,6 +426,9 @@ API_RATE_LIMIT_AUTHENTICATED = '1000/m'
 RATELIMIT_SUPERSEARCH = '10/m'
 RATELIMIT_SUPERSEARCH_AUTHENTICATED = '100/m'
 
+# Maximum number of crash reports a search can export
+SEARCH_EXPORT_MAX_HITS = config('SEARCH_EXPORT_MAX_HITS', 100000, cast=int)
+
 # Path to the view that gets executed if you hit upon a ratelimit block
 RATELIMIT_VIEW = 'crashstats.crashstats.views.ratelimit_blocked'
 
@@ -448,6 +454,49 @@ CACHE_IMPLEMENTATION_FETCHES = config(
     'CACHE_IMPLEMENTATION_FETCHES', True, cast=bool
 )
 
+# Build the implementations models share at start up, rather than on the
+# first request that needs them, and log how long that took.
+WARM_UP_IMPLEMENTATIONS = config('WARM_UP_IMPLEMENTATIONS', True, cast=bool)
+
+# Number of threads views use to fetch independent backend data in parallel,
+# shared by all the requests of a process. Set to 0 to fetch one after the
+# other in the request's thread.
+VIEW_FANOUT_THREADS = config('VIEW_FANOUT_THREADS', 16, cast=int)
+
+# Crash report pages cache the enhanced and pretty-printed json_dump of
+# processed crashes for that many seconds, unless the pretty-printed dump is
+# bigger than ENHANCED_JSON_DUMP_CACHE_MAX_SIZE characters. Set to 0 to
+# disable caching.
+ENHANCED_JSON_DUMP_CACHE_SECONDS = config(
+    'ENHANCED_JSON_DUMP_CACHE_SECONDS', 60 * 60, cast=int
+)
+ENHANCED_JSON_DUMP_CACHE_MAX_SIZE = config(
+    'ENHANCED_JSON_DUMP_CACHE_MAX_SIZE', 512 * 1024, cast=int
+)
+
+# JSON responses bigger than that many characters are streamed in chunks of
+# that size while they are being encoded.
+JSON_RESPONSE_CHUNK_SIZE = config('JSON_RESPONSE_CHUNK_SIZE', 256 * 1024, cast=int)
+
+# Raw dumps are streamed from S3 and only cached if they are no bigger than
+# that many bytes.
+RAW_DUMP_CACHE_MAX_SIZE = config('RAW_DUMP_CACHE_MAX_SIZE', 1000 * 1000, cast=int)
+
+# Super Search results are served from the cache for up to that many seconds
+# after they expired, while a single worker refreshes them.
+SEARCH_CACHE_STALE_SECONDS = config('SEARCH_CACHE_STALE_SECONDS', 60 * 10, cast=int)
+
+# Date bounds of cached Super Search queries are rounded down to a multiple
+# of that many seconds so that similar queries share cache entries. Set to 0
+# to disable rounding.
+SEARCH_CACHE_DATE_BUCKET_SECONDS = config(
+    'SEARCH_CACHE_DATE_BUCKET_SECONDS', 60 * 5, cast=int
+)
+
+# Compute top crashers from the hourly rollups of the topcrashers-rollup
+# crontabber job when they cover the requested dates.
+TOPCRASHERS_USE_ROLLUPS = config('TOPCRASHERS_USE_ROLLUPS', False, cast=bool)
+
 DEFAULT_PRODUCT = config('DEFAULT_PRODUCT', 'Firefox')
 
 # can be changed from null to log to test something locally
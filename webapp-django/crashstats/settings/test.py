@@ -10,6 +10,9 @@ from crashstats.settings.base import *  # noqa
 
 CACHE_IMPLEMENTATION_FETCHES = True
 
+# Tests expect searches made with a different date to be run again.
+SEARCH_CACHE_DATE_BUCKET_SECONDS = 0
+
 DEFAULT_PRODUCT = 'WaterWolf'
 
 # here we deliberately "destroy" the BZAPI URL so running tests that are
@@ -101,6 +101,46 @@ SignatureReport.init = function() {
     contentElt.empty().append(errorContent);
   };
 
+  // Panels loaded by the batched request, and the promise of that request.
+  var batchedPanels = [];
+  var batchRequest = null;
+
+  // Loads the default panels of several tabs with a single request. Tabs
+  // then get their content with SignatureReport.getBatchedContent.
+  function loadBatch() {
+    $.each(tabs, function(tabName, tab) {
+      batchedPanels = batchedPanels.concat(tab.getBatchedPanels());
+    });
+    if (!batchedPanels.length) {
+      return;
+    }
+
+    var params = SignatureReport.getParamsWithSignature();
+    params.panel = batchedPanels;
+    batchRequest = $.ajax({
+      url: SignatureReport.getURL('batch') + '?' + Qs.stringify(params, { indices: false }),
+      dataType: 'json',
+    });
+  }
+
+  // Returns a promise of the content of a panel loaded by the batched
+  // request, or null if the panel is not part of it. The content is only
+  // used once, reloading a panel makes a new request.
+  SignatureReport.getBatchedContent = function(panel) {
+    var index = batchedPanels.indexOf(panel);
+    if (index === -1) {
+      return null;
+    }
+    batchedPanels.splice(index, 1);
+
+    return batchRequest.then(function(data) {
+      if (!data.hasOwnProperty(panel)) {
+        return $.Deferred().reject();
+      }
+      return data[panel];
+    });
+  };
+
   // Manages showing a new tab and hiding the old tab.
   function showTab(tabName) {
     $('.selected', panelsNavSection).removeClass('selected');
@@ -195,7 +235,10 @@ SignatureReport.init = function() {
 
   // Finally start the damn thing.
   bindEvents();
-  startSearchForm(loadInitialTab);
+  startSearchForm(function() {
+    loadBatch();
+    loadInitialTab();
+  });
 };
 
 $(SignatureReport.init);
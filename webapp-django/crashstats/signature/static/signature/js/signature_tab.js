@@ -14,6 +14,9 @@
  * @cfg {string} dataDisplayType 'graph' or 'table'
  * @cfg {boolean} pagination
  *      Should be true if the tab is displaying tables with pages
+ * @cfg {boolean} batched
+ *      Whether the default panel(s) are loaded by the batched request
+ *      made when the page loads
  */
 SignatureReport.Tab = function(tabName, config) {
   // Set the name of the tab.
@@ -25,6 +28,7 @@ SignatureReport.Tab = function(tabName, config) {
   this.defaultOptions = config.defaultOptions;
   this.dataDisplayType = config.dataDisplayType;
   this.pagination = config.pagination;
+  this.batched = config.batched;
   this.page = SignatureReport.pageNum;
 
   // Tab is not loaded until this.showTab is called.
@@ -143,12 +147,39 @@ SignatureReport.Tab.prototype.loadPanel = function(option) {
   this.loadContent(panel.$contentElement, option);
 };
 
+// Returns the names of the panels loaded by the batched request.
+SignatureReport.Tab.prototype.getBatchedPanels = function() {
+  var tabName = this.tabName;
+
+  if (!this.batched) {
+    return [];
+  }
+  if (!this.panels) {
+    return [tabName];
+  }
+  return $.map(this.defaultOptions, function(option) {
+    return tabName + '/' + option;
+  });
+};
+
 // This should not need to be extended.
 SignatureReport.Tab.prototype.loadContent = function(contentElement, option) {
   // Get the parameters for the URL to get the data.
   var params = this.getParamsForUrl();
 
   if (params) {
+    // Use the content from the batched request if this panel is part of it.
+    var batchedContent = SignatureReport.getBatchedContent(option ? this.tabName + '/' + option : this.tabName);
+    if (batchedContent) {
+      SignatureReport.addLoaderToElement(contentElement);
+      batchedContent.then(
+        $.proxy(this.onAjaxSuccess, this, contentElement),
+        // If that failed, load the panel on its own, which shows errors.
+        $.proxy(this.loadContent, this, contentElement, option)
+      );
+      return;
+    }
+
     // Make the URL for getting the data.
     var url = this.buildUrl(params, option);
 
@@ -14,6 +14,7 @@ SignatureReport.AggregationsTab = function(tabName) {
     defaultOptions: ['product', 'platform', 'build_id', 'install_time'],
     dataDisplayType: 'table',
     pagination: false,
+    batched: true,
   };
 
   SignatureReport.Tab.call(this, tabName, config);
@@ -14,6 +14,7 @@ SignatureReport.GraphsTab = function(tabName) {
     dataDisplayType: 'graph',
     defaultOptions: ['product'],
     pagination: false,
+    batched: true,
   };
 
   SignatureReport.Tab.call(this, tabName, config);
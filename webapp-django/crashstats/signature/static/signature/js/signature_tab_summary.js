@@ -13,6 +13,7 @@ SignatureReport.SummaryTab = function(tabName) {
     panels: false,
     dataDisplayType: 'table',
     pagination: false,
+    batched: true,
   };
 
   SignatureReport.Tab.call(this, tabName, config);
@@ -794,6 +794,98 @@ class TestViews(BaseTestViews):
         })
         assert response.status_code == 200
 
+    def test_signature_batch(self):
+        def mocked_supersearch_get_multi(_searches, **params):
+            assert params['signature'] == ['=' + DUMB_SIGNATURE]
+            assert params['product'] == ['WaterWolf']
+            assert len(_searches) == 3
+
+            summary, aggregation, graphs = _searches
+            assert summary['_facets'] == [
+                'platform_pretty_version', 'cpu_arch', 'process_type', 'flash_version'
+            ]
+            assert aggregation['_facets'] == ['product']
+            assert aggregation['_results_number'] == 0
+            assert graphs['_facets'] == ['platform']
+            assert graphs['_histogram.date'] == ['platform']
+            # Filters are only in the shared parameters.
+            assert 'signature' not in aggregation
+
+            return [
+                {
+                    'hits': [],
+                    'total': 4,
+                    'facets': {
+                        'platform_pretty_version': [{'count': 4, 'term': 'Windows 7'}],
+                    },
+                },
+                {
+                    'hits': [],
+                    'total': 1382,
+                    'facets': {
+                        'product': [
+                            {'term': 'linux', 'count': 1337},
+                            {'term': 'windows', 'count': 45},
+                        ],
+                    },
+                },
+                {
+                    'hits': [],
+                    'total': 2,
+                    'facets': {
+                        'platform': [{'term': 'Linux', 'count': 2}],
+                        'histogram_date': [
+                            {
+                                'count': 2,
+                                'term': '2015-08-05T00:00:00+00:00',
+                                'facets': {'platform': [{'count': 2, 'term': 'Linux'}]},
+                            },
+                        ],
+                    },
+                },
+            ]
+
+        implementation = SuperSearchUnredacted.implementation()
+        implementation.get_multi.side_effect = mocked_supersearch_get_multi
+
+        url = reverse('signature:signature_batch')
+        response = self.client.get(url, {
+            'signature': DUMB_SIGNATURE,
+            'product': 'WaterWolf',
+            'panel': [
+                'summary',
+                'aggregations/product',
+                'graphs/platform',
+                # Users can't aggregate on a field they don't have access to.
+                'aggregations/email',
+                'unknown',
+            ],
+        })
+        assert response.status_code == 200
+        assert 'application/json' in response['content-type']
+        assert implementation.get_multi.call_count == 1
+        assert not implementation.get.called
+
+        struct = json.loads(response.content)
+        assert set(struct) == {'summary', 'aggregations/product', 'graphs/platform'}
+        assert 'Operating System' in struct['summary']
+        assert 'Windows 7' in struct['summary']
+        assert '1337' in struct['aggregations/product']
+        assert 'linux' in struct['aggregations/product']
+        assert struct['graphs/platform']['aggregation'] == 'platform'
+        assert len(struct['graphs/platform']['aggregates']) == 1
+        assert struct['graphs/platform']['term_counts'] == [{'term': 'Linux', 'count': 2}]
+
+        # Nothing to load.
+        response = self.client.get(url, {'signature': DUMB_SIGNATURE, 'panel': 'unknown'})
+        assert response.status_code == 200
+        assert json.loads(response.content) == {}
+        assert implementation.get_multi.call_count == 1
+
+        # The signature is mandatory.
+        response = self.client.get(url, {'panel': 'summary'})
+        assert response.status_code == 400
+
     def test_signature_bugzilla(self):
         models.BugAssociation.objects.create(
             bug_id=111111,
@@ -39,6 +39,11 @@ urlpatterns = [
         views.signature_summary,
         name='signature_summary',
     ),
+    url(
+        r'^batch/$',
+        views.signature_batch,
+        name='signature_batch',
+    ),
     url(
         r'^bugzilla/$',
         views.signature_bugzilla,
@@ -8,6 +8,7 @@ import math
 from django import http
 from django.conf import settings
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse
 
 from csp.decorators import csp_update
@@ -229,40 +230,32 @@ def signature_reports(request, params):
     return render(request, 'signature/signature_reports.html', context)
 
 
-@pass_validated_params
-def signature_aggregation(request, params, aggregation):
-    '''Return the aggregation of a field. '''
-
-    signature = params['signature'][0]
-
-    context = {}
-    context['aggregation'] = aggregation
-
+def _get_aggregation_params(request, params, aggregation):
+    """Return the search parameters of the aggregation of a field"""
     allowed_fields = get_allowed_fields(request.user)
 
     # Make sure the field we want to aggregate on is allowed.
     if aggregation not in allowed_fields:
-        return http.HttpResponseBadRequest(
+        raise ValidationError(
             '<ul><li>'
             'You are not allowed to aggregate on the "%s" field'
             '</li></ul>' % aggregation
         )
 
-    current_query = request.GET.copy()
-    context['params'] = current_query.copy()
-
-    params['signature'] = '=' + signature
+    params = dict(params)
+    params['signature'] = '=' + params['signature'][0]
     params['_results_number'] = 0
     params['_results_offset'] = 0
     params['_facets'] = [aggregation]
+    return params
 
-    api = SuperSearchUnredacted()
-    try:
-        search_results = api.get(**params)
-    except BadArgumentError as e:
-        # We need to return the error message in some HTML form for jQuery to
-        # pick it up.
-        return http.HttpResponseBadRequest(render_exception(e))
+
+def _get_aggregation_context(request, aggregation, search_results):
+    context = {}
+    context['aggregation'] = aggregation
+
+    current_query = request.GET.copy()
+    context['params'] = current_query.copy()
 
     context['aggregates'] = []
     if aggregation in search_results['facets']:
@@ -270,37 +263,75 @@ def signature_aggregation(request, params, aggregation):
 
     context['total_count'] = search_results['total']
 
-    return render(request, 'signature/signature_aggregation.html', context)
+    return context
 
 
-@utils.json_view
 @pass_validated_params
-def signature_graphs(request, params, field):
-    '''Return a multi-line graph of crashes per day grouped by field. '''
+def signature_aggregation(request, params, aggregation):
+    '''Return the aggregation of a field. '''
 
-    signature = params['signature'][0]
+    try:
+        params = _get_aggregation_params(request, params, aggregation)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
 
-    context = {}
-    context['aggregation'] = field
+    api = SuperSearchUnredacted()
+    try:
+        search_results = api.get(**params)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    context = _get_aggregation_context(request, aggregation, search_results)
+
+    return render(request, 'signature/signature_aggregation.html', context)
 
+
+def _get_graphs_params(request, params, field):
+    """Return the search parameters of the crashes per day grouped by
+    field"""
     allowed_fields = get_allowed_fields(request.user)
 
     # Make sure the field we want to aggregate on is allowed.
     if field not in allowed_fields:
-        return http.HttpResponseBadRequest(
+        raise ValidationError(
             '<ul><li>'
             'You are not allowed to group by the "%s" field'
             '</li></ul>' % field
         )
 
-    current_query = request.GET.copy()
-    context['params'] = current_query.copy()
-
-    params['signature'] = '=' + signature
+    params = dict(params)
+    params['signature'] = '=' + params['signature'][0]
     params['_results_number'] = 0
     params['_results_offset'] = 0
     params['_histogram.date'] = [field]
     params['_facets'] = [field]
+    return params
+
+
+def _get_graphs_context(request, field, search_results):
+    context = {}
+    context['aggregation'] = field
+
+    current_query = request.GET.copy()
+    context['params'] = current_query.copy()
+
+    context['aggregates'] = search_results['facets'].get('histogram_date', [])
+    context['term_counts'] = search_results['facets'].get(field, [])
+
+    return context
+
+
+@utils.json_view
+@pass_validated_params
+def signature_graphs(request, params, field):
+    '''Return a multi-line graph of crashes per day grouped by field. '''
+
+    try:
+        params = _get_graphs_params(request, params, field)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
 
     api = SuperSearchUnredacted()
     try:
@@ -310,10 +341,7 @@ def signature_graphs(request, params, field):
         # pick it up.
         return http.HttpResponseBadRequest(render_exception(e))
 
-    context['aggregates'] = search_results['facets'].get('histogram_date', [])
-    context['term_counts'] = search_results['facets'].get(field, [])
-
-    return context
+    return _get_graphs_context(request, field, search_results)
 
 
 @pass_validated_params
@@ -409,11 +437,9 @@ def signature_correlations(request, params):
     return render(request, 'signature/signature_correlations.html', context)
 
 
-@pass_validated_params
-def signature_summary(request, params):
-    """Return a list of specific aggregations"""
-    context = {}
-
+def _get_summary_params(request, params):
+    """Return the search parameters of the summary"""
+    params = dict(params)
     params['signature'] = '=' + params['signature'][0]
     params['_aggs.signature'] = [
         'hang_type',
@@ -443,15 +469,11 @@ def signature_summary(request, params):
     ):
         params['_histogram.date'] = ['exploitability']
 
-    api = SuperSearchUnredacted()
+    return params
 
-    # Now make the actual request with all expected parameters.
-    try:
-        search_results = api.get(**params)
-    except BadArgumentError as e:
-        # We need to return the error message in some HTML form for jQuery to
-        # pick it up.
-        return http.HttpResponseBadRequest(render_exception(e))
+
+def _get_summary_context(search_results):
+    context = {}
 
     facets = search_results['facets']
 
@@ -466,9 +488,102 @@ def signature_summary(request, params):
         context['signature_stats'] = SignatureStats(search_results['facets']['signature'][0],
                                                     search_results['total'])
 
+    return context
+
+
+@pass_validated_params
+def signature_summary(request, params):
+    """Return a list of specific aggregations"""
+    params = _get_summary_params(request, params)
+
+    api = SuperSearchUnredacted()
+
+    # Now make the actual request with all expected parameters.
+    try:
+        search_results = api.get(**params)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    context = _get_summary_context(search_results)
+
     return render(request, 'signature/signature_summary.html', context)
 
 
+@utils.json_view
+@pass_validated_params
+def signature_batch(request, params):
+    """Return the content of several panels of the signature report, computed
+    with a single request to Elasticsearch.
+
+    The `panel` parameter lists the panels to load: `summary`,
+    `aggregations/<field>` or `graphs/<field>`. All their searches share the
+    same filters, so they are sent together. The result maps each panel to
+    its content, HTML for tables and data for graphs.
+
+    Panels that can't be loaded this way, like an aggregation on a field the
+    user is not allowed to see, are left out of the result. They can still
+    be loaded with their own view, which explains what went wrong.
+    """
+    # Filters are the same for all searches, only meta parameters differ.
+    shared_params = {
+        key: value for key, value in params.items() if not key.startswith('_')
+    }
+    shared_params['signature'] = '=' + params['signature'][0]
+
+    panels = []
+    searches = []
+    for panel in request.GET.getlist('panel'):
+        tab, _, field = panel.partition('/')
+        try:
+            if panel == 'summary':
+                search_params = _get_summary_params(request, params)
+            elif tab == 'aggregations' and field:
+                search_params = _get_aggregation_params(request, params, field)
+            elif tab == 'graphs' and field:
+                search_params = _get_graphs_params(request, params, field)
+            else:
+                continue
+        except ValidationError:
+            continue
+
+        panels.append((panel, tab, field))
+        searches.append({
+            key: value for key, value in search_params.items() if key.startswith('_')
+        })
+
+    if not searches:
+        return {}
+
+    api = SuperSearchUnredacted()
+    try:
+        all_search_results = api.get_multi(searches, **shared_params)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    content = {}
+    for (panel, tab, field), search_results in zip(panels, all_search_results):
+        if tab == 'summary':
+            content[panel] = render_to_string(
+                'signature/signature_summary.html',
+                _get_summary_context(search_results),
+                request=request,
+            )
+        elif tab == 'aggregations':
+            content[panel] = render_to_string(
+                'signature/signature_aggregation.html',
+                _get_aggregation_context(request, field, search_results),
+                request=request,
+            )
+        else:
+            content[panel] = _get_graphs_context(request, field, search_results)
+
+    return content
+
+
 def _transform_graphics_summary(facets):
     # Augment graphics adapter with data from another service.
     if 'adapter_vendor_id' in facets:
@@ -0,0 +1,236 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Cache for the results of Super Search queries.
+
+Faceted searches are expensive and the same ones get run over and over by
+dashboards like Top Crashers or the signature report. On top of a plain
+cache, this module:
+
+* coalesces concurrent cache misses for the same query so that only one of
+  them hits Elasticsearch and the others wait for its result,
+* keeps serving a result for a while after it expired, and refreshes it in
+  the background, so that popular queries never miss,
+* rounds the date bounds of queries relative to now so that queries made a
+  few seconds apart share the same cache entry.
+
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import datetime
+import hashlib
+import logging
+import threading
+import time
+
+import isodate
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+logger = logging.getLogger('crashstats.supersearch')
+
+
+# How long, in seconds, a refresh of a stale entry is considered in progress.
+# Other processes keep serving the stale entry during that time.
+REFRESH_LOCK_SECONDS = 60
+
+# Operators of date bounds that get rounded, longest first.
+ROUNDED_DATE_OPERATORS = ('<=', '>=', '<', '>')
+
+
+class SingleFlight(object):
+    """Make concurrent calls for the same key share one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Return the result of `func()`, or of the call already in progress
+        for `key` if there is one."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_single_flight = SingleFlight()
+
+_refresh_executor = None
+_refresh_executor_lock = threading.Lock()
+
+
+def submit_refresh(func, *args):
+    """Run `func(*args)` in a background thread."""
+    global _refresh_executor
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2)
+    return _refresh_executor.submit(func, *args)
+
+
+def make_key(implementation, method, params):
+    """Return the cache key of a query.
+
+    The `_fields` parameter is left out: it is the same for the whole life
+    of the process and is very costly to serialize.
+
+    """
+    key_params = sorted(
+        (key, value) for key, value in params.items()
+        if key != '_fields'
+    )
+    key_string = '%s.%s%r' % (implementation.__class__.__name__, method, key_params)
+    return 'supersearch:%s' % hashlib.md5(key_string.encode('utf-8')).hexdigest()
+
+
+def _store(key, func, fresh_seconds, stale_seconds):
+    value = func()
+    entry = {
+        'value': value,
+        'fresh_until': time.time() + fresh_seconds,
+    }
+    cache.set(key, entry, fresh_seconds + stale_seconds)
+    return value
+
+
+def _refresh(key, func, fresh_seconds, stale_seconds):
+    try:
+        _store(key, func, fresh_seconds, stale_seconds)
+    except Exception:
+        logger.exception('Unable to refresh cached search %s', key)
+    finally:
+        cache.delete(key + ':refresh')
+
+
+def get_or_compute(key, func, fresh_seconds, stale_seconds=0, refresh=False):
+    """Return the cached value for `key`, computing it with `func` if needed.
+
+    A value is fresh for `fresh_seconds`. It is then still returned for
+    `stale_seconds`, while a single background task refreshes it. Concurrent
+    misses in a process share the same call to `func`.
+
+    :returns: tuple of (value, whether it came from the cache)
+
+    """
+    if not refresh:
+        entry = cache.get(key)
+        if entry is not None:
+            if entry['fresh_until'] <= time.time():
+                # `cache.add` only succeeds for one process, so only that one
+                # refreshes the entry.
+                if cache.add(key + ':refresh', True, REFRESH_LOCK_SECONDS):
+                    submit_refresh(_refresh, key, func, fresh_seconds, stale_seconds)
+            return entry['value'], True
+
+    value = _single_flight.do(
+        key, lambda: _store(key, func, fresh_seconds, stale_seconds)
+    )
+    return value, False
+
+
+def single_flight(key, func):
+    """Return `func()`, sharing the call with concurrent callers for `key`."""
+    return _single_flight.do(key, func)
+
+
+def round_date(date, bucket_seconds):
+    """Round a datetime down to a multiple of `bucket_seconds` in its day."""
+    seconds = date.hour * 3600 + date.minute * 60 + date.second
+    return date.replace(microsecond=0) - datetime.timedelta(
+        seconds=seconds % bucket_seconds
+    )
+
+
+def _round_date_value(value, operator, bucket_seconds):
+    date = value[len(operator):]
+    if 'T' not in date:
+        # Dates without a time are already shared by a whole day.
+        return value
+    try:
+        date = isodate.parse_datetime(date)
+    except ValueError:
+        return value
+    return operator + round_date(date, bucket_seconds).isoformat()
+
+
+def _parse_upper_bound(value):
+    for operator in ('<=', '<'):
+        if value.startswith(operator):
+            try:
+                date = isodate.parse_datetime(value[len(operator):])
+            except ValueError:
+                return None
+            if date.tzinfo is None:
+                date = date.replace(tzinfo=datetime.timezone.utc)
+            return date
+    return None
+
+
+def is_relative_to_now(values, bucket_seconds):
+    """Return whether the values of a `date` parameter end less than
+    `bucket_seconds` ago, like the searches of views showing the last days.
+
+    Only those have their bounds rounded. Other ranges were explicitly asked
+    for and are searched as they are.
+
+    """
+    if not bucket_seconds or not values:
+        return False
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+
+    oldest_now = timezone.now() - datetime.timedelta(seconds=bucket_seconds)
+    for value in values:
+        if isinstance(value, str):
+            date = _parse_upper_bound(value)
+            if date is not None and date >= oldest_now:
+                return True
+    return False
+
+
+def round_date_params(values, bucket_seconds):
+    """Return the values of a `date` parameter with all their bounds rounded
+    down to a multiple of `bucket_seconds`.
+
+    Both bounds of a range are rounded the same way, so the range keeps its
+    length and only moves back by less than `bucket_seconds`. Values that
+    are not a date and time with an inequality operator are left untouched.
+
+    """
+    if not bucket_seconds or not values:
+        return values
+
+    single = not isinstance(values, (list, tuple))
+    if single:
+        values = [values]
+
+    rounded = []
+    for value in values:
+        if isinstance(value, str):
+            for operator in ROUNDED_DATE_OPERATORS:
+                if value.startswith(operator):
+                    value = _round_date_value(value, operator, bucket_seconds)
+                    break
+        rounded.append(value)
+
+    return rounded[0] if single else rounded
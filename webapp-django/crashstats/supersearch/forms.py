@@ -39,18 +39,22 @@ class SearchForm(forms.Form):
 
         self.all_fields = all_fields.copy()
 
-        # Generate default values
-        if 'product' in self.all_fields:
-            self.all_fields['product']['form_field_choices'] = products
-
-        if 'version' in self.all_fields:
-            self.all_fields['version']['form_field_choices'] = uniqify_keep_order(product_versions)
-
-        if 'platform' in self.all_fields:
-            self.all_fields['platform']['form_field_choices'] = platforms
+        # Generate default values. The fields are shared with the rest of the
+        # process, so only copies of them are modified here.
+        choices = {
+            'product': products,
+            'version': uniqify_keep_order(product_versions),
+            'platform': platforms,
+        }
+        for field_name, field_choices in choices.items():
+            if field_name in self.all_fields:
+                self.all_fields[field_name] = dict(
+                    self.all_fields[field_name],
+                    form_field_choices=field_choices
+                )
 
         # Generate list of fields
-        for field_name, field_data in all_fields.items():
+        for field_name, field_data in list(self.all_fields.items()):
             if not field_data['is_exposed']:
                 del self.all_fields[field_name]
                 continue
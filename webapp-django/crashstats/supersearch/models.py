@@ -2,17 +2,20 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-import copy
+import collections
 import functools
 
 import six
 
+from django.conf import settings
 from django.core.cache import cache
 
 from crashstats.crashstats import models
+from crashstats.supersearch import cache as search_cache
 from socorro.external.es import query
 from socorro.external.es import supersearch
 from socorro.external.es import super_search_fields
+from socorro.lib.search_common import FieldsCompilationCache
 
 
 SUPERSEARCH_META_PARAMS = (
@@ -64,6 +67,140 @@ def get_api_whitelist(include_all_fields=False):
     return functools.partial(get_from_es, include_all_fields)
 
 
+def get_extended_params(all_fields):
+    """Return the `_aggs.*`, `_histogram.*` and `_histogram_interval.*`
+    parameters for all the public fields."""
+    # Add histogram fields for all 'date' or 'number' fields.
+    extended_fields = []
+    for field in all_fields.values():
+        if not field['is_exposed'] or field['permissions_needed']:
+            continue
+
+        extended_fields.append(
+            ('_aggs.%s' % field['name'], list)
+        )
+
+        if field['query_type'] in ('date', 'number'):
+            extended_fields.append(
+                ('_histogram.%s' % field['name'], list)
+            )
+
+            # Intervals can be strings for dates (like "day" or "1.5h")
+            # and can only be integers for numbers.
+            interval_type = {
+                'date': six.text_type,
+                'number': int
+            }.get(field['query_type'])
+
+            extended_fields.append(
+                ('_histogram_interval.%s' % field['name'], interval_type)
+            )
+
+    return tuple(extended_fields)
+
+
+SuperSearchParams = collections.namedtuple('SuperSearchParams', (
+    'required_params',
+    'possible_params',
+    'extended_fields',
+    'parameters_listing_fields',
+    'allowed_fields',
+))
+
+
+def _compile_params(all_fields):
+    required_params = tuple(
+        (x['name'], list) for x in all_fields.values()
+        if x['is_exposed'] and
+        not x['permissions_needed'] and
+        x['is_mandatory']
+    )
+
+    extended_fields = get_extended_params(all_fields)
+
+    parameters_listing_fields = PARAMETERS_LISTING_FIELDS + tuple(
+        field[0] for field in extended_fields
+        if '_histogram.' in field[0] or '_aggs.' in field[0]
+    )
+
+    possible_params = tuple(
+        (x['name'], list) for x in all_fields.values()
+        if x['is_exposed'] and
+        not x['permissions_needed'] and
+        not x['is_mandatory']
+    ) + SUPERSEARCH_META_PARAMS + extended_fields
+
+    # Initialize the list of allowed fields with all the fields we know
+    # that are returned and do not require any permission.
+    allowed_fields = set(
+        x for x in all_fields
+        if all_fields[x]['is_returned'] and
+        not all_fields[x]['permissions_needed']
+    )
+
+    # Extend that list with the special fields, like `_histogram.*`.
+    # Those are accepted values for fields listing other fields.
+    for field in extended_fields:
+        histogram = field[0]
+        if not histogram.startswith('_histogram.'):
+            continue
+
+        field_name = histogram[len('_histogram.'):]
+        if (
+            field_name in all_fields and
+            all_fields[field_name]['is_returned'] and
+            not all_fields[field_name]['permissions_needed']
+        ):
+            allowed_fields.add(histogram)
+
+    for field in set(allowed_fields):
+        allowed_fields.add('_cardinality.%s' % field)
+
+    return SuperSearchParams(
+        required_params=required_params,
+        possible_params=possible_params,
+        extended_fields=extended_fields,
+        parameters_listing_fields=parameters_listing_fields,
+        allowed_fields=frozenset(allowed_fields),
+    )
+
+
+SuperSearchUnredactedParams = collections.namedtuple('SuperSearchUnredactedParams', (
+    'required_params',
+    'possible_params',
+    'required_permissions',
+))
+
+
+def _compile_unredacted_params(all_fields):
+    required_params = tuple(
+        (x['name'], list) for x in all_fields.values()
+        if x['is_exposed'] and x['is_mandatory']
+    )
+
+    possible_params = tuple(
+        (x['name'], list) for x in all_fields.values()
+        if x['is_exposed'] and not x['is_mandatory']
+    ) + SUPERSEARCH_META_PARAMS + get_extended_params(all_fields)
+
+    permissions = {}
+    for field_data in all_fields.values():
+        for perm in field_data['permissions_needed']:
+            permissions[perm] = True
+
+    return SuperSearchUnredactedParams(
+        required_params=required_params,
+        possible_params=possible_params,
+        required_permissions=tuple(permissions.keys()),
+    )
+
+
+# The fields never change during the life of the process, so the parameters
+# derived from them are computed once and shared by all model instances.
+compile_params = FieldsCompilationCache(_compile_params).get
+compile_unredacted_params = FieldsCompilationCache(_compile_unredacted_params).get
+
+
 class ESSocorroMiddleware(models.SocorroMiddleware):
     implementation_config_namespace = 'elasticsearch'
 
@@ -80,87 +217,66 @@ class SuperSearch(ESSocorroMiddleware):
     def __init__(self):
         self.all_fields = SuperSearchFields().get()
 
+        compiled = compile_params(self.all_fields)
+        self.required_params = compiled.required_params
+        self.possible_params = compiled.possible_params
+        self.extended_fields = compiled.extended_fields
         # These fields contain lists of other fields. Later on, we want to
         # make sure that none of those listed fields are restricted.
-        self.parameters_listing_fields = list(PARAMETERS_LISTING_FIELDS)
-
-        self.required_params = tuple(
-            (x['name'], list) for x in self.all_fields.values()
-            if x['is_exposed'] and
-            not x['permissions_needed'] and
-            x['is_mandatory']
-        )
-
-        self.extended_fields = self._get_extended_params()
-        for field in self.extended_fields:
-            if '_histogram.' in field[0] or '_aggs.' in field[0]:
-                self.parameters_listing_fields.append(field[0])
-
-        self.possible_params = tuple(
-            (x['name'], list) for x in self.all_fields.values()
-            if x['is_exposed'] and
-            not x['permissions_needed'] and
-            not x['is_mandatory']
-        ) + SUPERSEARCH_META_PARAMS + tuple(self.extended_fields)
-
-    def _get_extended_params(self):
-        # Add histogram fields for all 'date' or 'number' fields.
-        extended_fields = []
-        for field in self.all_fields.values():
-            if not field['is_exposed'] or field['permissions_needed']:
-                continue
-
-            extended_fields.append(
-                ('_aggs.%s' % field['name'], list)
+        self.parameters_listing_fields = compiled.parameters_listing_fields
+        self.allowed_fields = compiled.allowed_fields
+
+    @models.measure_fetches
+    def fetch(self, implementation, params=None, method='get', dont_cache=False,
+              refresh_cache=False, **kwargs):
+        """Return the results of a search, using the search cache.
+
+        Results are fresh for `cache_seconds`, then served stale for another
+        `settings.SEARCH_CACHE_STALE_SECONDS` while they get refreshed in the
+        background. Date bounds of searches ending now are rounded to
+        `settings.SEARCH_CACHE_DATE_BUCKET_SECONDS` so that similar searches
+        share results, explicit date ranges are searched as they are.
+
+        """
+        if (
+            not settings.CACHE_IMPLEMENTATION_FETCHES or
+            dont_cache or
+            not self.cache_seconds or
+            method not in ('get', 'get_multi')
+        ):
+            return super().fetch(
+                implementation,
+                params=params,
+                method=method,
+                dont_cache=dont_cache,
+                refresh_cache=refresh_cache,
+                **kwargs
             )
 
-            if field['query_type'] in ('date', 'number'):
-                extended_fields.append(
-                    ('_histogram.%s' % field['name'], list)
-                )
-
-                # Intervals can be strings for dates (like "day" or "1.5h")
-                # and can only be integers for numbers.
-                interval_type = {
-                    'date': six.text_type,
-                    'number': int
-                }.get(field['query_type'])
-
-                extended_fields.append(
-                    ('_histogram_interval.%s' % field['name'], interval_type)
-                )
-
-        return tuple(extended_fields)
-
-    def get(self, **kwargs):
-        # Sanitize all parameters listing fields and make sure no private data
-        # is requested.
-
-        # Initialize the list of allowed fields with all the fields we know
-        # that are returned and do not require any permission.
-        allowed_fields = set(
-            x for x in self.all_fields
-            if self.all_fields[x]['is_returned'] and
-            not self.all_fields[x]['permissions_needed']
+        fresh_seconds = self.cache_seconds
+        bucket_seconds = settings.SEARCH_CACHE_DATE_BUCKET_SECONDS
+        params = dict(params)
+        if search_cache.is_relative_to_now(params.get('date'), bucket_seconds):
+            params['date'] = search_cache.round_date_params(params['date'], bucket_seconds)
+            # Do not let a search relative to now lag behind by more than
+            # a bucket.
+            fresh_seconds = min(fresh_seconds, bucket_seconds)
+
+        return search_cache.get_or_compute(
+            search_cache.make_key(implementation, method, params),
+            functools.partial(getattr(implementation, method), **params),
+            fresh_seconds=fresh_seconds,
+            stale_seconds=settings.SEARCH_CACHE_STALE_SECONDS,
+            refresh=refresh_cache,
         )
 
-        # Extend that list with the special fields, like `_histogram.*`.
-        # Those are accepted values for fields listing other fields.
-        for field in self.extended_fields:
-            histogram = field[0]
-            if not histogram.startswith('_histogram.'):
-                continue
-
-            field_name = histogram[len('_histogram.'):]
-            if (
-                field_name in self.all_fields and
-                self.all_fields[field_name]['is_returned'] and
-                not self.all_fields[field_name]['permissions_needed']
-            ):
-                allowed_fields.add(histogram)
-
-        for field in set(allowed_fields):
-            allowed_fields.add('_cardinality.%s' % field)
+    def sanitize_fields_params(self, kwargs):
+        """Make sure no private data is requested by the parameters listing
+        fields."""
+        # `allowed_fields` are all the fields we know that are returned and do
+        # not require any permission, plus the special fields computed from
+        # them like `_histogram.*` and `_cardinality.*`.
+        allowed_fields = self.allowed_fields
 
         # Now make sure all fields listing fields only have unrestricted
         # values.
@@ -172,11 +288,44 @@ class SuperSearch(ESSocorroMiddleware):
             ]
             kwargs[param] = filtered_values
 
+    def get(self, **kwargs):
+        # Sanitize all parameters listing fields and make sure no private data
+        # is requested.
+        self.sanitize_fields_params(kwargs)
+
         # SuperSearch requires that the list of fields be passed to it.
         kwargs['_fields'] = self.all_fields
 
         return super().get(**kwargs)
 
+    def get_multi(self, searches, dont_cache=False, refresh_cache=False, **kwargs):
+        """Return the results of several searches sharing the same filters.
+
+        `kwargs` are the parameters shared by all searches, like the filters,
+        and `searches` is a list of dicts of the parameters specific to each
+        search, like `_facets`. The searches are sent to Elasticsearch in a
+        single request and their results are returned in the same order.
+        """
+        searches = [dict(search_kwargs) for search_kwargs in searches]
+        for search_kwargs in [kwargs] + searches:
+            self.sanitize_fields_params(search_kwargs)
+
+        # SuperSearch requires that the list of fields be passed to it.
+        kwargs['_fields'] = self.all_fields
+
+        params = self.parse_parameters(kwargs)
+        params['_searches'] = [
+            self.kwargs_to_params(search_kwargs) for search_kwargs in searches
+        ]
+
+        return self.fetch(
+            self.get_implementation(),
+            params=params,
+            method='get_multi',
+            dont_cache=dont_cache,
+            refresh_cache=refresh_cache,
+        )
+
 
 class SuperSearchUnredacted(SuperSearch):
     HELP_TEXT = """
@@ -189,24 +338,10 @@ class SuperSearchUnredacted(SuperSearch):
     def __init__(self):
         self.all_fields = SuperSearchFields().get()
 
-        self.required_params = tuple(
-            (x['name'], list) for x in self.all_fields.values()
-            if x['is_exposed'] and x['is_mandatory']
-        )
-
-        histogram_fields = self._get_extended_params()
-
-        self.possible_params = tuple(
-            (x['name'], list) for x in self.all_fields.values()
-            if x['is_exposed'] and not x['is_mandatory']
-        ) + SUPERSEARCH_META_PARAMS + histogram_fields
-
-        permissions = {}
-        for field_data in self.all_fields.values():
-            for perm in field_data['permissions_needed']:
-                permissions[perm] = True
-
-        self.API_REQUIRED_PERMISSIONS = tuple(permissions.keys())
+        compiled = compile_unredacted_params(self.all_fields)
+        self.required_params = compiled.required_params
+        self.possible_params = compiled.possible_params
+        self.API_REQUIRED_PERMISSIONS = compiled.required_permissions
 
     def get(self, **kwargs):
         # SuperSearch requires that the list of fields be passed to it.
@@ -217,6 +352,25 @@ class SuperSearchUnredacted(SuperSearch):
         # the _facets field cleaning.
         return super(SuperSearch, self).get(**kwargs)
 
+    def sanitize_fields_params(self, kwargs):
+        # Any field can be listed, using this model requires all the
+        # permissions already.
+        pass
+
+    def iter_hits(self, **kwargs):
+        """Return an iterator over all the hits matching the parameters.
+
+        This walks the results with the Elasticsearch scroll API instead of
+        paginating, which makes it suitable for bulk exports. Results are not
+        cached. Callers are responsible for restricting `_columns` to the
+        fields the user is allowed to see.
+        """
+        # SuperSearch requires that the list of fields be passed to it.
+        kwargs['_fields'] = self.all_fields
+
+        params = self.parse_parameters(kwargs)
+        return self.get_implementation().iter_hits(**params)
+
 
 class SuperSearchFields(ESSocorroMiddleware):
     # Read it in once as a class attribute since it'll never change unless the
@@ -231,7 +385,9 @@ class SuperSearchFields(ESSocorroMiddleware):
     API_WHITELIST = None
 
     def get(self):
-        return copy.deepcopy(self._fields)
+        # The same dict is returned to every caller so that everything
+        # computed from it can be shared. Do not modify it.
+        return self._fields
 
 
 class SuperSearchMissingFields(ESSocorroMiddleware):
@@ -0,0 +1,222 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import datetime
+import threading
+import time
+
+import mock
+import pytest
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from crashstats.crashstats.tests.testbase import DjangoTestCase
+from crashstats.supersearch import cache as search_cache
+from crashstats.supersearch.models import SuperSearchUnredacted
+
+
+@pytest.fixture
+def sync_refresh():
+    """Run background refreshes synchronously."""
+    def submit_refresh(func, *args):
+        func(*args)
+
+    with mock.patch.object(search_cache, 'submit_refresh', side_effect=submit_refresh) as mocked:
+        yield mocked
+
+
+class TestSingleFlight(object):
+    def test_concurrent_calls_are_coalesced(self):
+        single_flight = search_cache.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+
+        def call():
+            results.append(single_flight.do('key', func))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=call) for i in range(3)]
+        for thread in followers:
+            thread.start()
+        # Give the followers time to start waiting on the leader.
+        time.sleep(0.1)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        assert calls == [1]
+        assert results == ['result'] * 4
+
+        # Once done, the next call runs again.
+        assert single_flight.do('key', lambda: 'other') == 'other'
+
+    def test_errors_are_raised(self):
+        single_flight = search_cache.SingleFlight()
+
+        def func():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            single_flight.do('key', func)
+        assert single_flight.do('key', lambda: 'ok') == 'ok'
+
+
+class TestGetOrCompute(object):
+    def setup_method(self):
+        cache.clear()
+
+    def test_miss_then_hit(self, sync_refresh):
+        func = mock.Mock(return_value={'total': 1})
+
+        assert search_cache.get_or_compute('key', func, 60, 60) == ({'total': 1}, False)
+        assert search_cache.get_or_compute('key', func, 60, 60) == ({'total': 1}, True)
+        assert func.call_count == 1
+        assert not sync_refresh.called
+
+        # Refreshing bypasses the cache.
+        func.return_value = {'total': 2}
+        assert search_cache.get_or_compute('key', func, 60, 60, refresh=True) == (
+            {'total': 2}, False
+        )
+
+    def test_stale_while_revalidate(self, sync_refresh):
+        func = mock.Mock(return_value={'total': 1})
+        search_cache.get_or_compute('key', func, 60, 60)
+
+        func.return_value = {'total': 2}
+        with mock.patch('time.time', return_value=time.time() + 90):
+            # The stale value is returned and refreshed in the background.
+            assert search_cache.get_or_compute('key', func, 60, 60) == ({'total': 1}, True)
+        assert sync_refresh.call_count == 1
+        assert func.call_count == 2
+
+        assert search_cache.get_or_compute('key', func, 60, 60) == ({'total': 2}, True)
+        # The refresh lock was released.
+        assert cache.get('key:refresh') is None
+
+    def test_stale_refresh_happens_once(self):
+        func = mock.Mock(return_value={'total': 1})
+        search_cache.get_or_compute('key', func, 60, 60)
+
+        with mock.patch.object(search_cache, 'submit_refresh') as submit_refresh:
+            with mock.patch('time.time', return_value=time.time() + 90):
+                search_cache.get_or_compute('key', func, 60, 60)
+                search_cache.get_or_compute('key', func, 60, 60)
+        assert submit_refresh.call_count == 1
+
+    def test_failed_refresh_keeps_stale_value(self, sync_refresh):
+        func = mock.Mock(return_value={'total': 1})
+        search_cache.get_or_compute('key', func, 60, 60)
+
+        func.side_effect = ValueError('boom')
+        with mock.patch('time.time', return_value=time.time() + 90):
+            assert search_cache.get_or_compute('key', func, 60, 60) == ({'total': 1}, True)
+        assert cache.get('key:refresh') is None
+
+
+class TestIsRelativeToNow(object):
+    def test_is_relative_to_now(self):
+        now = datetime.datetime(2018, 6, 8, 12, 34, 56, tzinfo=datetime.timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            assert search_cache.is_relative_to_now(
+                ['>=2018-06-01T12:34:00+00:00', '<2018-06-08T12:34:00+00:00'], 300
+            )
+            assert search_cache.is_relative_to_now('<=2018-06-08T12:34:56', 300)
+            assert not search_cache.is_relative_to_now(
+                ['>=2018-06-01T12:34:00+00:00', '<2018-06-08T12:00:00+00:00'], 300
+            )
+            assert not search_cache.is_relative_to_now(['>=2018-06-08T12:34:00'], 300)
+            assert not search_cache.is_relative_to_now(['<2018-06-08', '<junk'], 300)
+            assert not search_cache.is_relative_to_now(['<2018-06-08T12:34:00'], 0)
+            assert not search_cache.is_relative_to_now(None, 300)
+
+
+class TestRoundDateParams(object):
+    def test_round_date_params(self):
+        values = ['>=2018-06-01T12:34:56.789+00:00', '<2018-06-08T12:34:56.789+00:00']
+        assert search_cache.round_date_params(values, 300) == [
+            '>=2018-06-01T12:30:00+00:00',
+            '<2018-06-08T12:30:00+00:00',
+        ]
+        assert search_cache.round_date_params(values, 3600) == [
+            '>=2018-06-01T12:00:00+00:00',
+            '<2018-06-08T12:00:00+00:00',
+        ]
+        assert search_cache.round_date_params(values, 0) == values
+
+    def test_other_values_are_untouched(self):
+        values = ['2018-06-01', '>=2018-06-01', '=2018-06-01T12:34:56', '>=junkTjunk']
+        assert search_cache.round_date_params(values, 300) == values
+
+    def test_single_value(self):
+        assert search_cache.round_date_params('<2018-06-01T12:34:56', 600) == (
+            '<2018-06-01T12:30:00'
+        )
+
+
+def test_make_key():
+    implementation = mock.Mock()
+    key = search_cache.make_key(implementation, 'get', {'product': ['Firefox'], '_fields': {}})
+    assert key == search_cache.make_key(
+        implementation, 'get', {'_fields': {'a': 1}, 'product': ['Firefox']}
+    )
+    assert key != search_cache.make_key(implementation, 'get', {'product': ['Thunderbird']})
+
+
+class TestSuperSearchCache(DjangoTestCase):
+    @override_settings(SEARCH_CACHE_DATE_BUCKET_SECONDS=300)
+    def test_similar_searches_share_results(self):
+        def mocked_supersearch_get(**params):
+            return {'hits': [], 'facets': {}, 'total': 0}
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+        now = timezone.now().replace(hour=12, minute=31, second=0)
+        api = SuperSearchUnredacted()
+        for seconds in (0, 20, 40):
+            end_date = now + datetime.timedelta(seconds=seconds)
+            with mock.patch('django.utils.timezone.now', return_value=end_date):
+                api.get(
+                    product='WaterWolf',
+                    date=[
+                        '>=' + (end_date - datetime.timedelta(days=7)).isoformat(),
+                        '<' + end_date.isoformat(),
+                    ],
+                )
+
+        implementation = SuperSearchUnredacted.implementation()
+        assert implementation.get.call_count == 1
+        params = implementation.get.call_args[1]
+        rounded_now = now.replace(minute=30, second=0, microsecond=0)
+        assert params['date'][1] == '<' + rounded_now.isoformat()
+
+        # Searches that are not cached are not changed.
+        api.get(product='WaterWolf', date=['<' + now.isoformat()], dont_cache=True)
+        assert implementation.get.call_count == 2
+        assert implementation.get.call_args[1]['date'] == ['<' + now.isoformat()]
+
+    @override_settings(SEARCH_CACHE_DATE_BUCKET_SECONDS=300)
+    def test_explicit_dates_are_untouched(self):
+        def mocked_supersearch_get(**params):
+            return {'hits': [], 'facets': {}, 'total': 0}
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+        dates = ['>=2019-01-01T00:00:00', '<2019-01-01T12:34:56']
+        SuperSearchUnredacted().get(product='WaterWolf', date=dates)
+        params = SuperSearchUnredacted.implementation().get.call_args[1]
+        assert params['date'] == dates
@@ -2,6 +2,8 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import copy
+
 from crashstats.supersearch import forms
 from socorro.external.es.super_search_fields import FIELDS
 
@@ -141,3 +143,24 @@ class TestForms(object):
 
         # Verify there's only one occurence of the version.
         assert fields['version']['values'].count('20.0') == 1
+
+    def test_search_form_does_not_modify_fields(self):
+        class User(object):
+            def has_perm(self, permission):
+                return False
+
+        all_fields = copy.deepcopy(self.all_fields)
+        form = forms.SearchForm(
+            all_fields,
+            self.products,
+            self.product_versions,
+            self.platforms,
+            User(),
+            {}
+        )
+        assert form.is_valid()
+        assert form.all_fields['product']['form_field_choices'] == self.products
+        assert 'email' not in form.all_fields
+
+        # The fields are shared with the rest of the process.
+        assert all_fields == self.all_fields
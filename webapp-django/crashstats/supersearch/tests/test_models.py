@@ -0,0 +1,123 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import copy
+
+import mock
+
+from crashstats.crashstats.tests.testbase import DjangoTestCase
+from crashstats.supersearch import models
+from socorro.external.es.super_search_fields import FIELDS
+
+
+def params_to_dict(params):
+    return dict(x if isinstance(x, tuple) else (x, None) for x in params)
+
+
+class TestCompiledParams(object):
+    def setup_method(self):
+        self.all_fields = copy.deepcopy(FIELDS)
+        self.patcher = mock.patch.object(
+            models.SuperSearchFields, 'get', return_value=self.all_fields
+        )
+        self.patcher.start()
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_supersearch(self):
+        api = models.SuperSearch()
+        other_api = models.SuperSearch()
+
+        # Everything computed from the fields is shared between instances.
+        assert api.possible_params is other_api.possible_params
+        assert api.allowed_fields is other_api.allowed_fields
+
+        possible_params = params_to_dict(api.possible_params)
+        assert possible_params['signature'] is list
+        assert possible_params['_histogram_interval.date'] is str
+        assert possible_params['_histogram_interval.build_id'] is int
+        assert '_columns' in possible_params
+        # Protected fields are not exposed.
+        assert 'email' not in possible_params
+        assert '_aggs.email' not in possible_params
+
+        assert '_facets' in api.parameters_listing_fields
+        assert '_histogram.date' in api.parameters_listing_fields
+        assert '_aggs.signature' in api.parameters_listing_fields
+
+        assert 'signature' in api.allowed_fields
+        assert '_histogram.date' in api.allowed_fields
+        assert '_cardinality.signature' in api.allowed_fields
+        assert '_cardinality._histogram.date' in api.allowed_fields
+        assert 'email' not in api.allowed_fields
+
+    def test_supersearch_unredacted(self):
+        api = models.SuperSearchUnredacted()
+        assert api.possible_params is models.SuperSearchUnredacted().possible_params
+
+        possible_params = params_to_dict(api.possible_params)
+        assert 'email' in possible_params
+        assert 'signature' in possible_params
+        assert '_histogram.date' in possible_params
+
+        assert 'crashstats.view_pii' in api.API_REQUIRED_PERMISSIONS
+        assert 'crashstats.view_exploitability' in api.API_REQUIRED_PERMISSIONS
+
+    def test_new_fields_are_compiled_again(self):
+        api = models.SuperSearch()
+
+        other_fields = copy.deepcopy(self.all_fields)
+        del other_fields['signature']
+        with mock.patch.object(models.SuperSearchFields, 'get', return_value=other_fields):
+            other_api = models.SuperSearch()
+
+        assert 'signature' in params_to_dict(api.possible_params)
+        assert 'signature' not in params_to_dict(other_api.possible_params)
+
+
+class TestGetMulti(DjangoTestCase):
+    def test_get_multi(self):
+        def mocked_get_multi(_searches, **params):
+            return [{'hits': [], 'facets': {}, 'total': len(params)} for _ in _searches]
+
+        implementation = models.SuperSearch.implementation()
+        implementation.get_multi.side_effect = mocked_get_multi
+
+        api = models.SuperSearch()
+        searches = [
+            {'_facets': ['product', 'email']},
+            {'_facets': ['platform'], '_histogram.date': ['version'], '_results_number': 0},
+        ]
+        results = api.get_multi(searches, signature='=foo', email='me@example.com')
+        assert len(results) == 2
+
+        params = implementation.get_multi.call_args[1]
+        assert params['signature'] == ['=foo']
+        assert '_fields' in params
+        # Restricted fields are removed.
+        assert 'email' not in params
+        assert params['_searches'] == [
+            {'_facets': ['product']},
+            {'_facets': ['platform'], '_histogram.date': ['version'], '_results_number': 0},
+        ]
+        # The searches passed in are left untouched.
+        assert searches[0] == {'_facets': ['product', 'email']}
+
+        # Results are cached.
+        api.get_multi(searches, signature='=foo')
+        assert implementation.get_multi.call_count == 1
+        api.get_multi(searches, signature='=bar')
+        assert implementation.get_multi.call_count == 2
+
+    def test_get_multi_unredacted(self):
+        implementation = models.SuperSearchUnredacted.implementation()
+        implementation.get_multi.return_value = [{'hits': [], 'facets': {}, 'total': 0}]
+
+        api = models.SuperSearchUnredacted()
+        api.get_multi([{'_facets': ['email']}], email='me@example.com')
+
+        params = implementation.get_multi.call_args[1]
+        assert params['email'] == ['me@example.com']
+        assert params['_searches'] == [{'_facets': ['email']}]
@@ -10,6 +10,7 @@ import pyquery
 from six.moves.urllib.parse import quote
 
 from django.conf import settings
+from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.encoding import smart_text
 
@@ -342,6 +343,98 @@ class TestViews(BaseTestViews):
         assert '<script>' not in smart_text(response.content)
         assert '&lt;script&gt;' in smart_text(response.content)
 
+    def mock_search_export_total(self, total):
+        def mocked_supersearch_get(**params):
+            assert params['_results_number'] == 0
+            assert params['_facets_size'] == 0
+            return {'hits': [], 'facets': {}, 'total': total}
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+    def test_search_export(self):
+        def mocked_supersearch_iter_hits(**params):
+            assert '_columns' in params
+            assert '_results_number' not in params
+            assert 'WaterWolf' in params['product']
+
+            yield {'uuid': 'aaaaaaaaaaaaa1', 'signature': 'mySignatureIsCool'}
+            yield {'uuid': 'aaaaaaaaaaaaa2', 'signature': 'EMPTY'}
+
+        SuperSearchUnredacted.implementation().iter_hits.side_effect = (
+            mocked_supersearch_iter_hits
+        )
+        self.mock_search_export_total(2)
+
+        self._login()
+        url = reverse('supersearch:search_export')
+        response = self.client.get(url, {'product': 'WaterWolf'})
+        assert response.status_code == 200
+        assert response['content-type'] == 'application/x-ndjson; charset=UTF-8'
+
+        lines = smart_text(b''.join(response.streaming_content)).splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {'uuid': 'aaaaaaaaaaaaa1', 'signature': 'mySignatureIsCool'},
+            {'uuid': 'aaaaaaaaaaaaa2', 'signature': 'EMPTY'},
+        ]
+
+    def test_search_export_anonymous(self):
+        url = reverse('supersearch:search_export')
+        response = self.client.get(url, {'product': 'WaterWolf'})
+        assert response.status_code == 302
+        assert not SuperSearchUnredacted.implementation().get.called
+        assert not SuperSearchUnredacted.implementation().iter_hits.called
+
+    @override_settings(SEARCH_EXPORT_MAX_HITS=2)
+    def test_search_export_too_many_hits(self):
+        self.mock_search_export_total(3)
+
+        self._login()
+        url = reverse('supersearch:search_export')
+        response = self.client.get(url, {'product': 'WaterWolf'})
+        assert response.status_code == 400
+        assert 'matches 3 crash reports' in smart_text(response.content)
+        assert not SuperSearchUnredacted.implementation().iter_hits.called
+
+    @override_settings(SEARCH_EXPORT_MAX_HITS=2)
+    def test_search_export_capped(self):
+        def mocked_supersearch_iter_hits(**params):
+            # More crash reports were indexed since they were counted.
+            for i in range(3):
+                yield {'uuid': 'aaaaaaaaaaaaa%d' % i}
+
+        SuperSearchUnredacted.implementation().iter_hits.side_effect = (
+            mocked_supersearch_iter_hits
+        )
+        self.mock_search_export_total(2)
+
+        self._login()
+        url = reverse('supersearch:search_export')
+        response = self.client.get(url, {'product': 'WaterWolf'})
+        assert response.status_code == 200
+        lines = smart_text(b''.join(response.streaming_content)).splitlines()
+        assert len(lines) == 2
+
+    def test_search_export_badargumenterror(self):
+        def mocked_supersearch_iter_hits(**params):
+            raise BadArgumentError('<script>xss')
+            yield
+
+        SuperSearchUnredacted.implementation().iter_hits.side_effect = (
+            mocked_supersearch_iter_hits
+        )
+        self.mock_search_export_total(1)
+
+        self._login()
+        url = reverse('supersearch:search_export')
+        response = self.client.get(
+            url,
+            {'product': 'WaterWolf'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        assert response.status_code == 400
+        assert '<script>' not in smart_text(response.content)
+        assert '&lt;script&gt;' in smart_text(response.content)
+
     def test_search_results_admin_mode(self):
         """Test that an admin can see more fields, and that a non-admin cannot.
         """
@@ -4,6 +4,7 @@
 
 from collections import defaultdict
 import datetime
+import itertools
 import json
 import math
 
@@ -19,6 +20,7 @@ from ratelimit.decorators import ratelimit
 
 from crashstats.api.views import has_permissions
 from crashstats.crashstats import models, utils
+from crashstats.crashstats.decorators import login_required
 from crashstats.crashstats.utils import render_exception, urlencode_obj
 from crashstats.crashstats.views import pass_default_context
 from crashstats.supersearch import forms
@@ -278,6 +280,61 @@ def search_results(request):
     return render(request, 'supersearch/search_results.html', context)
 
 
+@login_required
+@ratelimit(
+    key='ip',
+    rate=utils.ratelimit_rate,
+    method=ratelimit.ALL,
+    block=True
+)
+def search_export(request):
+    """Stream all the hits of a search as newline-delimited JSON
+
+    This takes the same parameters as `search_results`, but returns every
+    matching hit rather than a page of them, one JSON document per line.
+    Searches matching more than `settings.SEARCH_EXPORT_MAX_HITS` crash
+    reports are refused.
+    """
+    try:
+        params = get_params(request)
+    except ValidationError as e:
+        # There was an error in the form, let's return it.
+        return http.HttpResponseBadRequest(str(e))
+
+    max_hits = settings.SEARCH_EXPORT_MAX_HITS
+    api = SuperSearchUnredacted()
+    try:
+        # Count the hits first, so a scroll over too many of them is never
+        # started. This also reports bad arguments with a proper status code.
+        total = api.get(**dict(params, _results_number=0, _facets_size=0))['total']
+        if total > max_hits:
+            return http.HttpResponseBadRequest(
+                'This search matches %d crash reports, more than the %d that can be '
+                'exported. Narrow it down, for example with a shorter date range.' % (
+                    total, max_hits
+                )
+            )
+
+        hits = api.iter_hits(**params)
+        # Pull the first hit before we start streaming so that bad arguments
+        # can still be reported with a proper status code.
+        first_hits = list(itertools.islice(hits, 1))
+    except BadArgumentError as exception:
+        return http.HttpResponseBadRequest(
+            render_exception(exception)
+        )
+
+    def generate_lines():
+        # Crash reports indexed after the count are left out.
+        for hit in itertools.islice(itertools.chain(first_hits, hits), max_hits):
+            yield json.dumps(hit, cls=utils.DateTimeEncoder) + '\n'
+
+    return http.StreamingHttpResponse(
+        generate_lines(),
+        content_type='application/x-ndjson; charset=UTF-8'
+    )
+
+
 @utils.json_view
 def search_fields(request):
     """Return JSON document describing fields used by JavaScript dynamic_form library"""
@@ -5,9 +5,12 @@
 import json
 from functools import partial
 
-from django.contrib import auth
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django import http
+from django.utils import timezone
 
 from crashstats.tokens import models
 
@@ -20,9 +23,40 @@ def json_forbidden_response(msg):
     )
 
 
-def has_perm(all, codename, obj=None):
+def has_perm(codenames, codename, obj=None):
     codename = codename.split('.', 1)[1]
-    return all.filter(codename=codename).count()
+    return codename in codenames
+
+
+def get_token_info(key):
+    """Return a dict with the user, expiration time and permission codenames
+    of the token with that key, or None if there's no such token.
+
+    This is cached for settings.API_TOKEN_CACHE_SECONDS so that API clients
+    making lots of calls don't cost database queries on each one of them.
+    Changes to tokens, their permissions and their users invalidate the
+    cache, see crashstats.tokens.models.
+    """
+    cache_key = models.get_token_cache_key(key)
+    info = cache.get(cache_key)
+    if info is None:
+        try:
+            token = models.Token.objects.select_related('user').get(key=key)
+        except models.Token.DoesNotExist:
+            return None
+        info = {
+            'user': token.user,
+            'expires': token.expires,
+            'permissions': frozenset(
+                token.permissions.values_list('codename', flat=True)
+            ),
+        }
+        # Using a token counts as logging in, see the auditgroups command.
+        # Updating the queryset rather than saving the user leaves the
+        # cached tokens alone.
+        User.objects.filter(pk=token.user.pk).update(last_login=timezone.now())
+        cache.set(cache_key, info, settings.API_TOKEN_CACHE_SECONDS)
+    return info
 
 
 class APIAuthenticationMiddleware(object):
@@ -49,25 +83,20 @@ class APIAuthenticationMiddleware(object):
         if not key:
             return
 
-        try:
-            token = models.Token.objects.select_related('user').get(key=key)
-            if token.is_expired:
-                return json_forbidden_response(
-                    'API Token found but expired'
-                )
-        except models.Token.DoesNotExist:
+        info = get_token_info(key)
+        if info is None:
             return json_forbidden_response('API Token not matched')
+        if info['expires'] < timezone.now():
+            return json_forbidden_response(
+                'API Token found but expired'
+            )
 
-        user = token.user
+        user = info['user']
 
         if not user.is_active:
             return json_forbidden_response('User of API token not active')
 
-        # it actually doesn't matter so much which backend
-        # we use as long as it's something
-        user.backend = 'django.contrib.auth.backends.ModelBackend'
-        user.has_perm = partial(has_perm, token.permissions.all())
-        # User is valid. Set request.user and persist user in the session
-        # by logging the user in.
+        user.has_perm = partial(has_perm, info['permissions'])
+        # User is valid. The token comes with every request, so there's no
+        # need to log the user in and write a session.
         request.user = user
-        auth.login(request, user)
@@ -3,10 +3,12 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import datetime
+import hashlib
 import uuid
 
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth.models import User, Permission, Group
 from django.utils import timezone
 from django.dispatch import receiver
@@ -45,6 +47,48 @@ class Token(models.Model):
         return self.expires < timezone.now()
 
 
+def get_token_cache_key(key):
+    """Return the cache key the API authentication middleware caches what it
+    knows about a token under"""
+    # Hash the key so it doesn't end up in the cache as is
+    return 'api_token:%s' % hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def invalidate_cached_tokens(keys):
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+@receiver(models.signals.post_save, sender=Token)
+@receiver(models.signals.post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_cached_tokens([instance.key])
+
+
+@receiver(models.signals.m2m_changed, sender=Token.permissions.through)
+def invalidate_cached_token_on_permissions_change(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_cached_tokens([instance.key])
+    elif kwargs.get('pk_set'):
+        # The tokens were added to or removed from a permission
+        invalidate_cached_tokens(
+            Token.objects.filter(id__in=kwargs['pk_set']).values_list('key', flat=True)
+        )
+
+
+@receiver(models.signals.post_save, sender=User)
+@receiver(models.signals.pre_delete, sender=User)
+def invalidate_cached_tokens_of_user(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) == {'last_login'}:
+        # Nothing the tokens depend on changed
+        return
+    invalidate_cached_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
 @receiver(models.signals.m2m_changed, sender=Group.permissions.through)
 def drop_permissions_on_group_change(sender, instance, action, **kwargs):
     if action == 'post_remove':
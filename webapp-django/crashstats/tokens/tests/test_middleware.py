@@ -119,3 +119,83 @@ class TestMiddleware(DjangoTestCase):
         assert response.status_code == 403
         result = json.loads(response.content)
         assert result['error'] == 'User of API token not active'
+
+    def test_token_cached(self):
+        user = User.objects.create(username='peterbe')
+        token = models.Token.objects.create(
+            user=user,
+        )
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        self.middleware.process_request(request)
+        assert User.objects.get(pk=user.pk).last_login
+
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        with self.assertNumQueries(0):
+            response = self.middleware.process_request(request)
+            assert response is None
+            assert request.user == user
+            assert not request.user.has_perm('crashstats.play')
+
+    def test_no_session_written(self):
+        user = User.objects.create(username='peterbe')
+        token = models.Token.objects.create(
+            user=user,
+        )
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        self.middleware.process_request(request)
+        assert not request.session.modified
+
+    def test_cache_invalidated_on_permission_change(self):
+        user = User.objects.create(username='peterbe')
+        token = models.Token.objects.create(
+            user=user,
+        )
+        ct, __ = ContentType.objects.get_or_create(
+            model='',
+            app_label='crashstats',
+        )
+        permission = Permission.objects.create(
+            codename='play',
+            content_type=ct
+        )
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        self.middleware.process_request(request)
+        assert not request.user.has_perm('crashstats.play')
+
+        token.permissions.add(permission)
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        self.middleware.process_request(request)
+        assert request.user.has_perm('crashstats.play')
+
+        permission.token_set.remove(token)
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        self.middleware.process_request(request)
+        assert not request.user.has_perm('crashstats.play')
+
+    def test_cache_invalidated_on_user_change(self):
+        user = User.objects.create(username='peterbe')
+        token = models.Token.objects.create(
+            user=user,
+        )
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        assert self.middleware.process_request(request) is None
+
+        user.is_active = False
+        user.save()
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        response = self.middleware.process_request(request)
+        assert response.status_code == 403
+
+    def test_cache_invalidated_on_token_change(self):
+        user = User.objects.create(username='peterbe')
+        token = models.Token.objects.create(
+            user=user,
+        )
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        assert self.middleware.process_request(request) is None
+
+        token.delete()
+        request = self._get_request(HTTP_AUTH_TOKEN=token.key)
+        response = self.middleware.process_request(request)
+        assert response.status_code == 403
+        assert json.loads(response.content)['error'] == 'API Token not matched'
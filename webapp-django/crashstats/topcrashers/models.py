@@ -1,3 +1,76 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.db import models
+
+
+class SignatureRollup(models.Model):
+    """Hourly crash counts for a signature
+
+    These are written by the topcrashers-rollup crontabber job and summed up
+    to build top crashers lists.
+
+    """
+    hour = models.DateTimeField(
+        help_text='start of the hour the crash reports were processed in'
+    )
+    product = models.TextField(help_text='the product')
+    version = models.TextField(help_text='the version')
+    process_type = models.TextField(
+        help_text='the process type, or "any" for all process types'
+    )
+    signature = models.TextField(help_text='the crash report signature')
+    count = models.IntegerField(help_text='number of crash reports')
+    platform_counts = models.TextField(
+        default='{}',
+        help_text='JSON object mapping platform names to numbers of crash reports'
+    )
+    gc_count = models.IntegerField(
+        default=0,
+        help_text='number of crash reports during garbage collection'
+    )
+    hang_count = models.IntegerField(default=0, help_text='number of hangs')
+    plugin_count = models.IntegerField(
+        default=0,
+        help_text='number of crash reports with a plugin process type'
+    )
+    startup_count = models.IntegerField(
+        default=0,
+        help_text='number of crash reports flagged as startup crashes'
+    )
+    startup_window_count = models.IntegerField(
+        default=0,
+        help_text='number of crash reports with an uptime under 60 seconds'
+    )
+    install_count = models.IntegerField(
+        default=0,
+        help_text=(
+            'number of distinct install times; summing hours overestimates '
+            'installs that crashed in several hours'
+        )
+    )
+
+    class Meta:
+        unique_together = ('product', 'process_type', 'version', 'hour', 'signature')
+
+
+class TotalRollup(models.Model):
+    """Hourly crash counts for all signatures
+
+    These are written by the topcrashers-rollup crontabber job along with
+    SignatureRollup.
+
+    """
+    hour = models.DateTimeField(
+        help_text='start of the hour the crash reports were processed in'
+    )
+    product = models.TextField(help_text='the product')
+    version = models.TextField(help_text='the version')
+    process_type = models.TextField(
+        help_text='the process type, or "any" for all process types'
+    )
+    count = models.IntegerField(help_text='number of crash reports')
+
+    class Meta:
+        unique_together = ('product', 'process_type', 'version', 'hour')
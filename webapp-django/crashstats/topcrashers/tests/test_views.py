@@ -7,6 +7,7 @@ import datetime
 import freezegun
 import pyquery
 
+from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.encoding import smart_text
 from django.utils.timezone import utc
@@ -14,6 +15,7 @@ from django.utils.timezone import utc
 from crashstats.crashstats.models import Signature, BugAssociation
 from crashstats.crashstats.tests.test_views import BaseTestViews
 from crashstats.supersearch.models import SuperSearchUnredacted
+from crashstats.topcrashers.models import SignatureRollup, TotalRollup
 
 
 class TestTopCrasherViews(BaseTestViews):
@@ -352,3 +354,173 @@ class TestTopCrasherViews(BaseTestViews):
             '_range_type': 'build',
         })
         assert response.status_code == 200
+
+    def create_rollups(self, now):
+        """Create rollups covering the last two weeks."""
+        end = now.replace(minute=0, second=0, microsecond=0)
+        previous_week = end - datetime.timedelta(days=14)
+        this_week = end - datetime.timedelta(days=7)
+        counts = {previous_week: 250, end - datetime.timedelta(hours=1): 250}
+        TotalRollup.objects.bulk_create([
+            TotalRollup(
+                hour=previous_week + datetime.timedelta(hours=hours),
+                product='WaterWolf', version='19.0', process_type='browser',
+                count=counts.get(previous_week + datetime.timedelta(hours=hours), 0),
+            )
+            for hours in range(14 * 24)
+        ])
+
+        # Last week, mozCool() was first.
+        SignatureRollup.objects.create(
+            hour=previous_week, product='WaterWolf', version='19.0', process_type='browser',
+            signature='mozCool()', count=100, platform_counts='{"Windows NT": 100}',
+        )
+        SignatureRollup.objects.create(
+            hour=previous_week, product='WaterWolf', version='19.0', process_type='browser',
+            signature='FakeSignature1', count=50, platform_counts='{"Windows NT": 50}',
+        )
+
+        # This week, FakeSignature1 is first, split in several hours.
+        for hour in (this_week, end - datetime.timedelta(hours=1)):
+            SignatureRollup.objects.create(
+                hour=hour, product='WaterWolf', version='19.0', process_type='browser',
+                signature='FakeSignature1', count=50,
+                platform_counts='{"Windows NT": 30, "Linux": 20}',
+                startup_count=50,
+            )
+        SignatureRollup.objects.create(
+            hour=this_week, product='WaterWolf', version='19.0', process_type='browser',
+            signature='mozCool()', count=80, platform_counts='{"Mac OS X": 80}',
+            startup_count=50,
+        )
+        # Other process types, versions and hours are ignored.
+        SignatureRollup.objects.create(
+            hour=this_week, product='WaterWolf', version='19.0', process_type='any',
+            signature='AnySignature', count=1000,
+        )
+        SignatureRollup.objects.create(
+            hour=this_week, product='WaterWolf', version='18.0', process_type='browser',
+            signature='OldSignature', count=1000,
+        )
+        SignatureRollup.objects.create(
+            hour=end, product='WaterWolf', version='19.0', process_type='browser',
+            signature='FutureSignature', count=1000,
+        )
+
+    @override_settings(TOPCRASHERS_USE_ROLLUPS=True)
+    def test_topcrashers_from_rollups(self):
+        calls = []
+
+        def mocked_supersearch_get(**params):
+            calls.append(params)
+            return {
+                'hits': [],
+                'facets': {
+                    'signature': [
+                        {
+                            'term': 'FakeSignature1',
+                            'count': 100,
+                            'facets': {'cardinality_install_time': {'value': 42}},
+                        },
+                    ],
+                },
+                'total': 100,
+            }
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+        now = datetime.datetime.utcnow().replace(tzinfo=utc)
+        self.create_rollups(now)
+
+        with freezegun.freeze_time(now, tz_offset=0):
+            response = self.client.get(self.base_url, {
+                'product': 'WaterWolf',
+                'version': '19.0',
+                'process_type': 'browser',
+            })
+        assert response.status_code == 200
+
+        # Super Search is only used for the installs of the top signatures,
+        # which cannot be summed from rollups.
+        assert len(calls) == 1
+        assert sorted(calls[0]['signature']) == ['=FakeSignature1', '=mozCool()']
+        assert calls[0]['_aggs.signature'] == ['_cardinality.install_time']
+
+        doc = pyquery.PyQuery(response.content)
+        signatures = [x.text.strip() for x in doc('td.signature-column a.signature')]
+        assert signatures == ['FakeSignature1', 'mozCool()']
+        installs = [row('td').eq(8).text() for row in doc('#signature-list tbody tr').items()]
+        assert installs == ['42', '0']
+
+        content = smart_text(response.content)
+        assert 'AnySignature' not in content
+        assert 'OldSignature' not in content
+        assert 'FutureSignature' not in content
+        assert 'Startup Crash, all crashes happened during startup' in content
+        assert 'Potential Startup Crash, 50 out of 80 crashes happened during startup' in content
+
+    @override_settings(TOPCRASHERS_USE_ROLLUPS=True)
+    def test_topcrashers_rollups_not_covering_dates(self):
+        def mocked_supersearch_get(**params):
+            return {
+                'hits': [],
+                'facets': {
+                    'signature': []
+                },
+                'total': 0
+            }
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+        now = datetime.datetime.utcnow().replace(tzinfo=utc)
+        self.create_rollups(now)
+
+        # Rollups do not go back 28 days, so Super Search is used.
+        response = self.client.get(self.base_url, {
+            'product': 'WaterWolf',
+            'version': '19.0',
+            'days': '14',
+        })
+        assert response.status_code == 200
+        assert SuperSearchUnredacted.implementation().get.called
+
+    @override_settings(TOPCRASHERS_USE_ROLLUPS=True)
+    def test_topcrashers_rollups_missing_hour(self):
+        calls = []
+
+        def mocked_supersearch_get(**params):
+            calls.append(params)
+            return {
+                'hits': [],
+                'facets': {
+                    'signature': []
+                },
+                'total': 0
+            }
+
+        SuperSearchUnredacted.implementation().get.side_effect = mocked_supersearch_get
+
+        now = datetime.datetime.utcnow().replace(tzinfo=utc)
+        self.create_rollups(now)
+        end = now.replace(minute=0, second=0, microsecond=0)
+        TotalRollup.objects.filter(hour=end - datetime.timedelta(days=3)).delete()
+        # Rollups of other products and process types don't make up for it.
+        TotalRollup.objects.create(
+            hour=end - datetime.timedelta(days=3), product='NightTrain', version='1.0',
+            process_type='browser', count=10,
+        )
+        TotalRollup.objects.create(
+            hour=end - datetime.timedelta(days=3), product='WaterWolf', version='19.0',
+            process_type='any', count=10,
+        )
+
+        with freezegun.freeze_time(now, tz_offset=0):
+            response = self.client.get(self.base_url, {
+                'product': 'WaterWolf',
+                'version': '19.0',
+                'process_type': 'browser',
+            })
+        assert response.status_code == 200
+        # The whole top crashers list comes from Super Search.
+        assert '_aggs.signature' in calls[0]
+        assert 'platform' in calls[0]['_aggs.signature']
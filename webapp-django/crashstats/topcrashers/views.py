@@ -4,9 +4,11 @@
 
 import datetime
 from collections import defaultdict
+import json
 
 from django import http
 from django.conf import settings
+from django.db.models import Sum
 from django.shortcuts import redirect, render
 from django.utils import timezone
 from django.utils.http import urlquote
@@ -23,6 +25,7 @@ from crashstats.crashstats.utils import get_comparison_signatures, SignatureStat
 from crashstats.supersearch.models import SuperSearchUnredacted
 from crashstats.supersearch.utils import get_date_boundaries
 from crashstats.topcrashers.forms import TopCrashersForm
+from crashstats.topcrashers.models import SignatureRollup, TotalRollup
 
 
 def datetime_to_build_id(date):
@@ -30,12 +33,155 @@ def datetime_to_build_id(date):
     return date.strftime('%Y%m%d%H%M%S')
 
 
-def get_topcrashers_stats(**kwargs):
-    """Return the results of a search. """
-    params = kwargs
-    range_type = params.pop('_range_type')
-    dates = get_date_boundaries(params)
+def floor_to_hour(date):
+    return date.replace(minute=0, second=0, microsecond=0)
+
+
+def get_rollup_results(product, versions, process_type, start_date, end_date, facets_size):
+    """Return top crashers results computed from rollups, in the same format
+    as Super Search results."""
+    filters = {
+        'product': product,
+        'process_type': process_type,
+        'hour__gte': start_date,
+        'hour__lt': end_date,
+    }
+    if versions:
+        filters['version__in'] = versions
+
+    total = TotalRollup.objects.filter(**filters).aggregate(total=Sum('count'))['total']
+
+    rows = list(
+        SignatureRollup.objects.filter(**filters)
+        .values('signature')
+        .annotate(
+            count=Sum('count'),
+            gc_count=Sum('gc_count'),
+            hang_count=Sum('hang_count'),
+            plugin_count=Sum('plugin_count'),
+            startup_count=Sum('startup_count'),
+            startup_window_count=Sum('startup_window_count'),
+        )
+        .order_by('-count', 'signature')[:facets_size]
+    )
+
+    # Platform counts are stored as JSON so they get summed here.
+    platform_counts = defaultdict(lambda: defaultdict(int))
+    if rows:
+        qs = (
+            SignatureRollup.objects
+            .filter(signature__in=[row['signature'] for row in rows], **filters)
+            .values_list('signature', 'platform_counts')
+        )
+        for signature, counts in qs:
+            for platform, count in json.loads(counts).items():
+                platform_counts[signature][platform] += count
+
+    # Rebuild the facets SignatureStats expects from Super Search.
+    signatures = []
+    for row in rows:
+        signatures.append({
+            'term': row['signature'],
+            'count': row['count'],
+            'facets': {
+                'platform': [
+                    {'term': platform, 'count': count}
+                    for platform, count in platform_counts[row['signature']].items()
+                ],
+                'is_garbage_collecting': [{'term': 't', 'count': row['gc_count']}],
+                'hang_type': [{'term': 1, 'count': row['hang_count']}],
+                'process_type': [{'term': 'plugin', 'count': row['plugin_count']}],
+                'startup_crash': [{'term': 'T', 'count': row['startup_count']}],
+                'histogram_uptime': [{'term': 0, 'count': row['startup_window_count']}],
+            },
+        })
+
+    return {
+        'total': total or 0,
+        'facets': {'signature': signatures},
+    }
+
+
+def get_install_counts(params, signatures, start_date, end_date):
+    """Return the number of distinct install times of each signature.
+
+    Distinct counts of different hours cannot be added up, so they are not
+    taken from rollups but from Super Search, for the given signatures only.
+    """
+    if not signatures:
+        return {}
+
+    install_params = {
+        key: params[key] for key in ('product', 'version', 'process_type') if params.get(key)
+    }
+    install_params.update({
+        'date': ['>=' + start_date.isoformat(), '<' + end_date.isoformat()],
+        'signature': ['=' + signature for signature in signatures],
+        '_aggs.signature': ['_cardinality.install_time'],
+        '_facets': ['signature'],
+        '_facets_size': len(signatures),
+        '_results_number': 0,
+    })
+    results = SuperSearchUnredacted().get(**install_params)
+    return {
+        row['term']: row['facets']['cardinality_install_time']['value']
+        for row in results['facets'].get('signature', [])
+    }
+
+
+def get_topcrashers_stats_from_rollups(params, dates):
+    """Return the top crashers stats computed from rollups, or None if the
+    rollups do not cover the requested dates."""
+    # Rollups are hourly, so the date range is aligned on hours.
+    start_date = floor_to_hour(dates[0])
+    end_date = floor_to_hour(dates[1])
+    previous_start_date = start_date - (end_date - start_date)
+    process_type = params.get('process_type') or 'any'
+
+    # Every hour that was rolled up has total rollups for the product, so
+    # any missing hour means crash reports would be left out.
+    rolled_up_hours = (
+        TotalRollup.objects
+        .filter(
+            product=params['product'],
+            process_type=process_type,
+            hour__gte=previous_start_date,
+            hour__lt=end_date,
+        )
+        .values('hour')
+        .distinct()
+        .count()
+    )
+    if rolled_up_hours < (end_date - previous_start_date) // datetime.timedelta(hours=1):
+        return None
+
+    versions = params.get('version') or []
+    if isinstance(versions, text_type):
+        versions = [versions]
 
+    search_results = get_rollup_results(
+        params['product'], versions, process_type, start_date, end_date,
+        int(params['_facets_size']),
+    )
+    previous_range_results = get_rollup_results(
+        params['product'], versions, process_type, previous_start_date, start_date,
+        int(params['_facets_size']) * 2,
+    )
+
+    signatures = search_results['facets']['signature']
+    install_counts = get_install_counts(
+        params, [signature['term'] for signature in signatures], start_date, end_date
+    )
+    for signature in signatures:
+        signature['facets']['cardinality_install_time'] = {
+            'value': install_counts.get(signature['term'], 0)
+        }
+    return search_results, previous_range_results
+
+
+def get_search_results(params, range_type, dates):
+    """Return the Super Search results for the requested date range and for
+    the previous one, or None for the latter if there are no results."""
     params['_aggs.signature'] = [
         'platform',
         'is_garbage_collecting',
@@ -50,9 +196,6 @@ def get_topcrashers_stats(**kwargs):
     # We don't care about no results, only facets.
     params['_results_number'] = 0
 
-    if params.get('process_type') in ('any', 'all'):
-        params['process_type'] = None
-
     if range_type == 'build':
         params['build_id'] = [
             '>=' + datetime_to_build_id(dates[0]),
@@ -62,7 +205,7 @@ def get_topcrashers_stats(**kwargs):
     api = SuperSearchUnredacted()
     search_results = api.get(**params)
 
-    signatures_stats = []
+    previous_range_results = None
     if search_results['total'] > 0:
         # Run the same query but for the previous date range, so we can
         # compare the rankings and show rank changes.
@@ -84,6 +227,38 @@ def get_topcrashers_stats(**kwargs):
             ]
 
         previous_range_results = api.get(**params)
+
+    return search_results, previous_range_results
+
+
+def get_topcrashers_stats(**kwargs):
+    """Return the results of a search. """
+    params = kwargs
+    range_type = params.pop('_range_type')
+    dates = get_date_boundaries(params)
+
+    if params.get('process_type') in ('any', 'all'):
+        params['process_type'] = None
+
+    rollup_results = None
+    if (
+        settings.TOPCRASHERS_USE_ROLLUPS and
+        range_type == 'report' and
+        not params.get('platform')
+    ):
+        # Rollups are per product, version and process type, they cannot be
+        # used to filter on anything else.
+        rollup_results = get_topcrashers_stats_from_rollups(params, dates)
+
+    if rollup_results is not None:
+        search_results, previous_range_results = rollup_results
+    else:
+        search_results, previous_range_results = get_search_results(
+            params, range_type, dates
+        )
+
+    signatures_stats = []
+    if search_results['total'] > 0:
         previous_signatures = get_comparison_signatures(previous_range_results)
 
         for index, signature in enumerate(search_results['facets']['signature']):